@@ -1,16 +1,32 @@
+from collections.abc import Sequence
 from datetime import datetime
-from typing import Any
+from typing import Any, NamedTuple
 
 from django.db.models import Expression, F
+from django.db.models.signals import post_save
 
 from sentry.db import models
+from sentry.db.models.query import bulk_increment
 from sentry.signals import buffer_incr_complete
 from sentry.tasks.process_buffer import process_incr
+from sentry.utils import metrics
 from sentry.utils.services import Service
 
 BufferField = models.Model | str | int
 
 
+class BufferIncr(NamedTuple):
+    """
+    The arguments of a single `Buffer.process` call.
+    """
+
+    model: type[models.Model]
+    columns: dict[str, int]
+    filters: dict[str, Any]
+    extra: dict[str, Any] | None = None
+    signal_only: bool | None = None
+
+
 class Buffer(Service):
     """
     Buffers act as temporary stores for counters. The default implementation is just a passthru and
@@ -28,8 +44,11 @@ class Buffer(Service):
     __all__ = (
         "get",
         "incr",
+        "flush_incrs",
         "process",
+        "process_many",
         "process_pending",
+        "process_pending_shard",
         "process_batch",
         "validate",
         "push_to_sorted_set",
@@ -132,9 +151,22 @@ class Buffer(Service):
             headers={"sentry-propagate-traces": False},
         )
 
+    def flush_incrs(self) -> None:
+        """
+        Write out any increments this process holds back. Buffers which don't hold back any
+        increments don't need to do anything here.
+        """
+        return
+
     def process_pending(self) -> None:
         return
 
+    def process_pending_shard(self, shard: int) -> None:
+        """
+        Process the pending buffers of one shard.
+        """
+        return
+
     def process_batch(self) -> None:
         return
 
@@ -188,3 +220,73 @@ class Buffer(Service):
             created=created,
             sender=model,
         )
+
+    def process_many(self, incrs: Sequence[BufferIncr]) -> None:
+        """
+        Same as calling `process` for each of `incrs`, but with a bounded number of queries.
+
+        Increments of rows selected by primary key are written with one multi-row `UPDATE`
+        statement per model and set of updated columns, after which `buffer_incr_complete` is sent
+        for all of them. Increments which can't be written that way (signal-only ones, ones with
+        other filters, and ones for rows which don't exist and may have to be created) fall back to
+        `process`.
+        """
+        from sentry.models.group import Group
+
+        # Subclasses like `RedisBuffer` override `process` with a different signature
+        process = Buffer.process
+
+        bulk: dict[tuple[Any, ...], list[BufferIncr]] = {}
+        bulk_pks: set[tuple[type[models.Model], Any]] = set()
+        for incr in incrs:
+            if (
+                incr.signal_only
+                or not (incr.columns or incr.extra)
+                or len(incr.filters) != 1
+                or not ({"id", "pk"} & incr.filters.keys())
+            ):
+                process(self, *incr)
+                continue
+
+            # A single statement can only update each row once
+            pk = next(iter(incr.filters.values()))
+            if (incr.model, pk) in bulk_pks:
+                process(self, *incr)
+                continue
+            bulk_pks.add((incr.model, pk))
+
+            bulk_key = (incr.model, tuple(sorted(incr.columns)), tuple(sorted(incr.extra or {})))
+            bulk.setdefault(bulk_key, []).append(incr)
+
+        for (model, column_names, extra_names), model_incrs in bulk.items():
+            rows = [
+                (next(iter(incr.filters.values())), incr.columns, incr.extra or {})
+                for incr in model_incrs
+            ]
+            with metrics.timer(
+                "buffer.process_many.bulk_increment", tags={"model": model.__name__}
+            ):
+                updated = bulk_increment(model, rows)
+
+            if model is Group and updated:
+                # Same as `Group.update` in `process`, which keeps the group cache in sync
+                for group in Group.objects.filter(id__in=updated):
+                    post_save.send_robust(
+                        sender=Group,
+                        instance=group,
+                        created=False,
+                        update_fields=[*column_names, *extra_names],
+                    )
+
+            for incr in model_incrs:
+                if next(iter(incr.filters.values())) not in updated:
+                    process(self, *incr)
+                    continue
+                buffer_incr_complete.send_robust(
+                    model=incr.model,
+                    columns=incr.columns,
+                    filters=incr.filters,
+                    extra=incr.extra,
+                    created=False,
+                    sender=incr.model,
+                )
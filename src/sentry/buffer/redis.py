@@ -1,7 +1,11 @@
 from __future__ import annotations
 
 import logging
+import multiprocessing.util
+import os
 import pickle
+import threading
+import weakref
 from collections.abc import Callable
 from dataclasses import dataclass
 from datetime import date, datetime, timezone
@@ -10,12 +14,14 @@ from time import time
 from typing import Any, TypeVar
 
 import rb
+from celery.signals import task_postrun
 from django.utils.encoding import force_bytes, force_str
 from rediscluster import RedisCluster
 
-from sentry.buffer.base import Buffer, BufferField
+from sentry import options
+from sentry.buffer.base import Buffer, BufferField, BufferIncr
 from sentry.db import models
-from sentry.tasks.process_buffer import process_incr
+from sentry.tasks.process_buffer import process_incr, process_pending_shard
 from sentry.utils import json, metrics
 from sentry.utils.hashlib import md5_text
 from sentry.utils.imports import import_string
@@ -221,9 +227,52 @@ class PendingBuffer:
         return rv
 
 
+@dataclass
+class CoalescedIncr:
+    """
+    Increments for a single buffer key which have not been written to Redis yet.
+    """
+
+    model: type[models.Model]
+    filters: dict[str, BufferField]
+    columns: dict[str, int]
+    extra: dict[str, Any]
+    signal_only: bool | None
+    count: int = 1
+
+    def merge(
+        self, columns: dict[str, int], extra: dict[str, Any] | None, signal_only: bool | None
+    ) -> None:
+        for column, amount in columns.items():
+            self.columns[column] = self.columns.get(column, 0) + amount
+        if extra:
+            # Last write wins, same as in Redis
+            self.extra.update(extra)
+        # Once set, the signal_only flag sticks to the Redis key until it is processed
+        self.signal_only = self.signal_only or signal_only
+        self.count += 1
+
+
+# Buffers which may hold coalesced increments in this process
+_coalescing_buffers: weakref.WeakSet[RedisBuffer] = weakref.WeakSet()
+
+
+def _reset_coalesced_incrs_after_fork() -> None:
+    # The parent still owns the increments coalesced before the fork, and the timer thread flushing
+    # them does not exist in the child.
+    for buf in _coalescing_buffers:
+        buf._reset_coalesced_incrs()
+
+
+os.register_at_fork(after_in_child=_reset_coalesced_incrs_after_fork)
+
+
 class RedisBuffer(Buffer):
     key_expire = 60 * 60  # 1 hour
     pending_key = "b:p"
+    # Upper bound for `buffer.redis.process-pending.shards`, so that shards which are not in use
+    # anymore can be found and drained
+    max_pending_shards = 64
 
     def __init__(self, incr_batch_size: int = 2, **options: object):
         self.is_redis_cluster, self.cluster, options = get_dynamic_cluster_from_options(
@@ -232,6 +281,12 @@ class RedisBuffer(Buffer):
         self.incr_batch_size = incr_batch_size
         assert self.incr_batch_size > 0
 
+        self._reset_coalesced_incrs()
+        _coalescing_buffers.add(self)
+        # A task is a batch boundary: increments coalesced while running it are written before the
+        # worker reports it as done.
+        task_postrun.connect(self._flush_incrs_after_task)
+
     def validate(self) -> None:
         validate_dynamic_cluster(self.is_redis_cluster, self.cluster)
 
@@ -342,8 +397,14 @@ class RedisBuffer(Buffer):
             pipe.hget(key, f"i+{col}")
         results = pipe.execute()
 
+        # Include increments which have been coalesced, but not written yet
+        with self._coalesce_lock:
+            coalesced = self._coalesced_incrs.get(key)
+            pending = dict(coalesced.columns) if coalesced is not None else {}
+
         return {
-            col: (int(results[i]) if results[i] is not None else 0) for i, col in enumerate(columns)
+            col: (int(results[i]) if results[i] is not None else 0) + pending.get(col, 0)
+            for i, col in enumerate(columns)
         }
 
     def get_redis_connection(self, key: str, transaction: bool = True) -> Pipeline:
@@ -463,8 +524,121 @@ class RedisBuffer(Buffer):
             - Perform a set (last write wins) on extra
             - Perform a set on signal_only (only if True)
         - Add hashmap key to pending flushes
+
+        If `buffer.redis.coalesce-incr.max-events` is set, increments are first aggregated
+        in-process per key and written to Redis by `flush_incrs`.
         """
         key = self._make_key(model, filters)
+
+        max_events = options.get("buffer.redis.coalesce-incr.max-events")
+        if max_events > 0:
+            self._coalesce_incr(key, model, columns, filters, extra, signal_only, max_events)
+        else:
+            self._write_incr(key, model, columns, filters, extra, signal_only)
+
+        metrics.incr(
+            "buffer.incr",
+            skip_internal=True,
+            tags={"module": model.__module__, "model": model.__name__},
+        )
+
+    def _coalesce_incr(
+        self,
+        key: str,
+        model: type[models.Model],
+        columns: dict[str, int],
+        filters: dict[str, BufferField],
+        extra: dict[str, Any] | None,
+        signal_only: bool | None,
+        max_events: int,
+    ) -> None:
+        with self._coalesce_lock:
+            coalesced = self._coalesced_incrs.get(key)
+            if coalesced is None:
+                self._coalesced_incrs[key] = CoalescedIncr(
+                    model=model,
+                    filters=filters,
+                    columns=dict(columns),
+                    extra=dict(extra or {}),
+                    signal_only=signal_only,
+                )
+            else:
+                coalesced.merge(columns, extra, signal_only)
+            self._coalesced_count += 1
+
+            should_flush = self._coalesced_count >= max_events
+            if not should_flush and self._coalesce_timer is None:
+                # Bound how long increments can sit in memory if traffic stops
+                self._coalesce_timer = threading.Timer(
+                    options.get("buffer.redis.coalesce-incr.max-delay"), self._flush_incrs_safe
+                )
+                self._coalesce_timer.daemon = True
+                self._coalesce_timer.start()
+
+            if not self._coalesce_exit_registered:
+                # Unlike atexit handlers, finalizers also run when multiprocessing workers exit.
+                # They are registered per process, since forked workers start without any.
+                multiprocessing.util.Finalize(None, self._flush_incrs_safe, exitpriority=0)
+                self._coalesce_exit_registered = True
+
+        if should_flush:
+            self.flush_incrs()
+
+    def _reset_coalesced_incrs(self) -> None:
+        self._coalesced_incrs: dict[str, CoalescedIncr] = {}
+        self._coalesced_count = 0
+        self._coalesce_lock = threading.Lock()
+        self._coalesce_timer: threading.Timer | None = None
+        self._coalesce_exit_registered = False
+
+    def _flush_incrs_after_task(self, **kwargs: Any) -> None:
+        self._flush_incrs_safe()
+
+    def _flush_incrs_safe(self) -> None:
+        try:
+            self.flush_incrs()
+        except Exception:
+            logger.exception("buffer.incr.coalesce.flush_failed")
+
+    def flush_incrs(self) -> None:
+        """
+        Write all increments coalesced in this process to Redis.
+        """
+        with self._coalesce_lock:
+            coalesced_incrs, self._coalesced_incrs = self._coalesced_incrs, {}
+            coalesced_count, self._coalesced_count = self._coalesced_count, 0
+            timer, self._coalesce_timer = self._coalesce_timer, None
+
+        if timer is not None:
+            timer.cancel()
+
+        if not coalesced_incrs:
+            return
+
+        with metrics.timer("buffer.incr.coalesce.flush"):
+            for key, coalesced in coalesced_incrs.items():
+                self._write_incr(
+                    key,
+                    coalesced.model,
+                    coalesced.columns,
+                    coalesced.filters,
+                    coalesced.extra,
+                    coalesced.signal_only,
+                )
+
+        metrics.incr("buffer.incr.coalesce.calls", amount=coalesced_count)
+        metrics.incr("buffer.incr.coalesce.writes", amount=len(coalesced_incrs))
+        metrics.distribution("buffer.incr.coalesce.ratio", coalesced_count / len(coalesced_incrs))
+
+    def _write_incr(
+        self,
+        key: str,
+        model: type[models.Model],
+        columns: dict[str, int],
+        filters: dict[str, BufferField],
+        extra: dict[str, Any] | None,
+        signal_only: bool | None,
+    ) -> None:
         # We can't use conn.map() due to wanting to support multiple pending
         # keys (one per Redis partition)
         pipe = self.get_redis_connection(key)
@@ -494,14 +668,24 @@ class RedisBuffer(Buffer):
             pipe.hset(key, "s", "1")
 
         pipe.expire(key, self.key_expire)
-        pipe.zadd(self.pending_key, {key: time()})
+        pipe.zadd(self._get_pending_key(key), {key: time()})
         pipe.execute()
 
-        metrics.incr(
-            "buffer.incr",
-            skip_internal=True,
-            tags={"module": model.__module__, "model": model.__name__},
-        )
+    def _get_num_pending_shards(self) -> int:
+        return min(options.get("buffer.redis.process-pending.shards"), self.max_pending_shards)
+
+    def _get_pending_key(self, key: str) -> str:
+        """
+        Returns the sorted set of pending keys that `key` is added to: the one of its shard if
+        pending keys are sharded, the unsharded one otherwise.
+        """
+        num_shards = self._get_num_pending_shards()
+        if num_shards > 0:
+            return self._make_pending_shard_key(self._get_key_shard(key, num_shards))
+        return self.pending_key
+
+    def _make_pending_shard_key(self, shard: int) -> str:
+        return f"{self.pending_key}:{shard}"
 
     def process_pending(self) -> None:
         client = get_cluster_routing_client(self.cluster, self.is_redis_cluster)
@@ -536,6 +720,9 @@ class RedisBuffer(Buffer):
             return process_incr_kwargs
 
         try:
+            self._schedule_pending_shards()
+
+            # Keys written before pending keys were sharded are still drained here
             keycount = 0
             if is_instance_redis_cluster(self.cluster, self.is_redis_cluster):
                 keys: list[str] = self.cluster.zrange(self.pending_key, 0, -1)
@@ -637,39 +824,199 @@ class RedisBuffer(Buffer):
             pipe.delete(key)
             values = pipe.execute()[0]
 
-            # XXX(python3): In python2 this isn't as important since redis will
-            # return string tyes (be it, byte strings), but in py3 we get bytes
-            # back, and really we just want to deal with keys as strings.
-            values = {force_str(k): v for k, v in values.items()}
-
             if not values:
                 metrics.incr("buffer.revoked", tags={"reason": "empty"}, skip_internal=False)
                 logger.debug("buffer.revoked.empty", extra={"redis_key": key})
                 return
 
-            model = import_string(force_str(values.pop("m")))
-
-            if values["f"].startswith(b"{" if not self.is_redis_cluster else "{"):
-                filters = self._load_values(json.loads(force_str(values.pop("f"))))
-            else:
-                # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
-                filters = pickle.loads(force_bytes(values.pop("f")))
-
-            incr_values = {}
-            extra_values = {}
-            signal_only = None
-            for k, v in values.items():
-                if k.startswith("i+"):
-                    incr_values[k[2:]] = int(v)
-                elif k.startswith("e+"):
-                    if v.startswith(b"[" if not self.is_redis_cluster else "["):
-                        extra_values[k[2:]] = self._load_value(json.loads(force_str(v)))
-                    else:
-                        # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
-                        extra_values[k[2:]] = pickle.loads(force_bytes(v))
-                elif k == "s":
-                    signal_only = bool(int(v))  # Should be 1 if set
-
-            self._base_process(model, incr_values, filters, extra_values, signal_only)
+            self._base_process(*self._load_incr(values))
         finally:
             client.delete(lock_key)
+
+    def _load_incr(self, values: dict[Any, Any]) -> BufferIncr:
+        """
+        Decodes the hash written by `incr` into the arguments for `process`.
+        """
+        # XXX(python3): In python2 this isn't as important since redis will
+        # return string tyes (be it, byte strings), but in py3 we get bytes
+        # back, and really we just want to deal with keys as strings.
+        values = {force_str(k): v for k, v in values.items()}
+
+        model = import_string(force_str(values.pop("m")))
+
+        if values["f"].startswith(b"{" if not self.is_redis_cluster else "{"):
+            filters = self._load_values(json.loads(force_str(values.pop("f"))))
+        else:
+            # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
+            filters = pickle.loads(force_bytes(values.pop("f")))
+
+        incr_values = {}
+        extra_values = {}
+        signal_only = None
+        for k, v in values.items():
+            if k.startswith("i+"):
+                incr_values[k[2:]] = int(v)
+            elif k.startswith("e+"):
+                if v.startswith(b"[" if not self.is_redis_cluster else "["):
+                    extra_values[k[2:]] = self._load_value(json.loads(force_str(v)))
+                else:
+                    # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
+                    extra_values[k[2:]] = pickle.loads(force_bytes(v))
+            elif k == "s":
+                signal_only = bool(int(v))  # Should be 1 if set
+
+        return BufferIncr(model, incr_values, filters, extra_values, signal_only)
+
+    @staticmethod
+    def _get_key_shard(key: str, num_shards: int) -> int:
+        return int(md5_text(key).hexdigest()[:8], 16) % num_shards
+
+    def _schedule_pending_shards(self) -> None:
+        """
+        Schedules a `process_pending_shard` task for every shard in use, as well as for shards
+        which still hold keys after the number of shards was lowered.
+        """
+        num_shards = self._get_num_pending_shards()
+        shards = list(range(num_shards))
+
+        stale_shards = range(num_shards, self.max_pending_shards)
+        if is_instance_redis_cluster(self.cluster, self.is_redis_cluster):
+            pipe = self.cluster.pipeline(transaction=False)
+            for shard in stale_shards:
+                pipe.zcard(self._make_pending_shard_key(shard))
+            sizes = pipe.execute()
+        elif is_instance_rb_cluster(self.cluster, self.is_redis_cluster):
+            with self.cluster.all() as conn:
+                results = [
+                    conn.zcard(self._make_pending_shard_key(shard)) for shard in stale_shards
+                ]
+            sizes = [sum(result.value.values()) for result in results]
+        else:
+            raise AssertionError("unreachable")
+
+        shards.extend(shard for shard, size in zip(stale_shards, sizes) if size)
+
+        for shard in shards:
+            process_pending_shard.apply_async(
+                kwargs={"shard": shard}, headers={"sentry-propagate-traces": False}
+            )
+
+    def process_pending_shard(self, shard: int) -> None:
+        """
+        Drains the pending keys of `shard`, applying them in batches of
+        `buffer.redis.process-pending.batch-size` instead of scheduling one `process_incr` per key.
+        """
+        batch_size = options.get("buffer.redis.process-pending.batch-size")
+        pending_key = self._make_pending_shard_key(shard)
+        tags = {"shard": str(shard)}
+        start = time()
+
+        pending: list[tuple[Any, list[str]]] = []
+        if is_instance_redis_cluster(self.cluster, self.is_redis_cluster):
+            pending.append((self.cluster, self.cluster.zrange(pending_key, 0, -1)))
+        elif is_instance_rb_cluster(self.cluster, self.is_redis_cluster):
+            with self.cluster.all() as conn:
+                results = conn.zrange(pending_key, 0, -1)
+
+            # Pending keys live on the same host as the key itself
+            for host_id, keysb in results.value.items():
+                pending.append(
+                    (
+                        self.cluster.get_local_client(host_id),
+                        [keyb.decode("utf-8") for keyb in keysb],
+                    )
+                )
+        else:
+            raise AssertionError("unreachable")
+
+        backlog = sum(len(keys) for _, keys in pending)
+        metrics.distribution("buffer.pending-shard-size", backlog, tags=tags)
+
+        drained = 0
+        for client, keys in pending:
+            for i in range(0, len(keys), batch_size):
+                drained += self._process_incr_batch(client, pending_key, keys[i : i + batch_size])
+
+        duration = time() - start
+        metrics.incr("buffer.process-pending-shard.drained", amount=drained, tags=tags)
+        metrics.timing("buffer.process-pending-shard.duration", duration, tags=tags)
+        if duration > 0:
+            metrics.distribution(
+                "buffer.process-pending-shard.drain-rate", drained / duration, tags=tags
+            )
+
+    def _process_incr_batch(self, client: Any, pending_key: str, keys: list[str]) -> int:
+        """
+        Fetches and removes the given keys in one round trip and applies them. Returns the number
+        of keys which still held any increments.
+
+        Keys are locked like in `_process_single_incr`, since `process_incr` tasks for the same
+        keys may still be running. Keys which are locked are left for the next drain.
+        """
+        locked_keys = self._lock_keys(keys, ex=10)
+        if len(locked_keys) < len(keys):
+            metrics.incr(
+                "buffer.revoked",
+                amount=len(keys) - len(locked_keys),
+                tags={"reason": "locked"},
+                skip_internal=False,
+            )
+        if not locked_keys:
+            return 0
+
+        try:
+            pipe = client.pipeline(transaction=False)
+            for key in locked_keys:
+                pipe.hgetall(key)
+                pipe.zrem(pending_key, key)
+                pipe.delete(key)
+            results = pipe.execute()
+
+            incrs = []
+            # HGETALL outputs, skipping ZREM and DEL
+            for key, values in zip(locked_keys, results[::3]):
+                if not values:
+                    metrics.incr("buffer.revoked", tags={"reason": "empty"}, skip_internal=False)
+                    logger.debug("buffer.revoked.empty", extra={"redis_key": key})
+                    continue
+                incrs.append(self._load_incr(values))
+
+            self.process_many(incrs)
+        finally:
+            self._unlock_keys(locked_keys)
+
+        return len(incrs)
+
+    def _lock_keys(self, keys: list[str], ex: int) -> list[str]:
+        """
+        Takes the locks of `_lock_key` for many keys in one round trip. Returns the keys which
+        were locked.
+        """
+        lock_keys = [self._make_lock_key(key) for key in keys]
+        if is_instance_redis_cluster(self.cluster, self.is_redis_cluster):
+            pipe = self.cluster.pipeline(transaction=False)
+            for lock_key in lock_keys:
+                pipe.set(lock_key, "1", nx=True, ex=ex)
+            results = pipe.execute()
+        elif is_instance_rb_cluster(self.cluster, self.is_redis_cluster):
+            with self.cluster.map() as conn:
+                promises = [conn.set(lock_key, "1", nx=True, ex=ex) for lock_key in lock_keys]
+            results = [promise.value for promise in promises]
+        else:
+            raise AssertionError("unreachable")
+
+        return [key for key, locked in zip(keys, results) if locked]
+
+    def _unlock_keys(self, keys: list[str]) -> None:
+        lock_keys = [self._make_lock_key(key) for key in keys]
+        if is_instance_redis_cluster(self.cluster, self.is_redis_cluster):
+            pipe = self.cluster.pipeline(transaction=False)
+            for lock_key in lock_keys:
+                pipe.delete(lock_key)
+            pipe.execute()
+        elif is_instance_rb_cluster(self.cluster, self.is_redis_cluster):
+            with self.cluster.map() as conn:
+                for lock_key in lock_keys:
+                    conn.delete(lock_key)
+        else:
+            raise AssertionError("unreachable")
@@ -3,7 +3,7 @@ from __future__ import annotations
 import logging
 import pickle
 from base64 import b64encode
-from collections.abc import Callable, MutableMapping
+from collections.abc import Callable, MutableMapping, Sequence
 from typing import Any
 from uuid import uuid4
 
@@ -11,7 +11,7 @@ from django.db.models import Model
 from django.db.models.signals import post_delete
 from django.utils.functional import cached_property
 
-from sentry import nodestore
+from sentry import nodestore, options
 from sentry.db.models.utils import Creator
 from sentry.utils import json
 from sentry.utils.strings import decompress
@@ -35,9 +35,14 @@ class NodeData(MutableMapping[str, Any]):
     Initializing with:
     data=None means, this is a node that needs to be fetched from nodestore.
     data={...} means, this is an object that should be saved to nodestore.
+
+    deduplicate=True stores repeating interfaces only once, see
+    `sentry.eventstore.compressor`.
     """
 
-    def __init__(self, id, data=None, wrapper=None, ref_version=None, ref_func=None):
+    def __init__(
+        self, id, data=None, wrapper=None, ref_version=None, ref_func=None, deduplicate=False
+    ):
         self.id = id
         self.ref = None
         # ref version is used to discredit a previous ref
@@ -46,6 +51,7 @@ class NodeData(MutableMapping[str, Any]):
         self.ref_version = ref_version
         self.ref_func = ref_func
         self.wrapper = wrapper
+        self.deduplicate = deduplicate
         if data is not None and self.wrapper is not None:
             data = self.wrapper(data)
         self._node_data = data
@@ -58,6 +64,7 @@ class NodeData(MutableMapping[str, Any]):
         return data
 
     def __setstate__(self, state):
+        state.setdefault("deduplicate", False)
         self.__dict__ = state
 
     def __getitem__(self, key):
@@ -133,10 +140,44 @@ class NodeData(MutableMapping[str, Any]):
             See documentation of nodestore.
         """
 
+        to_write = self._get_subkeys_to_write(subkeys)
+        if to_write is not None:
+            NodeData._deduplicate_items([self], {self.id: to_write})
+            nodestore.backend.set_subkeys(self.id, to_write)
+
+    @staticmethod
+    def save_many(nodes: Sequence[tuple[NodeData, dict[str, Any] | None]]) -> None:
+        """
+        Same as calling `save` on each of `(node, subkeys)`, but written to nodestore at once.
+        """
+        items = {}
+        for node, subkeys in nodes:
+            to_write = node._get_subkeys_to_write(subkeys)
+            if to_write is not None:
+                items[node.id] = to_write
+
+        if items:
+            NodeData._deduplicate_items([node for node, _ in nodes], items)
+            nodestore.backend.set_subkeys_multi(items)
+
+    @staticmethod
+    def _deduplicate_items(nodes: Sequence[NodeData], items: dict[str, dict[str | None, Any]]):
+        if not options.get("eventstore.compressor.enabled"):
+            return
+
+        from sentry.eventstore.compressor import deduplicate_nodes
+
+        to_deduplicate = {
+            node.id: items[node.id] for node in nodes if node.deduplicate and node.id in items
+        }
+        if to_deduplicate:
+            deduplicate_nodes(to_deduplicate, nodestore.backend.set_multi)
+
+    def _get_subkeys_to_write(self, subkeys: dict[str, Any] | None) -> dict[str | None, Any] | None:
         # We never loaded any data for reading or writing, so there
         # is nothing to save.
         if self._node_data is None:
-            return
+            return None
 
         # We can't put our wrappers into the nodestore, so we need to
         # ensure that the data is converted into a plain old dict
@@ -144,10 +185,9 @@ class NodeData(MutableMapping[str, Any]):
         if not isinstance(to_write, dict):
             to_write = dict(to_write.items())
 
-        subkeys = subkeys or {}
-        subkeys[None] = to_write
-
-        nodestore.backend.set_subkeys(self.id, subkeys)
+        rv: dict[str | None, Any] = dict(subkeys or {})
+        rv[None] = to_write
+        return rv
 
 
 class NodeField(GzippedDictField):
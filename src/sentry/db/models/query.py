@@ -2,10 +2,11 @@ from __future__ import annotations
 
 import itertools
 import operator
+from collections.abc import Mapping, Sequence
 from functools import reduce
 from typing import TYPE_CHECKING, Any, Literal
 
-from django.db import IntegrityError, router, transaction
+from django.db import IntegrityError, connections, router, transaction
 from django.db.models import F, Model, Q
 from django.db.models.expressions import BaseExpression, CombinedExpression, Value
 from django.db.models.fields import Field
@@ -17,6 +18,7 @@ if TYPE_CHECKING:
     from sentry.db.models.base import BaseModel
 
 __all__ = (
+    "bulk_increment",
     "create_or_update",
     "update",
 )
@@ -176,6 +178,72 @@ def create_or_update(
     return affected, False
 
 
+def bulk_increment(
+    model: type[Model],
+    rows: Sequence[tuple[Any, Mapping[str, int], Mapping[str, Any]]],
+    using: str | None = None,
+) -> set[Any]:
+    """
+    Updates many rows of `model` with a single `UPDATE ... FROM (VALUES ...)` statement.
+
+    Each row is given as `(pk, columns, values)`: `columns` are incremented by the given amounts,
+    and `values` overwrite the existing ones. All rows must increment and overwrite the same set of
+    columns.
+
+    Returns the primary keys of the rows which exist and were updated.
+
+    >>> bulk_increment(Group, [(1, {'times_seen': 2}, {'last_seen': now})])
+    """
+    if not rows:
+        return set()
+
+    _, first_columns, first_values = rows[0]
+    column_names = sorted(first_columns)
+    value_names = sorted(first_values)
+    if not column_names and not value_names:
+        raise ValueError("Nothing to update")
+
+    if not using:
+        using = router.db_for_write(model)
+    connection = connections[using]
+    qn = connection.ops.quote_name
+
+    pk_field = model._meta.pk
+    assert pk_field is not None
+    fields = [pk_field] + [_get_field(model, name) for name in column_names + value_names]
+
+    placeholders = "({})".format(", ".join(f"%s::{field.db_type(connection)}" for field in fields))
+    params: list[Any] = []
+    for pk, columns, values in rows:
+        if sorted(columns) != column_names or sorted(values) != value_names:
+            raise ValueError("All rows must update the same columns")
+        row_values = [pk, *(columns[name] for name in column_names)]
+        row_values.extend(values[name] for name in value_names)
+        params.extend(
+            field.get_db_prep_save(value, connection) for field, value in zip(fields, row_values)
+        )
+
+    assignments = [
+        f"{qn(field.column)} = t.{qn(field.column)} + v.{qn(field.column)}"
+        for field in fields[1 : len(column_names) + 1]
+    ]
+    assignments.extend(
+        f"{qn(field.column)} = v.{qn(field.column)}" for field in fields[len(column_names) + 1 :]
+    )
+
+    pk_column = qn(pk_field.column)
+    sql = (
+        f"UPDATE {qn(model._meta.db_table)} AS t SET {', '.join(assignments)} "
+        f"FROM (VALUES {', '.join([placeholders] * len(rows))}) "
+        f"AS v ({', '.join(qn(field.column) for field in fields)}) "
+        f"WHERE t.{pk_column} = v.{pk_column} RETURNING t.{pk_column}"
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return {pk_field.to_python(row[0]) for row in cursor.fetchall()}
+
+
 def in_iexact(column: str, values: Any) -> Q:
     """Operator to test if any of the given values are (case-insensitive)
     matching to values in the given column."""
@@ -4,7 +4,7 @@ import ipaddress
 import logging
 import uuid
 from collections.abc import Callable, Mapping, MutableMapping, Sequence
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from datetime import datetime, timedelta, timezone
 from typing import TYPE_CHECKING, Any, Literal, TypedDict, overload
 
@@ -41,6 +41,7 @@ from sentry.constants import (
     InsightModules,
 )
 from sentry.culprit import generate_culprit
+from sentry.db.models.fields.node import NodeData
 from sentry.dynamic_sampling import record_latest_release
 from sentry.eventstore.processing import event_processing_store
 from sentry.eventstream.base import GroupState
@@ -58,9 +59,11 @@ from sentry.grouping.ingest.config import is_in_transition, update_grouping_conf
 from sentry.grouping.ingest.hashing import (
     find_grouphash_with_group,
     get_or_create_grouphashes,
+    get_or_create_grouphashes_many,
     maybe_run_background_grouping,
     maybe_run_secondary_grouping,
     run_primary_grouping,
+    run_primary_grouping_many,
 )
 from sentry.grouping.ingest.metrics import record_hash_calculation_metrics, record_new_group_metrics
 from sentry.grouping.ingest.seer import maybe_check_seer_for_matching_grouphash
@@ -992,6 +995,8 @@ def _tsdb_record_all_metrics(jobs: Sequence[Job]) -> None:
 
 def _nodestore_save_many(jobs: Sequence[Job], app_feature: str) -> None:
     inserted_time = datetime.now(timezone.utc).timestamp()
+    save_many = options.get("nodestore.save-many.enabled")
+    nodes: list[tuple[NodeData, dict[str, Any]]] = []
     for job in jobs:
         # Write the event to Nodestore
         subkeys = {}
@@ -1018,7 +1023,13 @@ def _nodestore_save_many(jobs: Sequence[Job], app_feature: str) -> None:
                 usage_type=UsageUnit.BYTES,
             )
         job["event"].data["nodestore_insert"] = inserted_time
-        job["event"].data.save(subkeys=subkeys)
+        if save_many:
+            nodes.append((job["event"].data, subkeys))
+        else:
+            job["event"].data.save(subkeys=subkeys)
+
+    if nodes:
+        NodeData.save_many(nodes)
 
 
 def _eventstream_insert_many(jobs: Sequence[Job]) -> None:
@@ -1195,12 +1206,26 @@ def assign_event_to_group(
     event: Event,
     job: Job,
     metric_tags: MutableTags,
+    primary: GroupHashInfo | None = None,
 ) -> GroupInfo | None:
+    """
+    Find or create the group for the job's event.
+
+    If the event's primary hashes and grouphashes have already been calculated (for example, by
+    `get_hashes_and_grouphashes_many` for a batch of events), they can be passed in as `primary`.
+    """
     project = event.project
     secondary = NULL_GROUPHASH_INFO
 
     # Try looking for an existing group using the current grouping config
-    primary = get_hashes_and_grouphashes(job, run_primary_grouping, metric_tags)
+    if primary is None:
+        primary = get_hashes_and_grouphashes(job, run_primary_grouping, metric_tags)
+    elif primary.grouphashes:
+        # Precalculated grouphashes haven't been checked for tombstones yet. Doing it here means a
+        # discarded hash only affects this event, rather than the whole batch.
+        primary = replace(
+            primary, existing_grouphash=find_grouphash_with_group(primary.grouphashes)
+        )
 
     # If we've found one, great. No need to do any more calculations
     if primary.existing_grouphash:
@@ -1291,6 +1316,40 @@ def get_hashes_and_grouphashes(
         return NULL_GROUPHASH_INFO
 
 
+def get_hashes_and_grouphashes_many(
+    project: Project, jobs: Sequence[Job], metric_tags: MutableTags
+) -> list[GroupHashInfo]:
+    """
+    Batch version of `get_hashes_and_grouphashes` using the primary grouping config, for many jobs
+    whose events all belong to `project`.
+
+    Grouping configs, enhancements and fingerprinting rules are loaded once for the batch, and all
+    existing `GroupHash` records are fetched with a single query. The results can be passed to
+    `assign_event_to_group` as `primary`, which is also where the grouphashes are checked for an
+    existing group (or a tombstone).
+    """
+    results = run_primary_grouping_many(project, jobs, metric_tags)
+    if not results:
+        return []
+
+    # All jobs in the batch share the grouping config, since it's loaded once per batch
+    grouping_config = results[0][0]
+    grouphashes_by_job = get_or_create_grouphashes_many(
+        project,
+        [(job["event"], variants, hashes) for job, (_, hashes, variants) in zip(jobs, results)],
+        grouping_config["id"],
+    )
+
+    return [
+        (
+            GroupHashInfo(grouping_config, variants, hashes, grouphashes, None)
+            if hashes
+            else NULL_GROUPHASH_INFO
+        )
+        for (_, hashes, variants), grouphashes in zip(results, grouphashes_by_job)
+    ]
+
+
 def handle_existing_grouphash(
     job: Job,
     existing_grouphash: GroupHash,
@@ -1381,7 +1440,7 @@ def create_group_with_grouphashes(job: Job, grouphashes: list[GroupHash]) -> Gro
         # hashed) event is also in the process of creating a group and has grabbed the lock
         # before us, we'll block here until it's done. If not, we've now got the lock and other
         # identically-hashed events will have to wait for us.
-        grouphashes = list(
+        locked_grouphashes = list(
             GroupHash.objects.filter(
                 id__in=[h.id for h in grouphashes],
             ).select_for_update()
@@ -1391,7 +1450,7 @@ def create_group_with_grouphashes(job: Job, grouphashes: list[GroupHash]) -> Gro
         # condition scenario above, we'll have been blocked long enough for the other event to
         # have created the group and updated our grouphashes with a group id, which means this
         # time, we'll find something.
-        existing_grouphash = find_grouphash_with_group(grouphashes)
+        existing_grouphash = find_grouphash_with_group(locked_grouphashes)
 
         # If we still haven't found a matching grouphash, we're now safe to go ahead and create
         # the group.
@@ -1401,16 +1460,24 @@ def create_group_with_grouphashes(job: Job, grouphashes: list[GroupHash]) -> Gro
             record_new_group_metrics(event)
 
             group = _create_group(project, event, **_get_group_processing_kwargs(job))
-            add_group_id_to_grouphashes(group, grouphashes)
+            add_group_id_to_grouphashes(group, locked_grouphashes)
 
-            return GroupInfo(group=group, is_new=True, is_regression=False)
+            group_info: GroupInfo | None = GroupInfo(group=group, is_new=True, is_regression=False)
 
         # On the other hand, if we did in fact end up on the losing end of a race condition, treat
         # this the same way we would if we'd found a grouphash to begin with (and never landed in
         # this function at all)
         else:
             # TODO: should we be setting tags here, too?
-            return handle_existing_grouphash(job, existing_grouphash, grouphashes)
+            group_info = handle_existing_grouphash(job, existing_grouphash, locked_grouphashes)
+
+    # The given grouphashes may be shared with other events in the same batch (see
+    # `get_or_create_grouphashes_many`), which should find the group right away
+    group_ids = {grouphash.id: grouphash.group_id for grouphash in locked_grouphashes}
+    for grouphash in grouphashes:
+        grouphash.group_id = group_ids.get(grouphash.id, grouphash.group_id)
+
+    return group_info
 
 
 def _create_group(
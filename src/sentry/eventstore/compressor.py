@@ -3,18 +3,47 @@ Eventstore compressor is responsible for pulling out repeating data across
 events such that they can be stored only once. For example SDK modules list, or
 debug_meta.
 
-This is not used in production yet, we are still collecting metrics there.
+Events opt into this through `NodeData(deduplicate=True)`, and only while the
+`eventstore.compressor.enabled` option is set. Every deduplicated sub-document is
+stored as its own node, keyed by the checksum of its contents, and the event
+payload keeps a list of patchsets referencing those nodes. Nodestore reassembles
+events transparently on read, regardless of the option.
+
+Shared nodes are garbage collected by nodestore's regular TTL / cleanup, like
+events are: every event referencing a shared node writes it again, unless this
+process already did so within `eventstore.compressor.refresh-interval` seconds,
+which should be well under the nodestore TTL. An event can therefore outlive a
+shared node by at most that interval, in which case the affected interface is
+left out when reassembling the event.
 """
 
 from __future__ import annotations
 
+import copy
 import hashlib
+import time
+from collections.abc import Callable, Mapping
 from typing import Any
 
 import orjson
+from cachetools import LRUCache
+
+from sentry import options
+from sentry.utils import metrics
+
+PATCHSETS_KEY = "__nodestore_patchsets"
+
+# Node ids are limited to 40 characters by some backends, which leaves room for a short prefix
+# in front of the md5 checksum.
+SHARED_NODE_PREFIX = "dedup:"
 
 _INTERFACES = {}
 
+_MISSING = object()
+
+# Checksums of shared nodes written by this process, and when they were last written
+_recently_written: LRUCache[str, float] = LRUCache(10_000)
+
 
 def _deduplicate_interface(*keys):
     def inner(f):
@@ -35,10 +64,15 @@ class DebugMeta:
         dedup: dict[str, list[str | Any]] = {}
 
         if data:
+            data = dict(data)
+            images = []
             for image in data.get("images") or []:
-                image = image or {}
+                image = dict(image or {})
                 for name in DebugMeta._DEDUP_FIELDS:
                     dedup.setdefault(name, []).append(image.pop(name, None))
+                images.append(image)
+            if data.get("images"):
+                data["images"] = images
 
         return dedup, data
 
@@ -54,39 +88,226 @@ class DebugMeta:
         return data
 
 
-def deduplicate(data):
+@_deduplicate_interface("modules")
+class Modules:
+    @staticmethod
+    def encode(data):
+        return dict(data or {}), None
+
+    @staticmethod
+    def decode(dedup, data):
+        return dict(dedup)
+
+
+@_deduplicate_interface("sdk")
+class Sdk:
+    _DEDUP_FIELDS = ("integrations", "packages")
+
+    @staticmethod
+    def encode(data):
+        dedup = {}
+
+        if data:
+            data = dict(data)
+            for name in Sdk._DEDUP_FIELDS:
+                if data.get(name):
+                    dedup[name] = data.pop(name)
+
+        return dedup, data
+
+    @staticmethod
+    def decode(dedup, data):
+        if data is not None:
+            data.update(copy.deepcopy(dedup))
+
+        return data
+
+
+@_deduplicate_interface("contexts.device")
+class DeviceContext:
+    # Describes the hardware, and is the same for every device of a model. Everything else
+    # (battery level, free memory, orientation, ...) changes from event to event.
+    _DEDUP_FIELDS = (
+        "arch",
+        "brand",
+        "chipset",
+        "cpu_description",
+        "family",
+        "manufacturer",
+        "memory_size",
+        "model",
+        "model_id",
+        "processor_count",
+        "processor_description",
+        "processor_frequency",
+        "screen_density",
+        "screen_dpi",
+        "screen_height_pixels",
+        "screen_resolution",
+        "screen_width_pixels",
+        "simulator",
+        "storage_size",
+    )
+
+    @staticmethod
+    def encode(data):
+        dedup = {}
+
+        if data:
+            data = dict(data)
+            for name in DeviceContext._DEDUP_FIELDS:
+                if name in data:
+                    dedup[name] = data.pop(name)
+
+        return dedup, data
+
+    @staticmethod
+    def decode(dedup, data):
+        if data is not None:
+            data.update(dedup)
+
+        return data
+
+
+def _get_path(data, key):
+    *parents, leaf = key.split(".")
+    for parent in parents:
+        data = data.get(parent)
+        if not isinstance(data, dict):
+            return _MISSING
+    return data.get(leaf, _MISSING)
+
+
+def _set_path(data, key, value):
+    """
+    Sets `key` in a copy of all containers along the way, so that nested
+    dictionaries shared with the caller are never modified.
+    """
+    *parents, leaf = key.split(".")
+    for parent in parents:
+        data[parent] = dict(data.get(parent) or {})
+        data = data[parent]
+    if value is _MISSING:
+        data.pop(leaf, None)
+    else:
+        data[leaf] = value
+
+
+def _deduplicate(data):
+    # Containers along the deduplicated paths are replaced by `_set_path`, so a shallow copy
+    # keeps the caller's event intact
+    data = dict(data)
     patchsets = []
     extra_keys = {}
+    bytes_saved = 0
 
     for key, interface in _INTERFACES.items():
-        if key not in data:
+        value = _get_path(data, key)
+        if value is _MISSING:
+            continue
+
+        to_deduplicate, to_inline = interface.encode(value)
+        if not to_deduplicate:
             continue
 
-        to_deduplicate, to_inline = interface.encode(data.pop(key))
         to_deduplicate_serialized = orjson.dumps(to_deduplicate)
         checksum = hashlib.md5(to_deduplicate_serialized).hexdigest()
         extra_keys[checksum] = to_deduplicate
         patchsets.append([key, checksum, to_inline])
+        _set_path(data, key, _MISSING)
+        bytes_saved += len(to_deduplicate_serialized)
 
     if patchsets:
-        data["__nodestore_patchsets"] = patchsets
+        data[PATCHSETS_KEY] = patchsets
+
+    return data, extra_keys, bytes_saved
 
+
+def deduplicate(data):
+    data, extra_keys, _ = _deduplicate(data)
     return data, extra_keys
 
 
 def assemble(data, get_extra_keys):
-    if not data.get("__nodestore_patchsets"):
+    if not data.get(PATCHSETS_KEY):
         return data
 
     checksums = []
-    for key, checksum, inlined in data["__nodestore_patchsets"]:
+    for key, checksum, inlined in data[PATCHSETS_KEY]:
         checksums.append(checksum)
 
     deduplicated_interfaces = get_extra_keys(checksums)
 
-    for key, checksum, inlined in data["__nodestore_patchsets"]:
-        deduplicated = deduplicated_interfaces[checksum]
-        data[key] = _INTERFACES[key].decode(deduplicated, inlined)
+    for key, checksum, inlined in data[PATCHSETS_KEY]:
+        deduplicated = deduplicated_interfaces.get(checksum)
+        if deduplicated is None:
+            # The shared node has been cleaned up before this event, keep what we have
+            metrics.incr("eventstore.compressor.missing_shared_node", tags={"interface": key})
+            if inlined is not None:
+                _set_path(data, key, inlined)
+            continue
+        _set_path(data, key, _INTERFACES[key].decode(deduplicated, inlined))
 
-    del data["__nodestore_patchsets"]
+    del data[PATCHSETS_KEY]
     return data
+
+
+def get_shared_node_id(checksum: str) -> str:
+    return f"{SHARED_NODE_PREFIX}{checksum}"
+
+
+def deduplicate_nodes(
+    items: Mapping[str, dict[str | None, Any]],
+    set_multi: Callable[[dict[str, Any]], None],
+) -> None:
+    """
+    Deduplicates the default subkey of every `node_id -> subkeys` item in place,
+    and writes the shared nodes they reference with a single call to `set_multi`.
+    This has to happen before the items themselves are written, so that readers
+    never see references to missing nodes.
+
+    Shared nodes which this process already wrote within the refresh interval are
+    skipped.
+    """
+    now = time.monotonic()
+    refresh_interval = options.get("eventstore.compressor.refresh-interval")
+
+    shared = {}
+    for subkeys in items.values():
+        data, extra_keys, bytes_saved = _deduplicate(subkeys[None])
+        subkeys[None] = data
+        metrics.distribution("eventstore.compressor.bytes_saved", bytes_saved, unit="byte")
+
+        for checksum, value in extra_keys.items():
+            if now - _recently_written.get(checksum, -refresh_interval) >= refresh_interval:
+                shared[checksum] = value
+
+    metrics.incr("eventstore.compressor.shared_nodes_written", amount=len(shared))
+    if shared:
+        set_multi({get_shared_node_id(checksum): value for checksum, value in shared.items()})
+        for checksum in shared:
+            _recently_written[checksum] = now
+
+
+def assemble_nodes(
+    items: dict[str, Any],
+    get_multi: Callable[[list[str]], Mapping[str, Any]],
+) -> None:
+    """
+    Reassembles all deduplicated items of a `node_id -> data` dictionary in place,
+    fetching the shared nodes of all of them with a single call to `get_multi`.
+    """
+    deduplicated = [
+        data for data in items.values() if isinstance(data, dict) and data.get(PATCHSETS_KEY)
+    ]
+    if not deduplicated:
+        return
+
+    checksums = {checksum for data in deduplicated for _, checksum, _ in data[PATCHSETS_KEY]}
+    shared_nodes = get_multi([get_shared_node_id(checksum) for checksum in checksums])
+
+    def get_extra_keys(checksums):
+        return {checksum: shared_nodes.get(get_shared_node_id(checksum)) for checksum in checksums}
+
+    for data in deduplicated:
+        assemble(data, get_extra_keys)
@@ -611,7 +611,12 @@ class Event(BaseEvent):
     def data(self, value: Mapping[str, Any]) -> None:
         node_id = Event.generate_node_id(self.project_id, self.event_id)
         self._data = NodeData(
-            node_id, data=value, wrapper=EventDict, ref_version=2, ref_func=ref_func
+            node_id,
+            data=value,
+            wrapper=EventDict,
+            ref_version=2,
+            ref_func=ref_func,
+            deduplicate=True,
         )
 
     @property
@@ -16,11 +16,12 @@ from sentry_ophio.enhancers import Cache as RustCache
 from sentry_ophio.enhancers import Component as RustComponent
 from sentry_ophio.enhancers import Enhancements as RustEnhancements
 
-from sentry import projectoptions
+from sentry import options, projectoptions
 from sentry.grouping.component import FrameGroupingComponent, StacktraceGroupingComponent
 from sentry.stacktraces.functions import set_in_app
 from sentry.utils.safe import get_path, set_path
 
+from .compiled import CompiledEnhancementRules
 from .exceptions import InvalidEnhancerConfig
 from .matchers import create_match_frame
 from .parser import parse_enhancements
@@ -177,9 +178,16 @@ class Enhancements:
         # TODO: Fix this type to list[MatchFrame] once it's fixed in ophio
         match_frames: list[Any] = [create_match_frame(frame, platform) for frame in frames]
 
-        category_and_in_app_results = self.rust_enhancements.apply_modifications_to_frames(
-            match_frames, make_rust_exception_data(exception_data)
-        )
+        if options.get("grouping.enhancer.compiled-rules.enabled"):
+            self.compiled_rules.apply_modifications_to_frames(frames, match_frames, exception_data)
+            category_and_in_app_results = [
+                (get_path(frame, "data", "category"), match_frame["in_app"])
+                for frame, match_frame in zip(frames, match_frames)
+            ]
+        else:
+            category_and_in_app_results = self.rust_enhancements.apply_modifications_to_frames(
+                match_frames, make_rust_exception_data(exception_data)
+            )
 
         for frame, (category, in_app) in zip(frames, category_and_in_app_results):
             if in_app is not None:
@@ -189,6 +197,20 @@ class Enhancements:
             if category is not None:
                 set_path(frame, "data", "category", value=category)
 
+    @cached_property
+    def compiled_rules(self) -> CompiledEnhancementRules:
+        """
+        An index over the rules of all bases followed by our own rules, in the order in which
+        they are applied.
+        """
+        rules = []
+        for base_id in self.bases:
+            base = ENHANCEMENT_BASES.get(base_id)
+            if base:
+                rules.extend(base.compiled_rules.rules)
+        rules.extend(self.rules)
+        return CompiledEnhancementRules(rules)
+
     def assemble_stacktrace_component(
         self,
         variant_name: str,
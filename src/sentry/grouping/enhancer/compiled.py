@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Sequence
+from typing import Any
+
+from cachetools import LRUCache
+
+from sentry.utils import metrics
+from sentry.utils.hashlib import md5_text
+
+from .matchers import (
+    CalleeMatch,
+    CallerMatch,
+    EnhancementMatch,
+    ExceptionFieldMatch,
+    FrameFieldMatch,
+    FrameMatch,
+    MatchFrame,
+    ReturnValueCache,
+)
+from .rules import EnhancementRule
+
+# The `MatchFrame` fields which are actually read by frame matchers. (`orig_in_app` is not.)
+FINGERPRINT_FIELDS = ("category", "family", "function", "in_app", "module", "package", "path")
+
+# Characters which make a pattern a glob rather than a literal value
+GLOB_CHARS = frozenset(b"*?[]{}\\")
+
+# Results of matching a single frame against all the matchers of a rule set, keyed by
+# `(rule set key, frame fingerprint)`. Library frames repeat across events far more often than
+# rule sets change, so this is shared by all compiled rule sets in the process.
+FRAME_MATCH_CACHE: LRUCache[tuple[str, tuple[Any, ...]], frozenset[int]] = LRUCache(10_000)
+
+FrameMatcherRef = tuple[int, int, bool]  # (frame offset, matcher slot, negated)
+
+
+def _is_literal(pattern: bytes) -> bool:
+    return not GLOB_CHARS.intersection(pattern)
+
+
+def _get_frame_fingerprint(match_frame: MatchFrame) -> tuple[Any, ...]:
+    return tuple(match_frame[field] for field in FINGERPRINT_FIELDS)  # type: ignore[literal-required]
+
+
+class CompiledEnhancementRules:
+    """
+    An index over a list of enhancement rules, allowing their frame modifications (`category` and
+    `in_app`) to be applied to a list of frames in (roughly) linear time in the number of frames.
+
+    Every distinct frame matcher used by any of the rules gets a slot. Matching a frame produces the
+    set of slots whose matcher (ignoring negation) matches it, which is computed once per distinct
+    frame and then cached. Literal patterns are looked up by value, so only true globs need to be
+    evaluated. Rules are then checked against these sets, and a rule anchored on one of its
+    matchers is only checked against the frames which matched that anchor.
+    """
+
+    def __init__(self, rules: Sequence[EnhancementRule]):
+        self.rules = list(rules)
+        self.key = md5_text("\n".join(rule.matcher_description for rule in self.rules)).hexdigest()
+
+        self._slots: dict[FrameMatch, int] = {}
+        # field -> literal value -> slots matching that value exactly
+        self._literal_index: dict[str, dict[bytes, list[int]]] = defaultdict(
+            lambda: defaultdict(list)
+        )
+        # (slot, matcher) pairs which have to be evaluated against each frame
+        self._pattern_matchers: list[tuple[int, FrameMatch]] = []
+
+        self._exception_matchers: list[list[ExceptionFieldMatch]] = []
+        self._frame_matchers: list[list[FrameMatcherRef]] = []
+        # The slot of a positive matcher on the frame itself, for every rule which has one
+        self._anchors: list[int | None] = []
+        # The rules which modify frames, in the order in which they are applied
+        self._modifier_rules: list[int] = []
+
+        for rule_idx, rule in enumerate(self.rules):
+            exception_matchers = []
+            frame_matchers = []
+            for matcher in rule.matchers:
+                if isinstance(matcher, ExceptionFieldMatch):
+                    exception_matchers.append(matcher)
+                else:
+                    frame_matchers.append(self._compile_matcher(matcher))
+
+            self._exception_matchers.append(exception_matchers)
+            self._frame_matchers.append(frame_matchers)
+
+            self._anchors.append(
+                next(
+                    (
+                        slot
+                        for offset, slot, negated in frame_matchers
+                        if not offset and not negated
+                    ),
+                    None,
+                )
+            )
+            # Rules without matchers never match anything
+            if rule.matchers and any(action.is_classifier for action in rule.actions):
+                self._modifier_rules.append(rule_idx)
+
+    def _compile_matcher(self, matcher: EnhancementMatch) -> FrameMatcherRef:
+        offset = 0
+        if isinstance(matcher, CallerMatch):
+            offset, matcher = -1, matcher.inner
+        elif isinstance(matcher, CalleeMatch):
+            offset, matcher = 1, matcher.inner
+
+        assert isinstance(matcher, FrameMatch)
+
+        # Matchers are interned by `FrameMatch.from_key`, so identical matchers used by different
+        # rules share a slot. Negation is applied per rule, which lets `key:x` and `!key:x` share
+        # one as well.
+        positive = FrameMatch.from_key(matcher.key, matcher.pattern, False)
+        slot = self._slots.get(positive)
+        if slot is None:
+            slot = self._slots[positive] = len(self._slots)
+            pattern = positive._encoded_pattern
+            if isinstance(positive, FrameFieldMatch) and positive.field and _is_literal(pattern):
+                self._literal_index[positive.field][pattern].append(slot)
+            else:
+                self._pattern_matchers.append((slot, positive))
+
+        return offset, slot, matcher.negated
+
+    def _match_frame(self, match_frame: MatchFrame, cache: ReturnValueCache) -> frozenset[int]:
+        hits: set[int] = set()
+
+        for field, literals in self._literal_index.items():
+            value = match_frame[field]  # type: ignore[literal-required]
+            if value is not None:
+                hits.update(literals.get(value, ()))
+
+        for slot, matcher in self._pattern_matchers:
+            if matcher._positive_frame_match(match_frame, {}, cache):
+                hits.add(slot)
+
+        return frozenset(hits)
+
+    def _match_frames(
+        self, match_frames: Sequence[MatchFrame], cache: ReturnValueCache
+    ) -> list[frozenset[int]]:
+        rv = []
+        hits = misses = 0
+
+        for match_frame in match_frames:
+            cache_key = (self.key, _get_frame_fingerprint(match_frame))
+            frame_hits = FRAME_MATCH_CACHE.get(cache_key)
+            if frame_hits is None:
+                misses += 1
+                frame_hits = FRAME_MATCH_CACHE[cache_key] = self._match_frame(match_frame, cache)
+            else:
+                hits += 1
+            rv.append(frame_hits)
+
+        metrics.incr("grouping.enhancer.compiled.frame_cache", amount=hits, tags={"result": "hit"})
+        metrics.incr(
+            "grouping.enhancer.compiled.frame_cache", amount=misses, tags={"result": "miss"}
+        )
+
+        return rv
+
+    def _rule_matches_frame(
+        self, rule_idx: int, frame_hits: list[frozenset[int]], idx: int
+    ) -> bool:
+        for offset, slot, negated in self._frame_matchers[rule_idx]:
+            target_idx = idx + offset
+            # Caller and callee matchers never match past either end of the stacktrace,
+            # regardless of negation
+            if not 0 <= target_idx < len(frame_hits):
+                return False
+            if (slot in frame_hits[target_idx]) == negated:
+                return False
+
+        return True
+
+    def apply_modifications_to_frames(
+        self,
+        frames: Sequence[dict[str, Any]],
+        match_frames: list[MatchFrame],
+        exception_data: dict[str, Any],
+        in_memory_cache: ReturnValueCache | None = None,
+    ) -> None:
+        """
+        Apply the `category` and `in_app` modifications of all rules to the given frames, with the
+        same result as applying the actions of every matching rule in turn. The updated `in_app`
+        values are only written to `match_frames`, as with `EnhancementAction`.
+        """
+        cache = in_memory_cache if in_memory_cache is not None else {}
+        frame_hits = self._match_frames(match_frames, cache)
+        frames_by_slot = _get_frames_by_slot(frame_hits)
+
+        for rule_idx in self._modifier_rules:
+            if not all(
+                m.matches_frame([], None, exception_data, cache)
+                for m in self._exception_matchers[rule_idx]
+            ):
+                continue
+
+            anchor = self._anchors[rule_idx]
+            candidates = (
+                range(len(frame_hits)) if anchor is None else frames_by_slot.get(anchor, ())
+            )
+            matching_frames = [
+                idx for idx in candidates if self._rule_matches_frame(rule_idx, frame_hits, idx)
+            ]
+            if not matching_frames:
+                continue
+
+            rule = self.rules[rule_idx]
+            for idx in matching_frames:
+                for action in rule.actions:
+                    action.apply_modifications_to_frame(frames, match_frames, idx, rule=rule)
+
+            # Rules can match on `category` and `in_app`, so later rules have to see the frames as
+            # modified by this one
+            frame_hits = self._match_frames(match_frames, cache)
+            frames_by_slot = _get_frames_by_slot(frame_hits)
+
+
+def _get_frames_by_slot(frame_hits: list[frozenset[int]]) -> dict[int, list[int]]:
+    frames_by_slot: dict[int, list[int]] = defaultdict(list)
+    for idx, hits in enumerate(frame_hits):
+        for slot in hits:
+            frames_by_slot[slot].append(idx)
+    return frames_by_slot
@@ -35,16 +35,25 @@ from sentry.utils.tag_normalization import normalized_sdk_tag_from_event
 if TYPE_CHECKING:
     from sentry.event_manager import Job
     from sentry.eventstore.models import Event
+    from sentry.grouping.fingerprinting import FingerprintingRules
+    from sentry.grouping.strategies.base import StrategyConfiguration
 
 logger = logging.getLogger("sentry.events.grouping")
 
 
 def _calculate_event_grouping(
-    project: Project, event: Event, grouping_config: GroupingConfig
+    project: Project,
+    event: Event,
+    grouping_config: GroupingConfig,
+    loaded_grouping_config: StrategyConfiguration | None = None,
+    fingerprinting_config: FingerprintingRules | None = None,
 ) -> tuple[list[str], dict[str, BaseVariant]]:
     """
     Calculate hashes for the event using the given grouping config, add them to the event data, and
     return them, along with the variants data upon which they're based.
+
+    When grouping many events for the same project at once, the loaded grouping config and the
+    project's fingerprinting config can be passed in so they're only loaded once per batch.
     """
     metric_tags: MutableTags = {
         "grouping_config": grouping_config["id"],
@@ -53,7 +62,10 @@ def _calculate_event_grouping(
     }
 
     with metrics.timer("save_event._calculate_event_grouping", tags=metric_tags):
-        loaded_grouping_config = load_grouping_config(grouping_config)
+        if loaded_grouping_config is None:
+            loaded_grouping_config = load_grouping_config(grouping_config)
+        if fingerprinting_config is None:
+            fingerprinting_config = get_fingerprinting_config_for_project(project)
 
         with metrics.timer("event_manager.normalize_stacktraces_for_grouping", tags=metric_tags):
             with sentry_sdk.start_span(op="event_manager.normalize_stacktraces_for_grouping"):
@@ -66,9 +78,7 @@ def _calculate_event_grouping(
             # removed it from the payload.  The call to `get_hashes_and_variants` will then
             # look at `grouping_config` to pick the right parameters.
             event.data["fingerprint"] = event.data.data.get("fingerprint") or ["{{ default }}"]
-            apply_server_fingerprinting(
-                event.data.data, get_fingerprinting_config_for_project(project)
-            )
+            apply_server_fingerprinting(event.data.data, fingerprinting_config)
 
         with metrics.timer("event_manager.event.get_hashes", tags=metric_tags):
             hashes, variants = event.get_hashes_and_variants(loaded_grouping_config)
@@ -185,6 +195,47 @@ def _calculate_primary_hashes_and_variants(
     return _calculate_event_grouping(project, job["event"], grouping_config)
 
 
+def run_primary_grouping_many(
+    project: Project, jobs: Sequence[Job], metric_tags: MutableTags
+) -> list[tuple[GroupingConfig, list[str], dict[str, BaseVariant]]]:
+    """
+    Batch version of `run_primary_grouping`, for use when many events for the same project are
+    being saved at once.
+
+    The grouping config, the loaded strategy config (including its enhancements), and the
+    project's fingerprinting rules are only loaded once for the whole batch. Results are returned
+    in the same order as `jobs`.
+    """
+    with metrics.timer("event_manager.load_grouping_config"):
+        grouping_config = get_grouping_config_dict_for_project(project)
+        loaded_grouping_config = load_grouping_config(grouping_config)
+        fingerprinting_config = get_fingerprinting_config_for_project(project)
+
+    results = []
+
+    with (
+        sentry_sdk.start_span(
+            op="event_manager",
+            name="event_manager.save.calculate_event_grouping_many",
+        ),
+        metrics.timer("event_manager.calculate_event_grouping_many", tags=metric_tags),
+    ):
+        for job in jobs:
+            job["data"]["grouping_config"] = grouping_config
+            hashes, variants = _calculate_event_grouping(
+                project,
+                job["event"],
+                grouping_config,
+                loaded_grouping_config=loaded_grouping_config,
+                fingerprinting_config=fingerprinting_config,
+            )
+            results.append((grouping_config, hashes, variants))
+
+    metrics.distribution("grouping.ingest.batch_size", len(jobs))
+
+    return results
+
+
 def find_grouphash_with_group(
     grouphashes: Sequence[GroupHash],
 ) -> GroupHash | None:
@@ -232,32 +283,110 @@ def get_or_create_grouphashes(
 
     for hash_value in hashes:
         grouphash, created = GroupHash.objects.get_or_create(project=project, hash=hash_value)
+        _handle_grouphash_metadata(event, project, grouphash, created, grouping_config, variants)
+        grouphashes.append(grouphash)
 
-        if should_handle_grouphash_metadata(project, created):
-            try:
-                # We don't expect this to throw any errors, but collecting this metadata
-                # shouldn't ever derail ingestion, so better to be safe
-                create_or_update_grouphash_metadata_if_needed(
-                    event, project, grouphash, created, grouping_config, variants
-                )
-            except Exception as exc:
-                event_id = sentry_sdk.capture_exception(exc)
-                # Temporary log to try to debug why two metrics which should be equivalent are
-                # consistently unequal - maybe the code is erroring out between incrementing the
-                # first one and the second one?
-                logger.warning(
-                    "grouphash_metadata.exception", extra={"event_id": event_id, "error": repr(exc)}
+    return grouphashes
+
+
+def get_or_create_grouphashes_many(
+    project: Project,
+    events_with_hashes: Sequence[tuple[Event, dict[str, BaseVariant], list[str]]],
+    grouping_config: str,
+) -> list[list[GroupHash]]:
+    """
+    Batch version of `get_or_create_grouphashes`, for many events from the same project which
+    were grouped with the same config.
+
+    Rather than one `get_or_create` per hash, this fetches all existing `GroupHash` records for the
+    batch in a single query, and only falls back to `get_or_create` for hashes which don't exist
+    yet. Returns one list of grouphashes per event, in the same order (and with the same filtering
+    of new secondary hashes) as calling `get_or_create_grouphashes` for each event would.
+
+    Events in the batch which share a hash also share the `GroupHash` instance.
+    """
+    is_secondary = grouping_config == project.get_option("sentry:secondary_grouping_config")
+    all_hashes = {hash_value for _, _, hashes in events_with_hashes for hash_value in hashes}
+
+    grouphashes_by_hash = {
+        grouphash.hash: grouphash
+        for grouphash in GroupHash.objects.filter(
+            project=project, hash__in=all_hashes
+        ).select_related("_metadata")
+    }
+    created_hashes = set()
+    results = []
+
+    for event, variants, hashes in events_with_hashes:
+        grouphashes = []
+        for hash_value in hashes:
+            grouphash = grouphashes_by_hash.get(hash_value)
+            created = False
+
+            if grouphash is None:
+                # Secondary hashes are only useful if they already exist (see
+                # `get_or_create_grouphashes`)
+                if is_secondary:
+                    continue
+
+                # Another process may have created the hash since we looked, in which case this
+                # won't count as created
+                grouphash, created = GroupHash.objects.get_or_create(
+                    project=project, hash=hash_value
                 )
+                grouphashes_by_hash[hash_value] = grouphash
+                if created:
+                    created_hashes.add(hash_value)
 
-        if grouphash.metadata:
-            record_grouphash_metadata_metrics(grouphash.metadata, event.platform)
-        else:
-            # Collect a temporary metric to get a sense of how often we would be adding metadata to an
-            # existing hash. (Yes, this is an overestimate, because this will fire every time we see a given
-            # non-backfilled grouphash, not the once per non-backfilled grouphash we'd actually be doing a
-            # backfill, but it will give us a ceiling from which we can work down.)
-            metrics.incr("grouping.grouphashmetadata.backfill_needed")
+            _handle_grouphash_metadata(
+                event, project, grouphash, created, grouping_config, variants
+            )
+            grouphashes.append(grouphash)
+        results.append(grouphashes)
 
-        grouphashes.append(grouphash)
+    metrics.incr(
+        "grouping.get_or_create_grouphashes_many.hashes",
+        amount=len(grouphashes_by_hash) - len(created_hashes),
+        tags={"created": False, "is_secondary": is_secondary},
+    )
+    metrics.incr(
+        "grouping.get_or_create_grouphashes_many.hashes",
+        amount=len(created_hashes),
+        tags={"created": True, "is_secondary": is_secondary},
+    )
 
-    return grouphashes
+    return results
+
+
+def _handle_grouphash_metadata(
+    event: Event,
+    project: Project,
+    grouphash: GroupHash,
+    created: bool,
+    grouping_config: str,
+    variants: dict[str, BaseVariant],
+) -> None:
+    if should_handle_grouphash_metadata(project, created):
+        try:
+            # We don't expect this to throw any errors, but collecting this metadata
+            # shouldn't ever derail ingestion, so better to be safe
+            create_or_update_grouphash_metadata_if_needed(
+                event, project, grouphash, created, grouping_config, variants
+            )
+        except Exception as exc:
+            event_id = sentry_sdk.capture_exception(exc)
+            # Temporary log to try to debug why two metrics which should be equivalent are
+            # consistently unequal - maybe the code is erroring out between incrementing the
+            # first one and the second one?
+            logger.warning(
+                "grouphash_metadata.exception", extra={"event_id": event_id, "error": repr(exc)}
+            )
+
+    if grouphash.metadata:
+        record_grouphash_metadata_metrics(grouphash.metadata, event.platform)
+    else:
+        # Collect a temporary metric to get a sense of how often we would be adding metadata to an
+        # existing hash. (Yes, this is an overestimate, because this will fire every time we see a given
+        # non-backfilled grouphash, not the once per non-backfilled grouphash we'd actually be doing a
+        # backfill, but it will give us a ceiling from which we can work down.)
+        metrics.incr("grouping.grouphashmetadata.backfill_needed")
@@ -25,14 +25,21 @@ def add_group_id_to_grouphashes(
 ) -> None:
     """
     Link the given group to any grouphash which doesn't yet have a group assigned.
+
+    The given `GroupHash` instances are updated as well, since they may be shared with other
+    events being grouped in the same batch.
     """
 
-    new_grouphash_ids = [gh.id for gh in grouphashes if gh.group_id is None]
+    new_grouphashes = [gh for gh in grouphashes if gh.group_id is None]
 
-    GroupHash.objects.filter(id__in=new_grouphash_ids).exclude(
+    GroupHash.objects.filter(id__in=[gh.id for gh in new_grouphashes]).exclude(
         state=GroupHash.State.LOCKED_IN_MIGRATION
     ).update(group=group)
 
+    for grouphash in new_grouphashes:
+        if grouphash.state != GroupHash.State.LOCKED_IN_MIGRATION:
+            grouphash.group = group
+
 
 def check_for_group_creation_load_shed(project: Project, event: Event) -> None:
     """
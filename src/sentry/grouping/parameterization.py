@@ -5,8 +5,12 @@ from collections.abc import Callable, Sequence
 from functools import lru_cache
 
 import tiktoken
+from cachetools import LRUCache
+
+from sentry.utils import metrics
 
 __all__ = [
+    "PARAMETERIZATION_CACHE",
     "ParameterizationCallable",
     "ParameterizationCallableExperiment",
     "ParameterizationExperiment",
@@ -237,7 +241,11 @@ class _UniqueId:
     TOKEN_LENGTH_RATIO_LONG = 0.4
 
     @staticmethod
+    @lru_cache(maxsize=50_000)
     def is_probably_uniq_id(token_str: str) -> bool:
+        # Scoring a token means running it through the tokenizer, which is by far the most
+        # expensive part of parameterization. Log messages are built out of a fairly small set of
+        # words, so the results are memoized per token.
         token_str = token_str.strip("\"'[]{}():;")
         if len(token_str) < _UniqueId.TOKEN_LENGTH_MINIMUM:
             return False
@@ -274,6 +282,17 @@ UniqueIdExperiment = ParameterizationCallableExperiment(
 
 ParameterizationExperiment = ParameterizationCallableExperiment | ParameterizationRegexExperiment
 
+# Messages longer than this are too likely to be unique to be worth caching
+PARAMETERIZATION_CACHE_MAX_CONTENT_LENGTH = 1024
+
+# Results of `Parameterizer.parameterize_all`, keyed by the regex pattern keys, the names of the
+# experiments which ran, and the input. Values are the parameterized string along with the number
+# of matches for each key, so that cache hits update `matches_counter` in the same way a full run
+# would.
+PARAMETERIZATION_CACHE: LRUCache[
+    tuple[tuple[str, ...], tuple[str, ...], str], tuple[str, tuple[tuple[str, int], ...]]
+] = LRUCache(10_000)
+
 
 class Parameterizer:
     def __init__(
@@ -281,12 +300,14 @@ class Parameterizer:
         regex_pattern_keys: Sequence[str],
         experiments: Sequence[ParameterizationExperiment] = (),
     ):
-        self._parameterization_regex = self._make_regex_from_patterns(regex_pattern_keys)
+        self._regex_pattern_keys = tuple(regex_pattern_keys)
+        self._parameterization_regex = self._make_regex_from_patterns(self._regex_pattern_keys)
         self._experiments = experiments
 
         self.matches_counter: defaultdict[str, int] = defaultdict(int)
 
     @staticmethod
+    @lru_cache(maxsize=16)
     def _make_regex_from_patterns(pattern_keys: Sequence[str]) -> re.Pattern[str]:
         """
         Takes list of pattern keys and returns a compiled regex pattern that matches any of them.
@@ -365,4 +386,38 @@ class Parameterizer:
     def parameterize_all(
         self, content: str, should_run: Callable[[str], bool] = lambda _: True
     ) -> str:
-        return self.parametrize_w_experiments(self.parametrize_w_regex(content), should_run)
+        """
+        Apply both the regex and the experiments to the content, reusing the result from a previous
+        call with the same content and the same set of experiments if possible.
+        """
+        experiment_names = tuple(e.name for e in self._experiments if should_run(e.name))
+
+        if len(content) > PARAMETERIZATION_CACHE_MAX_CONTENT_LENGTH:
+            return self._parameterize_all(content, experiment_names)
+
+        cache_key = (self._regex_pattern_keys, experiment_names, content)
+        cached = PARAMETERIZATION_CACHE.get(cache_key)
+
+        if cached is not None:
+            metrics.incr("grouping.parameterization.cache", tags={"result": "hit"}, sample_rate=0.1)
+            parameterized, matches = cached
+            for key, count in matches:
+                self.matches_counter[key] += count
+            return parameterized
+
+        metrics.incr("grouping.parameterization.cache", tags={"result": "miss"}, sample_rate=0.1)
+        counts_before = dict(self.matches_counter)
+        parameterized = self._parameterize_all(content, experiment_names)
+        matches = tuple(
+            (key, count - counts_before.get(key, 0))
+            for key, count in self.matches_counter.items()
+            if count != counts_before.get(key, 0)
+        )
+        PARAMETERIZATION_CACHE[cache_key] = (parameterized, matches)
+
+        return parameterized
+
+    def _parameterize_all(self, content: str, experiment_names: Sequence[str]) -> str:
+        return self.parametrize_w_experiments(
+            self.parametrize_w_regex(content), lambda name: name in experiment_names
+        )
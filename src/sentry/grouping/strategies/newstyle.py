@@ -5,8 +5,12 @@ import logging
 import re
 from collections import Counter
 from collections.abc import Generator
+from hashlib import md5
 from typing import TYPE_CHECKING, Any
 
+from cachetools import LRUCache
+
+from sentry import options
 from sentry.grouping.component import (
     ChainedExceptionGroupingComponent,
     ContextLineGroupingComponent,
@@ -35,6 +39,7 @@ from sentry.interfaces.exception import Mechanism, SingleException
 from sentry.interfaces.stacktrace import Frame, Stacktrace
 from sentry.interfaces.threads import Threads
 from sentry.stacktraces.platform import get_behavior_family_for_platform
+from sentry.utils import metrics
 
 if TYPE_CHECKING:
     from sentry.eventstore.models import Event
@@ -106,6 +111,20 @@ RECURSION_COMPARISON_FIELDS = [
 # TODO(markus)
 StacktraceEncoderReturnValue = Any
 
+# Per-process cache of frame components, keyed by a hash of everything `_get_frame_component` reads.
+# Library frames repeat across a huge number of events, so this saves re-running the normalization
+# logic (and its regexes) for each of them. Entries must never be handed out directly, because
+# components get updated further up the stack (see `_copy_frame_component`).
+FRAME_COMPONENT_CACHE: LRUCache[str, FrameGroupingComponent] = LRUCache(20_000)
+
+# The grouping context values which affect the frame component
+FRAME_COMPONENT_CONTEXT_KEYS = [
+    "java_cglib_hibernate_logic",
+    "javascript_fuzzing",
+    "php_detect_anonymous_classes",
+    "with_context_line_file_origin_bug",
+]
+
 
 def is_recursive_frames(frame1: Frame, frame2: Frame | None) -> bool:
     """
@@ -300,6 +319,72 @@ def frame(
     frame = interface
     platform = frame.platform or event.platform
 
+    if options.get("grouping.frame_component_cache.enabled"):
+        frame_component = get_cached_frame_component(frame, platform, context)
+    else:
+        frame_component = _get_frame_component(frame, platform, context)
+
+    if context["is_recursion"]:
+        frame_component.update(contributes=False, hint="ignored due to recursion")
+
+    return {context["variant"]: frame_component}
+
+
+def _get_frame_cache_key(frame: Frame, platform: str | None, context: GroupingContext) -> str:
+    use_context_line = platform in context["contextline_platforms"]
+
+    key_values = (
+        context.config.id,
+        platform,
+        frame.abs_path,
+        frame.filename,
+        frame.module,
+        frame.function,
+        frame.raw_function,
+        frame.context_line if use_context_line else None,
+        frame.in_app,
+        bool(frame.data and frame.data.get("sourcemap") is not None),
+        use_context_line,
+        *(context[key] for key in FRAME_COMPONENT_CONTEXT_KEYS),
+    )
+
+    return md5(repr(key_values).encode("utf-8")).hexdigest()
+
+
+def _copy_frame_component(frame_component: FrameGroupingComponent) -> FrameGroupingComponent:
+    """
+    Copy a frame component along with its children. The values of the children are primitives, so
+    this is enough to make updates to the copy invisible to the original.
+    """
+    frame_component_copy = frame_component.shallow_copy()
+    frame_component_copy.values = [child.shallow_copy() for child in frame_component.values]
+    return frame_component_copy
+
+
+def get_cached_frame_component(
+    frame: Frame, platform: str | None, context: GroupingContext
+) -> FrameGroupingComponent:
+    """
+    Return the frame component for the given frame, reusing a previously-built component for an
+    identical frame if possible.
+    """
+    cache_key = _get_frame_cache_key(frame, platform, context)
+    cached_component = FRAME_COMPONENT_CACHE.get(cache_key)
+
+    if cached_component is None:
+        metrics.incr("grouping.frame_component_cache", tags={"result": "miss"}, sample_rate=0.01)
+        cached_component = FRAME_COMPONENT_CACHE[cache_key] = _get_frame_component(
+            frame, platform, context
+        )
+    else:
+        metrics.incr("grouping.frame_component_cache", tags={"result": "hit"}, sample_rate=0.01)
+
+    return _copy_frame_component(cached_component)
+
+
+def _get_frame_component(
+    frame: Frame, platform: str | None, context: GroupingContext
+) -> FrameGroupingComponent:
     # Safari throws [native code] frames in for calls like ``forEach``
     # whereas Chrome ignores these. Let's remove it from the hashing algo
     # so that they're more likely to group together
@@ -373,10 +458,7 @@ def frame(
         ):
             frame_component.update(contributes=False, hint="ignored low quality javascript frame")
 
-    if context["is_recursion"]:
-        frame_component.update(contributes=False, hint="ignored due to recursion")
-
-    return {context["variant"]: frame_component}
+    return frame_component
 
 
 def get_contextline_component(
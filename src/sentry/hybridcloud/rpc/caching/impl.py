@@ -1,6 +1,11 @@
-from collections.abc import Generator, Mapping
-from typing import TypeVar
-
+import contextlib
+import math
+import threading
+import time
+from collections.abc import Generator, Iterator, Mapping
+from typing import NamedTuple, TypeVar
+
+from cachetools import LRUCache
 from django.core.cache import cache
 from django.core.cache.backends.base import DEFAULT_TIMEOUT
 
@@ -26,12 +31,103 @@ def _consume_generator(g: Generator[None, None, _V]) -> _V:
             return e.value
 
 
+class _LocalEntry(NamedTuple):
+    version: int
+    # None for keys which were cleared, until a value of a newer version is stored
+    value: str | None
+    expires_at: float
+
+
+class LocalCache:
+    """
+    An optional per-process LRU tier in front of the versioned Django cache, for callables that
+    are read far more often than they change.
+
+    Entries remember the version they were read or written with, and are only served for that
+    version. Callers still read the current version of a key on every call, so clearing a key from
+    any process bumps its version and stops every process from serving its local copy. Clearing a
+    key also evicts it locally, so that values read with an older version can't be stored again
+    afterwards.
+    """
+
+    # How long to wait for a concurrent caller filling the same key, before filling it anyway
+    fill_timeout = 5.0
+
+    def __init__(self, maxsize: int) -> None:
+        self._entries: LRUCache[str, _LocalEntry] = LRUCache(maxsize)
+        self._filling: dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, version: int) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+        if (
+            entry is None
+            or entry.value is None
+            or entry.version != version
+            or entry.expires_at <= time.monotonic()
+        ):
+            return None
+        return entry.value
+
+    def set(self, key: str, value: str, version: int, timeout: int) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.version > version:
+                return
+            self._entries[key] = _LocalEntry(version, value, time.monotonic() + timeout)
+
+    def invalidate(self, key: str, version: int) -> None:
+        with self._lock:
+            self._entries[key] = _LocalEntry(version, None, math.inf)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    @contextlib.contextmanager
+    def single_flight(self, key: str) -> Iterator[bool]:
+        """
+        Lets only one caller at a time fill a missing key. Concurrent callers block until it's
+        done, and should check the local cache again afterwards. Yields whether the caller had to
+        wait.
+        """
+        with self._lock:
+            event = self._filling.get(key)
+            if event is None:
+                event = self._filling[key] = threading.Event()
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            event.wait(self.fill_timeout)
+            yield True
+            return
+
+        try:
+            yield False
+        finally:
+            with self._lock:
+                del self._filling[key]
+            event.set()
+
+
+local_cache = LocalCache(10_000)
+
+
 def _set_cache(
-    key: str, value: str | None, version: int, timeout: int | None = None
+    key: str,
+    value: str | None,
+    version: int,
+    timeout: int | None = None,
+    local_timeout: int | None = None,
 ) -> Generator[None, None, bool]:
     if timeout is None:
         timeout = DEFAULT_TIMEOUT
     result = cache.add(_versioned_key(key, version), value, timeout=timeout)
+    if local_timeout is not None and value is not None:
+        local_cache.set(key, value, version, local_timeout)
     yield
     return result
 
@@ -50,13 +146,25 @@ def _version_model(mode: SiloMode) -> type[CacheVersionBase]:
 
 def _delete_cache(key: str, mode: SiloMode) -> Generator[None, None, int]:
     version = _version_model(mode).incr_version(key)
+    local_cache.invalidate(key, version)
     yield
     return version
 
 
-def _get_cache(keys: list[str], mode: SiloMode) -> Generator[None, None, Mapping[str, str | int]]:
+def _get_versions(keys: list[str], mode: SiloMode) -> Generator[None, None, Mapping[str, int]]:
     versions = {cv.key: cv.version for cv in _version_model(mode).objects.filter(key__in=keys)}
     yield
+    return versions
+
+
+def _get_cache(
+    keys: list[str],
+    mode: SiloMode,
+    local_timeout: int | None = None,
+    versions: Mapping[str, int] | None = None,
+) -> Generator[None, None, Mapping[str, str | int]]:
+    if versions is None:
+        versions = yield from _get_versions(keys, mode)
 
     versioned_keys = [_versioned_key(key, versions.get(key, 0)) for key in keys]
     existing = cache.get_many(versioned_keys)
@@ -65,6 +173,8 @@ def _get_cache(keys: list[str], mode: SiloMode) -> Generator[None, None, Mapping
     for k, versioned_key in zip(keys, versioned_keys):
         if versioned_key in existing:
             result[k] = existing[versioned_key]
+            if local_timeout is not None and isinstance(result[k], str):
+                local_cache.set(k, existing[versioned_key], versions.get(k, 0), local_timeout)
             continue
         result[k] = versions.get(k, 0)
     return result
@@ -4,10 +4,12 @@
 # defined, because we want to reflect on type annotations and avoid forward references.
 import abc
 from collections.abc import Callable, Generator, Mapping
+from functools import partial
 from typing import TYPE_CHECKING, Generic, TypeVar
 
 import pydantic
 
+from sentry import options
 from sentry.hybridcloud.rpc.resolvers import ByRegionName
 from sentry.hybridcloud.rpc.service import RpcService, regional_rpc_method, rpc_method
 from sentry.silo.base import SiloMode
@@ -35,6 +37,53 @@ class RegionCachingService(RpcService):
 
 
 _R = TypeVar("_R", bound=pydantic.BaseModel)
+_T = TypeVar("_T")
+
+
+def _get_local_timeout(local_timeout: int | None) -> int | None:
+    if local_timeout is None or not options.get("hybridcloud.caching.local-cache.enabled"):
+        return None
+    return local_timeout
+
+
+def _resolve_key(
+    base_key: str,
+    key: str,
+    silo_mode: SiloMode,
+    local_timeout: int | None,
+    resolve: Callable[[Mapping[str, int | str], int | None], Generator[None, None, _T]],
+) -> _T:
+    """
+    Reads a single key from cache and resolves it. With a local timeout, the value of the current
+    version of the key is read from the local cache first, and concurrent misses of the key in
+    this process are only resolved by one of the callers, while the others wait for it to fill
+    the local cache.
+    """
+    from .impl import _consume_generator, _get_cache, _get_versions, local_cache
+
+    local_timeout = _get_local_timeout(local_timeout)
+    if local_timeout is None:
+        values = _consume_generator(_get_cache([key], silo_mode))
+        return _consume_generator(resolve(values, None))
+
+    versions = _consume_generator(_get_versions([key], silo_mode))
+    version = versions.get(key, 0)
+    result = "hit"
+    value = local_cache.get(key, version)
+    if value is None:
+        with local_cache.single_flight(key) as waited:
+            if waited:
+                result = "single_flight"
+                value = local_cache.get(key, version)
+            if value is None:
+                metrics.incr(
+                    "hybridcloud.caching.local", tags={"base_key": base_key, "result": "miss"}
+                )
+                values = _consume_generator(_get_cache([key], silo_mode, local_timeout, versions))
+                return _consume_generator(resolve(values, local_timeout))
+
+    metrics.incr("hybridcloud.caching.local", tags={"base_key": base_key, "result": result})
+    return _consume_generator(resolve({key: value}, local_timeout))
 
 
 class SiloCacheBackedCallable(Generic[_R]):
@@ -52,6 +101,7 @@ class SiloCacheBackedCallable(Generic[_R]):
     cb: Callable[[int], _R | None]
     type_: type[_R]
     timeout: int | None
+    local_timeout: int | None
 
     def __init__(
         self,
@@ -60,12 +110,14 @@ class SiloCacheBackedCallable(Generic[_R]):
         cb: Callable[[int], _R | None],
         t: type[_R],
         timeout: int | None = None,
+        local_timeout: int | None = None,
     ):
         self.base_key = base_key
         self.silo_mode = silo_mode
         self.cb = cb
         self.type_ = t
         self.timeout = timeout
+        self.local_timeout = local_timeout
 
     def __call__(self, object_id: int) -> _R | None:
         if (
@@ -79,7 +131,7 @@ class SiloCacheBackedCallable(Generic[_R]):
         return f"{self.base_key}:{object_id}"
 
     def resolve_from(
-        self, i: int, values: Mapping[str, int | str]
+        self, i: int, values: Mapping[str, int | str], local_timeout: int | None = None
     ) -> Generator[None, None, _R | None]:
         from .impl import _consume_generator, _delete_cache, _set_cache
 
@@ -98,15 +150,17 @@ class SiloCacheBackedCallable(Generic[_R]):
         metrics.incr("hybridcloud.caching.one.rpc", tags={"base_key": self.base_key})
         r = self.cb(i)
         if r is not None:
-            _consume_generator(_set_cache(key, r.json(), version, self.timeout))
+            _consume_generator(_set_cache(key, r.json(), version, self.timeout, local_timeout))
         return r
 
     def get_one(self, object_id: int) -> _R | None:
-        from .impl import _consume_generator, _get_cache
-
-        key = self.key_from(object_id)
-        values = _consume_generator(_get_cache([key], self.silo_mode))
-        return _consume_generator(self.resolve_from(object_id, values))
+        return _resolve_key(
+            self.base_key,
+            self.key_from(object_id),
+            self.silo_mode,
+            self.local_timeout,
+            partial(self.resolve_from, object_id),
+        )
 
 
 class SiloCacheBackedListCallable(Generic[_R]):
@@ -124,6 +178,7 @@ class SiloCacheBackedListCallable(Generic[_R]):
     cb: Callable[[int], list[_R]]
     type_: type[_R]
     timeout: int | None
+    local_timeout: int | None
 
     def __init__(
         self,
@@ -132,12 +187,14 @@ class SiloCacheBackedListCallable(Generic[_R]):
         cb: Callable[[int], list[_R]],
         t: type[_R],
         timeout: int | None = None,
+        local_timeout: int | None = None,
     ):
         self.base_key = base_key
         self.silo_mode = silo_mode
         self.cb = cb
         self.type_ = t
         self.timeout = timeout
+        self.local_timeout = local_timeout
 
     def __call__(self, object_id: int) -> list[_R]:
         if (
@@ -151,7 +208,7 @@ class SiloCacheBackedListCallable(Generic[_R]):
         return f"{self.base_key}:{object_id}"
 
     def resolve_from(
-        self, object_id: int, values: Mapping[str, int | str]
+        self, object_id: int, values: Mapping[str, int | str], local_timeout: int | None = None
     ) -> Generator[None, None, list[_R]]:
         from .impl import _consume_generator, _delete_cache, _set_cache
 
@@ -171,15 +228,17 @@ class SiloCacheBackedListCallable(Generic[_R]):
         result = self.cb(object_id)
         if result is not None:
             cache_value = json.dumps([item.json() for item in result])
-            _consume_generator(_set_cache(key, cache_value, version, self.timeout))
+            _consume_generator(_set_cache(key, cache_value, version, self.timeout, local_timeout))
         return result
 
     def get_results(self, object_id: int) -> list[_R]:
-        from .impl import _consume_generator, _get_cache
-
-        key = self.key_from(object_id)
-        values = _consume_generator(_get_cache([key], self.silo_mode))
-        return _consume_generator(self.resolve_from(object_id, values))
+        return _resolve_key(
+            self.base_key,
+            self.key_from(object_id),
+            self.silo_mode,
+            self.local_timeout,
+            partial(self.resolve_from, object_id),
+        )
 
 
 class SiloCacheManyBackedCallable(Generic[_R]):
@@ -197,6 +256,7 @@ class SiloCacheManyBackedCallable(Generic[_R]):
     cb: Callable[[list[int]], list[_R]]
     type_: type[_R]
     timeout: int | None
+    local_timeout: int | None
 
     def __init__(
         self,
@@ -205,12 +265,14 @@ class SiloCacheManyBackedCallable(Generic[_R]):
         cb: Callable[[list[int]], list[_R]],
         t: type[_R],
         timeout: int | None = None,
+        local_timeout: int | None = None,
     ):
         self.base_key = base_key
         self.silo_mode = silo_mode
         self.cb = cb
         self.type_ = t
         self.timeout = timeout
+        self.local_timeout = local_timeout
 
     def __call__(self, ids: list[int]) -> list[_R]:
         if (
@@ -224,10 +286,44 @@ class SiloCacheManyBackedCallable(Generic[_R]):
         return f"{self.base_key}:{object_id}"
 
     def get_many(self, ids: list[int]) -> list[_R]:
-        from .impl import _consume_generator, _delete_cache, _get_cache, _set_cache
+        from .impl import (
+            _consume_generator,
+            _delete_cache,
+            _get_cache,
+            _get_versions,
+            _set_cache,
+            local_cache,
+        )
 
         keys = {i: self.key_from(i) for i in ids}
-        cache_values = _consume_generator(_get_cache(list(keys.values()), self.silo_mode))
+        local_timeout = _get_local_timeout(self.local_timeout)
+
+        cache_values: dict[str, str | int] = {}
+        versions: Mapping[str, int] | None = None
+        if local_timeout is not None:
+            versions = _consume_generator(_get_versions(list(keys.values()), self.silo_mode))
+            for cache_key in keys.values():
+                local_value = local_cache.get(cache_key, versions.get(cache_key, 0))
+                if local_value is not None:
+                    cache_values[cache_key] = local_value
+            metrics.incr(
+                "hybridcloud.caching.local",
+                len(cache_values),
+                tags={"base_key": self.base_key, "result": "hit"},
+            )
+            metrics.incr(
+                "hybridcloud.caching.local",
+                len(keys) - len(cache_values),
+                tags={"base_key": self.base_key, "result": "miss"},
+            )
+
+        missing_cache_keys = [key for key in keys.values() if key not in cache_values]
+        if missing_cache_keys:
+            cache_values.update(
+                _consume_generator(
+                    _get_cache(missing_cache_keys, self.silo_mode, local_timeout, versions)
+                )
+            )
 
         # Mapping between object_id and cache versions
         missing: dict[int, int] = {}
@@ -267,14 +363,20 @@ class SiloCacheManyBackedCallable(Generic[_R]):
                 continue
             cache_key = keys[record_id]
             record_version = missing[record_id]
-            _consume_generator(_set_cache(cache_key, record.json(), record_version, self.timeout))
+            _consume_generator(
+                _set_cache(cache_key, record.json(), record_version, self.timeout, local_timeout)
+            )
             found[record_id] = record
 
         return [found[id] for id in ids if id in found]
 
 
 def back_with_silo_cache(
-    base_key: str, silo_mode: SiloMode, t: type[_R], timeout: int | None = None
+    base_key: str,
+    silo_mode: SiloMode,
+    t: type[_R],
+    timeout: int | None = None,
+    local_timeout: int | None = None,
 ) -> Callable[[Callable[[int], _R | None]], "SiloCacheBackedCallable[_R]"]:
     """
     Decorator for adding local caching to RPC operations on a single record.
@@ -285,17 +387,26 @@ def back_with_silo_cache(
     function for generating keys to clear cache entries
     with region_caching_service and control_caching_service.
 
+    With `local_timeout`, records are additionally kept in a per-process cache for that many
+    seconds, while `hybridcloud.caching.local-cache.enabled` is set. The cache version of the
+    record is still read on every call, and local copies are only served for the version they
+    were read with, so clearing a key from any process takes effect everywhere right away.
+
     See user_service.get_user() for an example usage.
     """
 
     def wrapper(cb: Callable[[int], _R | None]) -> "SiloCacheBackedCallable[_R]":
-        return SiloCacheBackedCallable(base_key, silo_mode, cb, t, timeout)
+        return SiloCacheBackedCallable(base_key, silo_mode, cb, t, timeout, local_timeout)
 
     return wrapper
 
 
 def back_with_silo_cache_many(
-    base_key: str, silo_mode: SiloMode, t: type[_R], timeout: int | None = None
+    base_key: str,
+    silo_mode: SiloMode,
+    t: type[_R],
+    timeout: int | None = None,
+    local_timeout: int | None = None,
 ) -> Callable[[Callable[[list[int]], list[_R]]], "SiloCacheManyBackedCallable[_R]"]:
     """
     Decorator for adding local caching to RPC operations that fetch many records by id.
@@ -306,17 +417,21 @@ def back_with_silo_cache_many(
     in cache for future use.
 
     Like `back_with_silo_cache`, this decorator adds helpers to the wrapped function
-    for generating keys to clear cache.
+    for generating keys to clear cache, and supports a per-process cache with `local_timeout`.
     """
 
     def wrapper(cb: Callable[[list[int]], list[_R]]) -> "SiloCacheManyBackedCallable[_R]":
-        return SiloCacheManyBackedCallable(base_key, silo_mode, cb, t, timeout)
+        return SiloCacheManyBackedCallable(base_key, silo_mode, cb, t, timeout, local_timeout)
 
     return wrapper
 
 
 def back_with_silo_cache_list(
-    base_key: str, silo_mode: SiloMode, t: type[_R], timeout: int | None = None
+    base_key: str,
+    silo_mode: SiloMode,
+    t: type[_R],
+    timeout: int | None = None,
+    local_timeout: int | None = None,
 ) -> Callable[[Callable[[int], list[_R]]], "SiloCacheBackedListCallable[_R]"]:
     """
     Decorator for adding local caching to RPC operations for list results
@@ -334,7 +449,7 @@ def back_with_silo_cache_list(
     """
 
     def wrapper(cb: Callable[[int], list[_R]]) -> "SiloCacheBackedListCallable[_R]":
-        return SiloCacheBackedListCallable(base_key, silo_mode, cb, t, timeout)
+        return SiloCacheBackedListCallable(base_key, silo_mode, cb, t, timeout, local_timeout)
 
     return wrapper
 
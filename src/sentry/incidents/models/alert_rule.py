@@ -121,6 +121,42 @@ class AlertRuleManager(BaseManager["AlertRule"]):
 
         return alert_rule
 
+    def get_for_subscriptions(
+        self, subscriptions: Collection[QuerySubscription]
+    ) -> dict[int, AlertRule]:
+        """
+        Fetches the AlertRules associated with many Subscriptions, keyed by subscription id.
+        Attempts to fetch from cache, then fetches all missing rules with a single query.
+        Subscriptions without an AlertRule are left out.
+        """
+        cache_keys = {
+            self.__build_subscription_cache_key(subscription.id): subscription
+            for subscription in subscriptions
+        }
+        result = {
+            cache_keys[cache_key].id: alert_rule
+            for cache_key, alert_rule in cache.get_many(list(cache_keys)).items()
+            if alert_rule is not None
+        }
+
+        missing = [subscription for subscription in subscriptions if subscription.id not in result]
+        if missing:
+            alert_rules = {
+                alert_rule.snuba_query_id: alert_rule
+                for alert_rule in AlertRule.objects.filter(
+                    snuba_query_id__in={subscription.snuba_query_id for subscription in missing}
+                )
+            }
+            to_cache = {}
+            for subscription in missing:
+                alert_rule = alert_rules.get(subscription.snuba_query_id)
+                if alert_rule is not None:
+                    result[subscription.id] = alert_rule
+                    to_cache[self.__build_subscription_cache_key(subscription.id)] = alert_rule
+            cache.set_many(to_cache, 3600)
+
+        return result
+
     @classmethod
     def clear_subscription_cache(cls, instance, **kwargs: Any) -> None:
         cache.delete(cls.__build_subscription_cache_key(instance.id))
@@ -295,6 +331,41 @@ class AlertRuleTriggerManager(BaseManager["AlertRuleTrigger"]):
             cache.set(cache_key, triggers, 3600)
         return triggers
 
+    def get_for_alert_rules(
+        self, alert_rules: Collection[AlertRule]
+    ) -> dict[int, list[AlertRuleTrigger]]:
+        """
+        Fetches the AlertRuleTriggers associated with many AlertRules, keyed by alert rule id.
+        Attempts to fetch from cache, then fetches all missing triggers with a single query.
+        """
+        cache_keys = {
+            self._build_trigger_cache_key(alert_rule.id): alert_rule.id
+            for alert_rule in alert_rules
+        }
+        result = {
+            cache_keys[cache_key]: triggers
+            for cache_key, triggers in cache.get_many(list(cache_keys)).items()
+            if triggers is not None
+        }
+
+        missing = {alert_rule.id for alert_rule in alert_rules} - result.keys()
+        if missing:
+            fetched: dict[int, list[AlertRuleTrigger]] = {
+                alert_rule_id: [] for alert_rule_id in missing
+            }
+            for trigger in AlertRuleTrigger.objects.filter(alert_rule_id__in=missing):
+                fetched[trigger.alert_rule_id].append(trigger)
+            cache.set_many(
+                {
+                    self._build_trigger_cache_key(alert_rule_id): triggers
+                    for alert_rule_id, triggers in fetched.items()
+                },
+                3600,
+            )
+            result.update(fetched)
+
+        return result
+
     @classmethod
     def clear_trigger_cache(cls, instance: AlertRuleTrigger, **kwargs: Any) -> None:
         cache.delete(cls._build_trigger_cache_key(instance.alert_rule_id))
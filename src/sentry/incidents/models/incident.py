@@ -88,6 +88,54 @@ class IncidentManager(BaseManager["Incident"]):
 
         return incident
 
+    def get_active_incidents(self, keys):
+        """
+        Bulk version of `get_active_incident`. Takes a list of `(alert_rule_id, project_id,
+        subscription_id)` tuples, where `subscription_id` may be None, and returns the active
+        incident (or None) for each of them. Incidents missing from the cache are fetched with
+        a single query.
+        """
+        cache_keys = {self._build_active_incident_cache_key(*key): key for key in keys}
+        result = {}
+        for cache_key, incident in cache.get_many(list(cache_keys)).items():
+            if incident is not None:
+                # A falsey value means we stored that there is no active incident
+                result[cache_keys[cache_key]] = incident or None
+
+        missing = {key for key in keys if key not in result}
+        if missing:
+            fetched = dict.fromkeys(missing)
+            incident_projects = (
+                IncidentProject.objects.filter(
+                    incident__type=IncidentType.ALERT_TRIGGERED.value,
+                    incident__alert_rule_id__in={key[0] for key in missing},
+                    project_id__in={key[1] for key in missing},
+                )
+                .exclude(incident__status=IncidentStatus.CLOSED.value)
+                .select_related("incident")
+                .order_by("-incident__date_added")
+            )
+            for incident_project in incident_projects:
+                incident = incident_project.incident
+                key = (
+                    incident.alert_rule_id,
+                    incident_project.project_id,
+                    incident.subscription_id,
+                )
+                # Ordered by date, so the first incident for each key is the latest one
+                if key in fetched and fetched[key] is None:
+                    fetched[key] = incident
+
+            cache.set_many(
+                {
+                    self._build_active_incident_cache_key(*key): incident or False
+                    for key, incident in fetched.items()
+                }
+            )
+            result.update(fetched)
+
+        return result
+
     @classmethod
     def clear_active_incident_cache(cls, instance, **kwargs):
         # instance is an Incident
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import logging
 import operator
+from collections import defaultdict
 from collections.abc import Sequence
 from copy import deepcopy
 from datetime import datetime, timedelta
@@ -10,6 +11,7 @@ from typing import TypeVar, cast
 from django.conf import settings
 from django.db import router, transaction
 from django.utils import timezone
+from redis.client import Pipeline
 from sentry_redis_tools.retrying_cluster import RetryingRedisCluster
 from snuba_sdk import Column, Condition, Limit, Op
 
@@ -81,6 +83,9 @@ CRASH_RATE_ALERT_MINIMUM_THRESHOLD: int | None = None
 
 T = TypeVar("T")
 
+# (last_update, trigger_alert_counts, trigger_resolve_counts)
+AlertRuleStats = tuple[datetime, dict[int, int], dict[int, int]]
+
 
 class SubscriptionProcessor:
     """
@@ -100,21 +105,40 @@ class SubscriptionProcessor:
         AlertRuleThresholdType.BELOW: (operator.lt, operator.gt),
     }
 
-    def __init__(self, subscription: QuerySubscription) -> None:
+    def __init__(
+        self,
+        subscription: QuerySubscription,
+        alert_rule: AlertRule | None = None,
+        triggers: list[AlertRuleTrigger] | None = None,
+        stats: AlertRuleStats | None = None,
+    ) -> None:
+        """
+        `alert_rule`, `triggers` and `stats` can be passed in when they have been prefetched
+        for many subscriptions at once, see `process_updates`.
+        """
         self.subscription = subscription
-        try:
-            self.alert_rule = AlertRule.objects.get_for_subscription(subscription)
-        except AlertRule.DoesNotExist:
-            return
+        # Set by `process_updates`, which writes the stats of all processors at once
+        self.defer_stats_update = False
+        self.stats_updated = False
+        self.fired_trigger_actions = False
+        if alert_rule is None:
+            try:
+                alert_rule = AlertRule.objects.get_for_subscription(subscription)
+            except AlertRule.DoesNotExist:
+                return
+        self.alert_rule = alert_rule
 
-        self.triggers = AlertRuleTrigger.objects.get_for_alert_rule(self.alert_rule)
-        self.triggers.sort(key=lambda trigger: trigger.alert_threshold)
+        if triggers is None:
+            triggers = AlertRuleTrigger.objects.get_for_alert_rule(self.alert_rule)
+        self.triggers = sorted(triggers, key=lambda trigger: trigger.alert_threshold)
 
+        if stats is None:
+            stats = get_alert_rule_stats(self.alert_rule, self.subscription, self.triggers)
         (
             self.last_update,
             self.trigger_alert_counts,
             self.trigger_resolve_counts,
-        ) = get_alert_rule_stats(self.alert_rule, self.subscription, self.triggers)
+        ) = stats
         self.orig_trigger_alert_counts = deepcopy(self.trigger_alert_counts)
         self.orig_trigger_resolve_counts = deepcopy(self.trigger_resolve_counts)
 
@@ -784,6 +808,8 @@ class SubscriptionProcessor:
                 actions_to_fire = warning_actions
                 new_status = IncidentStatus.WARNING.value
 
+        self.fired_trigger_actions = True
+
         # Schedule the actions to be fired
         for action in actions_to_fire:
             transaction.on_commit(
@@ -828,8 +854,28 @@ class SubscriptionProcessor:
     def update_alert_rule_stats(self) -> None:
         """
         Updates stats about the alert rule, if they're changed.
+
+        `process_updates` defers this to the end of the batch, unless trigger actions have
+        been fired. Those stats are written right away, so that the update is not processed
+        and alerted on a second time if the batch has to be processed again.
         :return:
         """
+        if self.defer_stats_update and not self.fired_trigger_actions:
+            self.stats_updated = True
+            return
+
+        update_alert_rule_stats(self.alert_rule, self.subscription, *self.get_updated_stats())
+        if self.defer_stats_update:
+            # Only counts which change from here on are left to write at the end of the batch
+            self.orig_trigger_alert_counts = deepcopy(self.trigger_alert_counts)
+            self.orig_trigger_resolve_counts = deepcopy(self.trigger_resolve_counts)
+            self.fired_trigger_actions = False
+            self.stats_updated = False
+
+    def get_updated_stats(self) -> AlertRuleStats:
+        """
+        Returns the last update and the trigger counts which changed since the stats were read
+        """
         updated_trigger_alert_counts = {
             trigger_id: alert_count
             for trigger_id, alert_count in self.trigger_alert_counts.items()
@@ -841,13 +887,113 @@ class SubscriptionProcessor:
             if alert_count != self.orig_trigger_resolve_counts[trigger_id]
         }
 
-        update_alert_rule_stats(
-            self.alert_rule,
-            self.subscription,
-            self.last_update,
-            updated_trigger_alert_counts,
-            updated_trigger_resolve_counts,
+        return self.last_update, updated_trigger_alert_counts, updated_trigger_resolve_counts
+
+    def get_state(self) -> AlertRuleStats:
+        return self.last_update, dict(self.trigger_alert_counts), dict(self.trigger_resolve_counts)
+
+    def restore_state(self, state: AlertRuleStats) -> None:
+        """
+        Rolls back to a state returned by `get_state`, after failing to process an update
+        """
+        self.last_update, self.trigger_alert_counts, self.trigger_resolve_counts = state
+        self.fired_trigger_actions = False
+        # The incident may have been changed part way, so it's fetched again when needed
+        for attr in ("_active_incident", "_incident_triggers"):
+            if hasattr(self, attr):
+                delattr(self, attr)
+
+
+def process_updates(updates: Sequence[tuple[QuerySubscriptionUpdate, QuerySubscription]]) -> None:
+    """
+    Processes many subscription updates, with the same result as calling `process_update` for
+    each of them in order. Updates are grouped by subscription (and so by alert rule), which
+    share a single processor. Alert rules, triggers, active incidents and stats are fetched
+    in bulk up front, and stats are written with a single pipeline once all updates have been
+    processed, apart from those of updates which fired trigger actions.
+    """
+    subscriptions: dict[int, QuerySubscription] = {}
+    updates_by_subscription: dict[int, list[QuerySubscriptionUpdate]] = defaultdict(list)
+    for subscription_update, subscription in updates:
+        subscriptions[subscription.id] = subscription
+        updates_by_subscription[subscription.id].append(subscription_update)
+
+    metrics.distribution("incidents.subscription_processor.process_updates.updates", len(updates))
+    metrics.distribution(
+        "incidents.subscription_processor.process_updates.subscriptions", len(subscriptions)
+    )
+
+    with metrics.timer("incidents.subscription_processor.process_updates.prefetch"):
+        alert_rules = AlertRule.objects.get_for_subscriptions(list(subscriptions.values()))
+        triggers = AlertRuleTrigger.objects.get_for_alert_rules(list(alert_rules.values()))
+        items = [
+            (alert_rule, subscriptions[subscription_id], triggers[alert_rule.id])
+            for subscription_id, alert_rule in alert_rules.items()
+        ]
+        stats = get_alert_rule_stats_many(items)
+        active_incidents = Incident.objects.get_active_incidents(
+            [
+                (alert_rule.id, subscription.project_id, subscription_id)
+                for alert_rule, subscription, _ in items
+                for subscription_id in (subscription.id, None)
+            ]
+        )
+
+    processors = []
+    for (alert_rule, subscription, alert_rule_triggers), alert_rule_stats in zip(items, stats):
+        processor = SubscriptionProcessor(
+            subscription,
+            alert_rule=alert_rule,
+            triggers=alert_rule_triggers,
+            stats=alert_rule_stats,
+        )
+        # TODO: make subscription required, see `active_incident`
+        processor.active_incident = (
+            active_incidents[(alert_rule.id, subscription.project_id, subscription.id)]
+            or active_incidents[(alert_rule.id, subscription.project_id, None)]
+        )
+        processor.defer_stats_update = True
+        processors.append(processor)
+
+    # Subscriptions without an alert rule are cleaned up by the first update
+    for subscription_id, subscription in subscriptions.items():
+        if subscription_id not in alert_rules:
+            processor = SubscriptionProcessor(subscription)
+            _process_update(processor, updates_by_subscription[subscription_id][0])
+
+    for processor in processors:
+        for subscription_update in updates_by_subscription[processor.subscription.id]:
+            state = processor.get_state()
+            if not _process_update(processor, subscription_update):
+                processor.restore_state(state)
+
+    update_alert_rule_stats_many(
+        [
+            (processor.alert_rule, processor.subscription, *processor.get_updated_stats())
+            for processor in processors
+            if processor.stats_updated
+        ]
+    )
+
+
+def _process_update(
+    processor: SubscriptionProcessor, subscription_update: QuerySubscriptionUpdate
+) -> bool:
+    try:
+        # noinspection SpellCheckingInspection
+        with metrics.timer("incidents.subscription_procesor.process_update"):
+            processor.process_update(subscription_update)
+    except Exception:
+        # Like in the consumer, a single update must never block the others
+        logger.exception(
+            "Failed to process subscription update",
+            extra={
+                "subscription_id": processor.subscription.id,
+                "timestamp": subscription_update["timestamp"],
+            },
         )
+        return False
+    return True
 
 
 def build_alert_rule_stat_keys(alert_rule: AlertRule, subscription: QuerySubscription) -> list[str]:
@@ -895,7 +1041,7 @@ def partition(iterable: Sequence[T], n: int) -> Sequence[Sequence[T]]:
 
 def get_alert_rule_stats(
     alert_rule: AlertRule, subscription: QuerySubscription, triggers: list[AlertRuleTrigger]
-) -> tuple[datetime, dict[int, int], dict[int, int]]:
+) -> AlertRuleStats:
     """
     Fetches stats about the alert rule, specific to the current subscription
     :return: A tuple containing the stats about the alert rule and subscription.
@@ -910,6 +1056,36 @@ def get_alert_rule_stats(
     alert_rule_keys = build_alert_rule_stat_keys(alert_rule, subscription)
     trigger_keys = build_trigger_stat_keys(alert_rule, subscription, triggers)
     results = get_redis_client().mget(alert_rule_keys + trigger_keys)
+    return _parse_alert_rule_stats(results, triggers)
+
+
+def get_alert_rule_stats_many(
+    items: Sequence[tuple[AlertRule, QuerySubscription, list[AlertRuleTrigger]]],
+) -> list[AlertRuleStats]:
+    """
+    Fetches the stats of many alert rules and subscriptions with a single pipeline. Returns
+    the same as `get_alert_rule_stats` for each item, in order.
+    """
+    if not items:
+        return []
+
+    pipeline = get_redis_client().pipeline()
+    for alert_rule, subscription, triggers in items:
+        # The keys of a single alert rule and subscription all share a hash slot
+        pipeline.mget(
+            build_alert_rule_stat_keys(alert_rule, subscription)
+            + build_trigger_stat_keys(alert_rule, subscription, triggers)
+        )
+
+    return [
+        _parse_alert_rule_stats(results, triggers)
+        for results, (_, _, triggers) in zip(pipeline.execute(), items)
+    ]
+
+
+def _parse_alert_rule_stats(
+    results: Sequence[str | None], triggers: list[AlertRuleTrigger]
+) -> AlertRuleStats:
     results = tuple(0 if result is None else int(result) for result in results)
     last_update = to_datetime(results[0])
     trigger_results = results[1:]
@@ -936,7 +1112,36 @@ def update_alert_rule_stats(
     Updates stats about the alert rule, subscription and triggers if they've changed.
     """
     pipeline = get_redis_client().pipeline()
+    _set_alert_rule_stats(
+        pipeline, alert_rule, subscription, last_update, alert_counts, resolve_counts
+    )
+    pipeline.execute()
+
+
+def update_alert_rule_stats_many(
+    items: Sequence[tuple[AlertRule, QuerySubscription, datetime, dict[int, int], dict[int, int]]],
+) -> None:
+    """
+    Updates the stats of many alert rules and subscriptions with a single pipeline. Takes the
+    same arguments as `update_alert_rule_stats` for each item.
+    """
+    if not items:
+        return
+
+    pipeline = get_redis_client().pipeline()
+    for item in items:
+        _set_alert_rule_stats(pipeline, *item)
+    pipeline.execute()
+
 
+def _set_alert_rule_stats(
+    pipeline: Pipeline,
+    alert_rule: AlertRule,
+    subscription: QuerySubscription,
+    last_update: datetime,
+    alert_counts: dict[int, int],
+    resolve_counts: dict[int, int],
+) -> None:
     counts_with_stat_keys = zip(ALERT_RULE_TRIGGER_STAT_KEYS, (alert_counts, resolve_counts))
     for stat_key, trigger_counts in counts_with_stat_keys:
         for trigger_id, alert_count in trigger_counts.items():
@@ -950,7 +1155,6 @@ def update_alert_rule_stats(
 
     last_update_key = build_alert_rule_stat_keys(alert_rule, subscription)[0]
     pipeline.set(last_update_key, int(last_update.timestamp()), ex=REDIS_TTL)
-    pipeline.execute()
 
 
 def get_redis_client() -> RetryingRedisCluster:
@@ -14,6 +14,7 @@ from arroyo.processing.strategies import (
 )
 from arroyo.types import Commit, FilteredPayload, Message, Partition
 
+from sentry import buffer
 from sentry.ingest.types import ConsumerType
 from sentry.processing.backpressure.arroyo import HealthChecker, create_backpressure_step
 from sentry.utils.arroyo import MultiprocessingPool, run_task_with_multiprocessing
@@ -34,12 +35,24 @@ TInput = TypeVar("TInput")
 TOutput = TypeVar("TOutput")
 
 
+def _process_and_flush_buffer_incrs(
+    function: Callable[[Message[TInput]], TOutput], message: Message[TInput]
+) -> TOutput:
+    try:
+        return function(message)
+    finally:
+        # Buffer increments coalesced while processing the message are written before its offset
+        # can be committed, also in multiprocessing workers which don't get to flush on shutdown.
+        buffer.backend.flush_incrs()
+
+
 def maybe_multiprocess_step(
     mp: MultiProcessConfig | None,
     function: Callable[[Message[TInput]], TOutput],
     next_step: ProcessingStrategy[FilteredPayload | TOutput],
     pool: MultiprocessingPool | None,
 ) -> ProcessingStrategy[FilteredPayload | TInput]:
+    function = partial(_process_and_flush_buffer_incrs, function)
     if mp is not None:
         assert pool is not None
         return run_task_with_multiprocessing(
@@ -159,6 +172,8 @@ class IngestStrategyFactory(ProcessingStrategyFactory[KafkaPayload]):
         self._pool.close()
         if self._attachments_pool:
             self._attachments_pool.close()
+        # Events saved in this process may have coalesced buffer increments
+        buffer.backend.flush_incrs()
 
 
 class IngestTransactionsStrategyFactory(ProcessingStrategyFactory[KafkaPayload]):
@@ -214,3 +229,4 @@ class IngestTransactionsStrategyFactory(ProcessingStrategyFactory[KafkaPayload])
 
     def shutdown(self) -> None:
         self._pool.close()
+        buffer.backend.flush_incrs()
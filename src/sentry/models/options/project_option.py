@@ -112,7 +112,7 @@ class ProjectOptionManager(OptionManager["ProjectOption"]):
 
     def unset_value(self, project: Project, key: str) -> None:
         self.filter(project=project, key=key).delete()
-        self.reload_cache(project.id, "projectoption.unset_value")
+        self.reload_cache(project.id, "projectoption.unset_value", option_key=key)
 
     def set_value(self, project: int | Project, key: str, value: Any) -> bool:
         if isinstance(project, models.Model):
@@ -123,7 +123,7 @@ class ProjectOptionManager(OptionManager["ProjectOption"]):
         inst, created = self.create_or_update(
             project_id=project_id, key=key, values={"value": value}
         )
-        self.reload_cache(project_id, "projectoption.set_value")
+        self.reload_cache(project_id, "projectoption.set_value", option_key=key)
 
         return created or inst > 0
 
@@ -143,11 +143,45 @@ class ProjectOptionManager(OptionManager["ProjectOption"]):
 
         return self._option_cache.get(cache_key, {})
 
-    def reload_cache(self, project_id: int, update_reason: str) -> Mapping[str, Any]:
+    def prefetch_all_values(self, project_ids: Sequence[int]) -> None:
+        """
+        Loads the options of many projects into the local cache with a single cache lookup and
+        database query, rather than one each per project in `get_all_values`.
+        """
+        missing = {}
+        for project_id in project_ids:
+            cache_key = self._make_key(project_id)
+            if cache_key not in self._option_cache:
+                missing[cache_key] = project_id
+
+        if not missing:
+            return
+
+        for cache_key, result in cache.get_many(list(missing)).items():
+            if result is not None:
+                self._option_cache[cache_key] = result
+                del missing[cache_key]
+
+        if not missing:
+            return
+
+        results: dict[int, dict[str, Any]] = {project_id: {} for project_id in missing.values()}
+        for option in self.filter(project_id__in=list(results)):
+            results[option.project_id][option.key] = option.value
+
+        to_cache = {self._make_key(project_id): result for project_id, result in results.items()}
+        cache.set_many(to_cache)
+        self._option_cache.update(to_cache)
+
+    def reload_cache(
+        self, project_id: int, update_reason: str, option_key: str | None = None
+    ) -> Mapping[str, Any]:
         from sentry.tasks.relay import schedule_invalidate_project_config
 
         if update_reason != "projectoption.get_all_values":
-            schedule_invalidate_project_config(project_id=project_id, trigger=update_reason)
+            schedule_invalidate_project_config(
+                project_id=project_id, trigger=update_reason, option_key=option_key
+            )
         cache_key = self._make_key(project_id)
         result = {i.key: i.value for i in self.filter(project=project_id)}
         cache.set(cache_key, result)
@@ -155,10 +189,10 @@ class ProjectOptionManager(OptionManager["ProjectOption"]):
         return result
 
     def post_save(self, *, instance: ProjectOption, created: bool, **kwargs: object) -> None:
-        self.reload_cache(instance.project_id, "projectoption.post_save")
+        self.reload_cache(instance.project_id, "projectoption.post_save", option_key=instance.key)
 
     def post_delete(self, instance: ProjectOption, **kwargs: Any) -> None:
-        self.reload_cache(instance.project_id, "projectoption.post_delete")
+        self.reload_cache(instance.project_id, "projectoption.post_delete", option_key=instance.key)
 
     def isset(self, project: Project, key: str) -> bool:
         return self.get_value(project, key, default=Ellipsis) is not Ellipsis
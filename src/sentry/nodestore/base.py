@@ -2,10 +2,11 @@ from __future__ import annotations
 
 from collections.abc import Mapping
 from datetime import datetime, timedelta
-from threading import local
+from threading import Lock, local
 from typing import Any
 
 import sentry_sdk
+from cachetools import LRUCache
 from django.core.cache import BaseCache, InvalidCacheBackendError, caches
 from django.utils.functional import cached_property
 
@@ -29,6 +30,69 @@ json_dumps = json.JSONEncoder(
 json_loads = json.loads
 
 
+class LocalNodeCache:
+    """
+    A per-process LRU cache of raw node payloads, bounded by their total size in bytes
+    (`nodestore.local-cache.max-bytes`, disabled if 0).
+
+    Unlike the `nodedata` Django cache this never leaves the process, so it can only be
+    invalidated for writes and deletes made by the same process. It is meant for the same event
+    being fetched several times within a single task.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._cache: LRUCache[str, bytes] = LRUCache(maxsize=0, getsizeof=len)
+
+    def _get_cache(self) -> LRUCache[str, bytes] | None:
+        max_bytes = options.get("nodestore.local-cache.max-bytes")
+        if not max_bytes:
+            if self._cache.currsize:
+                self._cache = LRUCache(maxsize=0, getsizeof=len)
+            return None
+        if self._cache.maxsize != max_bytes:
+            self._cache = LRUCache(maxsize=max_bytes, getsizeof=len)
+        return self._cache
+
+    def get_many(self, id_list: list[str]) -> dict[str, bytes]:
+        with self._lock:
+            cache = self._get_cache()
+            if cache is None:
+                return {}
+            rv = {id: cache[id] for id in id_list if id in cache}
+
+        metrics.incr("nodestore.local_cache.get", amount=len(rv), tags={"result": "hit"})
+        metrics.incr(
+            "nodestore.local_cache.get", amount=len(id_list) - len(rv), tags={"result": "miss"}
+        )
+        return rv
+
+    def set_many(self, items: Mapping[str, bytes | None]) -> None:
+        with self._lock:
+            cache = self._get_cache()
+            if cache is None:
+                return
+            for id, data in items.items():
+                # Payloads larger than the whole cache would just evict everything else
+                if data is not None and len(data) <= cache.maxsize:
+                    cache[id] = data
+            currsize = cache.currsize
+
+        metrics.gauge("nodestore.local_cache.bytes", currsize)
+
+    def delete_many(self, id_list: list[str]) -> None:
+        with self._lock:
+            for id in id_list:
+                self._cache.pop(id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+local_node_cache = LocalNodeCache()
+
+
 class NodeStorage(local, Service):
     """
     Nodestore is a key-value store that is used to store event payloads. It comes in two flavors:
@@ -72,7 +136,10 @@ class NodeStorage(local, Service):
         "get_multi",
         "set",
         "set_bytes",
+        "set_bytes_multi",
+        "set_multi",
         "set_subkeys",
+        "set_subkeys_multi",
         "cleanup",
         "validate",
         "bootstrap",
@@ -130,6 +197,23 @@ class NodeStorage(local, Service):
     def _get_bytes(self, id: str) -> bytes | None:
         raise NotImplementedError
 
+    def _get_bytes_with_local_cache(self, id: str) -> bytes | None:
+        cached = local_node_cache.get_many([id])
+        if id in cached:
+            return cached[id]
+
+        rv = self._get_bytes(id)
+        local_node_cache.set_many({id: rv})
+        return rv
+
+    def _get_bytes_multi_with_local_cache(self, id_list: list[str]) -> dict[str, bytes | None]:
+        rv: dict[str, bytes | None] = dict(local_node_cache.get_many(id_list))
+        if len(rv) < len(id_list):
+            items = self._get_bytes_multi([id for id in id_list if id not in rv])
+            local_node_cache.set_many(items)
+            rv.update(items)
+        return rv
+
     @metrics.wraps("nodestore.get.duration")
     def get(self, id: str, subkey: str | None = None) -> Any:
         """
@@ -144,14 +228,16 @@ class NodeStorage(local, Service):
                     metrics.incr("nodestore.get", tags={"cache": "hit"})
                     span.set_tag("origin", "from_cache")
                     span.set_tag("found", bool(item_from_cache))
+                    self._assemble_items({id: item_from_cache})
                     return item_from_cache
 
             span.set_tag("subkey", str(subkey))
-            bytes_data = self._get_bytes(id)
+            bytes_data = self._get_bytes_with_local_cache(id)
             rv = self._decode(bytes_data, subkey=subkey)
             if subkey is None:
                 # set cache item only after we know decoding did not fail
                 self._set_cache_item(id, rv)
+                self._assemble_items({id: rv})
 
             span.set_tag("result", "from_service")
             if bytes_data:
@@ -187,6 +273,7 @@ class NodeStorage(local, Service):
                 cache_items = self._get_cache_items(id_list)
                 if len(cache_items) == len(id_list):
                     span.set_tag("result", "from_cache")
+                    self._assemble_items(cache_items)
                     return cache_items
 
                 uncached_ids = [id for id in id_list if id not in cache_items]
@@ -196,17 +283,25 @@ class NodeStorage(local, Service):
             with sentry_sdk.start_span(op="nodestore._get_bytes_multi_and_decode") as span:
                 items = {
                     id: self._decode(value, subkey=subkey)
-                    for id, value in self._get_bytes_multi(uncached_ids).items()
+                    for id, value in self._get_bytes_multi_with_local_cache(uncached_ids).items()
                 }
             if subkey is None:
                 self._set_cache_items(items)
                 items.update(cache_items)
+                self._assemble_items(items)
 
             span.set_tag("result", "from_service")
             span.set_tag("found", len(items))
 
             return items
 
+    def _assemble_items(self, items: dict[str, Any]) -> None:
+        # Payloads written by `sentry.eventstore.compressor` reference shared nodes, which are
+        # inlined again here. Caches always hold the payloads as they were written.
+        from sentry.eventstore.compressor import assemble_nodes
+
+        assemble_nodes(items, self.get_multi)
+
     def _encode(self, data: dict[str | None, Mapping[str, Any]]) -> bytes:
         """
         Encode data dict in a way where its keys can be deserialized
@@ -229,11 +324,28 @@ class NodeStorage(local, Service):
         >>> nodestore.set_bytes('key1', b"{'foo': 'bar'}")
         """
         metrics.distribution("nodestore.set_bytes", len(data))
+        local_node_cache.delete_many([item_id])
         return self._set_bytes(item_id, data, ttl)
 
     def _set_bytes(self, item_id: str, data: bytes, ttl: timedelta | None = None) -> None:
         raise NotImplementedError
 
+    def set_bytes_multi(self, items: Mapping[str, bytes], ttl: timedelta | None = None) -> None:
+        """
+        >>> nodestore.set_bytes_multi({'key1': b"{'foo': 'bar'}", 'key2': b"{'foo': 'baz'}"})
+        """
+        for data in items.values():
+            metrics.distribution("nodestore.set_bytes", len(data))
+        local_node_cache.delete_many(list(items))
+        return self._set_bytes_multi(items, ttl)
+
+    def _set_bytes_multi(self, items: Mapping[str, bytes], ttl: timedelta | None = None) -> None:
+        """
+        Backends which can write many nodes at once should override this.
+        """
+        for item_id, data in items.items():
+            self._set_bytes(item_id, data, ttl)
+
     def set(self, item_id: str, data: Mapping[str, Any], ttl: timedelta | None = None) -> None:
         """
         Set value for `item_id`. Note that this deletes existing subkeys for `item_id` as
@@ -267,6 +379,35 @@ class NodeStorage(local, Service):
         if options.get("nodestore.set-subkeys.enable-set-cache-item"):
             self._set_cache_item(item_id, cache_item)
 
+    def set_multi(
+        self, items: Mapping[str, Mapping[str, Any]], ttl: timedelta | None = None
+    ) -> None:
+        """
+        Same as calling `set` for each item, but written in as few requests as the backend allows.
+
+        >>> nodestore.set_multi({'key1': {'foo': 'bar'}, 'key2': {'foo': 'baz'}})
+        """
+        return self.set_subkeys_multi(
+            {item_id: {None: data} for item_id, data in items.items()}, ttl=ttl
+        )
+
+    @sentry_sdk.tracing.trace
+    def set_subkeys_multi(
+        self,
+        items: Mapping[str, dict[str | None, Mapping[str, Any]]],
+        ttl: timedelta | None = None,
+    ) -> None:
+        """
+        Same as calling `set_subkeys` for each item, but written in as few requests as the
+        backend allows.
+        """
+        cache_items = {item_id: data.get(None) for item_id, data in items.items()}
+        bytes_data = {item_id: self._encode(data) for item_id, data in items.items()}
+        self.set_bytes_multi(bytes_data, ttl=ttl)
+        # set cache only after encoding and write to nodestore has succeeded
+        if options.get("nodestore.set-subkeys.enable-set-cache-item"):
+            self._set_cache_items({k: v for k, v in cache_items.items() if v})
+
     def cleanup(self, cutoff_timestamp: datetime) -> None:
         raise NotImplementedError
 
@@ -294,10 +435,12 @@ class NodeStorage(local, Service):
             self.cache.set_many(items)
 
     def _delete_cache_item(self, item_id: str) -> None:
+        local_node_cache.delete_many([item_id])
         if self.cache:
             self.cache.delete(item_id)
 
     def _delete_cache_items(self, id_list: list[str]) -> None:
+        local_node_cache.delete_many(id_list)
         if self.cache:
             self.cache.delete_many([item_id for item_id in id_list])
 
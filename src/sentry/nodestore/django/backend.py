@@ -1,23 +1,53 @@
 from __future__ import annotations
 
+import base64
 import logging
 import math
 import pickle
+from collections.abc import Mapping
 from datetime import datetime, timedelta
-from typing import Any
+from typing import Any, Literal
 
+import zstandard
 from django.utils import timezone
 
 from sentry.db.models.query import create_or_update
-from sentry.nodestore.base import NodeStorage
+from sentry.nodestore.base import NodeStorage, local_node_cache
 from sentry.utils.strings import compress, decompress
 
 from .models import Node
 
 logger = logging.getLogger("sentry")
 
+# Prefix of node data compressed with zstd. Legacy zlib data is plain base64, which never contains
+# a colon, so both can be told apart and old rows stay readable.
+ZSTD_MARKER = "zstd1:"
+
 
 class DjangoNodeStorage(NodeStorage):
+    """
+    Stores nodes in the `nodestore_node` table.
+
+    `compression` selects the codec for new writes, either the legacy `"zlib"` or `"zstd"`. Rows
+    written with either codec can always be read.
+    """
+
+    def __init__(self, compression: Literal["zlib", "zstd"] = "zlib", batch_size: int = 100):
+        if compression not in ("zlib", "zstd"):
+            raise ValueError(f"Unknown compression: {compression}")
+        self.compression = compression
+        self.batch_size = batch_size
+
+    def _compress(self, data: bytes) -> str:
+        if self.compression == "zstd":
+            return ZSTD_MARKER + base64.b64encode(zstandard.compress(data)).decode("ascii")
+        return compress(data)
+
+    def _decompress(self, data: str) -> bytes:
+        if data.startswith(ZSTD_MARKER):
+            return zstandard.decompress(base64.b64decode(data[len(ZSTD_MARKER) :]))
+        return decompress(data)
+
     def delete(self, id: str) -> None:
         Node.objects.filter(id=id).delete()
         self._delete_cache_item(id)
@@ -41,19 +71,32 @@ class DjangoNodeStorage(NodeStorage):
     def _get_bytes(self, id: str) -> bytes | None:
         try:
             data = Node.objects.get(id=id).data
-            return decompress(data)
+            return self._decompress(data)
         except Node.DoesNotExist:
             return None
 
     def _get_bytes_multi(self, id_list: list[str]) -> dict[str, bytes | None]:
-        return {n.id: decompress(n.data) for n in Node.objects.filter(id__in=id_list)}
+        return {n.id: self._decompress(n.data) for n in Node.objects.filter(id__in=id_list)}
 
     def delete_multi(self, id_list: list[str]) -> None:
         Node.objects.filter(id__in=id_list).delete()
         self._delete_cache_items(id_list)
 
     def _set_bytes(self, id: str, data: Any, ttl: timedelta | None = None) -> None:
-        create_or_update(Node, id=id, values={"data": compress(data), "timestamp": timezone.now()})
+        create_or_update(
+            Node, id=id, values={"data": self._compress(data), "timestamp": timezone.now()}
+        )
+
+    def _set_bytes_multi(self, items: Mapping[str, bytes], ttl: timedelta | None = None) -> None:
+        # One `INSERT ... ON CONFLICT DO UPDATE` per batch
+        now = timezone.now()
+        Node.objects.bulk_create(
+            [Node(id=id, data=self._compress(data), timestamp=now) for id, data in items.items()],
+            batch_size=self.batch_size,
+            update_conflicts=True,
+            unique_fields=["id"],
+            update_fields=["data", "timestamp"],
+        )
 
     def cleanup(self, cutoff_timestamp: datetime) -> None:
         from sentry.db.deletion import BulkDeleteQuery
@@ -64,6 +107,7 @@ class DjangoNodeStorage(NodeStorage):
         BulkDeleteQuery(model=Node, dtfield="timestamp", days=days).execute()
         if self.cache:
             self.cache.clear()
+        local_node_cache.clear()
 
     def bootstrap(self) -> None:
         # Nothing for Django backend to do during bootstrap
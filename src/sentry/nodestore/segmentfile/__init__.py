@@ -0,0 +1 @@
+from .backend import SegmentFileNodeStorage  # NOQA
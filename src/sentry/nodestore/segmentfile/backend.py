@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import contextlib
+import mmap
+import os
+import sqlite3
+import struct
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import IO
+
+import zstandard
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from sentry.nodestore.base import NodeStorage, local_node_cache
+from sentry.utils import metrics
+
+# Every record starts with the lengths of the node id and of the compressed node, which makes
+# segments self-describing. The index points straight at the compressed node.
+RECORD_HEADER = struct.Struct(">HI")
+
+SEGMENT_SUFFIX = ".seg"
+
+# SQLite limits the number of variables in a single statement
+MAX_QUERY_IDS = 500
+
+INDEX_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS nodes (
+        id TEXT PRIMARY KEY,
+        segment TEXT NOT NULL,
+        offset INTEGER NOT NULL,
+        length INTEGER NOT NULL,
+        expires_at REAL
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS nodes_segment ON nodes (segment)",
+)
+
+
+class SegmentFileNodeStorage(NodeStorage):
+    """
+    A log-structured backend for a local filesystem.
+
+    Nodes are compressed with zstd and appended to segment files, which are rotated once they
+    reach `max_segment_size` bytes or are older than `segment_duration`. Every writer (that is,
+    every thread of every process) appends to its own segment, so no file locking is required.
+    Segments and the index are opened again in forked processes, which must not share them.
+    A SQLite database next to the segments maps node ids to their location, and is the only
+    thing that gets updated in place: deleting or overwriting a node only changes its index entry.
+
+    Reads go through the index and then read the compressed node from its segment, memory-mapping
+    each segment once for `get_multi`. `cleanup` removes whole segments which were last written
+    to before the cutoff, so space is reclaimed without having to rewrite anything.
+
+    >>> SegmentFileNodeStorage(path="/var/lib/sentry/nodestore")
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_segment_size: int = 256 * 1024 * 1024,
+        segment_duration: int = 60 * 60,
+        compression_level: int = 3,
+        fsync: bool = False,
+    ):
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self.max_segment_size = max_segment_size
+        self.segment_duration = timedelta(seconds=segment_duration)
+        self.compression_level = compression_level
+        self.fsync = fsync
+
+        self._segment: IO[bytes] | None = None
+        self._segment_name = ""
+        self._segment_size = 0
+        self._segment_created = timezone.now()
+        self._segment_pid = 0
+
+        self._index: sqlite3.Connection | None = None
+        self._index_pid = 0
+
+    @property
+    def segments_path(self) -> str:
+        return os.path.join(self.path, "segments")
+
+    def segment_path(self, segment: str) -> str:
+        return os.path.join(self.segments_path, segment + SEGMENT_SUFFIX)
+
+    @property
+    def index(self) -> sqlite3.Connection:
+        # SQLite connections must not be shared between threads, which `NodeStorage` being a
+        # thread local takes care of, nor carried over into a forked process.
+        if self._index is None or self._index_pid != os.getpid():
+            conn = sqlite3.connect(
+                os.path.join(self.path, "index.sqlite3"), timeout=30, isolation_level=None
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in INDEX_SCHEMA:
+                conn.execute(statement)
+            self._index = conn
+            self._index_pid = os.getpid()
+        return self._index
+
+    @cached_property
+    def _compressor(self) -> zstandard.ZstdCompressor:
+        return zstandard.ZstdCompressor(level=self.compression_level)
+
+    @cached_property
+    def _decompressor(self) -> zstandard.ZstdDecompressor:
+        return zstandard.ZstdDecompressor()
+
+    def _get_segment(self) -> IO[bytes]:
+        now = timezone.now()
+        if self._segment is not None and self._segment_pid != os.getpid():
+            # Inherited from the parent process, which keeps appending to it. Every write is
+            # flushed, so closing the inherited handle can't write anything.
+            self._segment.close()
+            self._segment = None
+
+        if self._segment is not None and (
+            self._segment_size >= self.max_segment_size
+            or self._segment_created < now - self.segment_duration
+            # Removed by `cleanup` while this writer was idle
+            or os.fstat(self._segment.fileno()).st_nlink == 0
+        ):
+            self._segment.close()
+            self._segment = None
+
+        if self._segment is None:
+            # Segment names sort by creation time, and are unique to this writer
+            self._segment_name = f"{int(now.timestamp()):010d}-{uuid.uuid4().hex}"
+            self._segment = open(self.segment_path(self._segment_name), "xb")
+            self._segment_size = 0
+            self._segment_created = now
+            self._segment_pid = os.getpid()
+            metrics.incr("nodestore.segmentfile.segment_created")
+
+        return self._segment
+
+    def _set_bytes(self, id: str, data: bytes, ttl: timedelta | None = None) -> None:
+        key = id.encode("utf-8")
+        compressed = self._compressor.compress(data)
+
+        segment = self._get_segment()
+        try:
+            segment.write(RECORD_HEADER.pack(len(key), len(compressed)) + key + compressed)
+            segment.flush()
+            if self.fsync:
+                os.fsync(segment.fileno())
+        except BaseException:
+            # The record may have been written partially, don't append anything else after it
+            with contextlib.suppress(OSError):
+                segment.close()
+            self._segment = None
+            raise
+
+        # Take the offset from the file itself, rather than trusting our own bookkeeping
+        self._segment_size = segment.tell()
+        offset = self._segment_size - len(compressed)
+
+        # Only index the node once it can be read back
+        expires_at = (timezone.now() + ttl).timestamp() if ttl else None
+        self.index.execute(
+            "INSERT OR REPLACE INTO nodes (id, segment, offset, length, expires_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (id, self._segment_name, offset, len(compressed), expires_at),
+        )
+
+    def _get_locations(self, id_list: list[str]) -> dict[str, tuple[str, int, int]]:
+        now = timezone.now().timestamp()
+        rv = {}
+        for i in range(0, len(id_list), MAX_QUERY_IDS):
+            chunk = id_list[i : i + MAX_QUERY_IDS]
+            rows = self.index.execute(
+                "SELECT id, segment, offset, length, expires_at FROM nodes "
+                "WHERE id IN ({})".format(", ".join("?" * len(chunk))),
+                chunk,
+            )
+            for id, segment, offset, length, expires_at in rows:
+                if expires_at is None or expires_at > now:
+                    rv[id] = (segment, offset, length)
+        return rv
+
+    def _get_bytes(self, id: str) -> bytes | None:
+        location = self._get_locations([id]).get(id)
+        if location is None:
+            return None
+
+        segment, offset, length = location
+        try:
+            fd = os.open(self.segment_path(segment), os.O_RDONLY)
+        except FileNotFoundError:
+            # Cleaned up since we read the index
+            return None
+        try:
+            compressed = os.pread(fd, length, offset)
+        finally:
+            os.close(fd)
+
+        return self._decompressor.decompress(compressed)
+
+    def _get_bytes_multi(self, id_list: list[str]) -> dict[str, bytes | None]:
+        rv: dict[str, bytes | None] = {id: None for id in id_list}
+
+        ids_by_segment: dict[str, list[tuple[str, int, int]]] = defaultdict(list)
+        for id, (segment, offset, length) in self._get_locations(id_list).items():
+            ids_by_segment[segment].append((id, offset, length))
+
+        for segment, locations in ids_by_segment.items():
+            try:
+                f = open(self.segment_path(segment), "rb")
+            except FileNotFoundError:
+                continue
+            with f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                for id, offset, length in locations:
+                    rv[id] = self._decompressor.decompress(m[offset : offset + length])
+
+        metrics.distribution("nodestore.segmentfile.get_multi.segments", len(ids_by_segment))
+        return rv
+
+    def delete(self, id: str) -> None:
+        self.index.execute("DELETE FROM nodes WHERE id = ?", (id,))
+        self._delete_cache_item(id)
+
+    def delete_multi(self, id_list: list[str]) -> None:
+        for i in range(0, len(id_list), MAX_QUERY_IDS):
+            chunk = id_list[i : i + MAX_QUERY_IDS]
+            self.index.execute(
+                "DELETE FROM nodes WHERE id IN ({})".format(", ".join("?" * len(chunk))), chunk
+            )
+        self._delete_cache_items(id_list)
+
+    def cleanup(self, cutoff_timestamp: datetime) -> None:
+        cutoff = cutoff_timestamp.timestamp()
+        removed = 0
+
+        with os.scandir(self.segments_path) as entries:
+            for entry in entries:
+                if not entry.name.endswith(SEGMENT_SUFFIX):
+                    continue
+                segment = entry.name[: -len(SEGMENT_SUFFIX)]
+                if segment == self._segment_name or entry.stat().st_mtime >= cutoff:
+                    continue
+
+                # Unindex first, so no reader is pointed at a segment which is gone
+                self.index.execute("DELETE FROM nodes WHERE segment = ?", (segment,))
+                os.remove(entry.path)
+                removed += 1
+
+        self.index.execute("DELETE FROM nodes WHERE expires_at < ?", (timezone.now().timestamp(),))
+        metrics.incr("nodestore.segmentfile.segments_removed", amount=removed)
+
+        if self.cache:
+            self.cache.clear()
+        local_node_cache.clear()
+
+    def bootstrap(self) -> None:
+        os.makedirs(self.segments_path, exist_ok=True)
+        # Creates the index
+        self.index
@@ -111,6 +111,43 @@ register(
     flags=FLAG_NOSTORE | FLAG_IMMUTABLE,
 )
 register("redis.options", type=Dict, flags=FLAG_NOSTORE)
+# Coalesce `RedisBuffer.incr` calls in-process, writing them to Redis after this many calls (or
+# after `max-delay` seconds, whichever comes first), and at the end of every task or consumed
+# message. 0 disables coalescing.
+register(
+    "buffer.redis.coalesce-incr.max-events",
+    type=Int,
+    default=0,
+    flags=FLAG_AUTOMATOR_MODIFIABLE,
+)
+register(
+    "buffer.redis.coalesce-incr.max-delay",
+    type=Float,
+    default=1.0,
+    flags=FLAG_AUTOMATOR_MODIFIABLE,
+)
+# Write pending buffer keys into this many shards (at most 64), each of which is drained by its own
+# `process_pending_shard` task applying the keys in batches. 0 uses the unsharded `process_pending`
+# drain.
+register(
+    "buffer.redis.process-pending.shards",
+    type=Int,
+    default=0,
+    flags=FLAG_AUTOMATOR_MODIFIABLE,
+)
+register(
+    "buffer.redis.process-pending.batch-size",
+    type=Int,
+    default=500,
+    flags=FLAG_AUTOMATOR_MODIFIABLE,
+)
+# Read RedisTSDB counter series with one HMGET per hash instead of one HGET per key and rollup
+register(
+    "tsdb.redis.vectorized-reads",
+    type=Bool,
+    default=False,
+    flags=FLAG_AUTOMATOR_MODIFIABLE,
+)
 
 # Processing worker caches
 register(
@@ -497,6 +534,14 @@ register(
     default=5000,
     flags=FLAG_AUTOMATOR_MODIFIABLE,
 )
+# Streams recording segments into the download response as they are decompressed, rather than
+# downloading all of them up front.
+register(
+    "replay.segment-download.streaming.enabled",
+    type=Bool,
+    default=False,
+    flags=FLAG_AUTOMATOR_MODIFIABLE,
+)
 # Disables viewed by queries for a list of project ids.
 register(
     "replay.viewed-by.project-denylist",
@@ -1191,6 +1236,19 @@ register(
 # ```
 register("relay.cardinality-limiter.limits", default=[], flags=FLAG_AUTOMATOR_MODIFIABLE)
 
+# Compute the project configs of all keys of an organization in one batch when the organization
+# is invalidated, prefetching organization and project state once.
+register("relay.project-config.batch-build.enabled", default=False, flags=FLAG_AUTOMATOR_MODIFIABLE)
+# Recompute only the affected sections of cached project configs on invalidations which declare
+# them, and skip writing configs whose revision did not change.
+register(
+    "relay.project-config.incremental-invalidation.enabled",
+    default=False,
+    flags=FLAG_AUTOMATOR_MODIFIABLE,
+)
+# Maximum number of project configs written to the project config cache at once.
+register("relay.project-config.write-batch-size", default=500, flags=FLAG_AUTOMATOR_MODIFIABLE)
+
 # Controls the encoding used in Relay for encoding distributions and sets
 # when writing to Kafka.
 #
@@ -1399,6 +1457,21 @@ register(
     flags=FLAG_AUTOMATOR_MODIFIABLE,
 )
 
+# An option to enable the per-process cache in front of the caching indexer, and how long strings
+# which were rate limited are cached there
+register(
+    "sentry-metrics.indexer.in-memory-cache.enabled",
+    type=Bool,
+    default=False,
+    flags=FLAG_AUTOMATOR_MODIFIABLE,
+)
+register(
+    "sentry-metrics.indexer.in-memory-cache.rate-limited-ttl",
+    type=Int,
+    default=10,
+    flags=FLAG_AUTOMATOR_MODIFIABLE,
+)
+
 # Option to control sampling percentage of schema validation on the generic metrics pipeline
 # based on namespace.
 register(
@@ -2039,6 +2112,13 @@ register("hybridcloud.integrationproxy.retries", default=5, flags=FLAG_AUTOMATOR
 register("hybridcloud.endpoint_flag_logging", default=False, flags=FLAG_AUTOMATOR_MODIFIABLE)
 register("hybridcloud.rpc.method_retry_overrides", default={}, flags=FLAG_AUTOMATOR_MODIFIABLE)
 register("hybridcloud.rpc.method_timeout_overrides", default={}, flags=FLAG_AUTOMATOR_MODIFIABLE)
+# Serves RPC cached callables which opt into it from a per-process cache in front of Redis
+register(
+    "hybridcloud.caching.local-cache.enabled",
+    type=Bool,
+    default=False,
+    flags=FLAG_AUTOMATOR_MODIFIABLE,
+)
 # Webhook processing controls
 register(
     "hybridcloud.webhookpayload.worker_threads",
@@ -2058,6 +2138,20 @@ register("txnames.bump-lifetime-sample-rate", default=0.1, flags=FLAG_AUTOMATOR_
 register(
     "nodestore.set-subkeys.enable-set-cache-item", default=True, flags=FLAG_AUTOMATOR_MODIFIABLE
 )
+# Total size of node payloads cached in each process, in bytes. 0 disables the cache.
+register("nodestore.local-cache.max-bytes", default=0, flags=FLAG_AUTOMATOR_MODIFIABLE)
+# Write the events of a batch to nodestore with a single `set_subkeys_multi` call.
+register("nodestore.save-many.enabled", default=False, flags=FLAG_AUTOMATOR_MODIFIABLE)
+# Store repeating event interfaces (debug_meta, modules, ...) only once
+register("eventstore.compressor.enabled", default=False, flags=FLAG_AUTOMATOR_MODIFIABLE)
+# How often each process writes a shared node again, keeping it from being cleaned up. Has to
+# be well under the nodestore TTL.
+register(
+    "eventstore.compressor.refresh-interval",
+    type=Int,
+    default=60 * 60,
+    flags=FLAG_AUTOMATOR_MODIFIABLE,
+)
 
 # === Backpressure related runtime options ===
 
@@ -2674,6 +2768,37 @@ register(
     default=300,  # 5 minutes
     flags=FLAG_PRIORITIZE_DISK | FLAG_AUTOMATOR_MODIFIABLE,
 )
+# Read and delete flushed segments from the span buffer with one script call per trace, in
+# bounded chunks
+register(
+    "standalone-spans.buffer.scripted-flush.enable",
+    type=Bool,
+    default=False,
+    flags=FLAG_PRIORITIZE_DISK | FLAG_AUTOMATOR_MODIFIABLE,
+)
+# Partitions of the spans topic for which span payloads are stored zstd-compressed in the span
+# buffer
+register(
+    "standalone-spans.buffer.compression.partitions",
+    type=Sequence,
+    default=[],
+    flags=FLAG_PRIORITIZE_DISK | FLAG_AUTOMATOR_MODIFIABLE,
+)
+# Memory budgets for the span buffer, in bytes of stored span payloads. Segments over the segment
+# budget, and all segments of queue shards over the shard budget, are flushed early. 0 disables
+# the respective budget. Only applies with standalone-spans.buffer.scripted-flush.enable.
+register(
+    "standalone-spans.buffer.max-segment-bytes",
+    type=Int,
+    default=0,
+    flags=FLAG_PRIORITIZE_DISK | FLAG_AUTOMATOR_MODIFIABLE,
+)
+register(
+    "standalone-spans.buffer.max-shard-bytes",
+    type=Int,
+    default=0,
+    flags=FLAG_PRIORITIZE_DISK | FLAG_AUTOMATOR_MODIFIABLE,
+)
 register(
     "standalone-spans.process-segments-consumer.enable",
     default=True,
@@ -2910,6 +3035,14 @@ register(
     default=False,
     flags=FLAG_AUTOMATOR_MODIFIABLE,
 )
+# Evaluates the workflows of an event from a cached, per-project evaluation plan instead of
+# loading them and their conditions from the database.
+register(
+    "workflow_engine.evaluation-plan.enabled",
+    type=Bool,
+    default=False,
+    flags=FLAG_AUTOMATOR_MODIFIABLE,
+)
 register(
     "celery_split_queue_task_rollout",
     default={},
@@ -2928,6 +3061,20 @@ register(
     default=0.0,
     flags=FLAG_AUTOMATOR_MODIFIABLE,
 )
+# Reuse frame grouping components for frames which have already been seen by this process
+register(
+    "grouping.frame_component_cache.enabled",
+    type=Bool,
+    default=False,
+    flags=FLAG_AUTOMATOR_MODIFIABLE,
+)
+# Apply enhancement rules to frames with the compiled rule index instead of the Rust enhancer
+register(
+    "grouping.enhancer.compiled-rules.enabled",
+    type=Bool,
+    default=False,
+    flags=FLAG_AUTOMATOR_MODIFIABLE,
+)
 
 register(
     "ecosystem:enable_integration_form_error_raise", default=True, flags=FLAG_AUTOMATOR_MODIFIABLE
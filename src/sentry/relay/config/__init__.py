@@ -1,11 +1,14 @@
 from __future__ import annotations
 
+import copy
+import hashlib
 import logging
-import uuid
-from collections.abc import Iterable, Mapping, MutableMapping, Sequence
+from collections.abc import Callable, Iterable, Mapping, MutableMapping, Sequence
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Any, Literal, NotRequired, TypedDict
 
+import orjson
 import sentry_sdk
 from sentry_sdk import capture_exception
 
@@ -31,7 +34,7 @@ from sentry.ingest.transaction_clusterer.rules import (
 from sentry.interfaces.security import DEFAULT_DISALLOWED_SOURCES
 from sentry.models.organization import Organization
 from sentry.models.project import Project
-from sentry.models.projectkey import ProjectKey
+from sentry.models.projectkey import ProjectKey, ProjectKeyStatus
 from sentry.relay.config.experimental import TimeChecker, add_experimental_config
 from sentry.relay.config.metric_extraction import (
     get_metric_conditional_tagging_rules,
@@ -81,11 +84,26 @@ MIN_CLUSTERER_RUNS = 10
 logger = logging.getLogger(__name__)
 
 
-def get_exposed_features(project: Project) -> Sequence[str]:
+def get_organization_features(organization: Organization) -> Mapping[str, bool]:
+    """Evaluates all organization-level exposable features at once, so that the result can be
+    shared by the configs of all projects of the organization."""
+    return {
+        feature: features.has(feature, organization)
+        for feature in EXPOSABLE_FEATURES
+        if feature.startswith("organizations:")
+    }
+
+
+def get_exposed_features(
+    project: Project, organization_features: Mapping[str, bool] | None = None
+) -> Sequence[str]:
     active_features = []
     for feature in EXPOSABLE_FEATURES:
         if feature.startswith("organizations:"):
-            has_feature = features.has(feature, project.organization)
+            if organization_features is not None and feature in organization_features:
+                has_feature = organization_features[feature]
+            else:
+                has_feature = features.has(feature, project.organization)
         elif feature.startswith("projects:"):
             has_feature = features.has(feature, project)
         else:
@@ -277,7 +295,9 @@ def get_metrics_config(timeout: TimeChecker, project: Project) -> Mapping[str, A
 
 
 def get_project_config(
-    project: Project, project_keys: Iterable[ProjectKey] | None = None
+    project: Project,
+    project_keys: Iterable[ProjectKey] | None = None,
+    organization_features: Mapping[str, bool] | None = None,
 ) -> ProjectConfig:
     """Constructs the ProjectConfig information.
     :param project: The project to load configuration for. Ensure that
@@ -287,6 +307,8 @@ def get_project_config(
         no project keys are provided it is assumed that the config does not
         need to contain auth information (this is the case when used in
         python's StoreView)
+    :param organization_features: Pre-computed organization features, see
+        :func:`get_organization_features`.
     :return: a ProjectConfig object for the given project
     """
     with sentry_sdk.isolation_scope() as scope:
@@ -295,7 +317,51 @@ def get_project_config(
             sentry_sdk.start_transaction(name="get_project_config"),
             metrics.timer("relay.config.get_project_config.duration"),
         ):
-            return _get_project_config(project, project_keys=project_keys)
+            return _get_project_config(
+                project, project_keys=project_keys, organization_features=organization_features
+            )
+
+
+def get_project_key_configs(
+    project: Project,
+    project_keys: Sequence[ProjectKey],
+    organization_features: Mapping[str, bool] | None = None,
+) -> dict[str, MutableMapping[str, Any]]:
+    """Constructs the configs of several keys of the same project, keyed by public key.
+
+    All keys of a project share everything but their public key and quotas, so the project
+    config is computed only once and then specialized for every other key. Inactive keys are
+    disabled.
+    """
+    configs: dict[str, MutableMapping[str, Any]] = {}
+    active_keys = []
+    for key in project_keys:
+        if key.status == ProjectKeyStatus.ACTIVE:
+            active_keys.append(key)
+        else:
+            configs[key.public_key] = {"disabled": True}
+
+    if not active_keys:
+        return configs
+
+    first_key, *other_keys = active_keys
+    base = get_project_config(
+        project, project_keys=[first_key], organization_features=organization_features
+    ).to_dict()
+    configs[first_key.public_key] = base
+
+    for key in other_keys:
+        config = copy.deepcopy(base)
+        if not config["disabled"]:
+            config["publicKeys"] = get_public_key_configs(project_keys=[key])
+            if quotas_config := get_quotas(project, keys=[key]):
+                config["config"]["quotas"] = quotas_config
+            else:
+                config["config"].pop("quotas", None)
+            config["rev"] = get_config_revision(config)
+        configs[key.public_key] = config
+
+    return configs
 
 
 def get_dynamic_sampling_config(timeout: TimeChecker, project: Project) -> Mapping[str, Any] | None:
@@ -1013,8 +1079,195 @@ def _get_mobile_performance_profiles(
     ]
 
 
+@dataclass(frozen=True)
+class ConfigSection:
+    """A part of the project config which can be recomputed on its own."""
+
+    name: str
+    #: The keys of the inner `config` object computed by this section.
+    keys: tuple[str, ...]
+    #: Computes the section and adds its keys to the inner `config` object.
+    compute: Callable[[MutableMapping[str, Any], Project, Sequence[ProjectKey] | None], None]
+    #: Invalidation triggers which affect nothing but this section.
+    triggers: frozenset[str] = frozenset()
+    #: Prefixes of the project options which affect nothing but this section.
+    options: tuple[str, ...] = ()
+
+
+CONFIG_SECTIONS: dict[str, ConfigSection] = {}
+
+
+def _config_section(
+    name: str,
+    keys: Sequence[str],
+    triggers: Iterable[str] = (),
+    options: Sequence[str] = (),
+) -> Callable[[Callable[..., None]], Callable[..., None]]:
+    def inner(f: Callable[..., None]) -> Callable[..., None]:
+        CONFIG_SECTIONS[name] = ConfigSection(
+            name=name,
+            keys=tuple(keys),
+            compute=f,
+            triggers=frozenset(triggers),
+            options=tuple(options),
+        )
+        return f
+
+    return inner
+
+
+@_config_section(
+    "sampling",
+    keys=["sampling"],
+    triggers=[
+        "dynamic_sampling:boost_release",
+        "dynamic_sampling:custom_rule_upsert",
+        "dynamic_sampling_boost_low_volume_projects",
+        "dynamic_sampling_boost_low_volume_transactions",
+        "releaseproject.post_delete",
+        "releaseproject.post_save",
+        "teamkeytransaction.post_delete",
+        "teamkeytransaction.post_save",
+    ],
+    options=["sentry:dynamic_sampling_biases", "sentry:target_sample_rate"],
+)
+def _add_dynamic_sampling_config(
+    config: MutableMapping[str, Any], project: Project, project_keys: Sequence[ProjectKey] | None
+) -> None:
+    # NOTE: Omitting dynamicSampling because of a failure increases the number
+    # of events forwarded by Relay, because dynamic sampling will stop filtering
+    # anything.
+    add_experimental_config(config, "sampling", get_dynamic_sampling_config, project)
+
+
+@_config_section(
+    "transaction_names",
+    keys=["txNameRules", "txNameReady"],
+    options=[
+        ClustererNamespace.TRANSACTIONS.value.persistent_storage,
+        ClustererNamespace.TRANSACTIONS.value.meta_store,
+    ],
+)
+def _add_transaction_names_config(
+    config: MutableMapping[str, Any], project: Project, project_keys: Sequence[ProjectKey] | None
+) -> None:
+    # Rules to replace high cardinality transaction names
+    add_experimental_config(config, "txNameRules", get_transaction_names_config, project)
+
+    # Mark the project as ready if it has seen >= 10 clusterer runs.
+    # This prevents projects from prematurely marking all URL transactions as sanitized.
+    if get_clusterer_meta(ClustererNamespace.TRANSACTIONS, project)["runs"] >= MIN_CLUSTERER_RUNS:
+        config["txNameReady"] = True
+
+
+@_config_section(
+    "metric_extraction",
+    keys=["metricExtraction"],
+    triggers=["alerts:create-on-demand-metric", "dashboards:create-on-demand-metric"],
+)
+def _add_metric_extraction_config(
+    config: MutableMapping[str, Any], project: Project, project_keys: Sequence[ProjectKey] | None
+) -> None:
+    if _should_extract_transaction_metrics(project):
+        if metric_extraction := get_metric_extraction_config(project):
+            config["metricExtraction"] = metric_extraction
+
+
+@_config_section(
+    "filters",
+    keys=["filterSettings"],
+    options=[
+        "filters:",
+        f"sentry:{FilterTypes.RELEASES}",
+        f"sentry:{FilterTypes.ERROR_MESSAGES}",
+        "sentry:blacklisted_ips",
+        "sentry:csp_ignored_sources",
+    ],
+)
+def _add_filter_settings(
+    config: MutableMapping[str, Any], project: Project, project_keys: Sequence[ProjectKey] | None
+) -> None:
+    with sentry_sdk.start_span(op="get_filter_settings"):
+        if filter_settings := get_filter_settings(project):
+            config["filterSettings"] = filter_settings
+
+
+@_config_section("quotas", keys=["quotas"], triggers=["monitors:monitor_created"])
+def _add_quotas(
+    config: MutableMapping[str, Any], project: Project, project_keys: Sequence[ProjectKey] | None
+) -> None:
+    with sentry_sdk.start_span(op="get_all_quotas"):
+        if quotas_config := get_quotas(project, keys=project_keys):
+            config["quotas"] = quotas_config
+
+
+def get_invalidated_sections(trigger: str, option_key: str | None = None) -> list[str] | None:
+    """Returns the names of the config sections affected by an invalidation.
+
+    :param trigger: The trigger of the invalidation.
+    :param option_key: The project option which changed, if any.
+    :return: The affected sections, or `None` if the whole config has to be recomputed.
+    """
+    if option_key is not None:
+        sections = [s.name for s in CONFIG_SECTIONS.values() if option_key.startswith(s.options)]
+    else:
+        sections = [s.name for s in CONFIG_SECTIONS.values() if trigger in s.triggers]
+
+    return sections or None
+
+
+def get_config_revision(config: Mapping[str, Any]) -> str:
+    """Computes the revision of a project config from its contents, so that the revision only
+    changes when the config does."""
+    contents = {
+        key: value for key, value in config.items() if key not in ("rev", "lastFetch", "lastChange")
+    }
+    return hashlib.md5(
+        orjson.dumps(contents, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS, default=str)
+    ).hexdigest()
+
+
+def update_project_config(
+    project: Project,
+    project_keys: Sequence[ProjectKey] | None,
+    config: Mapping[str, Any],
+    sections: Iterable[str],
+) -> MutableMapping[str, Any]:
+    """Recomputes only the given sections of a previously computed project config.
+
+    :param project: The project the config belongs to.
+    :param project_keys: The project keys the config was computed for.
+    :param config: The previous config, as returned by ``ProjectConfig.to_dict``.
+    :param sections: Names of the sections to recompute, see :data:`CONFIG_SECTIONS`.
+    :return: The updated config. The revision only changes if the contents did.
+    """
+    if project.status != ObjectStatus.ACTIVE:
+        return ProjectConfig(project, disabled=True).to_dict()
+
+    updated = dict(config)
+    inner_config = updated["config"] = dict(config["config"])
+
+    with metrics.timer("relay.config.update_project_config.duration"):
+        for name in sections:
+            section = CONFIG_SECTIONS[name]
+            for key in section.keys:
+                inner_config.pop(key, None)
+            section.compute(inner_config, project, project_keys)
+
+    now = datetime.now(timezone.utc)
+    updated["lastFetch"] = now
+    rev = get_config_revision(updated)
+    if rev != updated.get("rev"):
+        updated["rev"] = rev
+        updated["lastChange"] = now
+
+    return updated
+
+
 def _get_project_config(
-    project: Project, project_keys: Iterable[ProjectKey] | None = None
+    project: Project,
+    project_keys: Iterable[ProjectKey] | None = None,
+    organization_features: Mapping[str, bool] | None = None,
 ) -> ProjectConfig:
     if project.status != ObjectStatus.ACTIVE:
         return ProjectConfig(project, disabled=True)
@@ -1028,7 +1281,6 @@ def _get_project_config(
             "slug": project.slug,
             "lastFetch": now,
             "lastChange": now,
-            "rev": uuid.uuid4().hex,
             "publicKeys": public_keys,
             "config": {
                 "allowedDomains": list(get_origins(project)),
@@ -1047,21 +1299,11 @@ def _get_project_config(
     config = cfg["config"]
 
     with sentry_sdk.start_span(op="get_exposed_features"):
-        if exposed_features := get_exposed_features(project):
+        if exposed_features := get_exposed_features(project, organization_features):
             config["features"] = exposed_features
 
-    # NOTE: Omitting dynamicSampling because of a failure increases the number
-    # of events forwarded by Relay, because dynamic sampling will stop filtering
-    # anything.
-    add_experimental_config(config, "sampling", get_dynamic_sampling_config, project)
-
-    # Rules to replace high cardinality transaction names
-    add_experimental_config(config, "txNameRules", get_transaction_names_config, project)
-
-    # Mark the project as ready if it has seen >= 10 clusterer runs.
-    # This prevents projects from prematurely marking all URL transactions as sanitized.
-    if get_clusterer_meta(ClustererNamespace.TRANSACTIONS, project)["runs"] >= MIN_CLUSTERER_RUNS:
-        config["txNameReady"] = True
+    _add_dynamic_sampling_config(config, project, project_keys)
+    _add_transaction_names_config(config, project, project_keys)
 
     config["breakdownsV2"] = project.get_option("sentry:breakdowns")
 
@@ -1086,8 +1328,7 @@ def _get_project_config(
             project,
         )
 
-        if metric_extraction := get_metric_extraction_config(project):
-            config["metricExtraction"] = metric_extraction
+    _add_metric_extraction_config(config, project, project_keys)
 
     config["sessionMetrics"] = {
         "version": (
@@ -1106,9 +1347,7 @@ def _get_project_config(
     if performance_score_profiles:
         config["performanceScore"] = {"profiles": performance_score_profiles}
 
-    with sentry_sdk.start_span(op="get_filter_settings"):
-        if filter_settings := get_filter_settings(project):
-            config["filterSettings"] = filter_settings
+    _add_filter_settings(config, project, project_keys)
     with sentry_sdk.start_span(op="get_grouping_config_dict_for_project"):
         grouping_config = get_grouping_config_dict_for_project(project)
         if grouping_config is not None:
@@ -1117,9 +1356,9 @@ def _get_project_config(
         event_retention = quotas.backend.get_event_retention(project.organization)
         if event_retention is not None:
             config["eventRetention"] = event_retention
-    with sentry_sdk.start_span(op="get_all_quotas"):
-        if quotas_config := get_quotas(project, keys=project_keys):
-            config["quotas"] = quotas_config
+    _add_quotas(config, project, project_keys)
+
+    cfg["rev"] = get_config_revision(cfg)
 
     return ProjectConfig(project, **cfg)
 
@@ -2,7 +2,7 @@ from sentry.utils.services import Service
 
 
 class ProjectConfigCache(Service):
-    __all__ = ("set_many", "delete_many", "get")
+    __all__ = ("set_many", "set_many_if_rev", "delete_many", "get", "get_rev_many")
 
     def __init__(self, **options):
         pass
@@ -10,8 +10,20 @@ class ProjectConfigCache(Service):
     def set_many(self, configs):
         pass
 
+    def set_many_if_rev(self, configs, revs):
+        """Like ``set_many``, but writes every config only if its cached revision is still
+        the one in ``revs``.
+
+        Returns the public keys whose config was not written.
+        """
+        return []
+
     def delete_many(self, public_keys):
         pass
 
     def get(self, public_key):
         raise NotImplementedError()
+
+    def get_rev_many(self, public_keys):
+        """Returns the revisions of all given cached configs which have one."""
+        return {}
@@ -13,6 +13,8 @@ COMPRESSION_LEVEL = 3  # 3 is the default level of compression
 
 logger = logging.getLogger(__name__)
 
+compare_and_set_rev = redis.load_redis_script("relay/compare_and_set_rev.lua")
+
 
 class RedisProjectConfigCache(ProjectConfigCache):
     def __init__(self, **options):
@@ -39,14 +41,7 @@ class RedisProjectConfigCache(ProjectConfigCache):
         # Note: Those are multiple pipelines, one per cluster node.
         p = self.cluster.pipeline(transaction=False)
         for public_key, config in configs.items():
-            serialized = json.dumps(config).encode()
-            compressed = zstandard.compress(serialized, level=COMPRESSION_LEVEL)
-            metrics.distribution(
-                "relay.projectconfig_cache.uncompressed_size", len(serialized), unit="byte"
-            )
-            metrics.distribution("relay.projectconfig_cache.size", len(compressed), unit="byte")
-
-            p.setex(self.__get_redis_key(public_key), REDIS_CACHE_TIMEOUT, compressed)
+            p.setex(self.__get_redis_key(public_key), REDIS_CACHE_TIMEOUT, self.__compress(config))
             # Update the revision after updating the config, while not strictly necessary
             # this means when the reader is checking the revision before reading the key
             # the revision won't be updated already while the project config is still the old.
@@ -60,6 +55,59 @@ class RedisProjectConfigCache(ProjectConfigCache):
 
         p.execute()
 
+    def set_many_if_rev(self, configs: dict[str, Mapping[str, Any]], revs: Mapping[str, Any]):
+        """
+        Writes every config only if the revision key still holds its revision in ``revs``.
+
+        The revision is swapped with a script first, and the config only written if that
+        succeeded.  A concurrent writer of another revision therefore always makes this fail,
+        while readers may briefly see the new revision along with the previous config.  As in
+        ``set_many``, the revision key is only an optimization for them.
+        """
+        public_keys = [
+            public_key
+            for public_key, config in configs.items()
+            if revs.get(public_key) and config.get("rev")
+        ]
+
+        # Note: Those are multiple pipelines, one per cluster node.
+        p = self.cluster.pipeline(transaction=False)
+        for public_key in public_keys:
+            # redis-cluster-py pipelines can't run EVALSHA, so the (short) script is sent in full,
+            # as in the span buffer
+            p.eval(
+                compare_and_set_rev.script,
+                1,
+                self.__get_redis_rev_key(public_key),
+                revs[public_key],
+                configs[public_key]["rev"],
+                REDIS_CACHE_TIMEOUT,
+            )
+        swapped = {public_key for public_key, ok in zip(public_keys, p.execute()) if ok}
+
+        metrics.incr(
+            "relay.projectconfig_cache.write", amount=len(swapped), tags={"action": "set_if_rev"}
+        )
+        p = self.cluster.pipeline(transaction=False)
+        for public_key in swapped:
+            p.setex(
+                self.__get_redis_key(public_key),
+                REDIS_CACHE_TIMEOUT,
+                self.__compress(configs[public_key]),
+            )
+        p.execute()
+
+        return [public_key for public_key in configs if public_key not in swapped]
+
+    def __compress(self, config: Mapping[str, Any]) -> bytes:
+        serialized = json.dumps(config).encode()
+        compressed = zstandard.compress(serialized, level=COMPRESSION_LEVEL)
+        metrics.distribution(
+            "relay.projectconfig_cache.uncompressed_size", len(serialized), unit="byte"
+        )
+        metrics.distribution("relay.projectconfig_cache.size", len(compressed), unit="byte")
+        return compressed
+
     def delete_many(self, public_keys):
         # Note: Those are multiple pipelines, one per cluster node
         with self.cluster.pipeline() as p:
@@ -86,3 +134,16 @@ class RedisProjectConfigCache(ProjectConfigCache):
         if value := self.cluster_read.get(self.__get_redis_rev_key(public_key)):
             return value.decode()
         return None
+
+    def get_rev_many(self, public_keys) -> dict[str, str]:
+        # Note: Those are multiple pipelines, one per cluster node.
+        p = self.cluster_read.pipeline(transaction=False)
+        for public_key in public_keys:
+            p.get(self.__get_redis_rev_key(public_key))
+        values = p.execute()
+
+        return {
+            public_key: value.decode()
+            for public_key, value in zip(public_keys, values)
+            if value is not None
+        }
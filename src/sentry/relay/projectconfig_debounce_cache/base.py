@@ -22,22 +22,25 @@ class ProjectConfigDebounceCache(Service):
     def __init__(self, **options):
         pass
 
-    def is_debounced(self, *, public_key, project_id, organization_id):
+    def is_debounced(self, *, public_key, project_id, organization_id, sections=None):
         """Checks if the given project/organization should be debounced.
 
         If this is called this with multiple arguments each scope is checked, so that even
         if you only need to check a single key an org-level debounce will be respected.  You
         must make sure that the several arguments relate to each other.
+
+        With ``sections``, only a task which recomputes those same config sections is
+        checked for, which is debounced separately from tasks recomputing whole configs.
         """
         return False
 
-    def debounce(self, *, public_key, project_id, organization_id):
+    def debounce(self, *, public_key, project_id, organization_id, sections=None):
         """Debounces the given project/organization, without performing any checks.
 
         The highest-scoped argument passed in will be debounced.
         """
 
-    def mark_task_done(self, *, public_key, project_id, organization_id):
+    def mark_task_done(self, *, public_key, project_id, organization_id, sections=None):
         """
         Mark a task done such that `is_debounced` starts emitting False
         for the given parameters.
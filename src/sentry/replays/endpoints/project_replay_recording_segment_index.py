@@ -5,7 +5,7 @@ from drf_spectacular.utils import extend_schema
 from rest_framework.request import Request
 from rest_framework.response import Response
 
-from sentry import features
+from sentry import features, options
 from sentry.api.api_owners import ApiOwner
 from sentry.api.api_publish_status import ApiPublishStatus
 from sentry.api.base import region_silo_endpoint
@@ -17,7 +17,11 @@ from sentry.apidocs.parameters import CursorQueryParam, GlobalParams, ReplayPara
 from sentry.apidocs.utils import inline_sentry_response_serializer
 from sentry.replays.lib.storage import storage
 from sentry.replays.types import ReplayRecordingSegment
-from sentry.replays.usecases.reader import download_segments, fetch_segments_metadata
+from sentry.replays.usecases.reader import (
+    download_segments,
+    fetch_segments_metadata,
+    stream_segments,
+)
 
 
 @region_silo_endpoint
@@ -64,5 +68,9 @@ class ProjectReplayRecordingSegmentIndexEndpoint(ProjectEndpoint):
             response_kwargs={"content_type": "application/json"},
             paginator_cls=GenericOffsetPaginator,
             data_fn=functools.partial(fetch_segments_metadata, project.id, replay_id),
-            on_results=download_segments,
+            on_results=(
+                stream_segments
+                if options.get("replay.segment-download.streaming.enabled")
+                else download_segments
+            ),
         )
@@ -16,6 +16,8 @@ binary encoding for the `[` character. These are considered rrweb type
 payloads and can be returned as is.
 """
 
+import itertools
+from collections.abc import Iterable, Iterator
 from enum import Enum
 
 USIZE = 4  # Unsigned integer word size.
@@ -56,3 +58,48 @@ def _unpack_rrweb(mv: memoryview) -> tuple[None, memoryview]:
 def _unpack_video(mv: memoryview) -> tuple[memoryview, memoryview]:
     end = int.from_bytes(mv[1:HEADER_OFFSET]) + HEADER_OFFSET
     return (mv[HEADER_OFFSET:end], mv[end:])
+
+
+def get_rrweb_offset(header: bytes | bytearray | memoryview) -> int | None:
+    """Return the offset of the rrweb bytes in a packed payload starting with `header`.
+
+    None is returned if the header is too short to tell.
+    """
+    if not header:
+        return None
+    elif header[0] == Encoding.RRWEB.value:
+        return 1
+    elif header[0] == Encoding.VIDEO.value:
+        if len(header) < HEADER_OFFSET:
+            return None
+        return int.from_bytes(header[1:HEADER_OFFSET]) + HEADER_OFFSET
+    else:  # Not packed.
+        return 0
+
+
+def iter_unpack_rrweb(chunks: Iterable[bytes | memoryview]) -> Iterator[memoryview]:
+    """Yield the rrweb bytes of a packed payload which is read in chunks.
+
+    The result is the same as `unpack(b"".join(chunks))[1]`, but the chunks are never joined
+    and video bytes are skipped as they are read.
+    """
+    chunks = iter(chunks)
+
+    header = bytearray()
+    offset = None
+    for chunk in chunks:
+        header += chunk
+        offset = get_rrweb_offset(header)
+        if offset is not None:
+            break
+
+    if offset is None:
+        return
+
+    for chunk in itertools.chain([header], chunks):
+        mv = memoryview(chunk)
+        if offset >= len(mv):
+            offset -= len(mv)
+            continue
+        yield mv[offset:]
+        offset = 0
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
+import itertools
 import uuid
 import zlib
+from collections import deque
 from collections.abc import Iterator
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Any
 
@@ -33,9 +35,16 @@ from sentry.replays.lib.storage import (
     storage_kv,
 )
 from sentry.replays.models import ReplayRecordingSegment
-from sentry.replays.usecases.pack import unpack
+from sentry.replays.usecases.pack import iter_unpack_rrweb, unpack
+from sentry.utils import metrics
 from sentry.utils.snuba import raw_snql_query
 
+# Number of segments downloaded ahead of the one being streamed.
+STREAM_WINDOW_SIZE = 10
+
+# Size of the chunks in which segments are decompressed and streamed.
+STREAM_CHUNK_SIZE = 64 * 1024
+
 # METADATA QUERY BEHAVIOR.
 
 
@@ -267,6 +276,50 @@ def download_segments(segments: list[RecordingSegmentStorageMeta]) -> Iterator[b
     yield b"]"
 
 
+def stream_segments(
+    segments: list[RecordingSegmentStorageMeta], window_size: int = STREAM_WINDOW_SIZE
+) -> Iterator[bytes | memoryview]:
+    """Stream the rrweb data of many segments as one JSON array.
+
+    This produces the same output as `download_segments`, but never holds more than
+    `window_size` segments in memory, and only in their compressed form. The next segments are
+    downloaded concurrently while a segment is decompressed and written out in chunks.
+    """
+    remaining = iter(segments)
+    pending: deque[Future[bytes | None]] = deque()
+
+    with ThreadPoolExecutor(max_workers=window_size) as pool:
+
+        def fill_window() -> None:
+            for segment in itertools.islice(remaining, window_size - len(pending)):
+                pending.append(pool.submit(_fetch_segment, segment))
+
+        try:
+            yield b"["
+
+            fill_window()
+            is_first = True
+            while pending:
+                result = pending.popleft().result()
+                fill_window()
+
+                if not is_first:
+                    yield b","
+                is_first = False
+
+                if result is None:
+                    metrics.incr("replays.usecases.reader.stream_segments.missing")
+                    yield b"[]"
+                else:
+                    yield from iter_unpack_rrweb(iter_decompress(result))
+
+            yield b"]"
+        finally:
+            # The response was closed early, don't wait for segments nobody is going to read.
+            for future in pending:
+                future.cancel()
+
+
 def download_segment(segment: RecordingSegmentStorageMeta, span: Any) -> bytes:
     results = _download_segment(segment)
     return results[1] if results is not None else b"[]"
@@ -288,9 +341,7 @@ def download_video(segment: RecordingSegmentStorageMeta) -> bytes | None:
 
 
 def _download_segment(segment: RecordingSegmentStorageMeta) -> tuple[bytes | None, bytes] | None:
-    driver = filestore if segment.file_id else storage
-
-    result = driver.get(segment)
+    result = _fetch_segment(segment)
     if result is None:
         return None
 
@@ -298,6 +349,12 @@ def _download_segment(segment: RecordingSegmentStorageMeta) -> tuple[bytes | Non
     return unpack(decompressed)
 
 
+def _fetch_segment(segment: RecordingSegmentStorageMeta) -> bytes | None:
+    """Return the segment's payload as it is stored."""
+    driver = filestore if segment.file_id else storage
+    return driver.get(segment)
+
+
 def decompress(buffer: bytes) -> bytes:
     """Return decompressed output."""
     # If the file starts with a valid JSON character we assume its uncompressed.
@@ -308,3 +365,31 @@ def decompress(buffer: bytes) -> bytes:
         return buffer
 
     return zlib.decompress(buffer, zlib.MAX_WBITS | 32)
+
+
+def iter_decompress(
+    buffer: bytes, chunk_size: int = STREAM_CHUNK_SIZE
+) -> Iterator[bytes | memoryview]:
+    """Yield the output of `decompress` in chunks of at most `chunk_size` bytes."""
+    mv = memoryview(buffer)
+
+    if buffer.startswith(b"["):
+        for offset in range(0, len(mv), chunk_size):
+            yield mv[offset : offset + chunk_size]
+        return
+
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 32)
+    # The input is fed in chunks as well, so that the unconsumed input which has to be copied
+    # for every output chunk stays small.
+    for offset in range(0, len(mv), chunk_size):
+        data: bytes | memoryview = mv[offset : offset + chunk_size]
+        while data and not decompressor.eof:
+            if chunk := decompressor.decompress(data, chunk_size):
+                yield chunk
+            data = decompressor.unconsumed_tail
+
+    if chunk := decompressor.flush():
+        yield chunk
+
+    if not decompressor.eof:
+        raise zlib.error("Error -5 while decompressing data: incomplete or truncated stream")
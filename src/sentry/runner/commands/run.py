@@ -244,9 +244,21 @@ def worker(ignore_unknown_queues: bool, **options: Any) -> None:
     help="The rediscluster name to store run state in.",
     default="default",
 )
+@click.option(
+    "--num-shards",
+    help="Share schedules between scheduler replicas by leasing this many shards of them. 0 runs all schedules in a single scheduler.",
+    default=0,
+)
+@click.option(
+    "--max-jitter",
+    help="The maximum number of seconds schedules are spread out by. Requires num-shards.",
+    default=0,
+)
 @log_options()
 @configuration
-def taskworker_scheduler(redis_cluster: str, **options: Any) -> None:
+def taskworker_scheduler(
+    redis_cluster: str, num_shards: int, max_jitter: int, **options: Any
+) -> None:
     """
     Run a scheduler for taskworkers
 
@@ -255,7 +267,7 @@ def taskworker_scheduler(redis_cluster: str, **options: Any) -> None:
     from django.conf import settings
 
     from sentry.taskworker.registry import taskregistry
-    from sentry.taskworker.scheduler.runner import RunStorage, ScheduleRunner
+    from sentry.taskworker.scheduler.runner import RunStorage, ScheduleRunner, ShardedScheduleRunner
     from sentry.utils.redis import redis_clusters
 
     for module in settings.TASKWORKER_IMPORTS:
@@ -264,7 +276,13 @@ def taskworker_scheduler(redis_cluster: str, **options: Any) -> None:
     run_storage = RunStorage(redis_clusters.get(redis_cluster))
 
     with managed_bgtasks(role="taskworker-scheduler"):
-        runner = ScheduleRunner(taskregistry, run_storage)
+        runner: ScheduleRunner
+        if num_shards:
+            runner = ShardedScheduleRunner(
+                taskregistry, run_storage, num_shards=num_shards, max_jitter=max_jitter
+            )
+        else:
+            runner = ScheduleRunner(taskregistry, run_storage)
         for _, schedule_data in settings.TASKWORKER_SCHEDULES.items():
             runner.add(schedule_data)
 
@@ -308,6 +326,11 @@ def taskworker_scheduler(redis_cluster: str, **options: Any) -> None:
     help="The number of tasks to process before choosing a new broker instance. Requires num-brokers > 1",
     default=taskworker_constants.DEFAULT_REBALANCE_AFTER,
 )
+@click.option(
+    "--prefetch-size",
+    help="The number of tasks to fetch and report results for per round trip to the broker. 0 fetches tasks one at a time.",
+    default=0,
+)
 @log_options()
 @configuration
 def taskworker(**options: Any) -> None:
@@ -329,6 +352,7 @@ def run_taskworker(
     child_tasks_queue_maxsize: int,
     result_queue_maxsize: int,
     rebalance_after: int,
+    prefetch_size: int,
     **options: Any,
 ) -> None:
     """
@@ -346,6 +370,7 @@ def run_taskworker(
             child_tasks_queue_maxsize=child_tasks_queue_maxsize,
             result_queue_maxsize=result_queue_maxsize,
             rebalance_after=rebalance_after,
+            prefetch_size=prefetch_size,
             **options,
         )
         exitcode = worker.start()
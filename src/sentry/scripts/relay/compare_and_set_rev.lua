@@ -0,0 +1,13 @@
+-- Replaces the revision at KEYS[1] with ARGV[2] for ARGV[3] seconds if, and only if, it
+-- currently is ARGV[1].
+-- Returns 1 if the revision was replaced, and 0 otherwise.
+local key = KEYS[1]
+local expected_rev = ARGV[1]
+local rev = ARGV[2]
+local timeout = ARGV[3]
+
+if redis.call('GET', key) == expected_rev then
+    redis.call('SET', key, rev, 'EX', timeout)
+    return 1
+end
+return 0
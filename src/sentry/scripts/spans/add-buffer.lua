@@ -11,6 +11,13 @@ ARGS:
 - span_id -- str
 - parent_span_id -- str
 - set_timeout -- int
+- track_size -- bool, whether to track the size of the segment's payloads.
+
+Returns the size of the hole that had to be traversed, the key the span would
+have had as its own segment, the key of the segment it was added to, whether
+that segment has a root span, the total size of the segment's payloads in
+bytes (0 if sizes are not tracked), and the number of bytes added (0 if the
+payload was already in the segment).
 
 ]]--
 
@@ -21,6 +28,7 @@ local is_root_span = ARGV[2] == "true"
 local span_id = ARGV[3]
 local parent_span_id = ARGV[4]
 local set_timeout = tonumber(ARGV[5])
+local track_size = ARGV[6] == "true"
 
 local span_key = string.format("span-buf:s:{%s}:%s", project_and_trace, span_id)
 
@@ -40,13 +48,33 @@ end
 redis.call("hset", main_redirect_key, span_id, set_span_id)
 local set_key = string.format("span-buf:s:{%s}:%s", project_and_trace, set_span_id)
 
+local set_size_key = string.format("span-buf:bs:%s", set_key)
+
 if not is_root_span then
     redis.call("sunionstore", set_key, set_key, span_key)
     redis.call("del", span_key)
+
+    if track_size then
+        local span_size_key = string.format("span-buf:bs:%s", span_key)
+        local span_size = redis.call("get", span_size_key)
+        if span_size then
+            redis.call("del", span_size_key)
+            redis.call("incrby", set_size_key, span_size)
+        end
+    end
+end
+local added_bytes = 0
+if redis.call("sadd", set_key, payload) == 1 then
+    added_bytes = #payload
 end
-redis.call("sadd", set_key, payload)
 redis.call("expire", set_key, set_timeout)
 
+local segment_size = 0
+if track_size then
+    segment_size = redis.call("incrby", set_size_key, added_bytes)
+    redis.call("expire", set_size_key, set_timeout)
+end
+
 redis.call("expire", main_redirect_key, set_timeout)
 
 local has_root_span_key = string.format("span-buf:hrs:%s", set_key)
@@ -55,4 +83,4 @@ if has_root_span or is_root_span then
     redis.call("setex", has_root_span_key, set_timeout, "1")
 end
 
-return {hole_size, span_key, set_key, has_root_span or is_root_span}
+return {hole_size, span_key, set_key, has_root_span or is_root_span, segment_size, added_bytes}
@@ -0,0 +1,53 @@
+--[[
+
+Delete all keys belonging to flushed segments of one trace in a single round
+trip.
+
+KEYS:
+- "project_id:trace_id" -- just for redis-cluster routing, all keys that the script uses are sharded like this/have this hashtag.
+
+ARGS, repeated for every segment:
+- set_key -- the "span-buf:s:*" key of the segment.
+- num_span_ids -- int, the number of span IDs following.
+- span_id... -- the IDs of all spans in the segment, to be removed from the redirect map.
+
+Returns whether every segment had a root span, the total size of its flushed
+payloads in bytes, and whether new spans were added to the segment since it
+was read by read-segments.lua, in the order of the arguments. Segments with new
+spans are kept, so that those spans get flushed later.
+
+]]--
+
+local project_and_trace = KEYS[1]
+local main_redirect_key = string.format("span-buf:sr:{%s}", project_and_trace)
+
+local segments = {}
+local i = 1
+while i <= #ARGV do
+    local set_key = ARGV[i]
+    local num_span_ids = tonumber(ARGV[i + 1])
+    local first_span_id = i + 2
+    local last_span_id = first_span_id + num_span_ids - 1
+
+    local has_root_span_key = string.format("span-buf:hrs:%s", set_key)
+    local has_root_span = redis.call("get", has_root_span_key) == "1"
+    local flushing_key = string.format("span-buf:fs:%s", set_key)
+    local flushing_size_key = string.format("span-buf:fbs:%s", set_key)
+    local segment_size = tonumber(redis.call("get", flushing_size_key) or "0")
+    redis.call("del", flushing_key, flushing_size_key)
+
+    local has_new_spans = redis.call("exists", set_key) == 1
+    if not has_new_spans then
+        redis.call("del", has_root_span_key)
+    end
+
+    -- unpack() is limited by the Lua stack size, so remove redirects in batches.
+    for j = first_span_id, last_span_id, 100 do
+        redis.call("hdel", main_redirect_key, unpack(ARGV, j, math.min(j + 99, last_span_id)))
+    end
+
+    table.insert(segments, {has_root_span, segment_size, has_new_spans})
+    i = last_span_id + 1
+end
+
+return segments
@@ -0,0 +1,56 @@
+--[[
+
+Read the payloads of segments of one trace for flushing, unless a segment is
+too large to be read in one go.
+
+KEYS:
+- "project_id:trace_id" -- just for redis-cluster routing, all keys that the script uses are sharded like this/have this hashtag.
+
+ARGS:
+- max_spans -- int, the maximum number of spans to return for one segment.
+- set_timeout -- int
+- set_key... -- the "span-buf:s:*" keys of the segments.
+
+Every segment is moved to its "span-buf:fs:*" key (and its size to its
+"span-buf:fbs:*" key) before it is read, merging it with what is left there
+from a previous read that was not marked as done. Spans that arrive while the
+segment is being flushed are therefore added to a new set under the original
+key, which is not deleted by done-flush-segments.lua and gets flushed later.
+
+Returns the size and the payloads of every segment, in the order of the
+arguments. If a segment has more than max_spans spans, no payloads are returned
+for it and the caller has to read its "span-buf:fs:*" set incrementally using
+SSCAN instead, so that a single huge segment does not block Redis or produce a
+huge reply.
+
+]]--
+
+local max_spans = tonumber(ARGV[1])
+local set_timeout = tonumber(ARGV[2])
+
+local segments = {}
+for i = 3, #ARGV do
+    local set_key = ARGV[i]
+    local flushing_key = string.format("span-buf:fs:%s", set_key)
+    redis.call("sunionstore", flushing_key, flushing_key, set_key)
+    redis.call("del", set_key)
+    redis.call("expire", flushing_key, set_timeout)
+
+    local set_size_key = string.format("span-buf:bs:%s", set_key)
+    local flushing_size_key = string.format("span-buf:fbs:%s", set_key)
+    local set_size = redis.call("get", set_size_key)
+    if set_size then
+        redis.call("del", set_size_key)
+        redis.call("incrby", flushing_size_key, set_size)
+        redis.call("expire", flushing_size_key, set_timeout)
+    end
+
+    local size = redis.call("scard", flushing_key)
+    if size > max_spans then
+        segments[i - 2] = {size, {}}
+    else
+        segments[i - 2] = {size, redis.call("smembers", flushing_key)}
+    end
+end
+
+return segments
@@ -0,0 +1,12 @@
+-- Claims the lease at KEYS[1] for ARGV[1], or extends it if ARGV[1] holds it already.
+-- Returns 1 if ARGV[1] holds the lease for another ARGV[2] seconds, and 0 otherwise.
+local key = KEYS[1]
+local owner = ARGV[1]
+local duration = ARGV[2]
+
+local current = redis.call('GET', key)
+if not current or current == owner then
+    redis.call('SET', key, owner, 'EX', duration)
+    return 1
+end
+return 0
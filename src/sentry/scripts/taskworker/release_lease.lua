@@ -0,0 +1,8 @@
+-- Releases the lease at KEYS[1] if, and only if, it is held by ARGV[1].
+local key = KEYS[1]
+local owner = ARGV[1]
+
+if redis.call('GET', key) == owner then
+    return redis.call('DEL', key)
+end
+return 0
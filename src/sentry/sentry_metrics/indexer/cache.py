@@ -2,15 +2,20 @@ from __future__ import annotations
 
 import logging
 import random
+import threading
+import time
+from collections import defaultdict
 from collections.abc import Collection, Iterable, Mapping, MutableMapping, Sequence
 from datetime import datetime, timedelta
 
+from cachetools import LRUCache
 from django.conf import settings
 from django.core.cache import caches
 
 from sentry import options
 from sentry.sentry_metrics.indexer.base import (
     FetchType,
+    FetchTypeExt,
     OrgId,
     StringIndexer,
     UseCaseKeyCollection,
@@ -33,6 +38,7 @@ _INDEXER_CACHE_RESOLVE_CACHE_REPLENISHMENT_METRIC = (
 _INDEXER_CACHE_DOUBLE_WRITE_METRIC = "sentry_metrics.indexer.memcache.double-write"
 _INDEXER_CACHE_DOUBLE_READ_METRIC = "sentry_metrics.indexer.memcache.new-schema-read"
 _INDEXER_CACHE_STALE_KEYS_METRIC = "sentry_metrics.indexer.memcache.stale-keys"
+_INDEXER_IN_MEMORY_CACHE_METRIC = "sentry_metrics.indexer.in_memory_cache"
 
 # only used to compare to the older version of the PGIndexer
 _INDEXER_CACHE_FETCH_METRIC = "sentry_metrics.indexer.memcache.fetch"
@@ -44,6 +50,17 @@ NAMESPACED_READ_FEAT_FLAG = "sentry-metrics.indexer.read-new-cache-namespace"
 BULK_RECORD_CACHE_NAMESPACE = "br"
 RESOLVE_CACHE_NAMESPACE = "res"
 
+IN_MEMORY_CACHE_FEAT_FLAG = "sentry-metrics.indexer.in-memory-cache.enabled"
+
+InMemoryCacheKey = tuple[UseCaseID, OrgId, str]
+
+
+def randomize_ttl(cache_ttl: int) -> int:
+    # introduce jitter in the cache_ttl so that when we have large
+    # amount of new keys written into the cache, they don't expire all at once
+    jitter = random.uniform(0, 0.25) * cache_ttl
+    return int(cache_ttl + jitter)
+
 
 class StringIndexerCache:
     def __init__(self, cache_name: str, partition_key: str):
@@ -53,11 +70,7 @@ class StringIndexerCache:
 
     @property
     def randomized_ttl(self) -> int:
-        # introduce jitter in the cache_ttl so that when we have large
-        # amount of new keys written into the cache, they don't expire all at once
-        cache_ttl = settings.SENTRY_METRICS_INDEXER_CACHE_TTL
-        jitter = random.uniform(0, 0.25) * cache_ttl
-        return int(cache_ttl + jitter)
+        return randomize_ttl(settings.SENTRY_METRICS_INDEXER_CACHE_TTL)
 
     def _make_cache_key(self, key: str) -> str:
         use_case_id, org_id, string = key.split(":", 2)
@@ -205,16 +218,128 @@ class StringIndexerCache:
             )
 
 
+class InMemoryStringIndexerCache:
+    """
+    A bounded, per-process cache in front of the `StringIndexerCache` for `bulk_record`.
+
+    Almost all metric names and tag keys repeat in every batch, so most batches can be resolved
+    without going to Redis at all. Entries expire like the ones in Redis do, with the same jitter.
+    Strings which were rate limited are cached for a short while as well, so that they don't go
+    through Redis and the rate limiter again in every batch until the limit is lifted.
+    """
+
+    def __init__(self, maxsize: int = 50_000) -> None:
+        # (id, expires_at) by key
+        self._ids: LRUCache[InMemoryCacheKey, tuple[int, float]] = LRUCache(maxsize)
+        # (fetch_type_ext, expires_at) by key
+        self._rate_limited: LRUCache[InMemoryCacheKey, tuple[FetchTypeExt | None, float]] = (
+            LRUCache(maxsize)
+        )
+        self._lock = threading.Lock()
+
+    def get_many(
+        self, keys: UseCaseKeyCollection
+    ) -> tuple[UseCaseKeyResults, UseCaseKeyCollection]:
+        """
+        Returns the results for all keys which are cached, and a collection of the ones which
+        are not.
+        """
+        now = time.monotonic()
+        results = UseCaseKeyResults()
+        missing: dict[UseCaseID, dict[OrgId, set[str]]] = defaultdict(lambda: defaultdict(set))
+        hits = rate_limited = 0
+
+        with self._lock:
+            for use_case_id, key_collection in keys.mapping.items():
+                for org_id, strings in key_collection.mapping.items():
+                    for string in strings:
+                        key = (use_case_id, org_id, string)
+                        cached_id = self._ids.get(key)
+                        if cached_id is not None and cached_id[1] > now:
+                            results.add_use_case_key_result(
+                                UseCaseKeyResult(use_case_id, org_id, string, cached_id[0]),
+                                FetchType.CACHE_HIT,
+                            )
+                            hits += 1
+                            continue
+
+                        limited = self._rate_limited.get(key)
+                        if limited is not None and limited[1] > now:
+                            results.add_use_case_key_result(
+                                UseCaseKeyResult(use_case_id, org_id, string, None),
+                                FetchType.RATE_LIMITED,
+                                limited[0],
+                            )
+                            rate_limited += 1
+                            continue
+
+                        missing[use_case_id][org_id].add(string)
+
+        metrics.incr(_INDEXER_IN_MEMORY_CACHE_METRIC, tags={"result": "hit"}, amount=hits)
+        metrics.incr(
+            _INDEXER_IN_MEMORY_CACHE_METRIC, tags={"result": "rate_limited"}, amount=rate_limited
+        )
+        metrics.incr(
+            _INDEXER_IN_MEMORY_CACHE_METRIC,
+            tags={"result": "miss"},
+            amount=keys.size - hits - rate_limited,
+        )
+
+        return results, UseCaseKeyCollection(
+            {use_case_id: dict(org_strings) for use_case_id, org_strings in missing.items()}
+        )
+
+    def set_many(self, results: UseCaseKeyResults) -> None:
+        """
+        Caches all mapped strings of `results`, and all strings which were rate limited.
+        """
+        now = time.monotonic()
+        expires_at = now + randomize_ttl(settings.SENTRY_METRICS_INDEXER_CACHE_TTL)
+        rate_limited_expires_at = now + options.get(
+            "sentry-metrics.indexer.in-memory-cache.rate-limited-ttl"
+        )
+
+        with self._lock:
+            for use_case_id, key_results in results.results.items():
+                fetch_metadata = key_results.get_fetch_metadata()
+                for org_id, strings in key_results.results.items():
+                    for string, id in strings.items():
+                        key = (use_case_id, org_id, string)
+                        if id is not None:
+                            self._ids[key] = (id, expires_at)
+                            continue
+
+                        metadata = fetch_metadata.get(org_id, {}).get(string)
+                        if metadata is not None and metadata.fetch_type == FetchType.RATE_LIMITED:
+                            self._rate_limited[key] = (
+                                metadata.fetch_type_ext,
+                                rate_limited_expires_at,
+                            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ids.clear()
+            self._rate_limited.clear()
+
+
 class CachingIndexer(StringIndexer):
     def __init__(self, cache: StringIndexerCache, indexer: StringIndexer) -> None:
         self.cache = cache
         self.indexer = indexer
+        self.local_cache = InMemoryStringIndexerCache()
 
     def bulk_record(
         self, strings: Mapping[UseCaseID, Mapping[OrgId, set[str]]]
     ) -> UseCaseKeyResults:
         cache_keys = UseCaseKeyCollection(strings)
         metrics.gauge("sentry_metrics.indexer.lookups_per_batch", value=cache_keys.size)
+
+        use_local_cache = options.get(IN_MEMORY_CACHE_FEAT_FLAG)
+        if use_local_cache:
+            local_results, cache_keys = self.local_cache.get_many(cache_keys)
+            if cache_keys.size == 0:
+                return local_results
+
         cache_key_strs = cache_keys.as_strings()
         cache_results = self.cache.get_many(BULK_RECORD_CACHE_NAMESPACE, cache_key_strs)
 
@@ -244,10 +369,13 @@ class CachingIndexer(StringIndexer):
             FetchType.CACHE_HIT,
         )
 
+        if use_local_cache:
+            self.local_cache.set_many(cache_key_results)
+
         db_record_keys = cache_key_results.get_unmapped_use_case_keys(cache_keys)
 
         if db_record_keys.size == 0:
-            return cache_key_results
+            return local_results.merge(cache_key_results) if use_local_cache else cache_key_results
 
         db_record_key_results = self.indexer.bulk_record(
             {
@@ -260,7 +388,12 @@ class CachingIndexer(StringIndexer):
             BULK_RECORD_CACHE_NAMESPACE, db_record_key_results.get_mapped_strings_to_ints()
         )
 
-        return cache_key_results.merge(db_record_key_results)
+        results = cache_key_results.merge(db_record_key_results)
+        if use_local_cache:
+            self.local_cache.set_many(db_record_key_results)
+            results = local_results.merge(results)
+
+        return results
 
     def record(self, use_case_id: UseCaseID, org_id: int, string: str) -> int | None:
         result = self.bulk_record(strings={use_case_id: {org_id: {string}}})
@@ -1,5 +1,6 @@
 import logging
-from collections.abc import Callable
+from collections import defaultdict
+from collections.abc import Callable, Sequence
 from datetime import timezone
 
 import sentry_sdk
@@ -16,8 +17,12 @@ from sentry.utils import metrics
 
 logger = logging.getLogger(__name__)
 TQuerySubscriptionCallable = Callable[[QuerySubscriptionUpdate, QuerySubscription], None]
+TQuerySubscriptionBatchCallable = Callable[
+    [Sequence[tuple[QuerySubscriptionUpdate, QuerySubscription]]], None
+]
 
 subscriber_registry: dict[str, TQuerySubscriptionCallable] = {}
+batch_subscriber_registry: dict[str, TQuerySubscriptionBatchCallable] = {}
 
 
 def register_subscriber(
@@ -32,6 +37,25 @@ def register_subscriber(
     return inner
 
 
+def register_batch_subscriber(
+    subscriber_key: str,
+) -> Callable[[TQuerySubscriptionBatchCallable], TQuerySubscriptionBatchCallable]:
+    """
+    Registers a callback which processes many updates of the subscriber type at once, when the
+    consumer runs in batched mode. Updates are passed in the order they were consumed in.
+    Subscriber types without a batch callback fall back to calling their regular callback for
+    every update.
+    """
+
+    def inner(func: TQuerySubscriptionBatchCallable) -> TQuerySubscriptionBatchCallable:
+        if subscriber_key in batch_subscriber_registry:
+            raise Exception("Batch handler already registered for %s" % subscriber_key)
+        batch_subscriber_registry[subscriber_key] = func
+        return func
+
+    return inner
+
+
 def parse_message_value(
     value: bytes, jsoncodec: Codec[SubscriptionResult]
 ) -> QuerySubscriptionUpdate:
@@ -77,22 +101,10 @@ def handle_message(
     :return:
     """
     with sentry_sdk.isolation_scope() as scope:
-        try:
-            with metrics.timer(
-                "snuba_query_subscriber.parse_message_value", tags={"dataset": dataset}
-            ):
-                contents = parse_message_value(message_value, jsoncodec)
-        except InvalidMessageError:
-            # If the message is in an invalid format, just log the error
-            # and continue
-            logger.exception(
-                "Subscription update could not be parsed",
-                extra={
-                    "offset": message_offset,
-                    "partition": message_partition,
-                    "value": message_value,
-                },
-            )
+        contents = _parse_message(
+            message_value, message_offset, message_partition, dataset, jsoncodec
+        )
+        if contents is None:
             return
         scope.set_tag("query_subscription_id", contents["subscription_id"])
 
@@ -100,56 +112,17 @@ def handle_message(
             with metrics.timer(
                 "snuba_query_subscriber.fetch_subscription", tags={"dataset": dataset}
             ):
-                subscription = QuerySubscription.objects.get_from_cache(
+                subscription: QuerySubscription | None = QuerySubscription.objects.get_from_cache(
                     subscription_id=contents["subscription_id"]
                 )
-                if subscription.status != QuerySubscription.Status.ACTIVE.value:
-                    metrics.incr("snuba_query_subscriber.subscription_inactive")
-                    return
         except QuerySubscription.DoesNotExist:
-            metrics.incr(
-                "snuba_query_subscriber.subscription_doesnt_exist", tags={"dataset": dataset}
-            )
-            logger.warning(
-                "Received subscription update, but subscription does not exist",
-                extra={
-                    "offset": message_offset,
-                    "partition": message_partition,
-                    "value": message_value,
-                },
-            )
-            try:
-                if topic in topic_to_dataset:
-                    _delete_from_snuba(
-                        topic_to_dataset[topic],
-                        contents["subscription_id"],
-                        EntityKey(contents["entity"]),
-                    )
-                else:
-                    logger.exception(
-                        "Topic not registered with QuerySubscriptionConsumer, can't remove "
-                        "non-existent subscription from Snuba",
-                        extra={"topic": topic, "subscription_id": contents["subscription_id"]},
-                    )
-            except InvalidMessageError as e:
-                logger.exception(str(e))
-            except Exception:
-                logger.exception("Failed to delete unused subscription from snuba.")
-            return
+            subscription = None
 
-        if subscription.type not in subscriber_registry:
-            metrics.incr(
-                "snuba_query_subscriber.subscription_type_not_registered", tags={"dataset": dataset}
-            )
-            logger.error(
-                "Received subscription update, but no subscription handler registered",
-                extra={
-                    "offset": message_offset,
-                    "partition": message_partition,
-                    "value": message_value,
-                },
-            )
+        if not _check_subscription(
+            contents, subscription, message_value, message_offset, message_partition, topic, dataset
+        ):
             return
+        assert subscription is not None
 
         sentry_sdk.set_tag("project_id", subscription.project_id)
         sentry_sdk.set_tag("query_subscription_id", contents["subscription_id"])
@@ -176,6 +149,166 @@ def handle_message(
             callback(contents, subscription)
 
 
+def handle_messages(
+    messages: Sequence[tuple[bytes, int, int]],
+    topic: str,
+    dataset: str,
+    jsoncodec: Codec[SubscriptionResult],
+) -> None:
+    """
+    Batched version of `handle_message`, taking `(value, offset, partition)` tuples. All
+    subscriptions are fetched at once, and updates are passed to the batch callback of their
+    subscription type in one go. Types without a batch callback get their regular callback
+    called for every update, in order.
+    """
+    parsed = []
+    for message_value, message_offset, message_partition in messages:
+        contents = _parse_message(
+            message_value, message_offset, message_partition, dataset, jsoncodec
+        )
+        if contents is not None:
+            parsed.append((contents, message_value, message_offset, message_partition))
+
+    with metrics.timer("snuba_query_subscriber.fetch_subscriptions", tags={"dataset": dataset}):
+        subscriptions = {
+            subscription.subscription_id: subscription
+            for subscription in QuerySubscription.objects.get_many_from_cache(
+                list({contents["subscription_id"] for contents, _, _, _ in parsed}),
+                key="subscription_id",
+            )
+        }
+
+    updates_by_type: dict[str, list[tuple[QuerySubscriptionUpdate, QuerySubscription]]] = (
+        defaultdict(list)
+    )
+    for contents, message_value, message_offset, message_partition in parsed:
+        subscription = subscriptions.get(contents["subscription_id"])
+        if _check_subscription(
+            contents, subscription, message_value, message_offset, message_partition, topic, dataset
+        ):
+            assert subscription is not None
+            updates_by_type[subscription.type].append((contents, subscription))
+
+    for subscription_type, updates in updates_by_type.items():
+        batch_callback = batch_subscriber_registry.get(subscription_type)
+        with (
+            sentry_sdk.start_span(op="process_batch") as span,
+            metrics.timer(
+                "snuba_query_subscriber.batch_callback.duration",
+                instance=subscription_type,
+                tags={"dataset": dataset},
+            ),
+        ):
+            span.set_data("subscription_type", subscription_type)
+            span.set_data("updates", len(updates))
+            metrics.distribution(
+                "snuba_query_subscriber.batch_callback.updates",
+                len(updates),
+                tags={"dataset": dataset},
+            )
+
+            if batch_callback is not None:
+                batch_callback(updates)
+                continue
+
+            callback = subscriber_registry[subscription_type]
+            for contents, subscription in updates:
+                try:
+                    callback(contents, subscription)
+                except Exception:
+                    logger.exception(
+                        "Unexpected error while handling subscription update. Skipping update.",
+                        extra={"subscription_id": contents["subscription_id"]},
+                    )
+
+
+def _parse_message(
+    message_value: bytes,
+    message_offset: int,
+    message_partition: int,
+    dataset: str,
+    jsoncodec: Codec[SubscriptionResult],
+) -> QuerySubscriptionUpdate | None:
+    try:
+        with metrics.timer("snuba_query_subscriber.parse_message_value", tags={"dataset": dataset}):
+            return parse_message_value(message_value, jsoncodec)
+    except InvalidMessageError:
+        # If the message is in an invalid format, just log the error
+        # and continue
+        logger.exception(
+            "Subscription update could not be parsed",
+            extra={
+                "offset": message_offset,
+                "partition": message_partition,
+                "value": message_value,
+            },
+        )
+        return None
+
+
+def _check_subscription(
+    contents: QuerySubscriptionUpdate,
+    subscription: QuerySubscription | None,
+    message_value: bytes,
+    message_offset: int,
+    message_partition: int,
+    topic: str,
+    dataset: str,
+) -> bool:
+    """
+    Returns whether an update should be passed on to the callback of its subscription. If the
+    subscription has been removed, it is removed from Snuba as well.
+    """
+    if subscription is None:
+        metrics.incr("snuba_query_subscriber.subscription_doesnt_exist", tags={"dataset": dataset})
+        logger.warning(
+            "Received subscription update, but subscription does not exist",
+            extra={
+                "offset": message_offset,
+                "partition": message_partition,
+                "value": message_value,
+            },
+        )
+        try:
+            if topic in topic_to_dataset:
+                _delete_from_snuba(
+                    topic_to_dataset[topic],
+                    contents["subscription_id"],
+                    EntityKey(contents["entity"]),
+                )
+            else:
+                logger.error(
+                    "Topic not registered with QuerySubscriptionConsumer, can't remove "
+                    "non-existent subscription from Snuba",
+                    extra={"topic": topic, "subscription_id": contents["subscription_id"]},
+                )
+        except InvalidMessageError as e:
+            logger.exception(str(e))
+        except Exception:
+            logger.exception("Failed to delete unused subscription from snuba.")
+        return False
+
+    if subscription.status != QuerySubscription.Status.ACTIVE.value:
+        metrics.incr("snuba_query_subscriber.subscription_inactive")
+        return False
+
+    if subscription.type not in subscriber_registry:
+        metrics.incr(
+            "snuba_query_subscriber.subscription_type_not_registered", tags={"dataset": dataset}
+        )
+        logger.error(
+            "Received subscription update, but no subscription handler registered",
+            extra={
+                "offset": message_offset,
+                "partition": message_partition,
+                "value": message_value,
+            },
+        )
+        return False
+
+    return True
+
+
 class InvalidMessageError(Exception):
     pass
 
@@ -1,6 +1,7 @@
 import logging
 from collections.abc import Mapping
 from functools import partial
+from typing import Literal
 
 import sentry_sdk
 from arroyo.backends.kafka.consumer import KafkaPayload
@@ -10,6 +11,7 @@ from arroyo.processing.strategies import (
     ProcessingStrategyFactory,
     RunTask,
 )
+from arroyo.processing.strategies.batching import BatchStep, ValuesBatch
 from arroyo.types import BrokerValue, Commit, Message, Partition
 from sentry_kafka_schemas import get_codec
 
@@ -33,6 +35,7 @@ class QuerySubscriptionStrategyFactory(ProcessingStrategyFactory[KafkaPayload]):
         input_block_size: int | None,
         output_block_size: int | None,
         multi_proc: bool = True,
+        mode: Literal["parallel", "batched"] = "parallel",
     ):
         self.dataset = Dataset(dataset)
         self.logical_topic = dataset_to_logical_topic[self.dataset]
@@ -42,6 +45,9 @@ class QuerySubscriptionStrategyFactory(ProcessingStrategyFactory[KafkaPayload]):
         self.input_block_size = input_block_size
         self.output_block_size = output_block_size
         self.multi_proc = multi_proc
+        # Batched mode processes batches in the main process, so that updates of the same alert
+        # rule can share their database and Redis round trips
+        self.batched = mode == "batched"
         self.pool = MultiprocessingPool(num_processes)
 
     def create_with_partitions(
@@ -49,6 +55,16 @@ class QuerySubscriptionStrategyFactory(ProcessingStrategyFactory[KafkaPayload]):
         commit: Commit,
         partitions: Mapping[Partition, int],
     ) -> ProcessingStrategy[KafkaPayload]:
+        if self.batched:
+            return BatchStep(
+                max_batch_size=self.max_batch_size,
+                max_batch_time=self.max_batch_time,
+                next_step=RunTask(
+                    partial(process_batch, self.dataset, self.topic, self.logical_topic),
+                    CommitOffsets(commit),
+                ),
+            )
+
         callable = partial(process_message, self.dataset, self.topic, self.logical_topic)
         if self.multi_proc:
             return run_task_with_multiprocessing(
@@ -70,7 +86,6 @@ class QuerySubscriptionStrategyFactory(ProcessingStrategyFactory[KafkaPayload]):
 def process_message(
     dataset: Dataset, topic: str, logical_topic: str, message: Message[KafkaPayload]
 ) -> None:
-    from sentry.snuba.query_subscriptions.consumer import handle_message
     from sentry.utils import metrics
 
     with (
@@ -83,27 +98,85 @@ def process_message(
     ):
         value = message.value
         assert isinstance(value, BrokerValue)
-        offset = value.offset
-        partition = value.partition.index
-        message_value = value.payload.value
+        _handle_message(
+            dataset,
+            topic,
+            logical_topic,
+            value.payload.value,
+            value.offset,
+            value.partition.index,
+        )
+
+
+def _handle_message(
+    dataset: Dataset,
+    topic: str,
+    logical_topic: str,
+    message_value: bytes,
+    offset: int,
+    partition: int,
+) -> None:
+    from sentry.snuba.query_subscriptions.consumer import handle_message
+
+    try:
+        handle_message(
+            message_value,
+            offset,
+            partition,
+            topic,
+            dataset.value,
+            get_codec(logical_topic),
+        )
+    except Exception:
+        # This is a failsafe to make sure that no individual message will block this
+        # consumer. If we see errors occurring here they need to be investigated to
+        # make sure that we're not dropping legitimate messages.
+        logger.exception(
+            "Unexpected error while handling message in QuerySubscriptionStrategy. Skipping message.",
+            extra={
+                "offset": offset,
+                "partition": partition,
+                "value": message_value,
+            },
+        )
+
+
+def process_batch(
+    dataset: Dataset,
+    topic: str,
+    logical_topic: str,
+    message: Message[ValuesBatch[KafkaPayload]],
+) -> None:
+    from sentry.snuba.query_subscriptions.consumer import handle_messages
+    from sentry.utils import metrics
+
+    messages = []
+    for value in message.payload:
+        assert isinstance(value, BrokerValue)
+        messages.append((value.payload.value, value.offset, value.partition.index))
+
+    with (
+        sentry_sdk.start_transaction(
+            op="handle_messages",
+            name="query_subscription_consumer_process_batch",
+            custom_sampling_context={"sample_rate": options.get("subscriptions-query.sample-rate")},
+        ),
+        metrics.timer("snuba_query_subscriber.handle_messages", tags={"dataset": dataset.value}),
+    ):
         try:
-            handle_message(
-                message_value,
-                offset,
-                partition,
-                topic,
-                dataset.value,
-                get_codec(logical_topic),
-            )
+            handle_messages(messages, topic, dataset.value, get_codec(logical_topic))
         except Exception:
-            # This is a failsafe to make sure that no individual message will block this
-            # consumer. If we see errors occurring here they need to be investigated to
-            # make sure that we're not dropping legitimate messages.
+            # Rather than dropping the whole batch, fall back to handling its messages one by
+            # one, which skips only the messages that fail on their own. Updates which were
+            # processed already are recognized by their alert rule stats.
             logger.exception(
-                "Unexpected error while handling message in QuerySubscriptionStrategy. Skipping message.",
+                "Unexpected error while handling batch in QuerySubscriptionStrategy. Handling messages one by one.",
                 extra={
-                    "offset": offset,
-                    "partition": partition,
-                    "value": message_value,
+                    "first_offset": messages[0][1] if messages else None,
+                    "partition": messages[0][2] if messages else None,
+                    "size": len(messages),
                 },
             )
+            metrics.incr("snuba_query_subscriber.handle_messages.fallback")
+            for message_value, offset, partition in messages:
+                _handle_message(dataset, topic, logical_topic, message_value, offset, partition)
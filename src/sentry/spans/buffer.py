@@ -47,30 +47,65 @@ This happens in two steps: Get the to-be-flushed segments in `flush_segments`,
 then the consumer produces them, then they are deleted from Redis
 (`done_flush_segments`)
 
+With the `standalone-spans.buffer.scripted-flush.enable` option, both steps
+use server-side scripts (`read-segments.lua` and `done-flush-segments.lua`),
+called once per trace for all of its segments, instead of several commands per
+segment. Segments are read in bounded chunks, and segments too
+large to be read in one reply are read with SSCAN instead. Reading a segment
+moves it to a separate "flushing" key, so that spans arriving between the two
+steps are not deleted with it, but kept in the segment and flushed later.
+
 On top of this, the global queue is sharded by partition, meaning that each
 consumer reads and writes to shards that correspond to its own assigned
 partitions. This means that extra care needs to be taken when recreating topics
 or using spillover topics, especially when their new partition count is lower
 than the original topic.
 
+Span payloads can optionally be stored zstd-compressed, which is enabled per
+partition using the `standalone-spans.buffer.compression.partitions` option.
+Compressed and uncompressed payloads are told apart by the zstd magic number, so
+the option can be changed at any time.
+
+To keep Redis memory bounded when a single trace explodes, the buffer tracks the
+size of each segment's payloads. Segments larger than
+`standalone-spans.buffer.max-segment-bytes` are scheduled to be flushed right
+away as partial segments, so they can't grow without bound until they time out.
+Spans of the same segment arriving afterwards end up in another (partial)
+segment. If `standalone-spans.buffer.max-shard-bytes` is set, the total size of
+each queue shard is tracked as well, and a shard over that budget has its
+segments flushed in deadline order without waiting for them to time out. The
+shard sizes are approximate: they expire along with the rest of the buffer and
+are never negative. Since early flushing targets segments that are still
+growing, both budgets only apply with the scripted flush. Segment sizes are only
+tracked while one of the budgets is set.
+
+The scripted flush can be turned off again at any time: the legacy flush also
+reads and deletes the "flushing" keys of segments which the scripted flush read
+but did not mark as done.
+
 Glossary for types of keys:
 
     * span-buf:s:* -- the actual set keys, containing span payloads. Each key contains all data for a segment. The most memory-intensive kind of key.
     * span-buf:q:* -- the priority queue, used to determine which segments are ready to be flushed.
     * span-buf:hrs:* -- simple bool key to flag a segment as "has root span" (HRS)
+    * span-buf:bs:* -- the total size of a segment's payloads in bytes, only written if a memory budget is set.
+    * span-buf:fs:*, span-buf:fbs:* -- a segment and its size while it is being flushed by the scripted flush.
+    * span-buf:qb:* -- the total size of all payloads in a queue shard in bytes, only written if a shard budget is set.
     * span-buf:sr:* -- redirect mappings so that each incoming span ID can be mapped to the right span-buf:s: set.
 """
 
 from __future__ import annotations
 
 import itertools
-from collections.abc import Sequence
+from collections.abc import Callable, Iterable, Sequence
 from typing import Any, NamedTuple
 
 import rapidjson
+import zstandard
 from django.conf import settings
 from sentry_redis_tools.clients import RedisCluster, StrictRedis
 
+from sentry import options
 from sentry.utils import metrics, redis
 
 # This SegmentId is an internal identifier used by the redis buffer that is
@@ -100,6 +135,27 @@ def get_redis_client() -> RedisCluster[bytes] | StrictRedis[bytes]:
 
 
 add_buffer_script = redis.load_redis_script("spans/add-buffer.lua")
+read_segments_script = redis.load_redis_script("spans/read-segments.lua")
+done_flush_segments_script = redis.load_redis_script("spans/done-flush-segments.lua")
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+ZSTD_COMPRESSION_LEVEL = 3
+
+# How many segments to read per pipeline when the scripted flush is enabled.
+FLUSH_CHUNK_SIZE = 100
+# Segments with more spans than this are read incrementally with SSCAN.
+MAX_SEGMENT_READ_SPANS = 1000
+SEGMENT_SSCAN_COUNT = 1000
+
+
+def encode_payload(payload: bytes) -> bytes:
+    return zstandard.compress(payload, ZSTD_COMPRESSION_LEVEL)
+
+
+def decode_payload(payload: bytes) -> bytes:
+    if payload.startswith(ZSTD_MAGIC):
+        return zstandard.decompress(payload)
+    return payload
 
 
 # NamedTuples are faster to construct than dataclasses
@@ -130,6 +186,9 @@ class SpansBuffer:
         self.span_buffer_root_timeout_secs = span_buffer_root_timeout_secs
         self.redis_ttl = redis_ttl
 
+        # Shards which were over their memory budget the last time we looked
+        self._over_budget_shards: set[int] = set()
+
     # make it pickleable
     def __reduce__(self):
         return (
@@ -153,12 +212,22 @@ class SpansBuffer:
         queue_delete_items = []
         queue_items = []
         queue_item_has_root_span = []
+        queue_item_over_budget = []
+        queue_key_bytes: dict[str, int] = {}
 
         is_root_span_count = 0
         has_root_span_count = 0
         min_hole_size = float("inf")
         max_hole_size = float("-inf")
 
+        compressed_shards = set(options.get("standalone-spans.buffer.compression.partitions"))
+        raw_bytes = 0
+        stored_bytes = 0
+
+        max_segment_bytes, max_shard_bytes = self._get_memory_budgets()
+        track_size = "true" if max_segment_bytes or max_shard_bytes else "false"
+        over_budget_count = 0
+
         with metrics.timer("spans.buffer.process_spans.insert_spans"):
             with self.client.pipeline(transaction=False) as p:
                 for span in spans:
@@ -166,6 +235,12 @@ class SpansBuffer:
                     shard = self.assigned_shards[int(span.trace_id, 16) % len(self.assigned_shards)]
                     queue_key = f"span-buf:q:{shard}"
 
+                    payload = span.payload
+                    if shard in compressed_shards:
+                        raw_bytes += len(payload)
+                        payload = encode_payload(payload)
+                        stored_bytes += len(payload)
+
                     # Note: For the case where the span's parent is in another project, we
                     # will still flush the segment-without-root-span as one unit, just
                     # after span_buffer_timeout_secs rather than
@@ -187,17 +262,25 @@ class SpansBuffer:
                         add_buffer_script.script,
                         1,
                         f"{span.project_id}:{span.trace_id}",
-                        span.payload,
+                        payload,
                         "true" if is_root_span else "false",
                         span.span_id,
                         parent_span_id,
                         self.redis_ttl,
+                        track_size,
                     )
 
                     queue_keys.append(queue_key)
 
-                results = iter(p.execute())
-                for hole_size, delete_item, item, has_root_span in results:
+                results = p.execute()
+                for queue_key, (
+                    hole_size,
+                    delete_item,
+                    item,
+                    has_root_span,
+                    segment_size,
+                    added_bytes,
+                ) in zip(queue_keys, results):
                     # For each span, hole_size measures how long it took to
                     # find the corresponding intermediate segment. Larger
                     # numbers loosely correlate with fewer siblings per tree
@@ -207,11 +290,20 @@ class SpansBuffer:
                     queue_delete_items.append(delete_item)
                     queue_items.append(item)
                     queue_item_has_root_span.append(has_root_span)
+                    queue_item_over_budget.append(
+                        bool(max_segment_bytes) and segment_size > max_segment_bytes
+                    )
+                    # Payloads that were already in the segment don't take up more memory
+                    queue_key_bytes[queue_key] = queue_key_bytes.get(queue_key, 0) + added_bytes
 
         with metrics.timer("spans.buffer.process_spans.update_queue"):
             with self.client.pipeline(transaction=False) as p:
-                for key, delete_item, item, has_root_span in zip(
-                    queue_keys, queue_delete_items, queue_items, queue_item_has_root_span
+                for key, delete_item, item, has_root_span, over_budget in zip(
+                    queue_keys,
+                    queue_delete_items,
+                    queue_items,
+                    queue_item_has_root_span,
+                    queue_item_over_budget,
                 ):
                     # if the currently processed span is a root span, OR the buffer
                     # already had a root span inside, use a different timeout than
@@ -222,11 +314,24 @@ class SpansBuffer:
                     else:
                         timestamp = now + self.span_buffer_timeout_secs
 
+                    # Segments over their memory budget are flushed as soon as possible.
+                    if over_budget:
+                        over_budget_count += 1
+                        timestamp = now
+
                     if delete_item != item:
                         p.zrem(key, delete_item)
                     p.zadd(key, {item: timestamp})
                     p.expire(key, self.redis_ttl)
 
+                if max_shard_bytes:
+                    for key, num_bytes in queue_key_bytes.items():
+                        shard_bytes_key = key.replace("span-buf:q:", "span-buf:qb:")
+                        # The TTL is not refreshed, so that the counter is reset regularly and
+                        # sizes of segments which expired without being flushed don't add up.
+                        p.set(shard_bytes_key, 0, ex=self.redis_ttl, nx=True)
+                        p.incrby(shard_bytes_key, num_bytes)
+
                 p.execute()
 
         metrics.timing("spans.buffer.process_spans.num_spans", len(spans))
@@ -235,39 +340,70 @@ class SpansBuffer:
 
         metrics.timing("span.buffer.hole_size.min", min_hole_size)
         metrics.timing("span.buffer.hole_size.max", max_hole_size)
+        metrics.timing("spans.buffer.process_spans.num_over_budget_segments", over_budget_count)
+
+        if raw_bytes:
+            metrics.timing("spans.buffer.process_spans.compressed_bytes", stored_bytes)
+            metrics.distribution(
+                "spans.buffer.process_spans.compression_ratio", raw_bytes / stored_bytes
+            )
 
     def flush_segments(
         self, now: int, max_segments: int = 0
     ) -> tuple[int, dict[SegmentId, list[OutputSpan]]]:
         cutoff = now
+        _, max_shard_bytes = self._get_memory_budgets()
 
         with metrics.timer("spans.buffer.flush_segments.load_segment_ids"):
             with self.client.pipeline(transaction=False) as p:
                 for shard in self.assigned_shards:
                     key = f"span-buf:q:{shard}"
+                    # Shards over their memory budget are flushed in deadline order, regardless
+                    # of whether their segments have timed out yet
+                    shard_cutoff = "+inf" if shard in self._over_budget_shards else cutoff
                     p.zrangebyscore(
-                        key, 0, cutoff, start=0 if max_segments else None, num=max_segments or None
+                        key,
+                        0,
+                        shard_cutoff,
+                        start=0 if max_segments else None,
+                        num=max_segments or None,
                     )
                     p.zcard(key)
+                    p.get(f"span-buf:qb:{shard}")
 
                 result = iter(p.execute())
 
-        segment_ids = []
+        segment_ids: list[SegmentId] = []
         queue_sizes = []
+        over_budget_shards = set()
+
+        # ZRANGEBYSCORE output
+        for shard, segment_span_ids in zip(self.assigned_shards, result):
+            segment_ids.extend(segment_span_ids)
+            # ZCARD output
+            queue_sizes.append(next(result))
+            # GET output
+            shard_bytes = max(int(next(result) or 0), 0)
+            if max_shard_bytes:
+                metrics.timing(
+                    "spans.buffer.flush_segments.shard_bytes", shard_bytes, tags={"shard_i": shard}
+                )
+                if shard_bytes > max_shard_bytes:
+                    over_budget_shards.add(shard)
 
-        with metrics.timer("spans.buffer.flush_segments.load_segment_data"):
-            with self.client.pipeline(transaction=False) as p:
-                # ZRANGEBYSCORE output
-                for segment_span_ids in result:
-                    # process return value of zrevrangebyscore
-                    for segment_id in segment_span_ids:
-                        segment_ids.append(segment_id)
-                        p.smembers(segment_id)
+        self._over_budget_shards = over_budget_shards
 
-                    # ZCARD output
-                    queue_sizes.append(next(result))
+        with metrics.timer("spans.buffer.flush_segments.load_segment_data"):
+            if options.get("standalone-spans.buffer.scripted-flush.enable"):
+                segments = self._load_segment_data_scripted(segment_ids)
+            else:
+                with self.client.pipeline(transaction=False) as p:
+                    for segment_id in segment_ids:
+                        # Also read what the scripted flush left in the flushing key, in case it
+                        # was turned off between reading a segment and marking it as done
+                        p.sunion(segment_id, b"span-buf:fs:" + segment_id)
 
-                segments = p.execute()
+                    segments = p.execute()
 
         for shard_i, queue_size in zip(self.assigned_shards, queue_sizes):
             metrics.timing(
@@ -277,6 +413,7 @@ class SpansBuffer:
             )
 
         return_segments = {}
+        num_bytes = 0
 
         for segment_id, segment in zip(segment_ids, segments):
             segment_span_id = _segment_to_span_id(segment_id).decode("ascii")
@@ -284,7 +421,8 @@ class SpansBuffer:
             return_segment = []
             metrics.timing("spans.buffer.flush_segments.num_spans_per_segment", len(segment))
             for payload in segment:
-                val = rapidjson.loads(payload)
+                num_bytes += len(payload)
+                val = rapidjson.loads(decode_payload(payload))
                 old_segment_id = val.get("segment_id")
                 if old_segment_id:
                     val_data = val.setdefault("data", {})
@@ -308,10 +446,63 @@ class SpansBuffer:
 
             return_segments[segment_id] = return_segment
         metrics.timing("spans.buffer.flush_segments.num_segments", len(return_segments))
+        metrics.timing("spans.buffer.flush_segments.num_bytes", num_bytes)
 
         return sum(queue_sizes), return_segments
 
+    def _load_segment_data_scripted(self, segment_ids: list[SegmentId]) -> list[Sequence[bytes]]:
+        """
+        Load the payloads of many segments in chunks of `FLUSH_CHUNK_SIZE`, with one script call per
+        trace. Segments larger than `MAX_SEGMENT_READ_SPANS` are read incrementally instead.
+        """
+        payloads_by_segment: dict[SegmentId, Sequence[bytes]] = {}
+        num_large_segments = 0
+
+        for chunk in itertools.batched(segment_ids, FLUSH_CHUNK_SIZE):
+            segments_by_trace = _group_by_trace(chunk)
+
+            def add_commands(p: Any) -> None:
+                for project_and_trace, trace_segment_ids in segments_by_trace.items():
+                    p.eval(
+                        read_segments_script.script,
+                        1,
+                        project_and_trace,
+                        MAX_SEGMENT_READ_SPANS,
+                        self.redis_ttl,
+                        *trace_segment_ids,
+                    )
+
+            results = self._execute_flush_scripts(add_commands)
+
+            for trace_segment_ids, trace_results in zip(segments_by_trace.values(), results):
+                for segment_id, (size, payloads) in zip(trace_segment_ids, trace_results):
+                    if size > MAX_SEGMENT_READ_SPANS:
+                        num_large_segments += 1
+                        payloads = self._scan_segment(segment_id)
+                    payloads_by_segment[segment_id] = payloads
+
+        metrics.timing("spans.buffer.flush_segments.num_large_segments", num_large_segments)
+
+        return [payloads_by_segment[segment_id] for segment_id in segment_ids]
+
+    def _execute_flush_scripts(self, add_commands: Callable[[Any], None]) -> list[Any]:
+        """
+        Execute a pipeline of calls of the flush scripts. Like `add-buffer.lua`, the scripts are
+        sent in full with EVAL, as redis-cluster-py pipelines can't run EVALSHA.
+        """
+        with self.client.pipeline(transaction=False) as p:
+            add_commands(p)
+            return p.execute()
+
+    def _scan_segment(self, segment_id: SegmentId) -> list[bytes]:
+        # SSCAN may return the same member more than once, so deduplicate
+        flushing_key = b"span-buf:fs:" + segment_id
+        return list(set(self.client.sscan_iter(flushing_key, count=SEGMENT_SSCAN_COUNT)))
+
     def done_flush_segments(self, segment_ids: dict[SegmentId, list[OutputSpan]]):
+        if options.get("standalone-spans.buffer.scripted-flush.enable"):
+            return self._done_flush_segments_scripted(segment_ids)
+
         num_hdels = []
         metrics.timing("spans.buffer.done_flush_segments.num_segments", len(segment_ids))
         with metrics.timer("spans.buffer.done_flush_segments"):
@@ -321,6 +512,13 @@ class SpansBuffer:
                     p.get(hrs_key)
                     p.delete(hrs_key)
                     p.delete(segment_id)
+                    segment_size_key = b"span-buf:bs:" + segment_id
+                    p.get(segment_size_key)
+                    p.delete(segment_size_key)
+                    flushing_size_key = b"span-buf:fbs:" + segment_id
+                    p.get(flushing_size_key)
+                    p.delete(flushing_size_key)
+                    p.delete(b"span-buf:fs:" + segment_id)
 
                     project_id, trace_id, _ = parse_segment_id(segment_id)
                     redirect_map_key = b"span-buf:sr:{%s:%s}" % (project_id, trace_id)
@@ -340,14 +538,141 @@ class SpansBuffer:
                 results = iter(p.execute())
 
             has_root_span_count = 0
+            segment_sizes = []
             for result, num_hdel in zip(results, num_hdels):
                 if result:
                     has_root_span_count += 1
 
                 next(results)  # DEL hrs_key
                 next(results)  # DEL segment_id
+                segment_size = int(next(results) or 0)  # GET segment_size_key
+                next(results)  # DEL segment_size_key
+                segment_size += int(next(results) or 0)  # GET flushing_size_key
+                next(results)  # DEL flushing_size_key
+                next(results)  # DEL flushing_key
+                segment_sizes.append(segment_size)
                 next(results)  # ZREM ...
                 for _ in range(num_hdel):  # HDEL ...
                     next(results)
 
+            self._release_shard_bytes(zip(segment_ids, segment_sizes))
+
             metrics.timing("spans.buffer.done_flush_segments.has_root_span", has_root_span_count)
+
+    def _done_flush_segments_scripted(self, segment_ids: dict[SegmentId, list[OutputSpan]]):
+        metrics.timing("spans.buffer.done_flush_segments.num_segments", len(segment_ids))
+        segments_by_trace = _group_by_trace(segment_ids)
+        queue_keys: dict[SegmentId, bytes] = {}
+        queue_items: dict[bytes, list[SegmentId]] = {}
+
+        for segment_id in segment_ids:
+            _, trace_id, _ = parse_segment_id(segment_id)
+            shard = self.assigned_shards[int(trace_id, 16) % len(self.assigned_shards)]
+            queue_key = queue_keys[segment_id] = f"span-buf:q:{shard}".encode("ascii")
+            queue_items.setdefault(queue_key, []).append(segment_id)
+
+        def add_commands(p: Any) -> None:
+            for project_and_trace, trace_segment_ids in segments_by_trace.items():
+                args: list[bytes | int] = []
+                for segment_id in trace_segment_ids:
+                    span_ids = [span.payload["span_id"] for span in segment_ids[segment_id]]
+                    args.extend((segment_id, len(span_ids), *span_ids))
+                p.eval(done_flush_segments_script.script, 1, project_and_trace, *args)
+
+        with metrics.timer("spans.buffer.done_flush_segments"):
+            # Remove the segments from the queue first: if spans arrive for a segment afterwards,
+            # they queue it again, and if they arrived before, the script reports them and the
+            # segment is queued again below.
+            with self.client.pipeline(transaction=False) as p:
+                for queue_key, queue_segment_ids in queue_items.items():
+                    p.zrem(queue_key, *queue_segment_ids)
+                p.execute()
+
+            results = self._execute_flush_scripts(add_commands)
+
+        has_root_span_count = 0
+        segment_sizes = []
+        requeue_items: dict[bytes, list[SegmentId]] = {}
+        for trace_segment_ids, trace_results in zip(segments_by_trace.values(), results):
+            for segment_id, (has_root_span, segment_size, has_new_spans) in zip(
+                trace_segment_ids, trace_results
+            ):
+                if has_root_span:
+                    has_root_span_count += 1
+                segment_sizes.append((segment_id, segment_size))
+                if has_new_spans:
+                    requeue_items.setdefault(queue_keys[segment_id], []).append(segment_id)
+
+        if requeue_items:
+            # Spans which arrived while the segment was being flushed are flushed with the next
+            # flush, unless they already queued the segment again themselves.
+            with self.client.pipeline(transaction=False) as p:
+                for queue_key, queue_segment_ids in requeue_items.items():
+                    p.zadd(queue_key, dict.fromkeys(queue_segment_ids, 0), nx=True)
+                p.execute()
+
+        metrics.timing(
+            "spans.buffer.done_flush_segments.num_requeued_segments",
+            sum(map(len, requeue_items.values())),
+        )
+
+        self._release_shard_bytes(segment_sizes)
+
+        metrics.timing("spans.buffer.done_flush_segments.has_root_span", has_root_span_count)
+
+    def _release_shard_bytes(self, segment_sizes: Iterable[tuple[SegmentId, int]]) -> None:
+        """
+        Subtract the sizes of flushed segments from the memory usage of their queue shards.
+        """
+        _, max_shard_bytes = self._get_memory_budgets()
+        if not max_shard_bytes:
+            return
+
+        shard_bytes: dict[int, int] = {}
+        for segment_id, segment_size in segment_sizes:
+            _, trace_id, _ = parse_segment_id(segment_id)
+            shard = self.assigned_shards[int(trace_id, 16) % len(self.assigned_shards)]
+            shard_bytes[shard] = shard_bytes.get(shard, 0) + segment_size
+
+        with self.client.pipeline(transaction=False) as p:
+            for shard, num_bytes in shard_bytes.items():
+                shard_bytes_key = f"span-buf:qb:{shard}"
+                p.set(shard_bytes_key, 0, ex=self.redis_ttl, nx=True)
+                p.decrby(shard_bytes_key, num_bytes)
+            # DECRBY output
+            results = p.execute()[1::2]
+
+        # Counters can drop below zero when they were reset while segments were buffered, clamp
+        # them without touching their TTL.
+        negative_shard_bytes = [
+            (shard, result) for shard, result in zip(shard_bytes, results) if result < 0
+        ]
+        if negative_shard_bytes:
+            with self.client.pipeline(transaction=False) as p:
+                for shard, result in negative_shard_bytes:
+                    p.incrby(f"span-buf:qb:{shard}", -result)
+                p.execute()
+
+    def _get_memory_budgets(self) -> tuple[int, int]:
+        """
+        Return the maximum size of a segment and of a queue shard in bytes, 0 meaning no limit.
+        """
+        if not options.get("standalone-spans.buffer.scripted-flush.enable"):
+            return 0, 0
+
+        return (
+            options.get("standalone-spans.buffer.max-segment-bytes"),
+            options.get("standalone-spans.buffer.max-shard-bytes"),
+        )
+
+
+def _group_by_trace(segment_ids: Iterable[SegmentId]) -> dict[bytes, list[SegmentId]]:
+    """
+    Group segments by the "project_id:trace_id" hashtag of their keys, which all keys a script call
+    touches have to share.
+    """
+    segments_by_trace: dict[bytes, list[SegmentId]] = {}
+    for segment_id in segment_ids:
+        project_id, trace_id, _ = parse_segment_id(segment_id)
+        segments_by_trace.setdefault(b"%s:%s" % (project_id, trace_id), []).append(segment_id)
+    return segments_by_trace
@@ -37,6 +37,24 @@ def process_pending() -> None:
         logger.warning("process_pending.fail", extra={"error": error})
 
 
+@instrumented_task(
+    name="sentry.tasks.process_buffer.process_pending_shard", queue="buffers.process_pending"
+)
+def process_pending_shard(shard: int) -> None:
+    """
+    Process the pending buffers of one shard.
+    """
+    from sentry import buffer
+
+    lock = get_process_lock(f"process_pending_shard:{shard}")
+
+    try:
+        with lock.acquire():
+            buffer.backend.process_pending_shard(shard)
+    except UnableToAcquireLock as error:
+        logger.warning("process_pending_shard.fail", extra={"error": error, "shard": shard})
+
+
 @instrumented_task(
     name="sentry.tasks.process_buffer.process_pending_batch", queue="buffers.process_pending_batch"
 )
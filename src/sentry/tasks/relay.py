@@ -1,14 +1,17 @@
 import logging
 import time
+from collections import defaultdict
 
 import sentry_sdk
 from django.db import router, transaction
 
+from sentry import options
 from sentry.models.organization import Organization
 from sentry.relay import projectconfig_cache, projectconfig_debounce_cache
 from sentry.silo.base import SiloMode
 from sentry.tasks.base import instrumented_task
 from sentry.utils import metrics
+from sentry.utils.iterators import chunked
 from sentry.utils.sdk import set_current_event_project
 
 logger = logging.getLogger(__name__)
@@ -102,11 +105,18 @@ def validate_args(organization_id=None, project_id=None, public_key=None):
         raise TypeError("Must provide exactly one of organzation_id, project_id or public_key")
 
 
-def compute_configs(organization_id=None, project_id=None, public_key=None):
+def compute_configs(
+    organization_id=None, project_id=None, public_key=None, sections=None, cached_revs=None
+):
     """Computes all configs for the org, project or single public key.
 
     You must only provide one single argument, not all.
 
+    :param sections: If given, only these sections of the cached configs are recomputed, see
+       :data:`sentry.relay.config.CONFIG_SECTIONS`.  Configs which are not cached yet are
+       still computed in full.
+    :param cached_revs: If given, filled with the revisions of the cached configs which only
+       some ``sections`` were recomputed for.
     :returns: A dict mapping all affected public keys to their config.  The dict will not
        contain keys which should be retained in the cache unchanged.
     """
@@ -114,6 +124,12 @@ def compute_configs(organization_id=None, project_id=None, public_key=None):
     from sentry.models.projectkey import ProjectKey
 
     validate_args(organization_id, project_id, public_key)
+
+    if organization_id and options.get("relay.project-config.batch-build.enabled"):
+        return compute_organization_configs(
+            organization_id, sections=sections, cached_revs=cached_revs
+        )
+
     configs = {}
 
     if organization_id:
@@ -131,8 +147,14 @@ def compute_configs(organization_id=None, project_id=None, public_key=None):
                     # If we find the config in the cache it means it was active.  As such we want to
                     # recalculate it.  If the config was not there at all, we leave it and avoid the
                     # cost of re-computation.
-                    if projectconfig_cache.backend.get(key.public_key) is not None:
-                        configs[key.public_key] = compute_projectkey_config(key)
+                    cached_config = projectconfig_cache.backend.get(key.public_key)
+                    if cached_config is not None:
+                        configs[key.public_key] = compute_projectkey_config(
+                            key,
+                            sections=sections,
+                            cached_config=cached_config,
+                            cached_revs=cached_revs,
+                        )
                         action = "recompute"
                     else:
                         action = "not-cached"
@@ -147,8 +169,11 @@ def compute_configs(organization_id=None, project_id=None, public_key=None):
                 # If we find the config in the cache it means it was active.  As such we want to
                 # recalculate it.  If the config was not there at all, we leave it and avoid the
                 # cost of re-computation.
-                if projectconfig_cache.backend.get(key.public_key) is not None:
-                    configs[key.public_key] = compute_projectkey_config(key)
+                cached_config = projectconfig_cache.backend.get(key.public_key)
+                if cached_config is not None:
+                    configs[key.public_key] = compute_projectkey_config(
+                        key, sections=sections, cached_config=cached_config, cached_revs=cached_revs
+                    )
                     action = "recompute"
                 else:
                     action = "not-cached"
@@ -170,7 +195,10 @@ def compute_configs(organization_id=None, project_id=None, public_key=None):
             # bug was fixed in https://github.com/getsentry/sentry/pull/35671
             configs[public_key] = {"disabled": True}
         else:
-            configs[public_key] = compute_projectkey_config(key)
+            cached_config = projectconfig_cache.backend.get(public_key) if sections else None
+            configs[public_key] = compute_projectkey_config(
+                key, sections=sections, cached_config=cached_config, cached_revs=cached_revs
+            )
 
     else:
         raise TypeError("One of the arguments must not be None")
@@ -178,16 +206,99 @@ def compute_configs(organization_id=None, project_id=None, public_key=None):
     return configs
 
 
-def compute_projectkey_config(key):
+def compute_organization_configs(organization_id, sections=None, cached_revs=None):
+    """Computes the configs of all public keys of an organization which are currently cached.
+
+    This returns the same configs as :func:`compute_configs`, but loads the organization, its
+    feature flags and the options of all its projects only once, and computes the config of
+    every project only once for all of its keys.  When only some ``sections`` are recomputed,
+    every key's cached config is updated on its own instead.
+
+    :returns: A dict mapping all affected public keys to their config.
+    """
+    from sentry.models.options.organization_option import OrganizationOption
+    from sentry.models.options.project_option import ProjectOption
+    from sentry.models.project import Project
+    from sentry.models.projectkey import ProjectKey
+    from sentry.relay.config import get_organization_features, get_project_key_configs
+
+    configs = {}
+
+    organization = Organization.objects.filter(id=organization_id).first()
+    if organization is None:
+        return configs
+
+    with metrics.timer("relay.projectconfig_cache.batch_build.duration"):
+        keys_by_project = defaultdict(list)
+        cached_configs = {}
+        for key in ProjectKey.objects.filter(project__organization_id=organization_id):
+            # If we find the config in the cache it means it was active.  As such we want to
+            # recalculate it.  If the config was not there at all, we leave it and avoid the
+            # cost of re-computation.
+            cached_config = projectconfig_cache.backend.get(key.public_key)
+            if cached_config is not None:
+                keys_by_project[key.project_id].append(key)
+                cached_configs[key.public_key] = cached_config
+                action = "recompute"
+            else:
+                action = "not-cached"
+            metrics.incr(
+                "relay.projectconfig_cache.invalidation.recompute",
+                tags={"action": action, "scope": "organization"},
+            )
+
+        if not keys_by_project:
+            return configs
+
+        OrganizationOption.objects.get_all_values(organization)
+        ProjectOption.objects.prefetch_all_values(list(keys_by_project))
+        organization_features = get_organization_features(organization)
+
+        for project in Project.objects.filter(id__in=list(keys_by_project)):
+            project.set_cached_field_value("organization", organization)
+            project_keys = keys_by_project[project.id]
+            for key in project_keys:
+                key.set_cached_field_value("project", project)
+
+            if sections:
+                for key in project_keys:
+                    configs[key.public_key] = compute_projectkey_config(
+                        key,
+                        sections=sections,
+                        cached_config=cached_configs[key.public_key],
+                        cached_revs=cached_revs,
+                    )
+            else:
+                configs.update(
+                    get_project_key_configs(
+                        project, project_keys, organization_features=organization_features
+                    )
+                )
+
+    metrics.distribution("relay.projectconfig_cache.batch_build.keys", len(configs))
+    return configs
+
+
+def compute_projectkey_config(key, sections=None, cached_config=None, cached_revs=None):
     """Computes a single config for the given :class:`ProjectKey`.
 
+    :param sections: Names of the sections of ``cached_config`` to recompute.  The config
+        is computed in full if either is missing.
+    :param cached_config: The currently cached config of the key.
+    :param cached_revs: If given, the revision of ``cached_config`` is added to it when only
+        some ``sections`` are recomputed.
     :returns: A dict with the project config.
     """
     from sentry.models.projectkey import ProjectKeyStatus
-    from sentry.relay.config import get_project_config
+    from sentry.relay.config import get_project_config, update_project_config
 
     if key.status != ProjectKeyStatus.ACTIVE:
         return {"disabled": True}
+    elif sections and cached_config and "config" in cached_config:
+        metrics.incr("relay.projectconfig_cache.invalidation.incremental")
+        if cached_revs is not None:
+            cached_revs[key.public_key] = cached_config.get("rev")
+        return update_project_config(key.project, [key], cached_config, sections)
     else:
         return get_project_config(key.project, project_keys=[key]).to_dict()
 
@@ -200,7 +311,12 @@ def compute_projectkey_config(key):
     silo_mode=SiloMode.REGION,
 )
 def invalidate_project_config(
-    organization_id=None, project_id=None, public_key=None, trigger="invalidated", **kwargs
+    organization_id=None,
+    project_id=None,
+    public_key=None,
+    trigger="invalidated",
+    sections=None,
+    **kwargs,
 ):
     """Task which re-computes an invalidated project config.
 
@@ -214,6 +330,11 @@ def invalidate_project_config(
     There is also no guarantee the project was in the cache if the task is triggered if it
     already existed.
 
+    If ``sections`` are given, only these sections of the cached configs are recomputed,
+    see :func:`sentry.relay.config.get_invalidated_sections`.  Configs whose revision did
+    not change are not written again.  The updated sections are only written if the cached
+    config did not change in the meantime, otherwise the config is recomputed in full.
+
     The current implementation has some limitations:
     - The task does not synchronise with the :func:`build_project_config`.
     - The task does not synchronise with more recent invocations of itself.
@@ -223,8 +344,13 @@ def invalidate_project_config(
     """
     # Make sure we start by deleting the deduplication key so that new invalidation triggers
     # can schedule a new message while we already started computing the project config.
+    # Incremental invalidations have their own key, so they never delete the key of a pending
+    # full invalidation.
     projectconfig_debounce_cache.invalidation.mark_task_done(
-        organization_id=organization_id, project_id=project_id, public_key=public_key
+        organization_id=organization_id,
+        project_id=project_id,
+        public_key=public_key,
+        sections=sections,
     )
 
     if project_id:
@@ -238,10 +364,44 @@ def invalidate_project_config(
     sentry_sdk.set_tag("trigger", trigger)
     sentry_sdk.set_context("kwargs", kwargs)
 
+    cached_revs = {}
     updated_configs = compute_configs(
-        organization_id=organization_id, project_id=project_id, public_key=public_key
+        organization_id=organization_id,
+        project_id=project_id,
+        public_key=public_key,
+        sections=sections,
+        cached_revs=cached_revs,
     )
-    projectconfig_cache.backend.set_many(updated_configs)
+
+    if options.get("relay.project-config.incremental-invalidation.enabled"):
+        revisions = projectconfig_cache.backend.get_rev_many(list(updated_configs))
+        unchanged = [
+            key
+            for key, config in updated_configs.items()
+            if config.get("rev") and revisions.get(key) == config["rev"]
+        ]
+        for key in unchanged:
+            del updated_configs[key]
+        metrics.incr("relay.projectconfig_cache.invalidation.unchanged", amount=len(unchanged))
+
+    # Updated sections were merged into the configs as cached when this task read them.  A full
+    # recompute may have written a newer config since, which must not be overwritten with the
+    # stale sections of the older one.
+    incremental_configs = {
+        key: updated_configs.pop(key) for key in list(updated_configs) if key in cached_revs
+    }
+    for chunk in chunked(
+        incremental_configs.items(), options.get("relay.project-config.write-batch-size")
+    ):
+        conflicts = projectconfig_cache.backend.set_many_if_rev(dict(chunk), cached_revs)
+        metrics.incr("relay.projectconfig_cache.invalidation.conflict", amount=len(conflicts))
+        for key in conflicts:
+            updated_configs.update(compute_configs(public_key=key))
+
+    for chunk in chunked(
+        updated_configs.items(), options.get("relay.project-config.write-batch-size")
+    ):
+        projectconfig_cache.backend.set_many(dict(chunk))
 
 
 @sentry_sdk.tracing.trace
@@ -251,6 +411,7 @@ def schedule_invalidate_project_config(
     organization_id=None,
     project_id=None,
     public_key=None,
+    option_key=None,
     countdown=5,
     transaction_db=None,
 ):
@@ -283,6 +444,9 @@ def schedule_invalidate_project_config(
     :param organization_id: Invalidates all project keys for all projects in an organization.
     :param project_id: Invalidates all project keys for a project.
     :param public_key: Invalidate a single public key.
+    :param option_key: The project option whose change triggered the invalidation, if any.
+        Together with ``trigger`` this determines whether the config can be updated
+        incrementally.
     :param countdown: The time to delay running this task in seconds.  Normally there is a
         slight delay to increase the likelihood of deduplicating invalidations but you can
         tweak this, like e.g. the :func:`invalidate_all` task does.
@@ -309,6 +473,7 @@ def schedule_invalidate_project_config(
                 organization_id=organization_id,
                 project_id=project_id,
                 public_key=public_key,
+                option_key=option_key,
                 countdown=countdown,
             ),
             using=transaction_db,
@@ -321,14 +486,20 @@ def _schedule_invalidate_project_config(
     organization_id=None,
     project_id=None,
     public_key=None,
+    option_key=None,
     countdown=5,
 ):
     """For param docs, see :func:`schedule_invalidate_project_config`."""
     from sentry.models.project import Project
     from sentry.models.projectkey import ProjectKey
+    from sentry.relay.config import get_invalidated_sections
 
     validate_args(organization_id, project_id, public_key)
 
+    sections = None
+    if options.get("relay.project-config.incremental-invalidation.enabled"):
+        sections = get_invalidated_sections(trigger, option_key=option_key)
+
     # The keys we need to check for to see if this is debounced, we want to check all
     # levels.
     check_debounce_keys = {
@@ -356,7 +527,13 @@ def _schedule_invalidate_project_config(
         else:
             check_debounce_keys["organization_id"] = org_id
 
-    if projectconfig_debounce_cache.invalidation.is_debounced(**check_debounce_keys):
+    debounced = projectconfig_debounce_cache.invalidation.is_debounced(**check_debounce_keys)
+    if not debounced and sections is not None:
+        # A pending invalidation of the same sections covers this one as well
+        debounced = projectconfig_debounce_cache.invalidation.is_debounced(
+            **check_debounce_keys, sections=sections
+        )
+    if debounced:
         # If this task is already in the queue, do not schedule another task.
         metrics.incr(
             "relay.projectconfig_cache.skipped",
@@ -366,20 +543,29 @@ def _schedule_invalidate_project_config(
 
     metrics.incr(
         "relay.projectconfig_cache.scheduled",
-        tags={"update_reason": trigger, "task": "invalidation"},
-    )
-
-    invalidate_project_config.apply_async(
-        countdown=countdown,
-        kwargs={
-            "project_id": project_id,
-            "organization_id": organization_id,
-            "public_key": public_key,
-            "trigger": trigger,
+        tags={
+            "update_reason": trigger,
+            "task": "invalidation",
+            "incremental": sections is not None,
         },
     )
 
-    # Use the original arguments to this function to set the debounce key.
+    kwargs = {
+        "project_id": project_id,
+        "organization_id": organization_id,
+        "public_key": public_key,
+        "trigger": trigger,
+    }
+    if sections is not None:
+        kwargs["sections"] = sections
+    invalidate_project_config.apply_async(countdown=countdown, kwargs=kwargs)
+
+    # Use the original arguments to this function to set the debounce key.  An incremental
+    # invalidation only covers some sections, so it only debounces invalidations of the same
+    # sections, while a pending full invalidation covers it as well, see above.
     projectconfig_debounce_cache.invalidation.debounce(
-        organization_id=organization_id, project_id=project_id, public_key=public_key
+        organization_id=organization_id,
+        project_id=project_id,
+        public_key=public_key,
+        sections=sections,
     )
@@ -2,7 +2,7 @@ import hashlib
 import hmac
 import logging
 import random
-from collections.abc import Callable
+from collections.abc import Callable, Sequence
 from typing import TYPE_CHECKING, Any
 
 import grpc
@@ -133,8 +133,8 @@ class TaskworkerClient:
         domain, port = pattern.split(":")
         return [f"{domain}-{i}:{port}" for i in range(0, num_brokers)]
 
-    def _get_cur_stub(self) -> tuple[int, ConsumerServiceStub]:
-        if self._num_tasks_before_rebalance == 0:
+    def _get_cur_stub(self, num_tasks: int = 1) -> tuple[int, ConsumerServiceStub]:
+        if self._num_tasks_before_rebalance <= 0:
             new_stub_idx = random.randint(0, len(self._stubs) - 1)
             if new_stub_idx != self._cur_stub_idx:
                 self._cur_stub_idx = new_stub_idx
@@ -143,7 +143,7 @@ class TaskworkerClient:
                 )
             self._num_tasks_before_rebalance = self._max_tasks_before_rebalance
 
-        self._num_tasks_before_rebalance -= 1
+        self._num_tasks_before_rebalance -= num_tasks
         return self._cur_stub_idx, self._stubs[self._cur_stub_idx]
 
     def get_task(self, namespace: str | None = None) -> TaskActivation | None:
@@ -174,6 +174,45 @@ class TaskworkerClient:
             return response.task
         return None
 
+    def get_tasks(self, namespace: str | None = None, count: int = 1) -> list[TaskActivation]:
+        """
+        Fetch up to `count` pending tasks.
+
+        The broker hands out one task per request. A single request is made first,
+        so that polling an idle broker stays cheap, and only once that returns a task
+        are the remaining requests sent concurrently, costing a single round trip
+        together.
+        """
+        task = self.get_task(namespace)
+        if task is None:
+            metrics.distribution("taskworker.client.get_tasks.count", 0)
+            return []
+
+        tasks = [task]
+        request = GetTaskRequest(namespace=namespace)
+        with metrics.timer("taskworker.get_tasks.rpc"):
+            stub_idx, stub = self._get_cur_stub(count - 1)
+            futures = [stub.GetTask.future(request) for _ in range(count - 1)]
+            for future in futures:
+                try:
+                    response = future.result()
+                except grpc.RpcError as err:
+                    metrics.incr(
+                        "taskworker.client.rpc_error",
+                        tags={"method": "GetTask", "status": err.code().name},
+                    )
+                    continue
+                if response.HasField("task"):
+                    metrics.incr(
+                        "taskworker.client.get_task",
+                        tags={"namespace": response.task.namespace},
+                    )
+                    self._task_id_to_stub_idx[response.task.id] = stub_idx
+                    tasks.append(response.task)
+
+        metrics.distribution("taskworker.client.get_tasks.count", len(tasks))
+        return tasks
+
     def update_task(
         self,
         task_id: str,
@@ -210,3 +249,59 @@ class TaskworkerClient:
             self._task_id_to_stub_idx[response.task.id] = stub_idx
             return response.task
         return None
+
+    def update_tasks(
+        self,
+        updates: Sequence[tuple[str, TaskActivationStatus.ValueType]],
+        fetch_next_task: FetchNextTask | None = None,
+        num_fetch_next: int = 0,
+    ) -> tuple[list[TaskActivation], list[tuple[str, grpc.RpcError]]]:
+        """
+        Update the status for many task activations at once, with concurrent
+        requests. The first `num_fetch_next` updates each ask for a next task.
+
+        Returns the next tasks that should be executed, and the updates which
+        failed along with their error. Only updates which failed because the
+        broker was unavailable can be sent again.
+        """
+        metrics.distribution("taskworker.client.update_tasks.count", len(updates))
+        futures = []
+        for i, (task_id, status) in enumerate(updates):
+            if task_id not in self._task_id_to_stub_idx:
+                metrics.incr("taskworker.client.task_id_not_in_client")
+                continue
+            fetch_next = fetch_next_task if i < num_fetch_next else None
+            metrics.incr("taskworker.client.fetch_next", tags={"next": fetch_next is not None})
+            request = SetTaskStatusRequest(id=task_id, status=status, fetch_next_task=fetch_next)
+            stub_idx = self._task_id_to_stub_idx.pop(task_id)
+            futures.append((task_id, stub_idx, self._stubs[stub_idx].SetTaskStatus.future(request)))
+
+        next_tasks = []
+        errors = []
+        with metrics.timer("taskworker.update_tasks.rpc"):
+            for task_id, stub_idx, future in futures:
+                try:
+                    response = future.result()
+                except grpc.RpcError as err:
+                    metrics.incr(
+                        "taskworker.client.rpc_error",
+                        tags={"method": "SetTaskStatus", "status": err.code().name},
+                    )
+                    if err.code() == grpc.StatusCode.UNAVAILABLE:
+                        # Allow the update to be retried, the other failed updates are dropped
+                        self._task_id_to_stub_idx[task_id] = stub_idx
+                    if err.code() != grpc.StatusCode.NOT_FOUND:
+                        errors.append((task_id, err))
+                    continue
+                if response.HasField("task"):
+                    self._task_id_to_stub_idx[response.task.id] = stub_idx
+                    next_tasks.append(response.task)
+
+        return next_tasks, errors
+
+    def discard_task(self, task_id: str) -> None:
+        """
+        Forget about a task which is not going to be executed, and which the
+        broker will hand out again once its processing deadline has passed.
+        """
+        self._task_id_to_stub_idx.pop(task_id, None)
@@ -1,3 +1,5 @@
+from typing import Literal
+
 DEFAULT_PROCESSING_DEADLINE = 10
 """
 The fallback/default processing_deadline that tasks
@@ -21,3 +23,14 @@ DEFAULT_CHILD_TASK_COUNT = 10000
 The number of tasks a worker child process will process
 before being restarted.
 """
+
+ExecutionMode = Literal["process", "thread", "asyncio"]
+"""
+How a namespace's tasks are executed by workers dedicated to it.
+
+process: every child process executes one task at a time.
+thread: a single child process executes many tasks at once on a thread pool,
+    for I/O bound tasks.
+asyncio: like thread, but on an asyncio event loop. Coroutine tasks are awaited
+    on the loop directly, other tasks run on a thread pool.
+"""
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import datetime
+import inspect
 import logging
 from collections.abc import Callable
 from concurrent import futures
@@ -13,7 +14,7 @@ from django.conf import settings
 from sentry_protos.taskbroker.v1.taskbroker_pb2 import TaskActivation
 
 from sentry.conf.types.kafka_definition import Topic
-from sentry.taskworker.constants import DEFAULT_PROCESSING_DEADLINE
+from sentry.taskworker.constants import DEFAULT_PROCESSING_DEADLINE, ExecutionMode
 from sentry.taskworker.retry import Retry
 from sentry.taskworker.router import TaskRouter
 from sentry.taskworker.task import P, R, Task
@@ -41,12 +42,14 @@ class TaskNamespace:
         retry: Retry | None,
         expires: int | datetime.timedelta | None = None,
         processing_deadline_duration: int = DEFAULT_PROCESSING_DEADLINE,
+        execution_mode: ExecutionMode = "process",
     ):
         self.name = name
         self.router = router
         self.default_retry = retry
         self.default_expires = expires  # seconds
         self.default_processing_deadline_duration = processing_deadline_duration  # seconds
+        self.execution_mode = execution_mode
         self._registered_tasks: dict[str, Task[Any, Any]] = {}
         self._producers: dict[Topic, SingletonProducer] = {}
 
@@ -104,9 +107,16 @@ class TaskNamespace:
         wait_for_delivery: bool
             If true, the task will wait for the delivery report to be received
             before returning.
+
+        Coroutine functions can only be registered in namespaces with the
+        asyncio execution mode.
         """
 
         def wrapped(func: Callable[P, R]) -> Task[P, R]:
+            if inspect.iscoroutinefunction(func) and self.execution_mode != "asyncio":
+                raise ValueError(
+                    f"Coroutine task {name} requires a namespace with the asyncio execution mode"
+                )
             task_retry = retry
             if not at_most_once:
                 task_retry = retry or self.default_retry
@@ -212,6 +222,7 @@ class TaskRegistry:
         retry: Retry | None = None,
         expires: int | datetime.timedelta | None = None,
         processing_deadline_duration: int = DEFAULT_PROCESSING_DEADLINE,
+        execution_mode: ExecutionMode = "process",
     ) -> TaskNamespace:
         """
         Create a namespaces.
@@ -220,6 +231,10 @@ class TaskRegistry:
         infrastructure to be scaled based on a region's requirements.
 
         Namespaces can define default behavior for tasks defined within a namespace.
+
+        Namespaces of I/O bound tasks can use a thread or asyncio `execution_mode`,
+        which lets workers dedicated to them run many tasks concurrently in a single
+        child process. See `sentry.taskworker.constants.ExecutionMode`.
         """
         namespace = TaskNamespace(
             name=name,
@@ -227,6 +242,7 @@ class TaskRegistry:
             retry=retry,
             expires=expires,
             processing_deadline_duration=processing_deadline_duration,
+            execution_mode=execution_mode,
         )
         self._namespaces[name] = namespace
 
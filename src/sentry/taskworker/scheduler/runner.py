@@ -2,9 +2,10 @@ from __future__ import annotations
 
 import heapq
 import logging
-from collections.abc import Mapping
+from collections.abc import Mapping, Sequence
 from datetime import datetime, timedelta
 from typing import Any
+from uuid import uuid4
 
 from django.utils import timezone
 from redis.client import StrictRedis
@@ -16,9 +17,18 @@ from sentry.taskworker.registry import TaskRegistry
 from sentry.taskworker.scheduler.schedules import CrontabSchedule, Schedule, TimedeltaSchedule
 from sentry.taskworker.task import Task
 from sentry.utils import metrics
+from sentry.utils.hashlib import md5_text
+from sentry.utils.redis import load_redis_script
 
 logger = logging.getLogger("taskworker.scheduler")
 
+claim_lease = load_redis_script("taskworker/claim_lease.lua")
+release_lease = load_redis_script("taskworker/release_lease.lua")
+
+
+def _stable_hash(value: str) -> int:
+    return int(md5_text(value).hexdigest()[:8], 16)
+
 
 class RunStorage:
     """
@@ -47,6 +57,21 @@ class RunStorage:
         result = self._redis.set(self._make_key(taskname), now.isoformat(), ex=duration, nx=True)
         return bool(result)
 
+    def set_many(self, next_runtimes: Mapping[str, datetime]) -> Mapping[str, bool]:
+        """
+        Record spawn times for many tasks with a single pipeline, see `set`.
+
+        Returns whether a task should be spawned for each taskname.
+        """
+        now = timezone.now()
+        with self._redis.pipeline(transaction=False) as pipeline:
+            for taskname, next_runtime in next_runtimes.items():
+                pipeline.set(
+                    self._make_key(taskname), now.isoformat(), ex=next_runtime - now, nx=True
+                )
+            results = pipeline.execute()
+        return {taskname: bool(result) for taskname, result in zip(next_runtimes, results)}
+
     def read(self, taskname: str) -> datetime | None:
         """
         Retrieve the last run time of a task
@@ -72,6 +97,50 @@ class RunStorage:
         """remove a task key - mostly for testing."""
         self._redis.delete(self._make_key(taskname))
 
+    def heartbeat(self, replica_id: str, duration: int) -> list[str]:
+        """
+        Record that a scheduler replica is alive for the next `duration` seconds.
+
+        Returns all replicas which are currently alive.
+        """
+        now = timezone.now().timestamp()
+        key = self._make_key("replicas")
+        with self._redis.pipeline(transaction=False) as pipeline:
+            pipeline.zadd(key, {replica_id: now + duration})
+            pipeline.zremrangebyscore(key, "-inf", now)
+            pipeline.zrange(key, 0, -1)
+            pipeline.expire(key, duration)
+            results = pipeline.execute()
+        return sorted(results[2])
+
+    def _make_lease_key(self, shard: int) -> str:
+        return self._make_key(f"lease:{shard}")
+
+    def acquire_leases(self, shards: Sequence[int], replica_id: str, duration: int) -> set[int]:
+        """
+        Acquire or extend the leases on schedule shards for `duration` seconds, with
+        a single pipeline.
+
+        Returns the shards leased to `replica_id`, leaving out those leased to
+        another replica.
+        """
+        with self._redis.pipeline(transaction=False) as pipeline:
+            for shard in shards:
+                # redis-cluster-py pipelines can't run EVALSHA, so the (short)
+                # script is sent in full, as in the span buffer
+                pipeline.eval(
+                    claim_lease.script, 1, self._make_lease_key(shard), replica_id, duration
+                )
+            results = pipeline.execute()
+        return {shard for shard, result in zip(shards, results) if result}
+
+    def release_leases(self, shards: Sequence[int], replica_id: str) -> None:
+        """Release the leases on schedule shards held by `replica_id`, with a single pipeline"""
+        with self._redis.pipeline(transaction=False) as pipeline:
+            for shard in shards:
+                pipeline.eval(release_lease.script, 1, self._make_lease_key(shard), replica_id)
+            pipeline.execute()
+
 
 class ScheduleEntry:
     """An individual task that can be scheduled to be run."""
@@ -85,6 +154,8 @@ class ScheduleEntry:
             scheduler = TimedeltaSchedule(schedule)
         self._schedule = scheduler
         self._last_run: datetime | None = None
+        self._jitter = 0
+        self._created = timezone.now()
 
     def __lt__(self, other: ScheduleEntry) -> bool:
         # Secondary sorting for heapq when remaining time is the same
@@ -112,6 +183,33 @@ class ScheduleEntry:
     def runtime_after(self, start: datetime) -> datetime:
         return self._schedule.runtime_after(start)
 
+    def set_jitter(self, max_jitter: int) -> None:
+        """
+        Hold back spawns by a stable, per entry number of seconds up to `max_jitter`.
+
+        Crontab schedules are all due at the start of a minute, so their jitter is an
+        offset into the minute. Interval schedules are only held back on their first
+        spawn, as later runs keep that offset.
+        """
+        if isinstance(self._schedule, CrontabSchedule):
+            max_jitter = min(max_jitter, 59)
+        else:
+            now = timezone.now()
+            interval = int((self.runtime_after(now) - now).total_seconds())
+            max_jitter = min(max_jitter, interval - 1)
+        self._jitter = _stable_hash(self.fullname) % (max_jitter + 1) if max_jitter > 0 else 0
+
+    def remaining_jitter(self) -> int:
+        """The number of seconds a due entry is still held back for"""
+        if not self._jitter:
+            return 0
+        now = timezone.now()
+        if isinstance(self._schedule, CrontabSchedule):
+            return max(self._jitter - now.second, 0)
+        if self._last_run is None:
+            return max(int((self._created - now).total_seconds()) + self._jitter, 0)
+        return 0
+
     def delay_task(self) -> None:
         logger.info("taskworker.scheduler.delay_task", extra={"task": self._task.fullname})
         self._task.delay()
@@ -203,14 +301,156 @@ class ScheduleRunner:
         heapq.heapify(heap_items)
         self._heap = heap_items
 
-    def _load_last_run(self) -> None:
+    def _load_last_run(self, entries: list[ScheduleEntry] | None = None) -> None:
         """
         load last_run state from storage
 
         We synchronize each time the schedule set is modified and
         then incrementally as tasks spawn attempts are made.
         """
-        last_run_times = self._run_storage.read_many([item.fullname for item in self._entries])
-        for item in self._entries:
+        if entries is None:
+            entries = self._entries
+        last_run_times = self._run_storage.read_many([item.fullname for item in entries])
+        for item in entries:
             last_run = last_run_times.get(item.fullname, None)
             item.set_last_run(last_run)
+
+
+class ShardedScheduleRunner(ScheduleRunner):
+    """
+    A ScheduleRunner which shares its schedule with other replicas.
+
+    Schedule entries are hashed onto a fixed number of shards, and every shard is
+    leased by a single replica at a time. Replicas heartbeat in `RunStorage`, and
+    each claims the shards it wins by rendezvous hashing over the live replicas.
+    Shards are spread evenly, and only the shards of replicas which come or go
+    change hands. Should two replicas briefly both hold a shard, `RunStorage`
+    still only lets one of them spawn each run.
+
+    Every tick claims all due entries of the owned shards at once, and entries can
+    be jittered to spread out schedules which would otherwise spawn together.
+    """
+
+    def __init__(
+        self,
+        registry: TaskRegistry,
+        run_storage: RunStorage,
+        num_shards: int = 64,
+        max_jitter: int = 0,
+        lease_duration: int = 30,
+        replica_id: str | None = None,
+    ) -> None:
+        super().__init__(registry, run_storage)
+        self._num_shards = num_shards
+        self._max_jitter = max_jitter
+        self._lease_duration = lease_duration
+        self._replica_id = replica_id or uuid4().hex
+        self._owned_shards: set[int] = set()
+        self._next_lease_refresh = 0.0
+
+    def add(self, task_config: ScheduleConfig) -> None:
+        super().add(task_config)
+        self._entries[-1].set_jitter(self._max_jitter)
+
+    def get_shard(self, entry: ScheduleEntry) -> int:
+        return _stable_hash(entry.fullname) % self._num_shards
+
+    def _get_owner(self, shard: int, replicas: Sequence[str]) -> str:
+        return max(replicas, key=lambda replica: _stable_hash(f"{shard}:{replica}"))
+
+    def _refresh_leases(self) -> None:
+        now = timezone.now().timestamp()
+        if now < self._next_lease_refresh:
+            return
+        # Leave plenty of time to extend leases before they run out
+        self._next_lease_refresh = now + self._lease_duration / 3
+
+        replicas = self._run_storage.heartbeat(self._replica_id, self._lease_duration)
+        if self._replica_id not in replicas:
+            replicas.append(self._replica_id)
+
+        to_acquire = []
+        to_release = []
+        for shard in range(self._num_shards):
+            if self._get_owner(shard, replicas) == self._replica_id:
+                to_acquire.append(shard)
+            elif shard in self._owned_shards:
+                to_release.append(shard)
+
+        if to_release:
+            # Hand the shards over to the replicas they belong to
+            self._run_storage.release_leases(to_release, self._replica_id)
+        owned_shards: set[int] = set()
+        if to_acquire:
+            owned_shards = self._run_storage.acquire_leases(
+                to_acquire, self._replica_id, self._lease_duration
+            )
+
+        acquired = owned_shards - self._owned_shards
+        self._owned_shards = owned_shards
+        if acquired:
+            # Other replicas have been spawning these entries in the meantime
+            self._load_last_run([e for e in self._entries if self.get_shard(e) in acquired])
+
+        metrics.gauge("taskworker.scheduler.owned_shards", len(owned_shards))
+        logger.info(
+            "taskworker.scheduler.refresh_leases",
+            extra={"replicas": len(replicas), "owned_shards": sorted(owned_shards)},
+        )
+
+    def tick(self) -> float:
+        """
+        Spawn all due entries of the shards owned by this replica.
+
+        Returns the number of seconds to sleep until the next entry is due, or
+        leases have to be refreshed.
+        """
+        with metrics.timer("taskworker.scheduler.tick"):
+            self._refresh_leases()
+
+            due = []
+            sleep_time = self._next_lease_refresh - timezone.now().timestamp()
+            for entry in self._entries:
+                if self.get_shard(entry) not in self._owned_shards:
+                    continue
+                remaining = entry.remaining_seconds() or entry.remaining_jitter()
+                if remaining <= 0:
+                    due.append(entry)
+                else:
+                    sleep_time = min(sleep_time, remaining)
+
+            if due:
+                try:
+                    self._spawn_many(due)
+                except Exception as e:
+                    capture_exception(e)
+                for entry in due:
+                    sleep_time = min(sleep_time, entry.remaining_seconds())
+
+            metrics.distribution("taskworker.scheduler.tick.due", len(due))
+            return max(sleep_time, 0)
+
+    def _spawn_many(self, entries: list[ScheduleEntry]) -> None:
+        now = timezone.now()
+        spawned = self._run_storage.set_many(
+            {entry.fullname: entry.runtime_after(now) for entry in entries}
+        )
+
+        to_sync = []
+        for entry in entries:
+            if not spawned[entry.fullname]:
+                to_sync.append(entry)
+                continue
+            try:
+                entry.delay_task()
+            except Exception as e:
+                capture_exception(e)
+            entry.set_last_run(now)
+            metrics.incr("taskworker.scheduler.delay_task")
+
+        if to_sync:
+            # sync with last_run state in storage
+            last_run_times = self._run_storage.read_many([entry.fullname for entry in to_sync])
+            for entry in to_sync:
+                entry.set_last_run(last_run_times.get(entry.fullname))
+            metrics.incr("taskworker.scheduler.sync_with_storage", amount=len(to_sync))
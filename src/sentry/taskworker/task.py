@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import datetime
+import inspect
 from collections.abc import Callable
 from functools import update_wrapper
 from typing import TYPE_CHECKING, Generic, ParamSpec, TypeVar
@@ -68,6 +69,10 @@ class Task(Generic[P, R]):
     def retry(self) -> Retry | None:
         return self._retry
 
+    @property
+    def is_coroutine(self) -> bool:
+        return inspect.iscoroutinefunction(self._func)
+
     def __call__(self, *args: P.args, **kwargs: P.kwargs) -> R:
         """
         Call the task function immediately.
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 from time import sleep
 
@@ -9,6 +10,7 @@ from sentry.taskworker.retry import LastAction, Retry, RetryError
 logger = logging.getLogger(__name__)
 
 exampletasks = taskregistry.create_namespace(name="examples")
+asyncexampletasks = taskregistry.create_namespace(name="examples-asyncio", execution_mode="asyncio")
 
 
 @exampletasks.register(name="examples.say_hello")
@@ -75,3 +77,9 @@ def at_most_once_task() -> None:
 def timed_task(sleep_seconds: float | str) -> None:
     sleep(float(sleep_seconds))
     logger.debug("timed_task complete")
+
+
+@asyncexampletasks.register(name="examples.async_timed")
+async def async_timed_task(sleep_seconds: float | str) -> None:
+    await asyncio.sleep(float(sleep_seconds))
+    logger.debug("async_timed_task complete")
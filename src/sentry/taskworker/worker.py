@@ -1,15 +1,20 @@
 from __future__ import annotations
 
+import asyncio
 import atexit
 import dataclasses
+import functools
 import logging
 import multiprocessing
+import os
 import queue
 import signal
 import sys
 import threading
 import time
-from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from concurrent import futures
+from concurrent.futures import Future, ThreadPoolExecutor
 from multiprocessing.context import ForkProcess
 from multiprocessing.synchronize import Event
 from typing import Any
@@ -29,7 +34,11 @@ from sentry_protos.taskbroker.v1.taskbroker_pb2 import (
 )
 
 from sentry.taskworker.client import TaskworkerClient
-from sentry.taskworker.constants import DEFAULT_REBALANCE_AFTER, DEFAULT_WORKER_QUEUE_SIZE
+from sentry.taskworker.constants import (
+    DEFAULT_REBALANCE_AFTER,
+    DEFAULT_WORKER_QUEUE_SIZE,
+    ExecutionMode,
+)
 from sentry.taskworker.registry import taskregistry
 from sentry.taskworker.task import Task
 from sentry.utils import metrics
@@ -73,6 +82,95 @@ def _get_known_task(activation: TaskActivation) -> Task[Any, Any] | None:
     return namespace.get(activation.taskname)
 
 
+def _get_task_to_execute(
+    activation: TaskActivation, processed_tasks: queue.Queue[ProcessingResult]
+) -> Task[Any, Any] | None:
+    """
+    Resolve the task of an activation. Returns None when the activation must not be
+    executed, after reporting a result for it if one is needed.
+    """
+    task_func = _get_known_task(activation)
+    if not task_func:
+        metrics.incr(
+            "taskworker.worker.unknown_task",
+            tags={"namespace": activation.namespace, "taskname": activation.taskname},
+        )
+        processed_tasks.put(
+            ProcessingResult(task_id=activation.id, status=TASK_ACTIVATION_STATUS_FAILURE)
+        )
+        return None
+
+    if task_func.at_most_once:
+        key = get_at_most_once_key(activation.namespace, activation.taskname, activation.id)
+        if cache.add(key, "1", timeout=AT_MOST_ONCE_TIMEOUT):  # The key didn't exist
+            metrics.incr(
+                "taskworker.task.at_most_once.executed", tags={"taskname": activation.taskname}
+            )
+        else:
+            metrics.incr(
+                "taskworker.worker.at_most_once.skipped", tags={"taskname": activation.taskname}
+            )
+            return None
+
+    return task_func
+
+
+def _get_error_state(
+    task_func: Task[Any, Any], activation: TaskActivation, err: BaseException
+) -> TaskActivationStatus.ValueType:
+    if isinstance(err, Exception) and task_func.should_retry(activation.retry_state, err):
+        logger.info("taskworker.task.retry", extra={"taskname": activation.taskname})
+        return TASK_ACTIVATION_STATUS_RETRY
+
+    logger.info("taskworker.task.errored", extra={"type": str(err.__class__), "error": str(err)})
+    return TASK_ACTIVATION_STATUS_FAILURE
+
+
+def _report_result(
+    processed_tasks: queue.Queue[ProcessingResult],
+    activation: TaskActivation,
+    next_state: TaskActivationStatus.ValueType,
+    execution_start_time: float,
+) -> None:
+    # Get completion time before pushing to queue to avoid inflating latency metrics.
+    execution_complete_time = time.time()
+    processed_tasks.put(ProcessingResult(task_id=activation.id, status=next_state))
+    metrics.distribution(
+        "taskworker.worker.processed_tasks.put.duration",
+        time.time() - execution_complete_time,
+    )
+
+    task_added_time = activation.received_at.ToDatetime().timestamp()
+    execution_duration = execution_complete_time - execution_start_time
+    execution_latency = execution_complete_time - task_added_time
+    logger.debug(
+        "taskworker.task_execution",
+        extra={
+            "taskname": activation.taskname,
+            "execution_duration": execution_duration,
+            "execution_latency": execution_latency,
+            "status": next_state,
+        },
+    )
+    metrics.incr(
+        "taskworker.worker.execute_task",
+        tags={
+            "namespace": activation.namespace,
+            "status": next_state,
+        },
+    )
+    metrics.distribution(
+        "taskworker.worker.execution_duration",
+        execution_duration,
+        tags={"namespace": activation.namespace, "taskname": activation.taskname},
+    )
+    metrics.distribution(
+        "taskworker.worker.execution_latency",
+        execution_latency,
+        tags={"namespace": activation.namespace, "taskname": activation.taskname},
+    )
+
+
 def child_worker(
     child_tasks: queue.Queue[TaskActivation],
     processed_tasks: queue.Queue[ProcessingResult],
@@ -130,29 +228,10 @@ def child_worker(
             metrics.incr("taskworker.worker.child_task_queue_empty")
             continue
 
-        task_func = _get_known_task(activation)
+        task_func = _get_task_to_execute(activation, processed_tasks)
         if not task_func:
-            metrics.incr(
-                "taskworker.worker.unknown_task",
-                tags={"namespace": activation.namespace, "taskname": activation.taskname},
-            )
-            processed_tasks.put(
-                ProcessingResult(task_id=activation.id, status=TASK_ACTIVATION_STATUS_FAILURE)
-            )
             continue
 
-        if task_func.at_most_once:
-            key = get_at_most_once_key(activation.namespace, activation.taskname, activation.id)
-            if cache.add(key, "1", timeout=AT_MOST_ONCE_TIMEOUT):  # The key didn't exist
-                metrics.incr(
-                    "taskworker.task.at_most_once.executed", tags={"taskname": activation.taskname}
-                )
-            else:
-                metrics.incr(
-                    "taskworker.worker.at_most_once.skipped", tags={"taskname": activation.taskname}
-                )
-                continue
-
         current_activation = activation
 
         # Set an alarm for the processing_deadline_duration
@@ -166,54 +245,10 @@ def child_worker(
             # Clear the alarm
             signal.alarm(0)
         except Exception as err:
-            if task_func.should_retry(activation.retry_state, err):
-                logger.info("taskworker.task.retry", extra={"taskname": activation.taskname})
-                next_state = TASK_ACTIVATION_STATUS_RETRY
-
-            if next_state != TASK_ACTIVATION_STATUS_RETRY:
-                logger.info(
-                    "taskworker.task.errored", extra={"type": str(err.__class__), "error": str(err)}
-                )
+            next_state = _get_error_state(task_func, activation, err)
 
         processed_task_count += 1
-
-        # Get completion time before pushing to queue to avoid inflating latency metrics.
-        execution_complete_time = time.time()
-        processed_tasks.put(ProcessingResult(task_id=activation.id, status=next_state))
-        metrics.distribution(
-            "taskworker.worker.processed_tasks.put.duration",
-            time.time() - execution_complete_time,
-        )
-
-        task_added_time = activation.received_at.ToDatetime().timestamp()
-        execution_duration = execution_complete_time - execution_start_time
-        execution_latency = execution_complete_time - task_added_time
-        logger.debug(
-            "taskworker.task_execution",
-            extra={
-                "taskname": activation.taskname,
-                "execution_duration": execution_duration,
-                "execution_latency": execution_latency,
-                "status": next_state,
-            },
-        )
-        metrics.incr(
-            "taskworker.worker.execute_task",
-            tags={
-                "namespace": activation.namespace,
-                "status": next_state,
-            },
-        )
-        metrics.distribution(
-            "taskworker.worker.execution_duration",
-            execution_duration,
-            tags={"namespace": activation.namespace, "taskname": activation.taskname},
-        )
-        metrics.distribution(
-            "taskworker.worker.execution_latency",
-            execution_latency,
-            tags={"namespace": activation.namespace, "taskname": activation.taskname},
-        )
+        _report_result(processed_tasks, activation, next_state, execution_start_time)
 
 
 def _execute_activation(task_func: Task[Any, Any], activation: TaskActivation) -> None:
@@ -232,7 +267,215 @@ def _execute_activation(task_func: Task[Any, Any], activation: TaskActivation) -
         track_memory_usage("taskworker.worker.memory_change"),
         sentry_sdk.start_transaction(transaction),
     ):
-        task_func(*args, **kwargs)
+        if task_func.is_coroutine:
+            # Workers which aren't dedicated to an asyncio namespace run its tasks one by one
+            asyncio.run(task_func(*args, **kwargs))
+        else:
+            task_func(*args, **kwargs)
+
+
+async def _execute_activation_async(
+    task_func: Task[Any, Any], activation: TaskActivation, executor: ThreadPoolExecutor
+) -> None:
+    """Await a coroutine task, or run a regular task on `executor`."""
+    parameters = orjson.loads(activation.parameters)
+    args = parameters.get("args", [])
+    kwargs = parameters.get("kwargs", {})
+    headers = {k: v for k, v in activation.headers.items()}
+
+    transaction = sentry_sdk.continue_trace(
+        environ_or_headers=headers,
+        op="task.taskworker",
+        name=f"{activation.namespace}:{activation.taskname}",
+    )
+    with sentry_sdk.start_transaction(transaction):
+        if task_func.is_coroutine:
+            await task_func(*args, **kwargs)
+        else:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(executor, functools.partial(task_func, *args, **kwargs))
+
+
+class ThreadTaskExecutor:
+    """Runs many activations at once on a thread pool"""
+
+    def __init__(self, max_concurrency: int) -> None:
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="taskworker-task"
+        )
+
+    def submit(self, task_func: Task[Any, Any], activation: TaskActivation) -> Future[None]:
+        return self._pool.submit(_execute_activation, task_func, activation)
+
+    def cancel(self, task_func: Task[Any, Any], future: Future[None]) -> bool:
+        """
+        Stop a running activation. Returns False if it keeps running regardless,
+        as threads cannot be interrupted.
+        """
+        return future.cancel()
+
+    def shutdown(self, wait: bool) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+class AsyncioTaskExecutor(ThreadTaskExecutor):
+    """
+    Runs many activations at once on an asyncio event loop in a background thread.
+    Regular tasks are run on a thread pool instead of blocking the loop.
+    """
+
+    def __init__(self, max_concurrency: int) -> None:
+        super().__init__(max_concurrency)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="taskworker-asyncio", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, task_func: Task[Any, Any], activation: TaskActivation) -> Future[None]:
+        return asyncio.run_coroutine_threadsafe(
+            _execute_activation_async(task_func, activation, self._pool), self._loop
+        )
+
+    def cancel(self, task_func: Task[Any, Any], future: Future[None]) -> bool:
+        future.cancel()
+        # Only coroutines actually stop when cancelled
+        return task_func.is_coroutine
+
+    def shutdown(self, wait: bool) -> None:
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        if wait:
+            self._thread.join()
+        super().shutdown(wait)
+
+
+@dataclasses.dataclass
+class _RunningActivation:
+    activation: TaskActivation
+    task_func: Task[Any, Any]
+    start_time: float
+    deadline: float
+
+
+def run_concurrent_tasks(
+    child_tasks: queue.Queue[TaskActivation],
+    processed_tasks: queue.Queue[ProcessingResult],
+    shutdown_event: Event,
+    max_task_count: int | None,
+    executor: ThreadTaskExecutor,
+    max_concurrency: int,
+) -> bool:
+    """
+    Execute activations with up to `max_concurrency` of them running at once,
+    until shutdown, `max_task_count` or an activation missing its processing
+    deadline.
+
+    Activations which miss their deadline are reported as failed right away. Those
+    which cannot be stopped stop this loop once all other running activations are
+    done, and True is returned: the caller must then exit the process to get rid
+    of them.
+    """
+    running: dict[Future[None], _RunningActivation] = {}
+    processed_task_count = 0
+    abandoned = False
+
+    while True:
+        for future in [future for future in running if future.done()]:
+            item = running.pop(future)
+            next_state = TASK_ACTIVATION_STATUS_COMPLETE
+            err = future.exception() if not future.cancelled() else None
+            if err is not None:
+                next_state = _get_error_state(item.task_func, item.activation, err)
+            processed_task_count += 1
+            _report_result(processed_tasks, item.activation, next_state, item.start_time)
+
+        now = time.monotonic()
+        for future, item in list(running.items()):
+            if now < item.deadline:
+                continue
+            del running[future]
+            processed_task_count += 1
+            processed_tasks.put(
+                ProcessingResult(task_id=item.activation.id, status=TASK_ACTIVATION_STATUS_FAILURE)
+            )
+            metrics.incr(
+                "taskworker.worker.processing_deadline_exceeded",
+                tags={
+                    "namespace": item.activation.namespace,
+                    "taskname": item.activation.taskname,
+                },
+            )
+            if not executor.cancel(item.task_func, future):
+                abandoned = True
+
+        stopping = abandoned or shutdown_event.is_set()
+        if max_task_count and processed_task_count + len(running) >= max_task_count:
+            stopping = True
+        if stopping:
+            if not running:
+                logger.info(
+                    "taskworker.worker.concurrent_child_stopped",
+                    extra={"count": processed_task_count, "abandoned": abandoned},
+                )
+                return abandoned
+            futures.wait(running, timeout=0.1, return_when=futures.FIRST_COMPLETED)
+            continue
+
+        if len(running) >= max_concurrency:
+            futures.wait(running, timeout=0.1, return_when=futures.FIRST_COMPLETED)
+            continue
+
+        try:
+            # Poll while activations are running, so that completions are picked up quickly
+            activation = child_tasks.get(timeout=0.01 if running else 1.0)
+        except queue.Empty:
+            if running:
+                futures.wait(running, timeout=0.05, return_when=futures.FIRST_COMPLETED)
+            else:
+                metrics.incr("taskworker.worker.child_task_queue_empty")
+            continue
+
+        task_func = _get_task_to_execute(activation, processed_tasks)
+        if not task_func:
+            continue
+
+        future = executor.submit(task_func, activation)
+        running[future] = _RunningActivation(
+            activation=activation,
+            task_func=task_func,
+            start_time=time.time(),
+            deadline=time.monotonic() + activation.processing_deadline_duration,
+        )
+        metrics.distribution("taskworker.worker.concurrent_tasks", len(running))
+
+
+def concurrent_child_worker(
+    child_tasks: multiprocessing.Queue[TaskActivation],
+    processed_tasks: multiprocessing.Queue[ProcessingResult],
+    shutdown_event: Event,
+    max_task_count: int | None,
+    execution_mode: ExecutionMode,
+    max_concurrency: int,
+) -> None:
+    """
+    A child process executing many activations at once, see `ExecutionMode`.
+    """
+    for module in settings.TASKWORKER_IMPORTS:
+        __import__(module)
+
+    executor_cls = AsyncioTaskExecutor if execution_mode == "asyncio" else ThreadTaskExecutor
+    executor = executor_cls(max_concurrency)
+    abandoned = run_concurrent_tasks(
+        child_tasks, processed_tasks, shutdown_event, max_task_count, executor, max_concurrency
+    )
+    executor.shutdown(wait=not abandoned)
+
+    if abandoned:
+        # Threads cannot be interrupted, and would otherwise be joined on exit. Make
+        # sure all results have been sent before exiting without waiting for them.
+        processed_tasks.close()
+        processed_tasks.join_thread()
+        os._exit(1)
 
 
 class TaskWorker:
@@ -243,6 +486,13 @@ class TaskWorker:
     As tasks are completed status changes will be sent back to the RPC host and new tasks
     will be fetched.
 
+    Workers dedicated to a namespace with a thread or asyncio execution mode run a single
+    child instead, which executes up to `concurrency` tasks at once.
+
+    With a `prefetch_size`, up to that many tasks are fetched per round trip and kept in a
+    local buffer that child processes are fed from, and results are reported in batches of
+    up to that size. This keeps children busy when tasks are shorter than RPC calls.
+
     Taskworkers can be run with `sentry run taskworker`
     """
 
@@ -256,6 +506,7 @@ class TaskWorker:
         child_tasks_queue_maxsize: int = DEFAULT_WORKER_QUEUE_SIZE,
         result_queue_maxsize: int = DEFAULT_WORKER_QUEUE_SIZE,
         rebalance_after: int = DEFAULT_REBALANCE_AFTER,
+        prefetch_size: int = 0,
         **options: dict[str, Any],
     ) -> None:
         self.options = options
@@ -274,6 +525,12 @@ class TaskWorker:
         self._task_receive_timing: dict[str, float] = {}
         self._result_thread: threading.Thread | None = None
 
+        self._prefetch_size = prefetch_size
+        self._prefetched: deque[TaskActivation] = deque()
+        # Number of next tasks requested by result batches which are in flight
+        self._prefetch_pending = 0
+        self._prefetch_lock = threading.Lock()
+
         self._gettask_backoff_seconds = 0
         self._setstatus_backoff_seconds = 0
 
@@ -332,6 +589,11 @@ class TaskWorker:
             except queue.Empty:
                 break
 
+        # Prefetched tasks will be handed out again by the broker once their
+        # processing deadline has passed.
+        while self._prefetched:
+            self._discard_task(self._prefetched.popleft())
+
     def _add_task(self) -> bool:
         """
         Add a task to child tasks queue. Returns False if no new task was fetched.
@@ -339,7 +601,7 @@ class TaskWorker:
         if self._child_tasks.full():
             return False
 
-        task = self.fetch_task()
+        task = self._get_prefetched_task() if self._prefetch_size else self.fetch_task()
         if task:
             try:
                 start_time = time.time()
@@ -373,7 +635,10 @@ class TaskWorker:
                 while not self._shutdown_event.is_set():
                     try:
                         result = self._processed_tasks.get(timeout=1.0)
-                        executor.submit(self._send_result, result)
+                        if self._prefetch_size:
+                            executor.submit(self._send_results, self._get_result_batch(result))
+                        else:
+                            executor.submit(self._send_result, result)
                     except queue.Empty:
                         metrics.incr("taskworker.worker.result_thread.queue_empty")
                         continue
@@ -412,6 +677,60 @@ class TaskWorker:
         self._send_update_task(result, fetch_next=None)
         return True
 
+    def _get_result_batch(self, result: ProcessingResult) -> list[ProcessingResult]:
+        batch = [result]
+        while len(batch) < self._prefetch_size:
+            try:
+                batch.append(self._processed_tasks.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _send_results(self, results: list[ProcessingResult]) -> None:
+        """
+        Send a batch of results to the broker, and refill the prefetch buffer with
+        the next tasks handed out in response.
+
+        Run in the result thread's pool, see `start_result_thread`
+        """
+        now = time.time()
+        for result in results:
+            task_received = self._task_receive_timing.pop(result.task_id, None)
+            if task_received is not None:
+                metrics.distribution("taskworker.worker.complete_duration", now - task_received)
+
+        num_fetch_next = self._reserve_prefetch()
+
+        # Use the shutdown_event as a sleep mechanism
+        self._shutdown_event.wait(self._setstatus_backoff_seconds)
+        try:
+            next_tasks, errors = self.client.update_tasks(
+                [(result.task_id, result.status) for result in results],
+                fetch_next_task=FetchNextTask(namespace=self._namespace),
+                num_fetch_next=num_fetch_next,
+            )
+            now = time.time()
+            for task in next_tasks:
+                self._task_receive_timing[task.id] = now
+            # Fill the buffer before releasing the reservation, so that it never overshoots
+            self._prefetched.extend(next_tasks)
+        finally:
+            self._release_prefetch(num_fetch_next)
+
+        if not errors:
+            self._setstatus_backoff_seconds = 0
+            return
+
+        self._setstatus_backoff_seconds = min(self._setstatus_backoff_seconds + 1, 10)
+        results_by_id = {result.task_id: result for result in results}
+        for task_id, error in errors:
+            if error.code() == grpc.StatusCode.UNAVAILABLE:
+                self._processed_tasks.put(results_by_id[task_id])
+            logger.error(
+                "taskworker.send_update_task.failed",
+                extra={"task_id": task_id, "error": error},
+            )
+
     def _send_update_task(
         self, result: ProcessingResult, fetch_next: FetchNextTask | None
     ) -> TaskActivation | None:
@@ -442,20 +761,33 @@ class TaskWorker:
             )
             return None
 
+    def _get_execution_mode(self) -> ExecutionMode:
+        if self._namespace and taskregistry.contains(self._namespace):
+            return taskregistry.get(self._namespace).execution_mode
+        return "process"
+
     def _spawn_children(self) -> None:
+        execution_mode = self._get_execution_mode()
+        # Concurrent execution modes run all tasks in a single child
+        num_children = self._concurrency if execution_mode == "process" else 1
+
         active_children = [child for child in self._children if child.is_alive()]
-        if len(active_children) >= self._concurrency:
+        if len(active_children) >= num_children:
             return
-        for _ in range(self._concurrency - len(active_children)):
-            process = mp_context.Process(
-                target=child_worker,
-                args=(
-                    self._child_tasks,
-                    self._processed_tasks,
-                    self._shutdown_event,
-                    self._max_child_task_count,
-                ),
+        for _ in range(num_children - len(active_children)):
+            args: tuple[Any, ...] = (
+                self._child_tasks,
+                self._processed_tasks,
+                self._shutdown_event,
+                self._max_child_task_count,
             )
+            if execution_mode == "process":
+                process = mp_context.Process(target=child_worker, args=args)
+            else:
+                process = mp_context.Process(
+                    target=concurrent_child_worker,
+                    args=args + (execution_mode, self._concurrency),
+                )
             process.start()
             active_children.append(process)
             logger.info("taskworker.spawn_child", extra={"pid": process.pid})
@@ -483,3 +815,85 @@ class TaskWorker:
         self._gettask_backoff_seconds = 0
         self._task_receive_timing[activation.id] = time.time()
         return activation
+
+    def fetch_tasks(self, count: int) -> list[TaskActivation]:
+        # Use the shutdown_event as a sleep mechanism
+        self._shutdown_event.wait(self._gettask_backoff_seconds)
+        try:
+            activations = self.client.get_tasks(self._namespace, count)
+        except grpc.RpcError as e:
+            logger.info("taskworker.fetch_task.failed", extra={"error": e})
+
+            self._gettask_backoff_seconds = min(self._gettask_backoff_seconds + 1, 10)
+            return []
+
+        if not activations:
+            metrics.incr("taskworker.worker.fetch_task.not_found")
+            logger.debug("taskworker.fetch_task.not_found")
+
+            self._gettask_backoff_seconds = min(self._gettask_backoff_seconds + 1, 10)
+            return []
+
+        self._gettask_backoff_seconds = 0
+        now = time.time()
+        for activation in activations:
+            self._task_receive_timing[activation.id] = now
+        return activations
+
+    def _reserve_prefetch(self) -> int:
+        """
+        Reserve room in the prefetch buffer for tasks about to be fetched, as fetches
+        from the main loop and several result batches can be in flight at once.
+        Returns the number of tasks to fetch, see `_release_prefetch`.
+        """
+        with self._prefetch_lock:
+            count = max(self._prefetch_size - len(self._prefetched) - self._prefetch_pending, 0)
+            self._prefetch_pending += count
+        return count
+
+    def _release_prefetch(self, count: int) -> None:
+        with self._prefetch_lock:
+            self._prefetch_pending -= count
+
+    def _get_prefetched_task(self) -> TaskActivation | None:
+        """
+        Take the next task from the prefetch buffer, refilling it once it is empty.
+
+        The broker starts the processing deadline of a task when handing it out, so
+        the deadline of a buffered task is reduced to the whole seconds it has left,
+        which children set their alarm from. Tasks without a second left are dropped,
+        as the broker will hand them out again before they could complete.
+        """
+        if not self._prefetched:
+            count = self._reserve_prefetch()
+            if not count:
+                # Result batches in flight are going to refill the buffer
+                self._shutdown_event.wait(0.01)
+                return None
+            try:
+                self._prefetched.extend(self.fetch_tasks(count))
+            finally:
+                self._release_prefetch(count)
+
+        while self._prefetched:
+            task = self._prefetched.popleft()
+            task_received = self._task_receive_timing.get(task.id)
+            if task_received is None or not task.processing_deadline_duration:
+                return task
+
+            remaining = int(task.processing_deadline_duration - (time.time() - task_received))
+            if remaining >= 1:
+                task.processing_deadline_duration = remaining
+                return task
+
+            metrics.incr(
+                "taskworker.worker.prefetch.deadline_exceeded",
+                tags={"namespace": task.namespace, "taskname": task.taskname},
+            )
+            self._discard_task(task)
+
+        return None
+
+    def _discard_task(self, task: TaskActivation) -> None:
+        self._task_receive_timing.pop(task.id, None)
+        self.client.discard_task(task.id)
@@ -2,6 +2,7 @@ import binascii
 import itertools
 import logging
 import uuid
+from array import array
 from collections import defaultdict, namedtuple
 from collections.abc import Callable, Iterable, Mapping, Sequence
 from datetime import datetime
@@ -13,6 +14,7 @@ from django.utils import timezone
 from django.utils.encoding import force_bytes
 from redis.client import Script
 
+from sentry import options
 from sentry.tsdb.base import BaseTSDB, IncrMultiOptions, TSDBItem, TSDBKey, TSDBModel
 from sentry.utils.dates import to_datetime
 from sentry.utils.redis import check_cluster_versions, get_cluster_from_options, load_redis_script
@@ -190,12 +192,7 @@ class RedisTSDB(BaseTSDB):
 
         Returns a 2-tuple that contains the hash key and the hash field.
         """
-        model_key = self.get_model_key(key)
-
-        if isinstance(model_key, int):
-            vnode = model_key % self.vnodes
-        else:
-            vnode = _crc32(force_bytes(model_key)) % self.vnodes
+        vnode, hash_field = self.get_counter_vnode_and_field(key, environment_id)
 
         return (
             "{prefix}{model}:{epoch}:{vnode}".format(
@@ -204,9 +201,24 @@ class RedisTSDB(BaseTSDB):
                 epoch=self.normalize_to_rollup(timestamp, rollup),
                 vnode=vnode,
             ),
-            self.add_environment_parameter(model_key, environment_id),
+            hash_field,
         )
 
+    def get_counter_vnode_and_field(
+        self, key: int | str | bytes, environment_id: int | None
+    ) -> tuple[int, str | int]:
+        """
+        Returns the vnode and hash field of a counter, which don't depend on the timestamp.
+        """
+        model_key = self.get_model_key(key)
+
+        if isinstance(model_key, int):
+            vnode = model_key % self.vnodes
+        else:
+            vnode = _crc32(force_bytes(model_key)) % self.vnodes
+
+        return vnode, self.add_environment_parameter(model_key, environment_id)
+
     def get_model_key(self, key: int | str | bytes) -> int | str:
         # We specialize integers so that a pure int-map can be optimized by
         # Redis, whereas long strings (say tag values) will store in a more
@@ -329,6 +341,10 @@ class RedisTSDB(BaseTSDB):
             raise NotImplementedError
         environment_id = environment_ids[0] if environment_ids else None
 
+        if options.get("tsdb.redis.vectorized-reads"):
+            epochs, counts = self.get_range_arrays(model, keys, start, end, rollup, environment_id)
+            return {key: list(zip(epochs, key_counts)) for key, key_counts in counts.items()}
+
         self.validate_arguments([model], [environment_id])
 
         rollup, series = self.get_optimal_rollup_series(start, end, rollup)
@@ -355,6 +371,59 @@ class RedisTSDB(BaseTSDB):
             output[key] = sorted(points.items())
         return output
 
+    def get_range_arrays(
+        self,
+        model: TSDBModel,
+        keys: Sequence[TSDBKey],
+        start: datetime,
+        end: datetime,
+        rollup: int | None = None,
+        environment_id: int | None = None,
+    ) -> tuple[list[int], dict[TSDBKey, array[int]]]:
+        """
+        Same as `get_range`, but returns the epochs of the series once, along with an array of
+        counts in the same order for each key.
+
+        The counters of all keys sharing a vnode are stored in the same hash for each rollup
+        epoch, so this reads them with one ``HMGET`` per hash rather than one ``HGET`` per key and
+        epoch.
+        """
+        self.validate_arguments([model], [environment_id])
+
+        rollup, series = self.get_optimal_rollup_series(start, end, rollup)
+        epochs = sorted(series)
+        keys = list(dict.fromkeys(keys))
+
+        # hash key -> (indexes into `keys` and `epochs`, hash fields)
+        reads: dict[str, tuple[list[tuple[int, int]], list[str | int]]] = {}
+        for key_index, key in enumerate(keys):
+            vnode, hash_field = self.get_counter_vnode_and_field(key, environment_id)
+            for epoch_index, epoch in enumerate(epochs):
+                hash_key = "{prefix}{model}:{epoch}:{vnode}".format(
+                    prefix=self.prefix,
+                    model=model.value,
+                    epoch=self.normalize_to_rollup(epoch, rollup),
+                    vnode=vnode,
+                )
+                indexes, hash_fields = reads.setdefault(hash_key, ([], []))
+                indexes.append((key_index, epoch_index))
+                hash_fields.append(hash_field)
+
+        cluster, _ = self.get_cluster(environment_id)
+        with cluster.map() as client:
+            promises = [
+                (indexes, client.hmget(hash_key, hash_fields))
+                for hash_key, (indexes, hash_fields) in reads.items()
+            ]
+
+        counts = [array("q", [0]) * len(epochs) for _ in keys]
+        for indexes, promise in promises:
+            for (key_index, epoch_index), value in zip(indexes, promise.value):
+                if value:
+                    counts[key_index][epoch_index] = int(value)
+
+        return epochs, dict(zip(keys, counts))
+
     def merge(
         self,
         model: TSDBModel,
@@ -495,6 +564,12 @@ class RedisTSDB(BaseTSDB):
         """
         Fetch counts of distinct items for each rollup interval within the range.
         """
+        if options.get("tsdb.redis.vectorized-reads"):
+            epochs, counts = self.get_distinct_counts_arrays(
+                model, keys, start, end, rollup, environment_id
+            )
+            return {key: list(zip(epochs, key_counts)) for key, key_counts in counts.items()}
+
         self.validate_arguments([model], [environment_id])
 
         rollup, series = self.get_optimal_rollup_series(start, end, rollup)
@@ -518,6 +593,42 @@ class RedisTSDB(BaseTSDB):
             for key, value in responses.items()
         }
 
+    def get_distinct_counts_arrays(
+        self,
+        model: TSDBModel,
+        keys: Sequence[int],
+        start: datetime,
+        end: datetime | None = None,
+        rollup: int | None = None,
+        environment_id: int | None = None,
+    ) -> tuple[list[int], dict[int, array[int]]]:
+        """
+        Same as `get_distinct_counts_series`, but returns the epochs of the series once, along
+        with an array of counts in the same order for each key.
+        """
+        self.validate_arguments([model], [environment_id])
+
+        rollup, series = self.get_optimal_rollup_series(start, end, rollup)
+        epochs = sorted(series)
+        keys = list(dict.fromkeys(keys))
+
+        cluster, _ = self.get_cluster(environment_id)
+        with cluster.fanout() as client:
+            promises = []
+            for key in keys:
+                c = client.target_key(key)
+                promises.append(
+                    [
+                        c.pfcount(self.make_key(model, rollup, epoch, key, environment_id))
+                        for epoch in epochs
+                    ]
+                )
+
+        return epochs, {
+            key: array("q", (promise.value or 0 for promise in key_promises))
+            for key, key_promises in zip(keys, promises)
+        }
+
     def get_distinct_counts_totals(
         self,
         model: TSDBModel,
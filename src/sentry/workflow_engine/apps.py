@@ -8,3 +8,6 @@ class Config(AppConfig):
         # Import our base DataConditionHandlers for the workflow engine platform
         import sentry.workflow_engine.handlers  # NOQA
         from sentry.workflow_engine.endpoints import serializers  # NOQA
+
+        # Invalidates cached evaluation plans when workflows or their conditions change
+        from sentry.workflow_engine.processors import evaluation_plan  # NOQA
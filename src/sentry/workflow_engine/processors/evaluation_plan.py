@@ -0,0 +1,451 @@
+"""
+Compiled evaluation plans for the workflows of a project.
+
+Processing a single event used to load the detector, its workflows and all of their condition
+groups from Postgres, one condition group at a time. An `EvaluationPlan` captures all of that for
+a project up front, so that `process_workflows` can evaluate every workflow of an event without
+any database queries:
+
+- Identical conditions are deduplicated across all workflows and condition groups of the
+  project, and are evaluated at most once per event and environment.
+- The fast conditions of every condition group are ordered by cost, so that cheap comparisons
+  can short-circuit conditions which have to read from the cache, buffers or the database.
+  Slow conditions are never evaluated, they are returned to be enqueued for delayed processing.
+
+Plans are cached in Redis, and in-process in front of that. Both are keyed by a version per
+organization, which is replaced whenever any of its workflows, detectors or conditions changes.
+Changes are picked up from the `post_save`, `post_delete` and `post_update` signals of the
+models. Queryset updates only send `post_update` with `with_post_update_signal(True)`, so any
+other bulk change has to call `invalidate_evaluation_plans` itself.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+from uuid import uuid4
+
+import orjson
+from cachetools import LRUCache
+from django.db import router, transaction
+from django.db.models.signals import post_delete, post_save
+
+from sentry.db.models import Model
+from sentry.grouping.grouptype import ErrorGroupType
+from sentry.models.environment import Environment
+from sentry.models.project import Project
+from sentry.signals import post_update
+from sentry.utils import metrics
+from sentry.utils.cache import cache
+from sentry.workflow_engine.models import (
+    DataCondition,
+    DataConditionGroup,
+    Detector,
+    DetectorWorkflow,
+    Workflow,
+    WorkflowDataConditionGroup,
+)
+from sentry.workflow_engine.models.data_condition import CONDITION_OPS, Condition, is_slow_condition
+from sentry.workflow_engine.types import WorkflowEventData
+
+if TYPE_CHECKING:
+    from sentry.eventstore.models import GroupEvent
+
+logger = logging.getLogger(__name__)
+
+EVALUATION_PLAN_TTL = 60 * 60
+EVALUATION_PLAN_VERSION_TTL = 24 * 60 * 60
+
+# Conditions whose handlers may have to read from the cache, buffers or the database
+EXPENSIVE_CONDITIONS = frozenset(
+    [
+        Condition.ASSIGNED_TO,
+        Condition.ISSUE_OCCURRENCES,
+        Condition.LATEST_ADOPTED_RELEASE,
+        Condition.LATEST_RELEASE,
+    ]
+)
+
+# Whether a condition triggered, by the index of the condition in the plan and the id of the
+# environment of the workflow it was evaluated for
+ConditionResults = dict[tuple[int, int | None], bool]
+
+# The plans most recently used by this process, by project id, with the version they belong to
+_local_plans: LRUCache[int, tuple[str, EvaluationPlan]] = LRUCache(1000)
+
+
+@dataclass(frozen=True)
+class ConditionGroupPlan:
+    id: int
+    # None if the logic type of the group is invalid, in which case it never passes
+    logic_type: DataConditionGroup.Type | None
+    # Indexes into `EvaluationPlan.conditions`, cheapest first
+    fast_conditions: tuple[int, ...]
+    slow_conditions: tuple[DataCondition, ...]
+
+
+@dataclass(frozen=True)
+class WorkflowPlan:
+    workflow: Workflow
+    action_filter_group_ids: tuple[int, ...]
+
+
+@dataclass(frozen=True)
+class EvaluationPlan:
+    project_id: int
+    organization_id: int
+    error_detector_id: int | None
+    detectors: dict[int, Detector] = field(default_factory=dict)
+    # The ids of the enabled workflows of every detector
+    detector_workflows: dict[int, tuple[int, ...]] = field(default_factory=dict)
+    workflows: dict[int, WorkflowPlan] = field(default_factory=dict)
+    environments: dict[int, Environment] = field(default_factory=dict)
+    condition_groups: dict[int, ConditionGroupPlan] = field(default_factory=dict)
+    conditions: tuple[DataCondition, ...] = ()
+
+    def get_detector(self, event: GroupEvent) -> Detector | None:
+        if event.occurrence is None:
+            detector_id = self.error_detector_id
+        else:
+            detector_id = event.occurrence.evidence_data.get("detector_id", None)
+        return self.detectors.get(detector_id) if detector_id is not None else None
+
+    def get_workflows(self, detector_id: int, environment_id: int) -> set[Workflow]:
+        workflows = (
+            self.workflows[workflow_id].workflow
+            for workflow_id in self.detector_workflows.get(detector_id, ())
+        )
+        return {
+            workflow
+            for workflow in workflows
+            if workflow.environment_id is None or workflow.environment_id == environment_id
+        }
+
+    def get_environment(self, workflow: Workflow) -> Environment | None:
+        if workflow.environment_id is None:
+            return None
+        return self.environments.get(workflow.environment_id)
+
+    def evaluate_condition_group(
+        self, condition_group_id: int, job: WorkflowEventData, results: ConditionResults
+    ) -> tuple[bool, list[DataCondition]]:
+        """
+        Evaluates the fast conditions of a condition group, with the same outcome as
+        `process_data_condition_group`, and returns the slow conditions that still have to be
+        evaluated. Conditions which already were evaluated for the environment of the job are
+        looked up in `results` instead.
+        """
+        group = self.condition_groups.get(condition_group_id)
+        if group is None or group.logic_type is None:
+            return False, []
+
+        logic_type = group.logic_type
+        if not group.fast_conditions:
+            # Groups without any conditions always pass, like action filters which only exist
+            # to attach actions to a workflow
+            if not group.slow_conditions:
+                return True, []
+            return False, list(group.slow_conditions)
+
+        environment_id = job.workflow_env.id if job.workflow_env else None
+        logic_result = logic_type in (DataConditionGroup.Type.ALL, DataConditionGroup.Type.NONE)
+        for index in group.fast_conditions:
+            key = (index, environment_id)
+            if key not in results:
+                results[key] = self.conditions[index].evaluate_value(job) is not None
+
+            if logic_type == DataConditionGroup.Type.ALL:
+                if not results[key]:
+                    logic_result = False
+                    break
+            elif results[key]:
+                logic_result = logic_type != DataConditionGroup.Type.NONE
+                break
+
+        is_short_circuit_all = not logic_result and logic_type == DataConditionGroup.Type.ALL
+        is_short_circuit_any = logic_result and logic_type in (
+            DataConditionGroup.Type.ANY,
+            DataConditionGroup.Type.ANY_SHORT_CIRCUIT,
+        )
+        if is_short_circuit_all or is_short_circuit_any:
+            return logic_result, []
+
+        return logic_result, list(group.slow_conditions)
+
+
+def get_condition_cost(condition: DataCondition) -> int:
+    condition_type = Condition(condition.type)
+    if condition_type in CONDITION_OPS:
+        return 0
+    if condition_type in EXPENSIVE_CONDITIONS:
+        return 2
+    return 1
+
+
+def _get_condition_key(condition: DataCondition) -> tuple[str, bytes, bytes]:
+    return (
+        condition.type,
+        orjson.dumps(condition.comparison, option=orjson.OPT_SORT_KEYS),
+        orjson.dumps(condition.condition_result, option=orjson.OPT_SORT_KEYS),
+    )
+
+
+def build_evaluation_plan(project_id: int, organization_id: int) -> EvaluationPlan:
+    detectors = {
+        detector.id: detector for detector in Detector.objects.filter(project_id=project_id)
+    }
+    error_detector_ids = [
+        detector.id for detector in detectors.values() if detector.type == ErrorGroupType.slug
+    ]
+
+    detector_workflows: dict[int, list[int]] = defaultdict(list)
+    for detector_id, workflow_id in DetectorWorkflow.objects.filter(
+        detector_id__in=list(detectors), workflow__enabled=True
+    ).values_list("detector_id", "workflow_id"):
+        detector_workflows[detector_id].append(workflow_id)
+
+    workflows = {
+        workflow.id: workflow
+        for workflow in Workflow.objects.filter(
+            id__in={workflow_id for ids in detector_workflows.values() for workflow_id in ids}
+        )
+    }
+
+    environment_ids = {workflow.environment_id for workflow in workflows.values()}
+    environment_ids.discard(None)
+    environments = {
+        environment.id: environment
+        for environment in Environment.objects.filter(id__in=environment_ids)
+    }
+
+    action_filter_group_ids: dict[int, list[int]] = defaultdict(list)
+    for workflow_id, condition_group_id in WorkflowDataConditionGroup.objects.filter(
+        workflow_id__in=list(workflows)
+    ).values_list("workflow_id", "condition_group_id"):
+        action_filter_group_ids[workflow_id].append(condition_group_id)
+
+    condition_group_ids = {
+        workflow.when_condition_group_id
+        for workflow in workflows.values()
+        if workflow.when_condition_group_id is not None
+    }
+    for group_ids in action_filter_group_ids.values():
+        condition_group_ids.update(group_ids)
+
+    conditions_by_group: dict[int, list[DataCondition]] = defaultdict(list)
+    for condition in DataCondition.objects.filter(condition_group_id__in=condition_group_ids):
+        conditions_by_group[condition.condition_group_id].append(condition)
+
+    conditions: list[DataCondition] = []
+    condition_indexes: dict[tuple[str, bytes, bytes], int] = {}
+    condition_groups = {}
+    for group in DataConditionGroup.objects.filter(id__in=condition_group_ids):
+        try:
+            logic_type: DataConditionGroup.Type | None = DataConditionGroup.Type(group.logic_type)
+        except ValueError:
+            logger.exception(
+                "Invalid DataConditionGroup.logic_type found in build_evaluation_plan",
+                extra={"logic_type": group.logic_type},
+            )
+            logic_type = None
+
+        fast_conditions: list[DataCondition] = []
+        slow_conditions: list[DataCondition] = []
+        for condition in conditions_by_group[group.id]:
+            if is_slow_condition(condition):
+                slow_conditions.append(condition)
+            else:
+                fast_conditions.append(condition)
+
+        fast_condition_indexes = []
+        for condition in sorted(fast_conditions, key=get_condition_cost):
+            key = _get_condition_key(condition)
+            if key not in condition_indexes:
+                condition_indexes[key] = len(conditions)
+                conditions.append(condition)
+            fast_condition_indexes.append(condition_indexes[key])
+
+        condition_groups[group.id] = ConditionGroupPlan(
+            id=group.id,
+            logic_type=logic_type,
+            fast_conditions=tuple(fast_condition_indexes),
+            slow_conditions=tuple(slow_conditions),
+        )
+
+    metrics.distribution("workflow_engine.evaluation_plan.workflows", len(workflows))
+    metrics.distribution("workflow_engine.evaluation_plan.conditions", len(conditions))
+
+    return EvaluationPlan(
+        project_id=project_id,
+        organization_id=organization_id,
+        error_detector_id=min(error_detector_ids) if error_detector_ids else None,
+        detectors=detectors,
+        detector_workflows={
+            detector_id: tuple(workflow_ids)
+            for detector_id, workflow_ids in detector_workflows.items()
+        },
+        workflows={
+            workflow.id: WorkflowPlan(
+                workflow=workflow,
+                action_filter_group_ids=tuple(action_filter_group_ids[workflow.id]),
+            )
+            for workflow in workflows.values()
+        },
+        environments=environments,
+        condition_groups=condition_groups,
+        conditions=tuple(conditions),
+    )
+
+
+def _get_version_cache_key(organization_id: int) -> str:
+    return f"workflow_engine:evaluation_plan_version:{organization_id}"
+
+
+def _get_plan_cache_key(project_id: int, version: str) -> str:
+    return f"workflow_engine:evaluation_plan:{project_id}:{version}"
+
+
+def get_evaluation_plan_version(organization_id: int) -> str:
+    cache_key = _get_version_cache_key(organization_id)
+    version = cache.get(cache_key)
+    if version is None:
+        version = uuid4().hex
+        # Another process might have just set the version as well, in which case we use theirs
+        if not cache.add(cache_key, version, EVALUATION_PLAN_VERSION_TTL):
+            version = cache.get(cache_key) or version
+    return version
+
+
+def get_evaluation_plan(project_id: int, organization_id: int) -> EvaluationPlan:
+    version = get_evaluation_plan_version(organization_id)
+
+    local = _local_plans.get(project_id)
+    if local is not None and local[0] == version:
+        metrics.incr("workflow_engine.evaluation_plan.cache", tags={"result": "local"})
+        return local[1]
+
+    cache_key = _get_plan_cache_key(project_id, version)
+    plan = cache.get(cache_key)
+    if plan is None:
+        metrics.incr("workflow_engine.evaluation_plan.cache", tags={"result": "miss"})
+        with metrics.timer("workflow_engine.evaluation_plan.build"):
+            plan = build_evaluation_plan(project_id, organization_id)
+        cache.set(cache_key, plan, EVALUATION_PLAN_TTL)
+    else:
+        metrics.incr("workflow_engine.evaluation_plan.cache", tags={"result": "hit"})
+
+    _local_plans[project_id] = (version, plan)
+    return plan
+
+
+def invalidate_evaluation_plans(organization_id: int) -> None:
+    """
+    Invalidates the plans of all projects of an organization, both in Redis and in every process
+    which checks the version of its plans before using them.
+    """
+    cache.set(_get_version_cache_key(organization_id), uuid4().hex, EVALUATION_PLAN_VERSION_TTL)
+
+
+def _schedule_invalidation(organization_ids: Iterable[int | None], using: str) -> None:
+    for organization_id in set(organization_ids):
+        if organization_id is not None:
+            transaction.on_commit(
+                lambda organization_id=organization_id: invalidate_evaluation_plans(
+                    organization_id
+                ),
+                using,
+            )
+
+
+def _get_workflow_organization_id(workflow_id: int) -> int | None:
+    return Workflow.objects.filter(id=workflow_id).values_list("organization_id", flat=True).first()
+
+
+def _invalidate_for_workflow(instance: Workflow, **kwargs: object) -> None:
+    _schedule_invalidation([instance.organization_id], router.db_for_write(Workflow))
+
+
+def _invalidate_for_condition_group(instance: DataConditionGroup, **kwargs: object) -> None:
+    _schedule_invalidation([instance.organization_id], router.db_for_write(DataConditionGroup))
+
+
+def _invalidate_for_condition(instance: DataCondition, **kwargs: object) -> None:
+    try:
+        group = DataConditionGroup.objects.get_from_cache(id=instance.condition_group_id)
+    except DataConditionGroup.DoesNotExist:
+        # Deleted along with its group, which invalidates the plans itself
+        return
+    _schedule_invalidation([group.organization_id], router.db_for_write(DataCondition))
+
+
+def _invalidate_for_detector(instance: Detector, **kwargs: object) -> None:
+    try:
+        project = Project.objects.get_from_cache(id=instance.project_id)
+    except Project.DoesNotExist:
+        return
+    _schedule_invalidation([project.organization_id], router.db_for_write(Detector))
+
+
+def _invalidate_for_detector_workflow(instance: DetectorWorkflow, **kwargs: object) -> None:
+    _schedule_invalidation(
+        [_get_workflow_organization_id(instance.workflow_id)],
+        router.db_for_write(DetectorWorkflow),
+    )
+
+
+def _invalidate_for_workflow_condition_group(
+    instance: WorkflowDataConditionGroup, **kwargs: object
+) -> None:
+    _schedule_invalidation(
+        [_get_workflow_organization_id(instance.workflow_id)],
+        router.db_for_write(WorkflowDataConditionGroup),
+    )
+
+
+# The lookup of the organization id of every model, for updates made through querysets
+_ORGANIZATION_ID_LOOKUPS: dict[type[Model], str] = {
+    Workflow: "organization_id",
+    DataConditionGroup: "organization_id",
+    DataCondition: "condition_group__organization_id",
+    Detector: "project__organization_id",
+    DetectorWorkflow: "workflow__organization_id",
+    WorkflowDataConditionGroup: "workflow__organization_id",
+}
+
+
+def _invalidate_for_update(sender: type[Model], model_ids: list[int], **kwargs: object) -> None:
+    organization_ids = sender.objects.filter(id__in=model_ids).values_list(
+        _ORGANIZATION_ID_LOOKUPS[sender], flat=True
+    )
+    _schedule_invalidation(organization_ids, router.db_for_write(sender))
+
+
+for model, invalidate in (
+    (Workflow, _invalidate_for_workflow),
+    (DataConditionGroup, _invalidate_for_condition_group),
+    (DataCondition, _invalidate_for_condition),
+    (Detector, _invalidate_for_detector),
+    (DetectorWorkflow, _invalidate_for_detector_workflow),
+    (WorkflowDataConditionGroup, _invalidate_for_workflow_condition_group),
+):
+    post_save.connect(
+        invalidate,
+        sender=model,
+        weak=False,
+        dispatch_uid=f"workflow_engine_evaluation_plan_{model.__name__.lower()}",
+    )
+    post_delete.connect(
+        invalidate,
+        sender=model,
+        weak=False,
+        dispatch_uid=f"workflow_engine_evaluation_plan_{model.__name__.lower()}",
+    )
+    post_update.connect(
+        _invalidate_for_update,
+        sender=model,
+        weak=False,
+        dispatch_uid=f"workflow_engine_evaluation_plan_update_{model.__name__.lower()}",
+    )
@@ -1,15 +1,19 @@
 import logging
+from collections.abc import Callable
 from dataclasses import asdict, replace
 from enum import StrEnum
+from functools import partial
 
 import sentry_sdk
 from django.db import router, transaction
 from django.db.models import Q
 
-from sentry import buffer, features
+from sentry import buffer, features, options
 from sentry.db.models.manager.base_query_set import BaseQuerySet
 from sentry.eventstore.models import GroupEvent
 from sentry.models.environment import Environment
+from sentry.models.organization import Organization
+from sentry.models.project import Project
 from sentry.utils import json, metrics
 from sentry.workflow_engine.models import (
     Action,
@@ -22,6 +26,11 @@ from sentry.workflow_engine.models import (
 from sentry.workflow_engine.processors.action import filter_recently_fired_workflow_actions
 from sentry.workflow_engine.processors.data_condition_group import process_data_condition_group
 from sentry.workflow_engine.processors.detector import get_detector_by_event
+from sentry.workflow_engine.processors.evaluation_plan import (
+    ConditionResults,
+    EvaluationPlan,
+    get_evaluation_plan,
+)
 from sentry.workflow_engine.types import WorkflowEventData
 
 logger = logging.getLogger(__name__)
@@ -155,6 +164,71 @@ def log_fired_workflows(log_name: str, actions: list[Action], job: WorkflowEvent
         )
 
 
+def evaluate_workflow_triggers_from_plan(
+    plan: EvaluationPlan,
+    results: ConditionResults,
+    workflows: set[Workflow],
+    job: WorkflowEventData,
+) -> set[Workflow]:
+    triggered_workflows: set[Workflow] = set()
+
+    for workflow in workflows:
+        if workflow.when_condition_group_id is None:
+            triggered_workflows.add(workflow)
+            continue
+
+        workflow_job = replace(job, workflow_env=plan.get_environment(workflow))
+        evaluation, remaining_conditions = plan.evaluate_condition_group(
+            workflow.when_condition_group_id, workflow_job, results
+        )
+
+        if remaining_conditions:
+            enqueue_workflow(
+                workflow,
+                remaining_conditions,
+                job.event,
+                WorkflowDataConditionGroupType.WORKFLOW_TRIGGER,
+            )
+        else:
+            if evaluation:
+                triggered_workflows.add(workflow)
+
+    return triggered_workflows
+
+
+def evaluate_workflows_action_filters_from_plan(
+    plan: EvaluationPlan,
+    results: ConditionResults,
+    workflows: set[Workflow],
+    job: WorkflowEventData,
+) -> BaseQuerySet[Action]:
+    filtered_action_groups: set[DataConditionGroup] = set()
+
+    for workflow in workflows:
+        workflow_job = replace(job, workflow_env=plan.get_environment(workflow))
+
+        for condition_group_id in plan.workflows[workflow.id].action_filter_group_ids:
+            evaluation, remaining_conditions = plan.evaluate_condition_group(
+                condition_group_id, workflow_job, results
+            )
+
+            if remaining_conditions:
+                enqueue_workflow(
+                    workflow,
+                    remaining_conditions,
+                    job.event,
+                    WorkflowDataConditionGroupType.ACTION_FILTER,
+                )
+            else:
+                if evaluation:
+                    filtered_action_groups.add(DataConditionGroup(id=condition_group_id))
+
+    if not filtered_action_groups:
+        return Action.objects.none()
+
+    return filter_recently_fired_workflow_actions(filtered_action_groups, job.event.group)
+
+
 def process_workflows(job: WorkflowEventData) -> set[Workflow]:
     """
     This method will get the detector based on the event, and then gather the associated workflows.
@@ -162,7 +236,19 @@ def process_workflows(job: WorkflowEventData) -> set[Workflow]:
     the workflow will be added to a unique list of triggered workflows.
 
     Finally, each of the triggered workflows will have their actions evaluated and executed.
+
+    With `workflow_engine.evaluation-plan.enabled`, the detector, workflows and conditions are
+    taken from the cached evaluation plan of the project instead of the database.
     """
+    if options.get("workflow_engine.evaluation-plan.enabled"):
+        project = Project.objects.get_from_cache(id=job.event.project_id)
+        plan = get_evaluation_plan(project.id, project.organization_id)
+        plan_detector = plan.get_detector(job.event)
+        if plan_detector is not None:
+            return process_workflows_from_plan(job, plan, plan_detector)
+        # The detector of an occurrence might belong to another project
+        metrics.incr("workflow_engine.evaluation_plan.detector_not_found")
+
     # Check to see if the GroupEvent has an issue occurrence
     try:
         detector = get_detector_by_event(job)
@@ -190,6 +276,54 @@ def process_workflows(job: WorkflowEventData) -> set[Workflow]:
         ).distinct()
     )
 
+    return _process_workflows(
+        job,
+        detector,
+        organization,
+        environment,
+        workflows,
+        evaluate_workflow_triggers,
+        evaluate_workflows_action_filters,
+    )
+
+
+def process_workflows_from_plan(
+    job: WorkflowEventData, plan: EvaluationPlan, detector: Detector
+) -> set[Workflow]:
+    try:
+        environment = Environment.get_for_organization_id(
+            plan.organization_id, job.event.get_tag("environment")
+        )
+    except Environment.DoesNotExist:
+        metrics.incr("workflow_engine.process_workflows.error")
+        logger.exception("Missing environment for event", extra={"event_id": job.event.event_id})
+        return set()
+
+    organization = Organization.objects.get_from_cache(id=plan.organization_id)
+    workflows = plan.get_workflows(detector.id, environment.id)
+
+    # Conditions shared between workflows are only evaluated once per environment
+    results: ConditionResults = {}
+    return _process_workflows(
+        job,
+        detector,
+        organization,
+        environment,
+        workflows,
+        partial(evaluate_workflow_triggers_from_plan, plan, results),
+        partial(evaluate_workflows_action_filters_from_plan, plan, results),
+    )
+
+
+def _process_workflows(
+    job: WorkflowEventData,
+    detector: Detector,
+    organization: Organization,
+    environment: Environment,
+    workflows: set[Workflow],
+    evaluate_triggers: Callable[[set[Workflow], WorkflowEventData], set[Workflow]],
+    evaluate_action_filters: Callable[[set[Workflow], WorkflowEventData], BaseQuerySet[Action]],
+) -> set[Workflow]:
     if features.has(
         "organizations:workflow-engine-process-workflows-logs",
         organization,
@@ -213,7 +347,7 @@ def process_workflows(job: WorkflowEventData) -> set[Workflow]:
         )
 
     with sentry_sdk.start_span(op="workflow_engine.process_workflows.evaluate_workflow_triggers"):
-        triggered_workflows = evaluate_workflow_triggers(workflows, job)
+        triggered_workflows = evaluate_triggers(workflows, job)
 
         if triggered_workflows:
             metrics.incr(
@@ -225,7 +359,7 @@ def process_workflows(job: WorkflowEventData) -> set[Workflow]:
     with sentry_sdk.start_span(
         op="workflow_engine.process_workflows.evaluate_workflows_action_filters"
     ):
-        actions = evaluate_workflows_action_filters(triggered_workflows, job)
+        actions = evaluate_action_filters(triggered_workflows, job)
 
         if features.has(
             "organizations:workflow-engine-process-workflows",
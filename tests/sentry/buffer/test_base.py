@@ -4,7 +4,7 @@ from unittest import mock
 from django.utils import timezone
 from pytest import raises
 
-from sentry.buffer.base import Buffer, BufferField
+from sentry.buffer.base import Buffer, BufferField, BufferIncr
 from sentry.models.group import Group
 from sentry.models.organization import Organization
 from sentry.models.project import Project
@@ -78,6 +78,33 @@ class BufferTest(TestCase):
         group.refresh_from_db()
         assert group.times_seen == prev_times_seen
 
+    @mock.patch("sentry.buffer.base.buffer_incr_complete")
+    def test_process_many(self, buffer_incr_complete):
+        groups = [Group.objects.create(project=Project(id=1)) for _ in range(3)]
+        release_project_filters = {"project_id": self.project.id, "release_id": self.release.id}
+        the_date = timezone.now() + timedelta(days=5)
+
+        incrs = [
+            *(
+                BufferIncr(Group, {"times_seen": i + 1}, {"id": group.id}, {"last_seen": the_date})
+                for i, group in enumerate(groups)
+            ),
+            # The same row twice can't be written by a single statement
+            BufferIncr(Group, {"times_seen": 10}, {"pk": groups[0].id}),
+            # Doesn't exist anymore
+            BufferIncr(Group, {"times_seen": 1}, {"id": groups[-1].id + 1}),
+            # Has to be created
+            BufferIncr(ReleaseProject, {"new_groups": 1}, release_project_filters),
+        ]
+        self.buf.process_many(incrs)
+
+        for i, group in enumerate(groups):
+            group_ = Group.objects.get(id=group.id)
+            assert group_.times_seen == group.times_seen + i + 1 + (10 if i == 0 else 0)
+            assert group_.last_seen == the_date
+        assert ReleaseProject.objects.filter(new_groups=1, **release_project_filters).exists()
+        assert buffer_incr_complete.send_robust.call_count == len(incrs)
+
     def test_push_to_hash_bulk(self):
         raises(NotImplementedError, self.buf.push_to_hash_bulk, Group, {"id": 1}, {"foo": "bar"})
 
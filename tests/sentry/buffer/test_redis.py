@@ -7,6 +7,7 @@ from unittest import mock
 from unittest.mock import Mock
 
 import pytest
+from celery.signals import task_postrun
 from django.utils import timezone
 
 from sentry import options
@@ -14,6 +15,7 @@ from sentry.buffer.redis import (
     BufferHookEvent,
     RedisBuffer,
     _get_model_key,
+    _reset_coalesced_incrs_after_fork,
     redis_buffer_registry,
     redis_buffer_router,
 )
@@ -22,6 +24,7 @@ from sentry.models.project import Project
 from sentry.rules.processing.buffer_processing import process_buffer
 from sentry.rules.processing.processor import PROJECT_ID_BUFFER_LIST_KEY
 from sentry.testutils.helpers.datetime import freeze_time
+from sentry.testutils.helpers.options import override_options
 from sentry.testutils.pytest.fixtures import django_db_all
 from sentry.utils import json
 from sentry.utils.redis import get_cluster_routing_client
@@ -146,6 +149,71 @@ class TestRedisBuffer:
         group = Group.objects.get_from_cache(id=default_group.id)
         assert group.times_seen == orig_times_seen + times_seen_incr
 
+    def _get_pending_keys(self, key: str, pending_key: str) -> list[str]:
+        # Pending keys live on the same host as the key itself
+        pipe = self.buf.get_redis_connection(key, transaction=False)
+        pipe.zrange(pending_key, 0, -1)
+        return pipe.execute()[0]
+
+    @django_db_all
+    @freeze_time()
+    def test_process_pending_shard(self, default_group, task_runner):
+        orig_times_seen = Group.objects.get_from_cache(id=default_group.id).times_seen
+        now = timezone.now()
+        with override_options({"buffer.redis.process-pending.shards": 3}):
+            self.buf.incr(Group, {"times_seen": 2}, {"id": default_group.id}, {"last_seen": now})
+            self.buf.incr(Group, {"times_seen": 3}, {"id": default_group.id}, {"last_seen": now})
+            # Groups which were deleted in the meantime are skipped
+            self.buf.incr(
+                Group, {"times_seen": 1}, {"id": default_group.id + 1}, {"last_seen": now}
+            )
+
+        client = get_cluster_routing_client(self.buf.cluster, self.buf.is_redis_cluster)
+        key = self.buf._make_key(Group, {"id": default_group.id})
+        assert self._get_pending_keys(key, "b:p") == []
+        assert len(self._get_pending_keys(key, f"b:p:{self.buf._get_key_shard(key, 3)}")) == 1
+
+        # Shards which are not in use anymore are still drained
+        with (
+            override_options(
+                {
+                    "buffer.redis.process-pending.shards": 2,
+                    "buffer.redis.process-pending.batch-size": 1,
+                }
+            ),
+            task_runner(),
+            mock.patch("sentry.buffer.backend", self.buf),
+        ):
+            self.buf.process_pending()
+
+        group = Group.objects.get_from_cache(id=default_group.id)
+        assert group.times_seen == orig_times_seen + 5
+        assert group.last_seen == now
+
+        assert not any(self._get_pending_keys(key, f"b:p:{shard}") for shard in range(3))
+        assert not client.exists(key)
+
+    @django_db_all
+    def test_process_pending_shard_locked(self, default_group):
+        orig_times_seen = Group.objects.get_from_cache(id=default_group.id).times_seen
+        with override_options({"buffer.redis.process-pending.shards": 1}):
+            self.buf.incr(Group, {"times_seen": 2}, {"id": default_group.id})
+
+        # A `process_incr` task is still processing the key
+        client = get_cluster_routing_client(self.buf.cluster, self.buf.is_redis_cluster)
+        key = self.buf._make_key(Group, {"id": default_group.id})
+        lock_key = self.buf._lock_key(client, key, ex=10)
+        assert lock_key
+
+        self.buf.process_pending_shard(0)
+        assert Group.objects.get(id=default_group.id).times_seen == orig_times_seen
+        assert len(self._get_pending_keys(key, "b:p:0")) == 1
+
+        client.delete(lock_key)
+        self.buf.process_pending_shard(0)
+        assert Group.objects.get(id=default_group.id).times_seen == orig_times_seen + 2
+        assert not client.exists(self.buf._make_lock_key(key))
+
     def test_get(self):
         model = mock.Mock()
         model.__name__ = "Mock"
@@ -211,6 +279,102 @@ class TestRedisBuffer:
         else:
             assert pending == [key.encode("utf-8")]
 
+    def test_incr_coalesced(self):
+        client = get_cluster_routing_client(self.buf.cluster, self.buf.is_redis_cluster)
+        model = mock.Mock()
+        model.__name__ = "Mock"
+        filters = {"pk": 1}
+        key = self.buf._make_key(model, filters=filters)
+
+        with override_options(
+            {
+                "buffer.redis.coalesce-incr.max-events": 3,
+                "buffer.redis.coalesce-incr.max-delay": 60.0,
+            }
+        ):
+            self.buf.incr(model, {"times_seen": 1}, filters, extra={"foo": "bar"})
+            self.buf.incr(model, {"times_seen": 2}, filters, extra={"foo": "baz"})
+
+            # Nothing is written yet, but reads still see coalesced increments
+            assert not client.exists(key)
+            assert self.buf.get(model, ["times_seen"], filters=filters) == {"times_seen": 3}
+
+            self.buf.incr(model, {"times_seen": 4}, filters, signal_only=True)
+
+        result = _hgetall_decode_keys(client, key, self.buf.is_redis_cluster)
+        if self.buf.is_redis_cluster:
+            assert result["i+times_seen"] == "7"
+            assert self.buf._load_value(json.loads(result["e+foo"])) == "baz"
+            assert result["s"] == "1"
+        else:
+            assert result["i+times_seen"] == b"7"
+            assert pickle.loads(result["e+foo"]) == "baz"
+            assert result["s"] == b"1"
+
+    def test_flush_incrs(self):
+        model = mock.Mock()
+        model.__name__ = "Mock"
+        filters = {"pk": 1}
+
+        with override_options(
+            {
+                "buffer.redis.coalesce-incr.max-events": 100,
+                "buffer.redis.coalesce-incr.max-delay": 60.0,
+            }
+        ):
+            self.buf.incr(model, {"times_seen": 1}, filters)
+            self.buf.flush_incrs()
+
+        assert self.buf._coalesced_incrs == {}
+        assert self.buf._coalesce_timer is None
+        assert self.buf.get(model, ["times_seen"], filters=filters) == {"times_seen": 1}
+
+    def test_flush_incrs_after_task(self):
+        model = mock.Mock()
+        model.__name__ = "Mock"
+        filters = {"pk": 1}
+
+        with override_options(
+            {
+                "buffer.redis.coalesce-incr.max-events": 100,
+                "buffer.redis.coalesce-incr.max-delay": 60.0,
+            }
+        ):
+            self.buf.incr(model, {"times_seen": 1}, filters)
+            task_postrun.send(sender=None)
+
+        assert self.buf._coalesced_incrs == {}
+        assert self.buf.get(model, ["times_seen"], filters=filters) == {"times_seen": 1}
+
+    def test_reset_coalesced_incrs_after_fork(self):
+        model = mock.Mock()
+        model.__name__ = "Mock"
+        filters = {"pk": 1}
+
+        with override_options(
+            {
+                "buffer.redis.coalesce-incr.max-events": 100,
+                "buffer.redis.coalesce-incr.max-delay": 60.0,
+            }
+        ):
+            self.buf.incr(model, {"times_seen": 1}, filters)
+            timer = self.buf._coalesce_timer
+            assert timer is not None
+
+            # The child drops the parent's increments, and starts its own timer
+            _reset_coalesced_incrs_after_fork()
+            assert self.buf._coalesced_incrs == {}
+            assert self.buf._coalesce_timer is None
+
+            self.buf.incr(model, {"times_seen": 2}, filters)
+            assert self.buf._coalesce_timer is not None
+            assert self.buf._coalesce_timer is not timer
+
+            timer.cancel()
+            self.buf.flush_incrs()
+
+        assert self.buf.get(model, ["times_seen"], filters=filters) == {"times_seen": 2}
+
     def group_rule_data_by_project_id(self, buffer, project_ids):
         project_ids_to_rule_data = defaultdict(list)
         for proj_id in project_ids:
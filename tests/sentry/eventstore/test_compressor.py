@@ -1,6 +1,11 @@
 import copy
 
-from sentry.eventstore.compressor import assemble, deduplicate
+from sentry import nodestore
+from sentry.eventstore import compressor
+from sentry.eventstore.compressor import assemble, assemble_nodes, deduplicate, deduplicate_nodes
+from sentry.eventstore.models import Event
+from sentry.testutils.helpers import override_options
+from sentry.testutils.pytest.fixtures import django_db_all
 
 
 def _assert_roundtrip(data, assert_extra_keys=None):
@@ -52,3 +57,97 @@ def test_basic():
             }
         },
     )
+
+
+def test_interfaces():
+    _assert_roundtrip({"modules": {"b": "1.0", "a": "2.0"}})
+    _assert_roundtrip({"modules": None})
+    # Modules keep their order
+    new_data, extra_keys = deduplicate({"modules": {"b": "1.0", "a": "2.0"}})
+    assert list(assemble(new_data, lambda checksums: extra_keys)["modules"]) == ["b", "a"]
+    _assert_roundtrip(
+        {"sdk": {"name": "sentry.cocoa", "version": "8.0.0", "integrations": ["Crash"]}}
+    )
+    _assert_roundtrip({"contexts": {"device": {"model": "iPhone14,5", "battery_level": 42}}})
+    _assert_roundtrip({"contexts": {"os": {"name": "iOS"}}})
+
+    data = {"contexts": {"device": {"model": "iPhone14,5", "battery_level": 42}}}
+    new_data, extra_keys = deduplicate(data)
+    assert new_data["contexts"] == {}
+    assert list(extra_keys.values()) == [{"model": "iPhone14,5"}]
+    assert new_data["__nodestore_patchsets"] == [
+        ["contexts.device", next(iter(extra_keys)), {"battery_level": 42}]
+    ]
+    # The input is never modified
+    assert data == {"contexts": {"device": {"model": "iPhone14,5", "battery_level": 42}}}
+
+
+def test_deduplicate_and_assemble_nodes():
+    compressor._recently_written.clear()
+    storage = {}
+    writes = []
+
+    def set_multi(items):
+        writes.append(items)
+        storage.update(copy.deepcopy(items))
+
+    modules = {"foo": "1.0", "bar": "2.0"}
+    items = {
+        "node_1": {None: {"message": "a", "modules": modules}},
+        "node_2": {None: {"message": "b", "modules": modules}, "unprocessed": {}},
+    }
+
+    with override_options({"eventstore.compressor.refresh-interval": 60}):
+        deduplicate_nodes(items, set_multi)
+        # Already written by this process
+        deduplicate_nodes({"node_3": {None: {"modules": modules}}}, set_multi)
+    assert len(writes) == 1
+
+    with override_options({"eventstore.compressor.refresh-interval": 0}):
+        # Written again, so that the shared node doesn't expire before node_3
+        deduplicate_nodes({"node_3": {None: {"modules": modules}}}, set_multi)
+    assert len(writes) == 2
+    assert writes[0] == writes[1]
+    assert list(storage.values()) == [{"bar": "2.0", "foo": "1.0"}]
+    assert "modules" not in items["node_1"][None]
+    assert items["node_2"]["unprocessed"] == {}
+
+    nodes = {"node_1": items["node_1"][None], "node_2": items["node_2"][None], "node_3": None}
+    assemble_nodes(nodes, lambda ids: {id: copy.deepcopy(storage[id]) for id in ids})
+    assert nodes == {
+        "node_1": {"message": "a", "modules": modules},
+        "node_2": {"message": "b", "modules": modules},
+        "node_3": None,
+    }
+
+    # Shared nodes which have been cleaned up are left out
+    data, _ = deduplicate({"message": "c", "modules": modules})
+    nodes = {"node_4": data}
+    assemble_nodes(nodes, lambda ids: {})
+    assert nodes == {"node_4": {"message": "c"}}
+
+
+@django_db_all
+@override_options(
+    {
+        "eventstore.compressor.enabled": True,
+        "nodestore.set-subkeys.enable-set-cache-item": False,
+    }
+)
+def test_event_roundtrip(default_project):
+    data = {
+        "event_id": "a" * 32,
+        "modules": {"foo": "1.0"},
+        "sdk": {"name": "sentry.python", "version": "2.0.0", "integrations": ["django"]},
+    }
+    event = Event(project_id=default_project.id, event_id="a" * 32, data=data)
+    event.data.save()
+
+    node_id = Event.generate_node_id(default_project.id, "a" * 32)
+    stored = nodestore.backend.get_bytes(node_id)
+    assert stored is not None and b"modules" not in stored
+
+    # Renormalization fills in some defaults
+    expected = dict(event.data.items())
+    assert nodestore.backend.get(node_id) == expected
+    assert nodestore.backend.get_multi([node_id]) == {node_id: expected}
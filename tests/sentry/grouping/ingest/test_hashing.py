@@ -2,12 +2,23 @@ from __future__ import annotations
 
 from time import time
 from unittest.mock import MagicMock, patch
-
+from uuid import uuid4
+
+from sentry.event_manager import assign_event_to_group
+from sentry.eventstore.models import Event
+from sentry.grouping.api import (
+    GroupHashInfo,
+    get_grouping_config_dict_for_project,
+    load_grouping_config,
+)
 from sentry.grouping.ingest.hashing import (
     _calculate_event_grouping,
     _calculate_secondary_hashes,
     get_or_create_grouphashes,
+    get_or_create_grouphashes_many,
+    run_primary_grouping_many,
 )
+from sentry.grouping.ingest.utils import add_group_id_to_grouphashes
 from sentry.models.group import Group
 from sentry.models.grouphash import GroupHash
 from sentry.projectoptions.defaults import DEFAULT_GROUPING_CONFIG, LEGACY_GROUPING_CONFIG
@@ -195,3 +206,148 @@ class SecondaryGroupingTest(TestCase):
                 legacy_config_hash,
                 default_config_hash,
             }
+
+
+class BatchedGroupingTest(TestCase):
+    def test_get_or_create_grouphashes_many(self):
+        project = self.project
+        existing_event = save_new_event({"message": "Dogs are great!"}, project)
+        existing_hash = existing_event.get_primary_hash()
+
+        event1 = self.store_event(data={"message": "Dogs are great!"}, project_id=project.id)
+        event2 = self.store_event(data={"message": "Adopt, don't shop"}, project_id=project.id)
+
+        grouphashes1, grouphashes2 = get_or_create_grouphashes_many(
+            project,
+            [
+                (event1, {}, [existing_hash, "new_hash"]),
+                (event2, {}, ["new_hash"]),
+            ],
+            DEFAULT_GROUPING_CONFIG,
+        )
+
+        assert [grouphash.hash for grouphash in grouphashes1] == [existing_hash, "new_hash"]
+        assert [grouphash.hash for grouphash in grouphashes2] == ["new_hash"]
+        assert grouphashes1[0].group_id == existing_event.group_id
+        assert grouphashes1[1] is grouphashes2[0]
+        assert GroupHash.objects.filter(project=project, hash="new_hash").count() == 1
+
+    @patch("sentry.grouping.ingest.hashing.metrics.incr")
+    def test_get_or_create_grouphashes_many_counts_created_hashes(self, mock_metrics_incr):
+        project = self.project
+        existing_event = save_new_event({"message": "Dogs are great!"}, project)
+        event = self.store_event(data={"message": "Adopt, don't shop"}, project_id=project.id)
+        # Created by another process between the initial lookup and the insert
+        GroupHash.objects.create(project=project, hash="raced_hash")
+
+        with patch(
+            "sentry.grouping.ingest.hashing.GroupHash.objects.filter",
+            return_value=GroupHash.objects.filter(
+                project=project, hash=existing_event.get_primary_hash()
+            ),
+        ):
+            get_or_create_grouphashes_many(
+                project,
+                [(event, {}, [existing_event.get_primary_hash(), "raced_hash", "new_hash"])],
+                DEFAULT_GROUPING_CONFIG,
+            )
+
+        amounts = {
+            call.kwargs["tags"]["created"]: call.kwargs["amount"]
+            for call in mock_metrics_incr.call_args_list
+            if call.args[0] == "grouping.get_or_create_grouphashes_many.hashes"
+        }
+        assert amounts == {False: 2, True: 1}
+
+    def test_get_or_create_grouphashes_many_filters_new_secondary_hashes(self):
+        project = self.project
+        project.update_option("sentry:secondary_grouping_config", LEGACY_GROUPING_CONFIG)
+        event = self.store_event(data={"message": "Dogs are great!"}, project_id=project.id)
+
+        (grouphashes,) = get_or_create_grouphashes_many(
+            project, [(event, {}, ["new_legacy_hash_value"])], LEGACY_GROUPING_CONFIG
+        )
+
+        assert grouphashes == []
+        assert not GroupHash.objects.filter(project=project, hash="new_legacy_hash_value").exists()
+
+    def test_run_primary_grouping_many(self):
+        project = self.project
+        events = [
+            self.store_event(data={"message": message}, project_id=project.id)
+            for message in ("Dogs are great!", "Adopt, don't shop")
+        ]
+        jobs = [{"event": event, "data": {}} for event in events]
+
+        with patch(
+            "sentry.grouping.ingest.hashing.load_grouping_config", wraps=load_grouping_config
+        ) as load_grouping_config_spy:
+            results = run_primary_grouping_many(project, jobs, {})  # type: ignore[arg-type]
+
+        assert load_grouping_config_spy.call_count == 1
+        assert [hashes for _, hashes, _ in results] == [event.get_hashes() for event in events]
+        assert all(job["data"]["grouping_config"] == results[0][0] for job in jobs)
+
+    def test_add_group_id_updates_shared_grouphashes(self):
+        event = save_new_event({"message": "Dogs are great!"}, self.project)
+        grouphash = GroupHash.objects.create(project=self.project, hash="new_hash")
+        locked_grouphash = GroupHash.objects.create(
+            project=self.project, hash="locked_hash", state=GroupHash.State.LOCKED_IN_MIGRATION
+        )
+
+        add_group_id_to_grouphashes(event.group, [grouphash, locked_grouphash])
+
+        assert grouphash.group_id == event.group_id
+        assert locked_grouphash.group_id is None
+        grouphash.refresh_from_db()
+        assert grouphash.group_id == event.group_id
+
+    @override_options({"grouping.ingest.batch-primary-grouping.enabled": True})
+    @patch("sentry.event_manager.maybe_run_secondary_grouping")
+    def test_save_event_with_batched_grouping(self, mock_secondary_grouping: MagicMock):
+        mock_secondary_grouping.return_value = (None, [], {})
+
+        event1 = save_new_event({"message": "Dogs are great!"}, self.project)
+        event2 = save_new_event({"message": "Dogs are great!"}, self.project)
+
+        assert event1.group_id is not None
+        assert event2.group_id == event1.group_id
+        # The second event found the group through its primary hash
+        assert mock_secondary_grouping.call_count == 1
+        assert GroupHash.objects.get(hash=event1.get_primary_hash()).group_id == event1.group_id
+
+    @patch(
+        "sentry.event_manager._get_group_processing_kwargs",
+        return_value={"level": 10, "culprit": "", "data": {}},
+    )
+    @patch("sentry.event_manager.maybe_check_seer_for_matching_grouphash", return_value=None)
+    @patch("sentry.event_manager.maybe_run_secondary_grouping")
+    def test_batched_events_find_group_created_in_batch(
+        self,
+        mock_secondary_grouping: MagicMock,
+        mock_check_seer: MagicMock,
+        mock_get_group_processing_kwargs: MagicMock,
+    ):
+        mock_secondary_grouping.return_value = (None, [], {})
+        grouping_config = get_grouping_config_dict_for_project(self.project)
+        events = [Event(self.project.id, uuid4().hex, data={"timestamp": time()}) for _ in range(2)]
+        grouphashes_by_event = get_or_create_grouphashes_many(
+            self.project, [(event, {}, ["pound sign"]) for event in events], grouping_config["id"]
+        )
+
+        group_infos = [
+            assign_event_to_group(
+                event=event,
+                job={"event_metadata": {}, "release": None, "event": event, "data": {}},
+                metric_tags={},
+                primary=GroupHashInfo(grouping_config, {}, ["pound sign"], grouphashes, None),
+            )
+            for event, grouphashes in zip(events, grouphashes_by_event)
+        ]
+
+        assert [group_info.is_new for group_info in group_infos] == [True, False]
+        assert group_infos[0].group.id == group_infos[1].group.id
+        # The second event found the new group through the shared grouphash, without falling back
+        # to secondary grouping or Seer
+        assert mock_secondary_grouping.call_count == 1
+        assert mock_check_seer.call_count == 1
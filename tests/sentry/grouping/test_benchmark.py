@@ -1,11 +1,38 @@
+from typing import Any
+
 import pytest
 
+from sentry.grouping.parameterization import PARAMETERIZATION_CACHE
 from sentry.grouping.strategies.configurations import CONFIGURATIONS
+from sentry.grouping.strategies.message import normalize_message_for_grouping
+from sentry.utils.safe import get_path
 from tests.sentry.grouping import GROUPING_INPUTS_DIR, GroupingInput, get_grouping_inputs
 
 GROUPING_INPUTS = get_grouping_inputs(GROUPING_INPUTS_DIR)
 
 
+def get_message_corpus(grouping_inputs: list[GroupingInput]) -> list[str]:
+    """Collect the log messages and exception values from the grouping inputs."""
+    messages = []
+    for grouping_input in grouping_inputs:
+        data: dict[str, Any] = grouping_input.data
+        candidates = [
+            get_path(data, "logentry", "formatted"),
+            get_path(data, "logentry", "message"),
+            data.get("message") if isinstance(data.get("message"), str) else None,
+            *(
+                exception.get("value")
+                for exception in get_path(data, "exception", "values", filter=True) or []
+                if isinstance(exception, dict)
+            ),
+        ]
+        messages.extend(m for m in candidates if isinstance(m, str) and m)
+    return messages
+
+
+MESSAGE_CORPUS = get_message_corpus(GROUPING_INPUTS)
+
+
 def benchmark_available() -> bool:
     try:
         __import__("pytest_benchmark")
@@ -37,3 +64,28 @@ def run_configuration(grouping_input: GroupingInput, config_name: str) -> None:
     event.project = None  # type: ignore[assignment]
 
     event.get_hashes()
+
+
+class _FakeEvent:
+    # One of the internal projects, so the parameterization experiments run as well
+    project_id = 1
+    event_id = "00000000000000000000000000000000"
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize("warm_cache", [False, True], ids=["cold_cache", "warm_cache"])
+def test_benchmark_parameterization(warm_cache, benchmark):
+    event = _FakeEvent()
+
+    def setup():
+        PARAMETERIZATION_CACHE.clear()
+        if warm_cache:
+            run_parameterization(event)
+        return (event,), {}
+
+    benchmark.pedantic(run_parameterization, setup=setup, rounds=20)
+
+
+def run_parameterization(event: Any) -> None:
+    for message in MESSAGE_CORPUS:
+        normalize_message_for_grouping(message, event, share_analytics=False)
@@ -10,7 +10,9 @@ from sentry.grouping.component import (
     StacktraceGroupingComponent,
     ThreadsGroupingComponent,
 )
+from sentry.grouping.strategies.newstyle import FRAME_COMPONENT_CACHE
 from sentry.testutils.cases import TestCase
+from sentry.testutils.helpers.options import override_options
 
 
 def find_given_child_component[
@@ -104,6 +106,32 @@ class ComponentTest(TestCase):
 
             assert [frame_component.in_app for frame_component in frame_components] == [False, True]
 
+    def test_frame_component_cache_does_not_change_results(self):
+        self.event.data["exception"]["values"][0]["stacktrace"] = {
+            "frames": [
+                self.contributing_system_frame,
+                # Repeated frames are marked as recursive, which must not leak into the cache
+                self.contributing_in_app_frame,
+                self.contributing_in_app_frame,
+                self.non_contributing_in_app_frame,
+            ]
+        }
+        FRAME_COMPONENT_CACHE.clear()
+
+        uncached_variants = self.event.get_grouping_variants(normalize_stacktraces=True)
+        with override_options({"grouping.frame_component_cache.enabled": True}):
+            # Run twice, so the second run is served from the cache
+            for _ in range(2):
+                cached_variants = self.event.get_grouping_variants(normalize_stacktraces=True)
+
+                assert {
+                    name: variant.component.as_dict() for name, variant in cached_variants.items()
+                } == {
+                    name: variant.component.as_dict() for name, variant in uncached_variants.items()
+                }
+
+        assert len(FRAME_COMPONENT_CACHE) == 3
+
     def test_stacktrace_component_tallies_frame_types_simple(self):
         self.event.data["exception"]["values"][0]["stacktrace"] = {
             "frames": (
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import copy
 from collections.abc import Sequence
 from dataclasses import dataclass
 from typing import Any
@@ -9,6 +10,7 @@ import pytest
 
 from sentry.grouping.component import FrameGroupingComponent, StacktraceGroupingComponent
 from sentry.grouping.enhancer import (
+    ENHANCEMENT_BASES,
     Enhancements,
     is_valid_profiling_action,
     is_valid_profiling_matcher,
@@ -18,6 +20,7 @@ from sentry.grouping.enhancer.exceptions import InvalidEnhancerConfig
 from sentry.grouping.enhancer.matchers import ReturnValueCache, _cached, create_match_frame
 from sentry.grouping.enhancer.parser import parse_enhancements
 from sentry.testutils.cases import TestCase
+from sentry.testutils.helpers.options import override_options
 
 
 def dump_obj(obj):
@@ -498,6 +501,57 @@ def test_app_no_matches(frame):
     assert frame.get("in_app")
 
 
+@pytest.mark.parametrize("platform", ["python", "javascript"])
+@pytest.mark.parametrize("exception_data", [{}, {"type": "ZeroDivisionError"}])
+def test_compiled_rules_match_rust_enhancer(platform, exception_data):
+    enhancement = Enhancements.from_config_string(
+        """
+        function:foo                                     +app
+        !function:foo                                    -app
+        function:bar | [ function:baz ]                 -group
+        [ function:foo ] | function:*                    category=foo
+        category:foo                                     ^+app
+        path:**/test.js family:javascript                +app
+        module:io.sentry.* error.type:ZeroDivisionError  -app
+        app:no function:baz                              category=bar
+        """
+    )
+    frames = [
+        {"function": "main"},
+        {"function": "foo", "module": "io.sentry.core"},
+        {"function": "bar", "abs_path": "http://example.com/foo/TEST.js"},
+        {"function": "baz"},
+        {"function": "foo", "abs_path": "/foo/test.js"},
+    ]
+
+    expected = copy.deepcopy(frames)
+    enhancement.apply_category_and_updated_in_app_to_frames(expected, platform, exception_data)
+
+    with override_options({"grouping.enhancer.compiled-rules.enabled": True}):
+        # The second run is served from the frame cache
+        for _ in range(2):
+            compiled_frames = copy.deepcopy(frames)
+            enhancement.apply_category_and_updated_in_app_to_frames(
+                compiled_frames, platform, exception_data
+            )
+            assert compiled_frames == expected
+
+
+def test_compiled_rules_include_bases():
+    enhancement = Enhancements.from_config_string(
+        "function:my_function +app", bases=["newstyle:2023-01-11"]
+    )
+    base = ENHANCEMENT_BASES["newstyle:2023-01-11"]
+
+    assert enhancement.compiled_rules.rules == [*base.rules, *enhancement.rules]
+
+    frames = [{"function": "my_function", "in_app": False}]
+    with override_options({"grouping.enhancer.compiled-rules.enabled": True}):
+        enhancement.apply_category_and_updated_in_app_to_frames(frames, "python", {})
+    assert frames[0]["in_app"] is True
+    assert frames[0]["data"]["orig_in_app"] == 0
+
+
 def test_cached_with_kwargs():
     """Order of kwargs should not matter"""
 
@@ -3,12 +3,20 @@ from unittest import mock
 import pytest
 
 from sentry.grouping.parameterization import (
+    PARAMETERIZATION_CACHE,
     ParameterizationRegexExperiment,
     Parameterizer,
     UniqueIdExperiment,
 )
 
 
+@pytest.fixture(autouse=True)
+def clear_parameterization_cache():
+    # Experiments in these tests reuse names with different patterns, which never happens outside
+    # of tests, so make sure results don't leak between them
+    PARAMETERIZATION_CACHE.clear()
+
+
 @pytest.fixture
 def parameterizer():
     return Parameterizer(
@@ -268,6 +276,33 @@ def test_parameterize_regex_experiment_cached_compiled():
     mocked_pattern.assert_called_once()
 
 
+def test_parameterize_all_cached_results_update_matches_counter(parameterizer):
+    input_str = "blah 0x40000015 fbtrace_id Aba64NMEPMmBwi_cPLaGeeK AugPfq0jxGbto4u3kxn8u6p blah"
+    expected = "blah <hex> fbtrace_id <uniq_id> <uniq_id> blah"
+
+    assert parameterizer.parameterize_all(input_str) == expected
+    uncached_counter = dict(parameterizer.matches_counter)
+    assert uncached_counter == {"hex": 1, "uniq_id": 2}
+
+    second_parameterizer = Parameterizer(
+        regex_pattern_keys=parameterizer._regex_pattern_keys,
+        experiments=(UniqueIdExperiment,),
+    )
+    with mock.patch.object(Parameterizer, "_parameterize_all") as mock_parameterize_all:
+        assert second_parameterizer.parameterize_all(input_str) == expected
+
+    mock_parameterize_all.assert_not_called()
+    assert dict(second_parameterizer.matches_counter) == uncached_counter
+    assert second_parameterizer.get_successful_experiments() == [UniqueIdExperiment]
+
+
+def test_parameterize_all_caches_per_experiment_set(parameterizer):
+    input_str = "fbtrace_id Aba64NMEPMmBwi_cPLaGeeK AugPfq0jxGbto4u3kxn8u6p blah"
+
+    assert parameterizer.parameterize_all(input_str, lambda _: False) == input_str
+    assert parameterizer.parameterize_all(input_str) == "fbtrace_id <uniq_id> <uniq_id> blah"
+
+
 # These are test cases that we should fix
 @pytest.mark.xfail()
 @pytest.mark.parametrize(
@@ -1,5 +1,7 @@
+import threading
 from collections.abc import Generator, Iterator
 from random import Random
+from unittest import mock
 
 from django.core.cache import cache
 
@@ -10,7 +12,12 @@ from sentry.hybridcloud.rpc.caching import (
     control_caching_service,
     region_caching_service,
 )
-from sentry.hybridcloud.rpc.caching.impl import CacheBackend, _consume_generator
+from sentry.hybridcloud.rpc.caching.impl import (
+    CacheBackend,
+    LocalCache,
+    _consume_generator,
+    local_cache,
+)
 from sentry.organizations.services.organization.model import (
     RpcOrganizationMember,
     RpcOrganizationSummary,
@@ -18,6 +25,7 @@ from sentry.organizations.services.organization.model import (
 from sentry.organizations.services.organization.service import organization_service
 from sentry.silo.base import SiloMode
 from sentry.testutils.factories import Factories
+from sentry.testutils.helpers import override_options
 from sentry.testutils.pytest.fixtures import django_db_all
 from sentry.testutils.silo import assume_test_silo_mode, control_silo_test, no_silo_test
 from sentry.types.region import get_local_region
@@ -327,3 +335,92 @@ def test_caching_list() -> None:
 
     cached_members = get_org_members(org.id)
     assert len(cached_members) == 0, "with members updated none are owners"
+
+
+@django_db_all(transaction=True)
+def test_caching_function_local_cache() -> None:
+    cache.clear()
+    local_cache.clear()
+
+    @back_with_silo_cache(
+        base_key="my-test-key", silo_mode=SiloMode.REGION, t=RpcUser, local_timeout=60
+    )
+    def get_user(user_id: int) -> RpcUser:
+        return user_service.get_many(filter=dict(user_ids=[user_id]))[0]
+
+    user = Factories.create_user()
+    key = get_user.key_from(user.id)
+
+    with override_options({"hybridcloud.caching.local-cache.enabled": True}):
+        cached_user = get_user(user.id)
+        assert cached_user
+        assert local_cache.get(key, 0) is not None
+
+        with assume_test_silo_mode(SiloMode.CONTROL):
+            user.update(username=user.username + "moocow")
+
+        # Served from the local cache, without reading Redis
+        with mock.patch("sentry.hybridcloud.rpc.caching.impl._get_cache") as mock_get_cache:
+            assert get_user(user.id) == cached_user
+        assert not mock_get_cache.called
+
+        region_caching_service.clear_key(region_name=get_local_region().name, key=key)
+        assert local_cache.get(key, 0) is None
+
+        next_user = get_user(user.id)
+        assert next_user
+        assert next_user.username == user.username
+
+        # Cleared by another process, which doesn't evict the key from the local cache here
+        with assume_test_silo_mode(SiloMode.CONTROL):
+            user.update(username=user.username + "moocow")
+        with mock.patch("sentry.hybridcloud.rpc.caching.impl.local_cache.invalidate"):
+            region_caching_service.clear_key(region_name=get_local_region().name, key=key)
+
+        next_user = get_user(user.id)
+        assert next_user
+        assert next_user.username == user.username
+
+
+def test_local_cache_versions() -> None:
+    local = LocalCache(10)
+
+    local.set("key", "a", 1, 60)
+    assert local.get("key", 1) == "a"
+    # The key was cleared by another process
+    assert local.get("key", 2) is None
+
+    local.invalidate("key", 2)
+    assert local.get("key", 1) is None
+
+    # Read before the key was cleared
+    local.set("key", "a", 1, 60)
+    assert local.get("key", 1) is None
+
+    local.set("key", "b", 2, 60)
+    assert local.get("key", 2) == "b"
+
+    local.set("key", "c", 2, 0)
+    assert local.get("key", 2) is None
+
+
+def test_local_cache_single_flight() -> None:
+    local = LocalCache(10)
+    waited: list[bool] = []
+
+    def follower() -> None:
+        with local.single_flight("key") as follower_waited:
+            waited.append(follower_waited)
+            assert local.get("key", 0) == "a"
+
+    with local.single_flight("key") as leader_waited:
+        assert not leader_waited
+        thread = threading.Thread(target=follower)
+        thread.start()
+        thread.join(0.1)
+        assert thread.is_alive()
+        assert not waited
+        local.set("key", "a", 0, 60)
+
+    thread.join()
+    assert waited == [True]
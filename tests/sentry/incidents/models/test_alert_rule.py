@@ -32,6 +32,34 @@ class IncidentGetForSubscriptionTest(TestCase):
         assert AlertRule.objects.get_for_subscription(subscription) == alert_rule
 
 
+class AlertRuleGetForSubscriptionsTest(TestCase):
+    def test(self):
+        alert_rule = self.create_alert_rule()
+        other_alert_rule = self.create_alert_rule()
+        subscription = alert_rule.snuba_query.subscriptions.get()
+        other_subscription = other_alert_rule.snuba_query.subscriptions.get()
+        # Caches the first alert rule only
+        AlertRule.objects.get_for_subscription(subscription)
+
+        expected = {subscription.id: alert_rule, other_subscription.id: other_alert_rule}
+        with self.assertNumQueries(1):
+            assert (
+                AlertRule.objects.get_for_subscriptions([subscription, other_subscription])
+                == expected
+            )
+        with self.assertNumQueries(0):
+            assert (
+                AlertRule.objects.get_for_subscriptions([subscription, other_subscription])
+                == expected
+            )
+
+    def test_deleted_alert_rule(self):
+        alert_rule = self.create_alert_rule()
+        subscription = alert_rule.snuba_query.subscriptions.get()
+        alert_rule.update(status=AlertRuleStatus.SNAPSHOT.value)
+        assert AlertRule.objects.get_for_subscriptions([subscription]) == {}
+
+
 class IncidentClearSubscriptionCacheTest(TestCase):
     def setUp(self):
         self.alert_rule = self.create_alert_rule()
@@ -118,6 +146,27 @@ class AlertRuleTriggerClearCacheTest(TestCase):
         ) is None
 
 
+class AlertRuleTriggerGetForAlertRulesTest(TestCase):
+    def test(self):
+        alert_rule = self.create_alert_rule()
+        trigger = self.create_alert_rule_trigger(alert_rule)
+        other_alert_rule = self.create_alert_rule()
+        # Caches the first alert rule only
+        AlertRuleTrigger.objects.get_for_alert_rule(alert_rule)
+
+        expected = {alert_rule.id: [trigger], other_alert_rule.id: []}
+        with self.assertNumQueries(1):
+            assert (
+                AlertRuleTrigger.objects.get_for_alert_rules([alert_rule, other_alert_rule])
+                == expected
+            )
+        with self.assertNumQueries(0):
+            assert (
+                AlertRuleTrigger.objects.get_for_alert_rules([alert_rule, other_alert_rule])
+                == expected
+            )
+
+
 class IncidentAlertRuleRelationTest(TestCase):
     def test(self):
         self.alert_rule = self.create_alert_rule()
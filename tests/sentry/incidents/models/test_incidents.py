@@ -14,6 +14,7 @@ from sentry.incidents.models.incident import (
     IncidentType,
     TriggerStatus,
 )
+from sentry.models.project import Project
 from sentry.testutils.cases import TestCase
 from sentry.testutils.helpers.datetime import freeze_time
 
@@ -149,6 +150,45 @@ class ActiveIncidentClearCacheTest(TestCase):
         )
 
 
+class GetActiveIncidentsTest(TestCase):
+    def test(self):
+        alert_rule = self.create_alert_rule()
+        subscription = alert_rule.snuba_query.subscriptions.get()
+        other_project = self.create_project()
+        incident = self.create_incident(
+            alert_rule=alert_rule, projects=[self.project], subscription=subscription
+        )
+        self.create_incident(
+            alert_rule=alert_rule,
+            projects=[other_project],
+            status=IncidentStatus.CLOSED.value,
+        )
+        # Older than `incident`, so it's never the active one
+        self.create_incident(
+            alert_rule=alert_rule,
+            projects=[self.project],
+            subscription=subscription,
+            date_started=timezone.now() - timedelta(days=1),
+        ).update(date_added=timezone.now() - timedelta(days=1))
+
+        keys = [
+            (alert_rule.id, self.project.id, subscription.id),
+            (alert_rule.id, self.project.id, None),
+            (alert_rule.id, other_project.id, None),
+        ]
+        expected = {keys[0]: incident, keys[1]: None, keys[2]: None}
+        with self.assertNumQueries(1):
+            assert Incident.objects.get_active_incidents(keys) == expected
+        with self.assertNumQueries(0):
+            assert Incident.objects.get_active_incidents(keys) == expected
+
+        # Shares the cache with `get_active_incident`
+        for (_, project_id, subscription_id), active_incident in expected.items():
+            project = Project(id=project_id)
+            sub = subscription if subscription_id else None
+            assert Incident.objects.get_active_incident(alert_rule, project, sub) == active_incident
+
+
 class IncidentTriggerClearCacheTest(TestCase):
     def setUp(self):
         self.alert_rule = self.create_alert_rule()
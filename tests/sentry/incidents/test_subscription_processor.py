@@ -46,9 +46,12 @@ from sentry.incidents.subscription_processor import (
     build_alert_rule_trigger_stat_key,
     build_trigger_stat_keys,
     get_alert_rule_stats,
+    get_alert_rule_stats_many,
     get_redis_client,
     partition,
+    process_updates,
     update_alert_rule_stats,
+    update_alert_rule_stats_many,
 )
 from sentry.incidents.utils.types import DATA_SOURCE_SNUBA_QUERY_SUBSCRIPTION
 from sentry.issues.grouptype import MetricIssuePOC
@@ -71,6 +74,7 @@ from sentry.testutils.helpers.datetime import freeze_time
 from sentry.testutils.helpers.features import with_feature
 from sentry.types.group import PriorityLevel
 from sentry.utils import json
+from sentry.utils.dates import to_datetime
 
 EMPTY = object()
 
@@ -1130,6 +1134,114 @@ class ProcessUpdateTest(ProcessUpdateBaseClass):
             ],
         )
 
+    def send_updates(self, updates):
+        self.email_action_handler.reset_mock()
+        with (
+            self.feature(["organizations:incidents", "organizations:performance-view"]),
+            self.capture_on_commit_callbacks(execute=True),
+        ):
+            process_updates(updates)
+
+    def test_process_updates(self):
+        # Verify that a batch of updates is processed as if the updates were sent one by one
+        rule = self.rule
+        trigger = self.trigger
+        rule.update(threshold_period=2)
+        value = trigger.alert_threshold + 1
+        self.send_updates(
+            [
+                (self.build_subscription_update(self.sub, timedelta(minutes=-2), value), self.sub),
+                (
+                    self.build_subscription_update(self.other_sub, timedelta(minutes=-2), value),
+                    self.other_sub,
+                ),
+                (self.build_subscription_update(self.sub, timedelta(minutes=-1), value), self.sub),
+                # Already processed, and so skipped
+                (self.build_subscription_update(self.sub, timedelta(minutes=-2), value), self.sub),
+            ]
+        )
+
+        incident = self.assert_active_incident(rule, self.sub)
+        self.assert_trigger_exists_with_status(incident, self.trigger, TriggerStatus.ACTIVE)
+        self.assert_actions_fired_for_incident(
+            incident,
+            [self.action],
+            [
+                {
+                    "action": self.action,
+                    "incident": incident,
+                    "project": self.project,
+                    "new_status": IncidentStatus.CRITICAL,
+                    "metric_value": value,
+                    "notification_uuid": mock.ANY,
+                }
+            ],
+        )
+        self.assert_no_active_incident(rule, self.other_sub)
+
+        last_update, alert_counts, _ = get_alert_rule_stats(rule, self.sub, [trigger])
+        assert last_update == timezone.now().replace(microsecond=0) - timedelta(minutes=1)
+        assert alert_counts == {trigger.id: 0}
+        last_update, alert_counts, _ = get_alert_rule_stats(rule, self.other_sub, [trigger])
+        assert last_update == timezone.now().replace(microsecond=0) - timedelta(minutes=2)
+        assert alert_counts == {trigger.id: 1}
+
+    def test_process_updates_failed_update(self):
+        # Verify that a failing update doesn't affect the stats of the other updates
+        rule = self.rule
+        trigger = self.trigger
+        rule.update(threshold_period=3)
+        value = trigger.alert_threshold + 1
+        updates = [
+            (self.build_subscription_update(self.sub, timedelta(minutes=-3), value), self.sub),
+            (self.build_subscription_update(self.sub, timedelta(minutes=-2), value), self.sub),
+            (self.build_subscription_update(self.sub, timedelta(minutes=-1), value), self.sub),
+        ]
+        orig_process_update = SubscriptionProcessor.process_update
+
+        def process_update(processor, subscription_update):
+            orig_process_update(processor, subscription_update)
+            if subscription_update is updates[1][0]:
+                raise Exception("boom")
+
+        with mock.patch.object(SubscriptionProcessor, "process_update", process_update):
+            self.send_updates(updates)
+
+        self.assert_no_active_incident(rule, self.sub)
+        last_update, alert_counts, _ = get_alert_rule_stats(rule, self.sub, [trigger])
+        assert last_update == timezone.now().replace(microsecond=0) - timedelta(minutes=1)
+        assert alert_counts == {trigger.id: 2}
+
+    def test_process_updates_fired_actions_stats(self):
+        # Verify that stats are written right away once an update fires trigger actions
+        rule = self.rule
+        trigger = self.trigger
+        value = trigger.alert_threshold + 1
+        first_update = self.build_subscription_update(self.sub, timedelta(minutes=-2), value)
+        with mock.patch(
+            "sentry.incidents.subscription_processor.update_alert_rule_stats",
+            wraps=update_alert_rule_stats,
+        ) as mock_update_alert_rule_stats:
+            self.send_updates(
+                [
+                    (first_update, self.sub),
+                    (
+                        self.build_subscription_update(self.sub, timedelta(minutes=-1), value),
+                        self.sub,
+                    ),
+                ]
+            )
+
+        assert mock_update_alert_rule_stats.call_count == 1
+        assert mock_update_alert_rule_stats.call_args[0][:3] == (
+            rule,
+            self.sub,
+            first_update["timestamp"],
+        )
+        self.assert_active_incident(rule, self.sub)
+        last_update, _, _ = get_alert_rule_stats(rule, self.sub, [trigger])
+        assert last_update == timezone.now().replace(microsecond=0) - timedelta(minutes=1)
+
     def test_alert_multiple_triggers_non_consecutive(self):
         # Verify that a rule that expects two consecutive updates to be over the
         # alert threshold doesn't trigger if there are two updates that are above with
@@ -4749,3 +4861,36 @@ class TestUpdateAlertRuleStats(TestCase):
         ]
 
         assert results == [int(date.timestamp()), 20, 10, 3, 15]
+
+
+class TestGetAlertRuleStatsMany(TestCase):
+    def test(self):
+        alert_rule = AlertRule(id=1)
+        sub = QuerySubscription(project_id=2)
+        other_sub = QuerySubscription(project_id=3)
+        triggers = [AlertRuleTrigger(id=4)]
+        timestamp = timezone.now().replace(microsecond=0)
+        update_alert_rule_stats(alert_rule, sub, timestamp, {4: 1}, {4: 2})
+
+        assert get_alert_rule_stats_many(
+            [(alert_rule, sub, triggers), (alert_rule, other_sub, triggers)]
+        ) == [(timestamp, {4: 1}, {4: 2}), (to_datetime(0), {4: 0}, {4: 0})]
+        assert get_alert_rule_stats_many([]) == []
+
+
+class TestUpdateAlertRuleStatsMany(TestCase):
+    def test(self):
+        alert_rule = AlertRule(id=1)
+        sub = QuerySubscription(project_id=2)
+        other_sub = QuerySubscription(project_id=3)
+        triggers = [AlertRuleTrigger(id=4)]
+        timestamp = timezone.now().replace(microsecond=0)
+        update_alert_rule_stats_many(
+            [
+                (alert_rule, sub, timestamp, {4: 1}, {}),
+                (alert_rule, other_sub, timestamp, {}, {4: 2}),
+            ]
+        )
+
+        assert get_alert_rule_stats(alert_rule, sub, triggers) == (timestamp, {4: 1}, {4: 0})
+        assert get_alert_rule_stats(alert_rule, other_sub, triggers) == (timestamp, {4: 0}, {4: 2})
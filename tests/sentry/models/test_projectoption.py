@@ -1,5 +1,6 @@
 from sentry.models.options.project_option import ProjectOption
 from sentry.testutils.cases import TestCase
+from sentry.utils.cache import cache
 
 
 class ProjectOptionManagerTest(TestCase):
@@ -28,3 +29,22 @@ class ProjectOptionManagerTest(TestCase):
         ProjectOption.objects.create(project=self.project, key="foo", value="bar")
         result = ProjectOption.objects.get_value_bulk([self.project], "foo")
         assert result == {self.project: "bar"}
+
+    def test_prefetch_all_values(self):
+        other_project = self.create_project()
+        ProjectOption.objects.create(project=self.project, key="foo", value="bar")
+        ProjectOption.objects.clear_local_cache()
+        cache.delete(ProjectOption.objects._make_key(self.project.id))
+
+        with self.assertNumQueries(1):
+            ProjectOption.objects.prefetch_all_values([self.project.id, other_project.id])
+
+        with self.assertNumQueries(0):
+            assert ProjectOption.objects.get_all_values(self.project) == {"foo": "bar"}
+            assert ProjectOption.objects.get_all_values(other_project) == {}
+
+        # Served from the shared cache once the local cache is gone
+        ProjectOption.objects.clear_local_cache()
+        with self.assertNumQueries(0):
+            ProjectOption.objects.prefetch_all_values([self.project.id, other_project.id])
+        assert ProjectOption.objects.get_all_values(self.project) == {"foo": "bar"}
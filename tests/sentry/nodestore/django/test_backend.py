@@ -6,7 +6,7 @@ import pytest
 from django.utils import timezone
 
 from sentry.nodestore.base import json_dumps
-from sentry.nodestore.django.backend import DjangoNodeStorage
+from sentry.nodestore.django.backend import ZSTD_MARKER, DjangoNodeStorage
 from sentry.nodestore.django.models import Node
 from sentry.testutils.pytest.fixtures import django_db_all
 from sentry.utils.strings import compress
@@ -52,6 +52,44 @@ class TestDjangoNodeStorage:
             b'{"foo":"bar"}'
         )
 
+    def test_set_zstd(self):
+        ns = DjangoNodeStorage(compression="zstd")
+        ns.set("d2502ebbd7df41ceba8d3275595cac33", {"foo": "bar"})
+
+        data = Node.objects.get(id="d2502ebbd7df41ceba8d3275595cac33").data
+        assert data.startswith(ZSTD_MARKER)
+        assert ns.get("d2502ebbd7df41ceba8d3275595cac33") == {"foo": "bar"}
+        # Switching codecs back keeps zstd rows readable, and vice versa
+        assert self.ns.get("d2502ebbd7df41ceba8d3275595cac33") == {"foo": "bar"}
+
+        Node.objects.create(id="d2502ebbd7df41ceba8d3275595cac34", data=compress(b'{"foo": "baz"}'))
+        assert ns.get_multi(
+            ["d2502ebbd7df41ceba8d3275595cac33", "d2502ebbd7df41ceba8d3275595cac34"]
+        ) == {
+            "d2502ebbd7df41ceba8d3275595cac33": {"foo": "bar"},
+            "d2502ebbd7df41ceba8d3275595cac34": {"foo": "baz"},
+        }
+
+    def test_set_bytes_multi(self):
+        Node.objects.create(id="d2502ebbd7df41ceba8d3275595cac33", data=compress(b'{"foo": "old"}'))
+        ns = DjangoNodeStorage(batch_size=1)
+
+        with mock.patch("sentry.nodestore.django.backend.create_or_update") as mock_create:
+            ns.set_bytes_multi(
+                {
+                    "d2502ebbd7df41ceba8d3275595cac33": b'{"foo":"bar"}',
+                    "d2502ebbd7df41ceba8d3275595cac34": b'{"foo":"baz"}',
+                }
+            )
+            assert mock_create.call_count == 0
+
+        assert Node.objects.get(id="d2502ebbd7df41ceba8d3275595cac33").data == compress(
+            b'{"foo":"bar"}'
+        )
+        assert Node.objects.get(id="d2502ebbd7df41ceba8d3275595cac34").data == compress(
+            b'{"foo":"baz"}'
+        )
+
     def test_delete(self):
         node = Node.objects.create(id="d2502ebbd7df41ceba8d3275595cac33", data='{"foo": "bar"}')
 
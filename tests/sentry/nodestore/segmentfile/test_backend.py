@@ -0,0 +1,91 @@
+import os
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.utils import timezone
+
+from sentry.nodestore.segmentfile.backend import SegmentFileNodeStorage
+from sentry.testutils.helpers.datetime import freeze_time
+
+
+class TestSegmentFileNodeStorage:
+    @pytest.fixture(autouse=True)
+    def setup_ns(self, tmp_path):
+        self.ns = SegmentFileNodeStorage(path=str(tmp_path), max_segment_size=64)
+        self.ns.bootstrap()
+
+    def segments(self):
+        return sorted(os.listdir(self.ns.segments_path))
+
+    def test_get_multi_across_segments(self):
+        nodes = {f"node_{i}": {"foo": "x" * i} for i in range(10)}
+        for id, data in nodes.items():
+            self.ns.set(id, data)
+
+        # Segments are rotated once they reach `max_segment_size`
+        assert len(self.segments()) > 1
+        assert self.ns.get_multi([*nodes, "missing"]) == {**nodes, "missing": None}
+
+    def test_overwrite(self):
+        self.ns.set("node_1", {"foo": "a"})
+        self.ns.set("node_1", {"foo": "b"})
+        assert self.ns.get("node_1") == {"foo": "b"}
+        assert self.ns.get_multi(["node_1"]) == {"node_1": {"foo": "b"}}
+
+    def test_ttl(self):
+        self.ns.set("node_1", {"foo": "a"}, ttl=timedelta(minutes=1))
+        assert self.ns.get("node_1") == {"foo": "a"}
+
+        with freeze_time(timezone.now() + timedelta(minutes=2)):
+            assert self.ns.get("node_1") is None
+
+    def test_cleanup(self):
+        with freeze_time(timezone.now() - timedelta(days=2)):
+            self.ns.set("old", {"foo": "a"})
+        old_segments = self.segments()
+        for segment in old_segments:
+            path = os.path.join(self.ns.segments_path, segment)
+            two_days_ago = (timezone.now() - timedelta(days=2)).timestamp()
+            os.utime(path, (two_days_ago, two_days_ago))
+
+        self.ns.set("new", {"foo": "b"})
+
+        self.ns.cleanup(timezone.now() - timedelta(days=1))
+
+        assert not set(old_segments) & set(self.segments())
+        assert self.ns.get("old") is None
+        assert self.ns.get("new") == {"foo": "b"}
+
+    def test_offsets_follow_the_file(self, tmp_path):
+        ns = SegmentFileNodeStorage(path=str(tmp_path / "large"))
+        ns.bootstrap()
+        ns.set("node_1", {"foo": "a"})
+
+        # A write which failed halfway still moved the end of the segment
+        assert ns._segment is not None
+        ns._segment.write(b"partial")
+        ns._segment.flush()
+
+        ns.set("node_2", {"foo": "b"})
+        assert ns.get_multi(["node_1", "node_2"]) == {
+            "node_1": {"foo": "a"},
+            "node_2": {"foo": "b"},
+        }
+
+    def test_reopened_after_fork(self, tmp_path):
+        ns = SegmentFileNodeStorage(path=str(tmp_path / "large"))
+        ns.bootstrap()
+        ns.set("node_1", {"foo": "a"})
+        parent_segment = ns._segment_name
+        parent_index = ns.index
+
+        with mock.patch("os.getpid", return_value=os.getpid() + 1):
+            ns.set("node_2", {"foo": "b"})
+            assert ns._segment_name != parent_segment
+            assert ns.index is not parent_index
+
+            assert ns.get_multi(["node_1", "node_2"]) == {
+                "node_1": {"foo": "a"},
+                "node_2": {"foo": "b"},
+            }
@@ -3,11 +3,15 @@ Testsuite of backend-independent nodestore tests. Add your backend to the
 `ns` fixture to have it tested.
 """
 
-from contextlib import nullcontext
+from contextlib import contextmanager, nullcontext
+from tempfile import TemporaryDirectory
+from unittest import mock
 
 import pytest
 
+from sentry.nodestore.base import local_node_cache
 from sentry.nodestore.django.backend import DjangoNodeStorage
+from sentry.nodestore.segmentfile.backend import SegmentFileNodeStorage
 from sentry.testutils.helpers import override_options
 from tests.sentry.nodestore.bigtable.test_backend import (
     MockedBigtableNodeStorage,
@@ -15,8 +19,19 @@ from tests.sentry.nodestore.bigtable.test_backend import (
 )
 
 
+@contextmanager
+def get_temporary_segmentfile_nodestorage():
+    with TemporaryDirectory() as path:
+        yield SegmentFileNodeStorage(path=path)
+
+
 @pytest.fixture(
-    params=["bigtable-mocked", "bigtable-real", pytest.param("django", marks=pytest.mark.django_db)]
+    params=[
+        "bigtable-mocked",
+        "bigtable-real",
+        pytest.param("django", marks=pytest.mark.django_db),
+        "segmentfile",
+    ]
 )
 def ns(request):
     # backends are returned from context managers to support teardown when required
@@ -24,6 +39,7 @@ def ns(request):
         "bigtable-mocked": lambda: nullcontext(MockedBigtableNodeStorage(project="test")),
         "bigtable-real": lambda: get_temporary_bigtable_nodestorage(),
         "django": lambda: nullcontext(DjangoNodeStorage()),
+        "segmentfile": lambda: get_temporary_segmentfile_nodestorage(),
     }
 
     ctx = backends[request.param]()
@@ -98,3 +114,52 @@ def test_set_subkeys(ns):
     ns.delete("node_1")
     assert ns.get("node_1") is None
     assert ns.get("node_1", subkey="other") is None
+
+
+@override_options({"nodestore.set-subkeys.enable-set-cache-item": False})
+def test_set_multi(ns):
+    ns.set("node_1", {"foo": "old"})
+
+    ns.set_multi({"node_1": {"foo": "a"}, "node_2": {"foo": "b"}})
+    assert ns.get_multi(["node_1", "node_2"]) == {"node_1": {"foo": "a"}, "node_2": {"foo": "b"}}
+
+    ns.set_subkeys_multi({"node_3": {None: {"foo": "c"}, "other": {"foo": "d"}}})
+    assert ns.get("node_3") == {"foo": "c"}
+    assert ns.get("node_3", subkey="other") == {"foo": "d"}
+
+
+@override_options(
+    {
+        "nodestore.set-subkeys.enable-set-cache-item": False,
+        "nodestore.local-cache.max-bytes": 1024,
+    }
+)
+def test_local_cache(ns):
+    local_node_cache.clear()
+    ns.set_subkeys("node_1", {None: {"foo": "a"}, "other": {"foo": "b"}})
+    ns.set("node_2", {"foo": "c"})
+
+    assert ns.get("node_1") == {"foo": "a"}
+    assert ns.get_multi(["node_1", "node_2"]) == {"node_1": {"foo": "a"}, "node_2": {"foo": "c"}}
+
+    # Served entirely from the local cache, including subkeys
+    with (
+        mock.patch.object(ns, "_get_bytes", side_effect=AssertionError),
+        mock.patch.object(ns, "_get_bytes_multi", side_effect=AssertionError),
+    ):
+        assert ns.get("node_1", subkey="other") == {"foo": "b"}
+        assert ns.get_multi(["node_1", "node_2"]) == {
+            "node_1": {"foo": "a"},
+            "node_2": {"foo": "c"},
+        }
+
+    # Writes and deletes invalidate
+    ns.set("node_1", {"foo": "d"})
+    assert ns.get("node_1") == {"foo": "d"}
+    ns.delete("node_1")
+    assert ns.get("node_1") is None
+
+    # Payloads larger than the whole cache are not cached at all
+    ns.set("node_3", {"foo": "x" * 2048})
+    assert ns.get("node_3") == {"foo": "x" * 2048}
+    assert local_node_cache.get_many(["node_3"]) == {}
@@ -17,10 +17,18 @@ from sentry.dynamic_sampling import (
     get_redis_client_for_ds,
 )
 from sentry.dynamic_sampling.rules.base import NEW_MODEL_THRESHOLD_IN_MINUTES
-from sentry.models.projectkey import ProjectKey
+from sentry.models.projectkey import ProjectKey, ProjectKeyStatus
 from sentry.models.projectteam import ProjectTeam
 from sentry.models.transaction_threshold import TransactionMetric
-from sentry.relay.config import ProjectConfig, get_project_config
+from sentry.relay.config import (
+    ProjectConfig,
+    get_config_revision,
+    get_invalidated_sections,
+    get_organization_features,
+    get_project_config,
+    get_project_key_configs,
+    update_project_config,
+)
 from sentry.snuba.dataset import Dataset
 from sentry.testutils.factories import Factories
 from sentry.testutils.helpers import Feature
@@ -223,6 +231,122 @@ def test_project_config_exposed_features(default_project):
     assert cfg_features == ["organizations:profiling"]
 
 
+@django_db_all
+@region_silo_test
+@mock.patch("sentry.relay.config.EXPOSABLE_FEATURES", ["organizations:profiling"])
+def test_project_config_prefetched_organization_features(default_project):
+    with Feature({"organizations:profiling": True}):
+        organization_features = get_organization_features(default_project.organization)
+    assert organization_features == {"organizations:profiling": True}
+
+    # The prefetched features are used, even though the feature has been disabled since
+    project_cfg = get_project_config(default_project, organization_features=organization_features)
+
+    cfg_features = get_path(project_cfg.to_dict(), "config", "features")
+    assert cfg_features == ["organizations:profiling"]
+
+
+@django_db_all
+@region_silo_test
+def test_get_project_key_configs(default_project, default_projectkey):
+    other_key = ProjectKey.objects.create(project=default_project)
+    inactive_key = ProjectKey.objects.create(
+        project=default_project, status=ProjectKeyStatus.INACTIVE
+    )
+
+    configs = get_project_key_configs(
+        default_project, [default_projectkey, other_key, inactive_key]
+    )
+
+    assert configs[inactive_key.public_key] == {"disabled": True}
+    assert configs[default_projectkey.public_key]["rev"] != configs[other_key.public_key]["rev"]
+
+    for key in (default_projectkey, other_key):
+        cfg = configs[key.public_key]
+        expected = get_project_config(default_project, project_keys=[key]).to_dict()
+        _validate_project_config(cfg["config"])
+
+        assert cfg["publicKeys"] == [
+            {"publicKey": key.public_key, "numericId": key.id, "isEnabled": True}
+        ]
+        for config in (cfg, expected):
+            config.pop("lastChange")
+            config.pop("lastFetch")
+        assert cfg == expected
+
+
+@django_db_all
+@region_silo_test
+def test_get_project_key_configs_project_disabled(default_project, default_projectkey):
+    other_key = ProjectKey.objects.create(project=default_project)
+    default_project.update(status=ObjectStatus.PENDING_DELETION)
+
+    configs = get_project_key_configs(default_project, [default_projectkey, other_key])
+    assert configs == {
+        default_projectkey.public_key: {"disabled": True},
+        other_key.public_key: {"disabled": True},
+    }
+
+
+def test_get_invalidated_sections():
+    assert get_invalidated_sections("monitors:monitor_created") == ["quotas"]
+    assert get_invalidated_sections("dashboards:create-on-demand-metric") == ["metric_extraction"]
+    assert get_invalidated_sections("projectoption.post_save") is None
+
+    trigger = "projectoption.set_value"
+    assert get_invalidated_sections(trigger, option_key="sentry:blacklisted_ips") == ["filters"]
+    assert get_invalidated_sections(trigger, option_key="filters:legacy-browsers") == ["filters"]
+    assert get_invalidated_sections(trigger, option_key="sentry:target_sample_rate") == ["sampling"]
+    assert get_invalidated_sections(
+        trigger, option_key="sentry:transaction_name_cluster_rules"
+    ) == ["transaction_names"]
+    assert get_invalidated_sections(trigger, option_key="sentry:relay_pii_config") is None
+
+
+def test_get_config_revision():
+    config = {"disabled": False, "rev": "a", "lastFetch": "b", "config": {"x": 1, "y": [2]}}
+
+    rev = get_config_revision(config)
+    assert rev == get_config_revision({**config, "rev": "c", "lastFetch": "d"})
+    assert rev == get_config_revision({"config": {"y": [2], "x": 1}, "disabled": False})
+    assert rev != get_config_revision({**config, "config": {"x": 2, "y": [2]}})
+
+
+@django_db_all
+@region_silo_test
+def test_update_project_config(default_project, default_projectkey):
+    keys = [default_projectkey]
+    cfg = get_project_config(default_project, project_keys=keys).to_dict()
+    assert cfg["rev"] == get_config_revision(cfg)
+
+    # Nothing changed
+    updated = update_project_config(default_project, keys, cfg, ["filters", "quotas"])
+    assert updated["rev"] == cfg["rev"]
+    assert updated["lastChange"] == cfg["lastChange"]
+
+    default_project.update_option("sentry:blacklisted_ips", ["112.69.248.54"])
+    # Options which are not part of the recomputed sections are left as they are
+    default_project.update_option("sentry:breakdowns", {})
+
+    updated = update_project_config(default_project, keys, cfg, ["filters"])
+    assert updated["rev"] != cfg["rev"]
+    assert updated["lastChange"] > cfg["lastChange"]
+    assert updated["config"]["filterSettings"]["clientIps"] == {"blacklistedIps": ["112.69.248.54"]}
+    assert updated["config"]["breakdownsV2"] == cfg["config"]["breakdownsV2"]
+    # The previous config is not modified
+    assert "clientIps" not in cfg["config"]["filterSettings"]
+
+
+@django_db_all
+@region_silo_test
+def test_update_project_config_project_disabled(default_project, default_projectkey):
+    cfg = get_project_config(default_project, project_keys=[default_projectkey]).to_dict()
+    default_project.update(status=ObjectStatus.PENDING_DELETION)
+
+    updated = update_project_config(default_project, [default_projectkey], cfg, ["filters"])
+    assert updated == {"disabled": True}
+
+
 @django_db_all
 @region_silo_test
 @mock.patch("sentry.relay.config.EXPOSABLE_FEATURES", ["badprefix:custom-inbound-filters"])
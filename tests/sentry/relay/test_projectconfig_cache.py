@@ -34,3 +34,22 @@ def test_read_write():
 
     assert cache.get_rev(dsn1) == "my_rev_123"
     assert cache.get_rev(dsn2) is None
+    assert cache.get_rev_many([dsn1, dsn2]) == {dsn1: "my_rev_123"}
+
+
+@django_db_all
+def test_set_many_if_rev():
+    cache = redis.RedisProjectConfigCache()
+    cache.set_many({"a": {"my-value": "foo", "rev": "1"}, "b": {"my-value": "foo", "rev": "1"}})
+
+    not_written = cache.set_many_if_rev(
+        {"a": {"my-value": "bar", "rev": "2"}, "b": {"my-value": "bar", "rev": "2"}},
+        {"a": "1", "b": "0"},
+    )
+
+    assert not_written == ["b"]
+    assert cache.get("a") == {"my-value": "bar", "rev": "2"}
+    assert cache.get_rev("a") == "2"
+    # Written by somebody else in the meantime
+    assert cache.get("b") == {"my-value": "foo", "rev": "1"}
+    assert cache.get_rev("b") == "1"
@@ -46,6 +46,25 @@ def test_split_debounce_lifecycle():
     assert not cache.is_debounced(**kwargs)
 
 
+def test_sections_lifecycle():
+    cache = RedisProjectConfigDebounceCache()
+    kwargs = {
+        "public_key": "abc",
+        "project_id": None,
+        "organization_id": None,
+    }
+
+    cache.debounce(**kwargs, sections=["quotas", "filters"])
+    assert cache.is_debounced(**kwargs, sections=["filters", "quotas"])
+    assert not cache.is_debounced(**kwargs, sections=["filters"])
+    assert not cache.is_debounced(**kwargs)
+
+    cache.debounce(**kwargs)
+    cache.mark_task_done(**kwargs, sections=["quotas", "filters"])
+    assert not cache.is_debounced(**kwargs, sections=["quotas", "filters"])
+    assert cache.is_debounced(**kwargs)
+
+
 def test_default_prefix():
     cache = RedisProjectConfigDebounceCache()
     kwargs = {
@@ -0,0 +1,53 @@
+import zlib
+from unittest import mock
+
+import pytest
+
+from sentry.replays.lib.storage import RecordingSegmentStorageMeta
+from sentry.replays.usecases.pack import pack
+from sentry.replays.usecases.reader import download_segments, stream_segments
+
+NUM_SEGMENTS = 500
+
+
+def benchmark_available() -> bool:
+    try:
+        __import__("pytest_benchmark")
+    except ModuleNotFoundError:
+        return False
+    else:
+        return True
+
+
+def _segments() -> tuple[list[RecordingSegmentStorageMeta], dict[int, bytes]]:
+    segments = []
+    blobs = {}
+    for i in range(NUM_SEGMENTS):
+        segments.append(
+            RecordingSegmentStorageMeta(
+                project_id=1,
+                replay_id="e5c2a2cd03e34f17a7e2f1e14a7e8a4f",
+                segment_id=i,
+                retention_days=30,
+                file_id=None,
+            )
+        )
+        rrweb = b"[" + b",".join(b'{"type":3,"data":{"id":%d}}' % j for j in range(2000)) + b"]"
+        # Every fifth segment was recorded by a mobile SDK, and has a video packed with it
+        blobs[i] = zlib.compress(pack(rrweb, b"\x00" * 10_000) if i % 5 == 0 else rrweb)
+    return segments, blobs
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize("download", [download_segments, stream_segments])
+def test_benchmark_download_segments(benchmark, download) -> None:
+    segments, blobs = _segments()
+
+    def run():
+        return sum(len(chunk) for chunk in download(segments))
+
+    with mock.patch(
+        "sentry.replays.usecases.reader._fetch_segment",
+        side_effect=lambda segment: blobs[segment.segment_id],
+    ):
+        assert benchmark(run) > 0
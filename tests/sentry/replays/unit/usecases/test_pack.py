@@ -1,4 +1,11 @@
-from sentry.replays.usecases.pack import HEADER_OFFSET, Encoding, pack, unpack
+from sentry.replays.usecases.pack import (
+    HEADER_OFFSET,
+    Encoding,
+    get_rrweb_offset,
+    iter_unpack_rrweb,
+    pack,
+    unpack,
+)
 
 
 def test_pack_rrweb():
@@ -26,3 +33,24 @@ def test_unpack_rrweb_video():
     x = b"\x00" * 1_000_000
     y = b"\xff" * 1_000_000
     assert unpack(pack(x, y)) == (y, x)
+
+
+def test_get_rrweb_offset():
+    assert get_rrweb_offset(b"") is None
+    assert get_rrweb_offset(b"[]") == 0
+    assert get_rrweb_offset(pack(b"hello", None)) == 1
+    assert get_rrweb_offset(pack(b"hello", b"world")) == HEADER_OFFSET + 5
+    assert get_rrweb_offset(pack(b"hello", b"world")[: HEADER_OFFSET - 1]) is None
+
+
+def _chunked(data, size):
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+def test_iter_unpack_rrweb():
+    for packed in (b"[hello]", pack(b"hello", None), pack(b"hello", b"world" * 100)):
+        expected = unpack(packed)[1]
+        for size in (1, 2, 3, 7, 4096):
+            assert b"".join(iter_unpack_rrweb(_chunked(packed, size))) == expected
+
+    assert list(iter_unpack_rrweb([])) == []
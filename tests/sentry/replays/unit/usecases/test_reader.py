@@ -0,0 +1,86 @@
+import zlib
+from unittest import mock
+
+import pytest
+
+from sentry.replays.lib.storage import RecordingSegmentStorageMeta
+from sentry.replays.usecases.pack import pack
+from sentry.replays.usecases.reader import (
+    decompress,
+    download_segments,
+    iter_decompress,
+    stream_segments,
+)
+
+
+def _segment(segment_id: int) -> RecordingSegmentStorageMeta:
+    return RecordingSegmentStorageMeta(
+        project_id=1,
+        replay_id="e5c2a2cd03e34f17a7e2f1e14a7e8a4f",
+        segment_id=segment_id,
+        retention_days=30,
+        file_id=None,
+    )
+
+
+def test_iter_decompress():
+    data = b"[" + b"a" * 100_000 + b"]"
+    for buffer in (data, zlib.compress(data)):
+        chunks = list(iter_decompress(buffer, chunk_size=1000))
+        assert all(len(chunk) <= 1000 for chunk in chunks)
+        assert b"".join(chunks) == decompress(buffer)
+
+
+def test_iter_decompress_truncated():
+    with pytest.raises(zlib.error):
+        list(iter_decompress(zlib.compress(b"[" + b"a" * 1000 + b"]")[:-8]))
+
+
+@pytest.mark.parametrize("window_size", [1, 3, 10])
+def test_stream_segments(window_size):
+    blobs = {
+        0: zlib.compress(b'[{"test":"hello 0"}]'),
+        1: None,
+        2: b'[{"test":"hello 2"}]',
+        3: zlib.compress(pack(b'[{"test":"hello 3"}]', b"video-bytes")),
+        4: zlib.compress(pack(b'[{"test":"hello 4"}]', None)),
+    }
+    segments = [_segment(i) for i in blobs]
+
+    with mock.patch(
+        "sentry.replays.usecases.reader._fetch_segment",
+        side_effect=lambda segment: blobs[segment.segment_id],
+    ):
+        result = b"".join(stream_segments(segments, window_size=window_size))
+        assert result == (
+            b'[[{"test":"hello 0"}],[],[{"test":"hello 2"}],'
+            b'[{"test":"hello 3"}],[{"test":"hello 4"}]]'
+        )
+
+        # Apart from missing segments, which only `stream_segments` separates correctly
+        del blobs[1]
+        segments = [_segment(i) for i in blobs]
+        assert b"".join(stream_segments(segments, window_size=window_size)) == b"".join(
+            download_segments(segments)
+        )
+
+
+def test_stream_segments_empty():
+    assert b"".join(stream_segments([])) == b"[]"
+
+
+def test_stream_segments_bounded_window():
+    fetched = []
+
+    def fetch(segment):
+        fetched.append(segment.segment_id)
+        return b"[]"
+
+    with mock.patch("sentry.replays.usecases.reader._fetch_segment", side_effect=fetch):
+        stream = stream_segments([_segment(i) for i in range(100)], window_size=5)
+        assert next(stream) == b"["
+        assert next(stream) == b"[]"
+        stream.close()
+
+    # The first segment, and at most one window after it
+    assert len(fetched) <= 6
@@ -4,7 +4,15 @@ import pytest
 from django.conf import settings
 from django.utils import timezone
 
-from sentry.sentry_metrics.indexer.cache import StringIndexerCache
+from sentry.sentry_metrics.indexer.base import (
+    FetchType,
+    FetchTypeExt,
+    Metadata,
+    UseCaseKeyCollection,
+    UseCaseKeyResult,
+    UseCaseKeyResults,
+)
+from sentry.sentry_metrics.indexer.cache import InMemoryStringIndexerCache, StringIndexerCache
 from sentry.sentry_metrics.use_case_id_registry import UseCaseID
 from sentry.testutils.helpers.options import override_options
 from sentry.utils.cache import cache
@@ -240,3 +248,50 @@ def test_is_valid_timestamp() -> None:
 
     assert not indexer_cache._is_valid_timestamp(str(stale_ts))
     assert indexer_cache._is_valid_timestamp(str(new_ts))
+
+
+def test_in_memory_cache() -> None:
+    local_cache = InMemoryStringIndexerCache()
+    keys = UseCaseKeyCollection({UseCaseID.SESSIONS: {1: {"a", "b"}, 2: {"c"}}})
+
+    results, missing = local_cache.get_many(keys)
+    assert results.get_mapped_results() == {}
+    assert missing == keys
+
+    db_results = UseCaseKeyResults()
+    db_results.add_use_case_key_results(
+        [UseCaseKeyResult(UseCaseID.SESSIONS, 1, "a", 10)], FetchType.DB_READ
+    )
+    db_results.add_use_case_key_results(
+        [UseCaseKeyResult(UseCaseID.SESSIONS, 1, "b", None)],
+        FetchType.RATE_LIMITED,
+        FetchTypeExt(is_global=False),
+    )
+    local_cache.set_many(db_results)
+
+    results, missing = local_cache.get_many(keys)
+    assert results[UseCaseID.SESSIONS][1] == {"a": 10, "b": None}
+    assert results.get_fetch_metadata()[UseCaseID.SESSIONS][1] == {
+        "a": Metadata(id=10, fetch_type=FetchType.CACHE_HIT),
+        "b": Metadata(
+            id=None, fetch_type=FetchType.RATE_LIMITED, fetch_type_ext=FetchTypeExt(is_global=False)
+        ),
+    }
+    assert missing == UseCaseKeyCollection({UseCaseID.SESSIONS: {2: {"c"}}})
+
+
+def test_in_memory_cache_rate_limited_ttl() -> None:
+    local_cache = InMemoryStringIndexerCache()
+    keys = UseCaseKeyCollection({UseCaseID.SESSIONS: {1: {"a"}}})
+
+    db_results = UseCaseKeyResults()
+    db_results.add_use_case_key_results(
+        [UseCaseKeyResult(UseCaseID.SESSIONS, 1, "a", None)],
+        FetchType.RATE_LIMITED,
+        FetchTypeExt(is_global=True),
+    )
+    with override_options({"sentry-metrics.indexer.in-memory-cache.rate-limited-ttl": 0}):
+        local_cache.set_many(db_results)
+
+    _, missing = local_cache.get_many(keys)
+    assert missing == keys
@@ -1,9 +1,12 @@
+from unittest import mock
+
 from sentry.sentry_metrics.configuration import UseCaseKey
-from sentry.sentry_metrics.indexer.base import UseCaseKeyCollection
+from sentry.sentry_metrics.indexer.base import FetchType, UseCaseKeyCollection
 from sentry.sentry_metrics.indexer.cache import CachingIndexer
 from sentry.sentry_metrics.indexer.postgres.postgres_v2 import PGStringIndexerV2, indexer_cache
 from sentry.sentry_metrics.use_case_id_registry import UseCaseID
 from sentry.testutils.cases import TestCase
+from sentry.testutils.helpers.options import override_options
 from sentry.utils.cache import cache
 
 
@@ -33,3 +36,24 @@ class PostgresIndexerV2Test(TestCase):
         )
 
         assert indexer_cache.get("br", key) is None
+
+    @override_options({"sentry-metrics.indexer.in-memory-cache.enabled": True})
+    def test_bulk_record_in_memory_cache(self):
+        strings = {self.use_case_id: {self.organization.id: self.strings}}
+
+        results = self.indexer.bulk_record(strings)
+        ids = results[self.use_case_id][self.organization.id]
+        assert ids.keys() == self.strings
+
+        with mock.patch.object(indexer_cache, "get_many") as mock_get_many:
+            cached_results = self.indexer.bulk_record(strings)
+
+        assert not mock_get_many.called
+        assert cached_results[self.use_case_id][self.organization.id] == ids
+        for string in self.strings:
+            assert (
+                cached_results.get_fetch_metadata()[self.use_case_id][self.organization.id][
+                    string
+                ].fetch_type
+                == FetchType.CACHE_HIT
+            )
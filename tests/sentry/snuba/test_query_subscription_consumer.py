@@ -16,7 +16,10 @@ from sentry.snuba.dataset import Dataset
 from sentry.snuba.models import SnubaQuery
 from sentry.snuba.query_subscriptions.consumer import (
     InvalidSchemaError,
+    batch_subscriber_registry,
+    handle_messages,
     parse_message_value,
+    register_batch_subscriber,
     register_subscriber,
     subscriber_registry,
 )
@@ -139,6 +142,168 @@ class HandleMessageTest(BaseQuerySubscriptionTest, TestCase):
         mock_callback.assert_called_once_with(data["payload"], sub)
 
 
+class HandleMessagesTest(BaseQuerySubscriptionTest, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.orig_registry = deepcopy(subscriber_registry)
+        self.orig_batch_registry = deepcopy(batch_subscriber_registry)
+
+    def tearDown(self):
+        super().tearDown()
+        subscriber_registry.clear()
+        subscriber_registry.update(self.orig_registry)
+        batch_subscriber_registry.clear()
+        batch_subscriber_registry.update(self.orig_batch_registry)
+
+    def create_subscription(self, registration_key):
+        with self.tasks():
+            snuba_query = create_snuba_query(
+                SnubaQuery.Type.ERROR,
+                Dataset.Events,
+                "hello",
+                "count()",
+                timedelta(minutes=10),
+                timedelta(minutes=1),
+                None,
+            )
+            sub = create_snuba_subscription(self.project, registration_key, snuba_query)
+        sub.refresh_from_db()
+        return sub
+
+    def build_message(self, subscription, timestamp):
+        data = deepcopy(self.valid_wrapper)
+        data["payload"]["subscription_id"] = subscription.subscription_id
+        data["payload"]["timestamp"] = timestamp
+        return json.dumps(data).encode("utf-8")
+
+    def build_update(self, subscription, timestamp):
+        return {
+            "entity": self.valid_payload["entity"],
+            "subscription_id": subscription.subscription_id,
+            "values": self.valid_payload["result"],
+            "timestamp": datetime.fromisoformat(timestamp).replace(tzinfo=timezone.utc),
+        }
+
+    def test_batch_subscriber(self):
+        batch_callback = mock.Mock()
+        register_subscriber("registered_batch")(mock.Mock())
+        register_batch_subscriber("registered_batch")(batch_callback)
+        sub = self.create_subscription("registered_batch")
+        other_sub = self.create_subscription("registered_batch")
+
+        handle_messages(
+            [
+                (self.build_message(sub, "2020-01-01T01:23:45"), 1, 0),
+                (self.build_message(other_sub, "2020-01-01T01:23:46"), 2, 0),
+                (b"invalid", 3, 0),
+                (self.build_message(sub, "2020-01-01T01:24:45"), 4, 0),
+            ],
+            self.topic,
+            self.dataset.value,
+            self.jsoncodec,
+        )
+
+        batch_callback.assert_called_once_with(
+            [
+                (self.build_update(sub, "2020-01-01T01:23:45"), sub),
+                (self.build_update(other_sub, "2020-01-01T01:23:46"), other_sub),
+                (self.build_update(sub, "2020-01-01T01:24:45"), sub),
+            ]
+        )
+
+    def test_no_batch_subscriber(self):
+        callback = mock.Mock(side_effect=[Exception("boom"), None])
+        register_subscriber("registered_no_batch")(callback)
+        sub = self.create_subscription("registered_no_batch")
+
+        handle_messages(
+            [
+                (self.build_message(sub, "2020-01-01T01:23:45"), 1, 0),
+                (self.build_message(sub, "2020-01-01T01:24:45"), 2, 0),
+            ],
+            self.topic,
+            self.dataset.value,
+            self.jsoncodec,
+        )
+
+        # A failing update doesn't prevent the next one from being handled
+        assert callback.call_args_list == [
+            mock.call(self.build_update(sub, "2020-01-01T01:23:45"), sub),
+            mock.call(self.build_update(sub, "2020-01-01T01:24:45"), sub),
+        ]
+
+    def test_arroyo_consumer_batched(self):
+        topic_defn = get_topic_definition(Topic.EVENTS)
+        create_topics(topic_defn["cluster"], [topic_defn["real_topic_name"]])
+
+        batch_callback = mock.Mock()
+        register_subscriber("registered_batch")(mock.Mock())
+        register_batch_subscriber("registered_batch")(batch_callback)
+        sub = self.create_subscription("registered_batch")
+
+        commit = mock.Mock()
+        partition = Partition(ArroyoTopic("test"), 0)
+        strategy = QuerySubscriptionStrategyFactory(
+            self.dataset.value,
+            1,
+            1,
+            1,
+            DEFAULT_BLOCK_SIZE,
+            DEFAULT_BLOCK_SIZE,
+            mode="batched",
+        ).create_with_partitions(commit, {partition: 0})
+        strategy.submit(
+            Message(
+                BrokerValue(
+                    KafkaPayload(b"key", self.build_message(sub, "2020-01-01T01:23:45"), []),
+                    partition,
+                    1,
+                    datetime.now(),
+                )
+            )
+        )
+        strategy.join()
+
+        batch_callback.assert_called_once_with(
+            [(self.build_update(sub, "2020-01-01T01:23:45"), sub)]
+        )
+
+    def test_arroyo_consumer_batched_fallback(self):
+        topic_defn = get_topic_definition(Topic.EVENTS)
+        create_topics(topic_defn["cluster"], [topic_defn["real_topic_name"]])
+
+        callback = mock.Mock()
+        register_subscriber("registered_batch")(callback)
+        register_batch_subscriber("registered_batch")(mock.Mock(side_effect=Exception("boom")))
+        sub = self.create_subscription("registered_batch")
+
+        commit = mock.Mock()
+        partition = Partition(ArroyoTopic("test"), 0)
+        strategy = QuerySubscriptionStrategyFactory(
+            self.dataset.value,
+            1,
+            1,
+            1,
+            DEFAULT_BLOCK_SIZE,
+            DEFAULT_BLOCK_SIZE,
+            mode="batched",
+        ).create_with_partitions(commit, {partition: 0})
+        strategy.submit(
+            Message(
+                BrokerValue(
+                    KafkaPayload(b"key", self.build_message(sub, "2020-01-01T01:23:45"), []),
+                    partition,
+                    1,
+                    datetime.now(),
+                )
+            )
+        )
+        strategy.join()
+
+        # A failing batch is handled again message by message, rather than being dropped
+        callback.assert_called_once_with(self.build_update(sub, "2020-01-01T01:23:45"), sub)
+
+
 class ParseMessageValueTest(BaseQuerySubscriptionTest, unittest.TestCase):
     def run_test(self, message):
         parse_message_value(json.dumps(message).encode(), self.jsoncodec)
@@ -210,3 +375,23 @@ class RegisterSubscriberTest(unittest.TestCase):
         with pytest.raises(Exception) as excinfo:
             register_subscriber("hello")(other_callback)
         assert str(excinfo.value) == "Handler already registered for hello"
+
+
+class RegisterBatchSubscriberTest(unittest.TestCase):
+    def setUp(self):
+        self.orig_registry = deepcopy(batch_subscriber_registry)
+
+    def tearDown(self):
+        batch_subscriber_registry.clear()
+        batch_subscriber_registry.update(self.orig_registry)
+
+    def test_register(self):
+        callback = lambda updates: None
+        register_batch_subscriber("hello")(callback)
+        assert batch_subscriber_registry["hello"] is callback
+
+    def test_already_registered(self):
+        register_batch_subscriber("hello")(lambda updates: None)
+        with pytest.raises(Exception) as excinfo:
+            register_batch_subscriber("hello")(lambda updates: None)
+        assert str(excinfo.value) == "Batch handler already registered for hello"
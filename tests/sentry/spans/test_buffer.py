@@ -6,7 +6,8 @@ import pytest
 import rapidjson
 from sentry_redis_tools.clients import StrictRedis
 
-from sentry.spans.buffer import OutputSpan, SegmentId, Span, SpansBuffer
+from sentry.spans.buffer import ZSTD_MAGIC, OutputSpan, SegmentId, Span, SpansBuffer, decode_payload
+from sentry.testutils.helpers.options import override_options
 
 
 def shallow_permutations(spans: list[Span]) -> list[list[Span]]:
@@ -399,3 +400,319 @@ def test_parent_in_other_project_and_nested_is_segment_span(buffer: SpansBuffer,
     assert buffer.flush_segments(now=90) == (0, {})
 
     assert_clean(buffer.client)
+
+
+@pytest.mark.parametrize("max_segment_read_spans", [1000, 2])
+@pytest.mark.parametrize("flush_chunk_size", [100, 1])
+def test_scripted_flush(buffer: SpansBuffer, max_segment_read_spans, flush_chunk_size, monkeypatch):
+    monkeypatch.setattr("sentry.spans.buffer.MAX_SEGMENT_READ_SPANS", max_segment_read_spans)
+    monkeypatch.setattr("sentry.spans.buffer.FLUSH_CHUNK_SIZE", flush_chunk_size)
+
+    spans = [
+        Span(
+            payload=_payload(b"a" * 16),
+            trace_id="a" * 32,
+            span_id="a" * 16,
+            parent_span_id=None,
+            is_segment_span=True,
+            project_id=1,
+        ),
+        Span(
+            payload=_payload(b"b" * 16),
+            trace_id="a" * 32,
+            span_id="b" * 16,
+            parent_span_id="a" * 16,
+            project_id=1,
+        ),
+        Span(
+            payload=_payload(b"c" * 16),
+            trace_id="a" * 32,
+            span_id="c" * 16,
+            parent_span_id="a" * 16,
+            project_id=1,
+        ),
+        Span(
+            payload=_payload(b"d" * 16),
+            trace_id="b" * 32,
+            span_id="d" * 16,
+            parent_span_id=None,
+            is_segment_span=True,
+            project_id=1,
+        ),
+        # A second segment of the first trace, whose parent never arrives
+        Span(
+            payload=_payload(b"e" * 16),
+            trace_id="a" * 32,
+            span_id="e" * 16,
+            parent_span_id="f" * 16,
+            project_id=1,
+        ),
+    ]
+
+    with override_options({"standalone-spans.buffer.scripted-flush.enable": True}):
+        buffer.process_spans(spans, now=0)
+
+        assert_ttls(buffer.client)
+
+        _, rv = buffer.flush_segments(now=60)
+        _normalize_output(rv)
+        assert rv == {
+            _segment_id(1, "a" * 32, "a" * 16): [
+                _output_segment(b"a" * 16, b"a" * 16, True),
+                _output_segment(b"b" * 16, b"a" * 16, False),
+                _output_segment(b"c" * 16, b"a" * 16, False),
+            ],
+            _segment_id(1, "a" * 32, "f" * 16): [
+                _output_segment(b"e" * 16, b"f" * 16, False),
+            ],
+            _segment_id(1, "b" * 32, "d" * 16): [
+                _output_segment(b"d" * 16, b"d" * 16, True),
+            ],
+        }
+
+        buffer.done_flush_segments(rv)
+
+        assert buffer.flush_segments(now=120) == (0, {})
+
+    assert_clean(buffer.client)
+
+
+def test_compressed_payloads(buffer: SpansBuffer):
+    spans = [
+        Span(
+            payload=_payload(b"a" * 16),
+            trace_id="a" * 32,
+            span_id="a" * 16,
+            parent_span_id=None,
+            is_segment_span=True,
+            project_id=1,
+        ),
+        Span(
+            payload=_payload(b"b" * 16),
+            trace_id="a" * 32,
+            span_id="b" * 16,
+            parent_span_id="a" * 16,
+            project_id=1,
+        ),
+    ]
+
+    with override_options(
+        {"standalone-spans.buffer.compression.partitions": buffer.assigned_shards}
+    ):
+        buffer.process_spans(spans[:1], now=0)
+
+    # Payloads written before the option was turned off must still be readable
+    buffer.process_spans(spans[1:], now=0)
+
+    segment_id = _segment_id(1, "a" * 32, "a" * 16)
+    stored = buffer.client.smembers(segment_id)
+    assert {payload.startswith(ZSTD_MAGIC) for payload in stored} == {True, False}
+    assert {decode_payload(payload) for payload in stored} == {span.payload for span in spans}
+
+    _, rv = buffer.flush_segments(now=10)
+    _normalize_output(rv)
+    assert rv == {
+        segment_id: [
+            _output_segment(b"a" * 16, b"a" * 16, True),
+            _output_segment(b"b" * 16, b"a" * 16, False),
+        ]
+    }
+
+    buffer.done_flush_segments(rv)
+    assert_clean(buffer.client)
+
+
+@override_options({"standalone-spans.buffer.scripted-flush.enable": True})
+def test_flush_segment_over_budget(buffer: SpansBuffer):
+    spans = [
+        Span(
+            payload=_payload(b"a" * 16),
+            trace_id="a" * 32,
+            span_id="a" * 16,
+            parent_span_id=None,
+            is_segment_span=True,
+            project_id=1,
+        ),
+        Span(
+            payload=_payload(b"b" * 16),
+            trace_id="b" * 32,
+            span_id="b" * 16,
+            parent_span_id=None,
+            is_segment_span=True,
+            project_id=1,
+        ),
+    ]
+
+    with override_options({"standalone-spans.buffer.max-segment-bytes": 1}):
+        buffer.process_spans(spans[:1], now=0)
+    buffer.process_spans(spans[1:], now=0)
+
+    _, rv = buffer.flush_segments(now=0)
+    _normalize_output(rv)
+    assert rv == {
+        _segment_id(1, "a" * 32, "a" * 16): [_output_segment(b"a" * 16, b"a" * 16, True)],
+    }
+    buffer.done_flush_segments(rv)
+
+    _, rv = buffer.flush_segments(now=10)
+    assert list(rv) == [_segment_id(1, "b" * 32, "b" * 16)]
+    buffer.done_flush_segments(rv)
+
+    assert_clean(buffer.client)
+
+
+@override_options({"standalone-spans.buffer.scripted-flush.enable": True})
+def test_flush_segment_receives_spans_while_flushing(buffer: SpansBuffer):
+    spans = [
+        Span(
+            payload=_payload(b"a" * 16),
+            trace_id="a" * 32,
+            span_id="a" * 16,
+            parent_span_id=None,
+            is_segment_span=True,
+            project_id=1,
+        ),
+        Span(
+            payload=_payload(b"b" * 16),
+            trace_id="a" * 32,
+            span_id="b" * 16,
+            parent_span_id="a" * 16,
+            project_id=1,
+        ),
+        Span(
+            payload=_payload(b"c" * 16),
+            trace_id="a" * 32,
+            span_id="c" * 16,
+            parent_span_id="b" * 16,
+            project_id=1,
+        ),
+    ]
+    segment_id = _segment_id(1, "a" * 32, "a" * 16)
+
+    with override_options({"standalone-spans.buffer.max-segment-bytes": 1}):
+        buffer.process_spans(spans[:1], now=0)
+        _, rv = buffer.flush_segments(now=0)
+        assert list(rv) == [segment_id]
+
+        # Spans arrive between reading the segment and marking it as flushed
+        buffer.process_spans(spans[1:], now=0)
+        buffer.done_flush_segments(rv)
+
+        assert_ttls(buffer.client)
+
+        _, rv = buffer.flush_segments(now=0)
+        _normalize_output(rv)
+        assert rv == {
+            segment_id: [
+                _output_segment(b"b" * 16, b"a" * 16, False),
+                _output_segment(b"c" * 16, b"a" * 16, False),
+            ]
+        }
+        buffer.done_flush_segments(rv)
+
+    assert buffer.flush_segments(now=60) == (0, {})
+    assert_clean(buffer.client)
+
+
+@override_options({"standalone-spans.buffer.scripted-flush.enable": True})
+def test_flush_shard_over_budget(buffer: SpansBuffer):
+    span = Span(
+        payload=_payload(b"a" * 16),
+        trace_id="a" * 32,
+        span_id="a" * 16,
+        parent_span_id=None,
+        is_segment_span=True,
+        project_id=1,
+    )
+
+    with override_options({"standalone-spans.buffer.max-shard-bytes": 1}):
+        # Duplicate payloads are only counted once
+        buffer.process_spans([span, span], now=0)
+        assert [int(buffer.client.get(key)) for key in buffer.client.keys("span-buf:qb:*")] == [
+            len(span.payload)
+        ]
+        assert_ttls(buffer.client)
+
+        # The first flush finds the shard over budget, the next one drains it early
+        _, rv = buffer.flush_segments(now=0)
+        assert rv == {}
+        _, rv = buffer.flush_segments(now=0)
+        assert list(rv) == [_segment_id(1, "a" * 32, "a" * 16)]
+        buffer.done_flush_segments(rv)
+
+    assert not any(int(buffer.client.get(key) or 0) for key in buffer.client.keys("span-buf:qb:*"))
+
+
+@override_options(
+    {
+        "standalone-spans.buffer.scripted-flush.enable": True,
+        "standalone-spans.buffer.max-shard-bytes": 1,
+    }
+)
+def test_shard_bytes_never_negative(buffer: SpansBuffer):
+    span = Span(
+        payload=_payload(b"a" * 16),
+        trace_id="a" * 32,
+        span_id="a" * 16,
+        parent_span_id=None,
+        is_segment_span=True,
+        project_id=1,
+    )
+
+    buffer.process_spans([span], now=0)
+    # The shard counter expired while the segment was buffered
+    for key in buffer.client.keys("span-buf:qb:*"):
+        buffer.client.delete(key)
+
+    _, rv = buffer.flush_segments(now=10)
+    assert list(rv) == [_segment_id(1, "a" * 32, "a" * 16)]
+    buffer.done_flush_segments(rv)
+
+    assert [int(buffer.client.get(key)) for key in buffer.client.keys("span-buf:qb:*")] == [0]
+    assert_ttls(buffer.client)
+    assert buffer.flush_segments(now=10) == (0, {})
+
+
+@override_options({"standalone-spans.buffer.scripted-flush.enable": True})
+def test_sizes_only_tracked_with_budget(buffer: SpansBuffer):
+    span = Span(
+        payload=_payload(b"a" * 16),
+        trace_id="a" * 32,
+        span_id="a" * 16,
+        parent_span_id=None,
+        is_segment_span=True,
+        project_id=1,
+    )
+
+    buffer.process_spans([span], now=0)
+    assert not buffer.client.keys("span-buf:bs:*")
+
+    with override_options({"standalone-spans.buffer.max-segment-bytes": 1000}):
+        buffer.process_spans([span], now=0)
+    assert buffer.client.keys("span-buf:bs:*")
+
+
+def test_scripted_flush_turned_off(buffer: SpansBuffer):
+    span = Span(
+        payload=_payload(b"a" * 16),
+        trace_id="a" * 32,
+        span_id="a" * 16,
+        parent_span_id=None,
+        is_segment_span=True,
+        project_id=1,
+    )
+    segment_id = _segment_id(1, "a" * 32, "a" * 16)
+
+    with override_options({"standalone-spans.buffer.scripted-flush.enable": True}):
+        buffer.process_spans([span], now=0)
+        _, rv = buffer.flush_segments(now=10)
+        assert list(rv) == [segment_id]
+
+    # The segment was read into its flushing key, but never marked as done
+    _, rv = buffer.flush_segments(now=10)
+    _normalize_output(rv)
+    assert rv == {segment_id: [_output_segment(b"a" * 16, b"a" * 16, True)]}
+    buffer.done_flush_segments(rv)
+
+    assert buffer.flush_segments(now=60) == (0, {})
+    assert_clean(buffer.client)
@@ -10,6 +10,7 @@ from sentry.tasks.process_buffer import (
     process_incr,
     process_pending,
     process_pending_batch,
+    process_pending_shard,
 )
 from sentry.testutils.cases import TestCase
 
@@ -48,6 +49,11 @@ class ProcessPendingTest(TestCase):
         assert len(mock_process_pending.mock_calls) == 1
         mock_process_pending.assert_any_call()
 
+    @mock.patch("sentry.buffer.backend.process_pending_shard")
+    def test_shard(self, mock_process_pending_shard):
+        process_pending_shard(shard=1)
+        mock_process_pending_shard.assert_called_once_with(1)
+
 
 class ProcessPendingBatchTest(TestCase):
     @mock.patch("sentry.buffer.backend.process_batch")
@@ -13,10 +13,13 @@ from sentry.relay.projectconfig_debounce_cache.redis import RedisProjectConfigDe
 from sentry.tasks.relay import (
     _schedule_invalidate_project_config,
     build_project_config,
+    compute_configs,
+    compute_organization_configs,
     invalidate_project_config,
     schedule_build_project_config,
     schedule_invalidate_project_config,
 )
+from sentry.testutils.helpers.options import override_options
 from sentry.testutils.helpers.task_runner import BurstTaskRunner
 from sentry.testutils.hybrid_cloud import simulated_transaction_watermarks
 from sentry.testutils.pytest.fixtures import django_db_all
@@ -215,6 +218,110 @@ def test_project_update_option(
         }
 
 
+@django_db_all
+@override_options({"relay.project-config.incremental-invalidation.enabled": True})
+def test_project_update_option_incremental(
+    default_projectkey,
+    default_project,
+    emulate_transactions,
+    redis_cache,
+    django_cache,
+):
+    redis_cache.set_many({default_projectkey.public_key: {"dummy": "dummy"}})
+    invalidate_project_config(project_id=default_project.id, trigger="test")
+    cfg = redis_cache.get(default_projectkey.public_key)
+    assert "clientIps" not in cfg["config"]["filterSettings"]
+
+    with (
+        mock.patch("sentry.relay.config.get_project_config") as get_project_config,
+        emulate_transactions(assert_num_callbacks=2),
+    ):
+        default_project.update_option("sentry:blacklisted_ips", ["112.69.248.54"])
+
+    # Only the filter settings have been recomputed
+    assert not get_project_config.called
+    new_cfg = redis_cache.get(default_projectkey.public_key)
+    assert new_cfg["config"]["filterSettings"]["clientIps"] == {"blacklistedIps": ["112.69.248.54"]}
+    assert new_cfg["rev"] != cfg["rev"]
+    assert new_cfg["lastChange"] != cfg["lastChange"]
+    assert new_cfg["config"]["piiConfig"] == cfg["config"]["piiConfig"]
+
+
+@django_db_all
+@override_options({"relay.project-config.incremental-invalidation.enabled": True})
+def test_invalidate_skips_unchanged_configs(
+    monkeypatch,
+    default_projectkey,
+    default_project,
+    redis_cache,
+    django_cache,
+):
+    redis_cache.set_many({default_projectkey.public_key: {"dummy": "dummy"}})
+    invalidate_project_config(project_id=default_project.id, trigger="test")
+    rev = redis_cache.get_rev(default_projectkey.public_key)
+
+    set_many = mock.Mock(wraps=redis_cache.set_many)
+    monkeypatch.setattr("sentry.relay.projectconfig_cache.backend.set_many", set_many)
+    set_many_if_rev = mock.Mock(wraps=redis_cache.set_many_if_rev)
+    monkeypatch.setattr("sentry.relay.projectconfig_cache.backend.set_many_if_rev", set_many_if_rev)
+
+    invalidate_project_config(project_id=default_project.id, trigger="test")
+    invalidate_project_config(
+        project_id=default_project.id, trigger="monitors:monitor_created", sections=["quotas"]
+    )
+    assert set_many.call_count == 0
+    assert set_many_if_rev.call_count == 0
+    assert redis_cache.get_rev(default_projectkey.public_key) == rev
+
+    with mock.patch("sentry.tasks.relay.schedule_invalidate_project_config"):
+        default_project.update_option("sentry:blacklisted_ips", ["112.69.248.54"])
+    invalidate_project_config(
+        project_id=default_project.id, trigger="projectoption.set_value", sections=["filters"]
+    )
+    assert set_many.call_count == 0
+    assert set_many_if_rev.call_count == 1
+    assert redis_cache.get_rev(default_projectkey.public_key) != rev
+
+
+@django_db_all
+@override_options({"relay.project-config.incremental-invalidation.enabled": True})
+def test_invalidate_incremental_conflict(
+    default_projectkey,
+    default_project,
+    redis_cache,
+    django_cache,
+):
+    from sentry.relay.config import get_project_config, update_project_config
+
+    redis_cache.set_many({default_projectkey.public_key: {"dummy": "dummy"}})
+    invalidate_project_config(project_id=default_project.id, trigger="test")
+
+    with mock.patch("sentry.tasks.relay.schedule_invalidate_project_config"):
+        default_project.update_option("sentry:blacklisted_ips", ["112.69.248.54"])
+
+    def concurrent_update(project, project_keys, config, sections):
+        # A full recompute writes its config while the sections are being recomputed
+        redis_cache.set_many({default_projectkey.public_key: {**config, "rev": "concurrent"}})
+        return update_project_config(project, project_keys, config, sections)
+
+    with (
+        mock.patch("sentry.relay.config.update_project_config", side_effect=concurrent_update),
+        mock.patch(
+            "sentry.relay.config.get_project_config", wraps=get_project_config
+        ) as mock_get_project_config,
+    ):
+        invalidate_project_config(
+            project_id=default_project.id, trigger="projectoption.set_value", sections=["filters"]
+        )
+
+    # The config changed in the meantime, so it has been recomputed in full
+    assert mock_get_project_config.call_count == 1
+    cfg = redis_cache.get(default_projectkey.public_key)
+    assert cfg["rev"] != "concurrent"
+    assert cfg["config"]["filterSettings"]["clientIps"] == {"blacklistedIps": ["112.69.248.54"]}
+    assert redis_cache.get_rev(default_projectkey.public_key) == cfg["rev"]
+
+
 @django_db_all
 def test_project_delete_option(
     default_projectkey,
@@ -454,6 +561,81 @@ class TestInvalidationTask:
             assert new_cfg is not None
             assert new_cfg != cfg
 
+    @override_options({"relay.project-config.batch-build.enabled": True})
+    def test_invalidate_org_batch(
+        self,
+        default_project,
+        default_organization,
+        default_projectkey,
+        redis_cache,
+        task_runner,
+        django_cache,
+        factories,
+    ):
+        other_project = factories.create_project(organization=default_organization)
+        other_key = ProjectKey.objects.get(project=other_project)
+        uncached_key = ProjectKey.objects.create(project=other_project)
+
+        cfg = {"dummy-key": "val"}
+        redis_cache.set_many({default_projectkey.public_key: cfg, other_key.public_key: cfg})
+
+        with task_runner():
+            schedule_invalidate_project_config(
+                organization_id=default_organization.id, trigger="test"
+            )
+
+        assert redis_cache.get(default_projectkey.public_key)["projectId"] == default_project.id
+        assert redis_cache.get(other_key.public_key)["projectId"] == other_project.id
+        assert redis_cache.get(uncached_key.public_key) is None
+
+    def test_compute_organization_configs(
+        self,
+        default_project,
+        default_organization,
+        default_projectkey,
+        redis_cache,
+        django_cache,
+    ):
+        redis_cache.set_many({default_projectkey.public_key: {"dummy-key": "val"}})
+
+        with override_options({"relay.project-config.batch-build.enabled": False}):
+            expected = compute_configs(organization_id=default_organization.id)
+        configs = compute_organization_configs(default_organization.id)
+
+        assert configs.keys() == expected.keys() == {default_projectkey.public_key}
+        for config in (*configs.values(), *expected.values()):
+            config.pop("lastChange")
+            config.pop("lastFetch")
+            config.pop("rev")
+        assert configs == expected
+
+    @override_options({"relay.project-config.write-batch-size": 1})
+    def test_invalidate_writes_in_batches(
+        self,
+        monkeypatch,
+        default_project,
+        default_projectkey,
+        redis_cache,
+        task_runner,
+        django_cache,
+    ):
+        other_key = ProjectKey.objects.create(project=default_project)
+        redis_cache.set_many(
+            {default_projectkey.public_key: {"dummy-key": "val"}, other_key.public_key: {}}
+        )
+
+        set_many = mock.Mock(wraps=redis_cache.set_many)
+        monkeypatch.setattr("sentry.relay.projectconfig_cache.backend.set_many", set_many)
+
+        with task_runner():
+            schedule_invalidate_project_config(project_id=default_project.id, trigger="test")
+
+        written = [list(c.args[0]) for c in set_many.call_args_list]
+        assert len(written) == 2
+        assert sorted(keys[0] for keys in written) == sorted(
+            [default_projectkey.public_key, other_key.public_key]
+        )
+
     @mock.patch(
         "sentry.tasks.relay._schedule_invalidate_project_config",
         wraps=_schedule_invalidate_project_config,
@@ -476,6 +658,7 @@ class TestInvalidationTask:
             organization_id=None,
             project_id=default_project.id,
             public_key=None,
+            option_key=None,
             countdown=2,
         )
 
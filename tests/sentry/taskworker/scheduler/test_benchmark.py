@@ -0,0 +1,61 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+
+from sentry.conf.types.taskworker import crontab
+from sentry.taskworker.registry import TaskRegistry
+from sentry.taskworker.scheduler.runner import RunStorage, ShardedScheduleRunner
+from sentry.testutils.helpers.datetime import freeze_time
+from sentry.utils.redis import redis_clusters
+
+NUM_ENTRIES = 5000
+NUM_REPLICAS = 4
+
+
+def benchmark_available() -> bool:
+    try:
+        __import__("pytest_benchmark")
+    except ModuleNotFoundError:
+        return False
+    else:
+        return True
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+def test_benchmark_sharded_tick(benchmark) -> None:
+    redis = redis_clusters.get("default")
+    redis.flushdb()
+    run_storage = RunStorage(redis)
+
+    registry = TaskRegistry()
+    namespace = registry.create_namespace("bench")
+    runner = ShardedScheduleRunner(registry, run_storage, max_jitter=30, replica_id="bench")
+    for i in range(NUM_ENTRIES):
+        namespace.register(name=f"task-{i}")(lambda: None)
+        # A mix of sub-minute intervals and crontabs all due at once
+        schedule = timedelta(seconds=10 + i % 50) if i % 2 else crontab(minute="*")
+        runner.add({"task": f"bench:task-{i}", "schedule": schedule})
+
+    # Another replica owns its share of the shards
+    run_storage.heartbeat("other", 300)
+    for replica in range(1, NUM_REPLICAS - 1):
+        run_storage.heartbeat(f"other-{replica}", 300)
+
+    def reset_schedule() -> None:
+        # Every round spawns all due entries again, rather than finding nothing due
+        with redis.pipeline(transaction=False) as pipeline:
+            for entry in runner._entries:
+                pipeline.delete(run_storage._make_key(entry.fullname))
+            pipeline.execute()
+        for entry in runner._entries:
+            entry.set_last_run(None)
+
+    with patch.object(namespace, "send_task"), freeze_time("2025-01-24 14:25:30"):
+        sleep_time = benchmark.pedantic(runner.tick, setup=reset_schedule, rounds=10)
+
+    # Ticks have to be much shorter than the one second resolution of schedules
+    assert benchmark.stats.stats.max < 1.0
+    assert 0 <= sleep_time <= 10
+    assert 0 < len(runner._owned_shards) < 64
@@ -6,7 +6,7 @@ from django.utils import timezone
 
 from sentry.conf.types.taskworker import crontab
 from sentry.taskworker.registry import TaskRegistry
-from sentry.taskworker.scheduler.runner import RunStorage, ScheduleRunner
+from sentry.taskworker.scheduler.runner import RunStorage, ScheduleRunner, ShardedScheduleRunner
 from sentry.testutils.helpers.datetime import freeze_time
 from sentry.utils.redis import redis_clusters
 
@@ -335,3 +335,84 @@ def test_schedulerunner_tick_fast_and_slow(
 
 def extract_sent_tasks(mock: Mock) -> list[str]:
     return [call[0][0].taskname for call in mock.call_args_list]
+
+
+@pytest.mark.django_db
+def test_runstorage_set_many(run_storage: RunStorage) -> None:
+    with freeze_time("2025-01-24 14:25:00"):
+        now = timezone.now()
+        assert run_storage.set("test:valid", now + timedelta(minutes=5))
+
+        result = run_storage.set_many(
+            {
+                "test:valid": now + timedelta(minutes=5),
+                "test:second": now + timedelta(minutes=1),
+            }
+        )
+        assert result == {"test:valid": False, "test:second": True}
+        assert run_storage.read_many(["test:valid", "test:second"]) == {
+            "test:valid": now,
+            "test:second": now,
+        }
+
+
+@pytest.mark.django_db
+def test_sharded_schedulerunner_replicas(run_storage: RunStorage) -> None:
+    registry = TaskRegistry()
+    namespace = registry.create_namespace("bench")
+    for i in range(20):
+        namespace.register(name=f"task-{i}")(lambda: None)
+
+    replicas = [
+        ShardedScheduleRunner(registry, run_storage, num_shards=8, replica_id=replica_id)
+        for replica_id in ("a", "b")
+    ]
+    for runner in replicas:
+        for i in range(20):
+            runner.add({"task": f"bench:task-{i}", "schedule": timedelta(minutes=5)})
+
+    with patch.object(namespace, "send_task") as mock_send:
+        # The first replica owns every shard until the second one shows up
+        with freeze_time("2025-01-24 14:25:00"):
+            replicas[0].tick()
+            replicas[1].tick()
+        assert mock_send.call_count == 20
+        assert replicas[0]._owned_shards == set(range(8))
+        assert replicas[1]._owned_shards == set()
+
+        # Once leases are refreshed, shards have been handed over
+        with freeze_time("2025-01-24 14:25:11"):
+            replicas[0].tick()
+            replicas[1].tick()
+        assert mock_send.call_count == 20
+        assert replicas[0]._owned_shards
+        assert replicas[1]._owned_shards
+        assert replicas[0]._owned_shards | replicas[1]._owned_shards == set(range(8))
+        assert not replicas[0]._owned_shards & replicas[1]._owned_shards
+
+        # Every entry is spawned once, by the replica owning its shard
+        for i in range(20):
+            run_storage.delete(f"bench:task-{i}")
+        with freeze_time("2025-01-24 14:30:01"):
+            replicas[0].tick()
+            replicas[1].tick()
+        assert mock_send.call_count == 40
+
+
+@pytest.mark.django_db
+def test_sharded_schedulerunner_jitter(taskregistry: TaskRegistry, run_storage: RunStorage) -> None:
+    runner = ShardedScheduleRunner(
+        taskregistry, run_storage, num_shards=1, max_jitter=30, lease_duration=60
+    )
+    runner.add({"task": "test:valid", "schedule": crontab(minute="*")})
+
+    namespace = taskregistry.get("test")
+    with patch.object(namespace, "send_task") as mock_send:
+        # The entry is held back by its jitter
+        with freeze_time("2025-01-24 14:25:00"):
+            assert runner.tick() == 13
+            assert mock_send.call_count == 0
+
+        with freeze_time("2025-01-24 14:25:13"):
+            runner.tick()
+            assert mock_send.call_count == 1
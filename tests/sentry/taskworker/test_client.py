@@ -27,6 +27,16 @@ class MockServiceCall:
     metadata: tuple[tuple[str, str | bytes], ...] | None = None
 
 
+@dataclasses.dataclass
+class MockFuture:
+    response: Any
+
+    def result(self):
+        if isinstance(self.response, Exception):
+            raise self.response
+        return self.response
+
+
 class MockServiceMethod:
     """Stub for grpc service methods"""
 
@@ -53,6 +63,14 @@ class MockServiceMethod:
             raise res.response
         return res.response
 
+    def future(self, *args, **kwargs):
+        # move the head to the tail
+        res = self.responses[0]
+        tail = self.responses[1:]
+        self.responses = tail + [res]
+
+        return MockFuture(res.response)
+
     def with_call(self, *args, **kwargs):
         res = self.responses[0]
         if res.metadata:
@@ -305,6 +323,124 @@ def test_update_task_not_found():
         assert result is None
 
 
+@django_db_all
+def test_get_tasks():
+    channel = MockChannel()
+    for task_id in ("abc123", "def456"):
+        channel.add_response(
+            "/sentry_protos.taskbroker.v1.ConsumerService/GetTask",
+            GetTaskResponse(
+                task=TaskActivation(
+                    id=task_id,
+                    namespace="testing",
+                    taskname="do_thing",
+                    parameters="",
+                    headers={},
+                    processing_deadline_duration=10,
+                )
+            ),
+        )
+    channel.add_response(
+        "/sentry_protos.taskbroker.v1.ConsumerService/GetTask",
+        MockGrpcError(grpc.StatusCode.NOT_FOUND, "no pending task found"),
+    )
+    with patch("sentry.taskworker.client.grpc.insecure_channel") as mock_channel:
+        mock_channel.return_value = channel
+        client = TaskworkerClient("localhost:50051", 1)
+        result = client.get_tasks("testing", count=3)
+
+        assert [task.id for task in result] == ["abc123", "def456"]
+        assert client._task_id_to_stub_idx.keys() == {"abc123", "def456"}
+
+
+@django_db_all
+def test_get_tasks_idle():
+    channel = MockChannel()
+    channel.add_response(
+        "/sentry_protos.taskbroker.v1.ConsumerService/GetTask",
+        MockGrpcError(grpc.StatusCode.NOT_FOUND, "no pending task found"),
+    )
+    channel.add_response(
+        "/sentry_protos.taskbroker.v1.ConsumerService/GetTask",
+        GetTaskResponse(
+            task=TaskActivation(
+                id="abc123",
+                namespace="testing",
+                taskname="do_thing",
+                parameters="",
+                headers={},
+                processing_deadline_duration=10,
+            )
+        ),
+    )
+    with patch("sentry.taskworker.client.grpc.insecure_channel") as mock_channel:
+        mock_channel.return_value = channel
+        client = TaskworkerClient("localhost:50051", 1)
+
+        # No further requests are made once the broker has no task to hand out
+        assert client.get_tasks("testing", count=3) == []
+        assert client._task_id_to_stub_idx == {}
+
+
+@django_db_all
+def test_get_tasks_failure():
+    channel = MockChannel()
+    channel.add_response(
+        "/sentry_protos.taskbroker.v1.ConsumerService/GetTask",
+        MockGrpcError(grpc.StatusCode.UNAVAILABLE, "broker down"),
+    )
+    with patch("sentry.taskworker.client.grpc.insecure_channel") as mock_channel:
+        mock_channel.return_value = channel
+        client = TaskworkerClient("localhost:50051", 1)
+        with pytest.raises(grpc.RpcError):
+            client.get_tasks(count=2)
+
+
+@django_db_all
+def test_update_tasks():
+    channel = MockChannel()
+    channel.add_response(
+        "/sentry_protos.taskbroker.v1.ConsumerService/SetTaskStatus",
+        SetTaskStatusResponse(
+            task=TaskActivation(
+                id="ghi789",
+                namespace="testing",
+                taskname="do_thing",
+                parameters="",
+                headers={},
+                processing_deadline_duration=10,
+            )
+        ),
+    )
+    channel.add_response(
+        "/sentry_protos.taskbroker.v1.ConsumerService/SetTaskStatus",
+        MockGrpcError(grpc.StatusCode.UNAVAILABLE, "broker down"),
+    )
+    channel.add_response(
+        "/sentry_protos.taskbroker.v1.ConsumerService/SetTaskStatus",
+        MockGrpcError(grpc.StatusCode.INTERNAL, "broker broken"),
+    )
+    with patch("sentry.taskworker.client.grpc.insecure_channel") as mock_channel:
+        mock_channel.return_value = channel
+        client = TaskworkerClient("localhost:50051", 1)
+        client._task_id_to_stub_idx = {"abc123": 0, "def456": 0, "jkl012": 0}
+        next_tasks, errors = client.update_tasks(
+            [
+                ("abc123", TASK_ACTIVATION_STATUS_COMPLETE),
+                ("def456", TASK_ACTIVATION_STATUS_RETRY),
+                ("jkl012", TASK_ACTIVATION_STATUS_COMPLETE),
+                ("unknown", TASK_ACTIVATION_STATUS_COMPLETE),
+            ],
+            fetch_next_task=FetchNextTask(namespace=None),
+            num_fetch_next=1,
+        )
+
+        assert [task.id for task in next_tasks] == ["ghi789"]
+        assert [task_id for task_id, _ in errors] == ["def456", "jkl012"]
+        # Only the update which failed because the broker was unavailable can be retried
+        assert client._task_id_to_stub_idx == {"ghi789": 0, "def456": 0}
+
+
 @django_db_all
 def test_client_loadbalance():
     channel_0 = MockChannel()
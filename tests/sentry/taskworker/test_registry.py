@@ -91,6 +91,24 @@ def test_register_inherits_default_expires_processing_deadline() -> None:
     assert activation.processing_deadline_duration == 10
 
 
+def test_namespace_register_coroutine() -> None:
+    namespace = TaskNamespace(name="tests", router=DefaultRouter(), retry=None)
+    async_namespace = TaskNamespace(
+        name="tests-asyncio", router=DefaultRouter(), retry=None, execution_mode="asyncio"
+    )
+
+    async def coroutine_task():
+        raise NotImplementedError
+
+    with pytest.raises(ValueError) as err:
+        namespace.register(name="tests.coroutine_task")(coroutine_task)
+    assert "asyncio execution mode" in str(err)
+    assert not namespace.contains("tests.coroutine_task")
+
+    task = async_namespace.register(name="tests.coroutine_task")(coroutine_task)
+    assert task.is_coroutine
+
+
 def test_namespace_get_unknown() -> None:
     namespace = TaskNamespace(
         name="tests",
@@ -2,6 +2,7 @@ import queue
 import time
 from multiprocessing import Event
 from unittest import mock
+from uuid import uuid4
 
 import grpc
 import pytest
@@ -12,7 +13,14 @@ from sentry_protos.taskbroker.v1.taskbroker_pb2 import (
     TaskActivation,
 )
 
-from sentry.taskworker.worker import ProcessingResult, TaskWorker, child_worker
+from sentry.taskworker.worker import (
+    AsyncioTaskExecutor,
+    ProcessingResult,
+    TaskWorker,
+    ThreadTaskExecutor,
+    child_worker,
+    run_concurrent_tasks,
+)
 from sentry.testutils.cases import TestCase
 
 SIMPLE_TASK = TaskActivation(
@@ -56,6 +64,38 @@ AT_MOST_ONCE_TASK = TaskActivation(
 )
 
 
+def _copy_tasks(*tasks: TaskActivation) -> list[TaskActivation]:
+    """Copies of tasks as the broker hands them out, which the worker can modify"""
+    copies = []
+    for task in tasks:
+        copy = TaskActivation()
+        copy.CopyFrom(task)
+        copies.append(copy)
+    return copies
+
+
+def _timed_task(
+    id: str,
+    sleep_seconds: float,
+    deadline: int = 2,
+    taskname="examples.timed",
+    namespace="examples",
+):
+    return TaskActivation(
+        id=id,
+        taskname=taskname,
+        namespace=namespace,
+        parameters=f'{{"args": [{sleep_seconds}], "kwargs": {{}}}}',
+        processing_deadline_duration=deadline,
+    )
+
+
+def _async_timed_task(id: str, sleep_seconds: float, deadline: int = 2):
+    return _timed_task(
+        id, sleep_seconds, deadline, taskname="examples.async_timed", namespace="examples-asyncio"
+    )
+
+
 @pytest.mark.django_db
 class TestTaskWorker(TestCase):
     def test_tasks_exist(self) -> None:
@@ -182,6 +222,80 @@ class TestTaskWorker(TestCase):
             assert mock_client.get_task.called
             assert mock_client.update_task.call_count == 3
 
+    def test_run_once_with_prefetch(self) -> None:
+        max_runtime = 5
+        taskworker = TaskWorker(
+            rpc_host="127.0.0.1:50051",
+            num_brokers=1,
+            max_child_task_count=100,
+            prefetch_size=2,
+        )
+        with mock.patch.object(taskworker, "client") as mock_client:
+            mock_client.get_tasks.side_effect = [_copy_tasks(SIMPLE_TASK, RETRY_TASK)] + [[]] * 100
+            mock_client.update_tasks.return_value = ([], [])
+            taskworker.start_result_thread()
+
+            start = time.time()
+            reported: set[str] = set()
+            while len(reported) < 2:
+                taskworker.run_once()
+                for call in mock_client.update_tasks.call_args_list:
+                    reported.update(task_id for task_id, _ in call.args[0])
+                if time.time() - start > max_runtime:
+                    taskworker.shutdown()
+                    raise AssertionError("Timeout waiting for update_tasks to be called")
+
+            taskworker.shutdown()
+            # Both tasks were fetched with a single call
+            assert mock_client.get_tasks.call_args_list[0] == mock.call(None, 2)
+            assert mock_client.get_task.call_count == 0
+            assert mock_client.update_task.call_count == 0
+
+    def test_prefetch_deadline_exceeded(self) -> None:
+        taskworker = TaskWorker(
+            rpc_host="127.0.0.1:50051",
+            num_brokers=1,
+            max_child_task_count=100,
+            prefetch_size=3,
+        )
+        with mock.patch.object(taskworker, "client") as mock_client:
+            mock_client.get_tasks.return_value = _copy_tasks(
+                _timed_task("1", 0, deadline=10), SIMPLE_TASK, RETRY_TASK
+            )
+            task = taskworker._get_prefetched_task()
+            assert task is not None and task.id == "1"
+
+            # Children get the whole seconds left before the broker hands the task out again
+            taskworker._task_receive_timing[SIMPLE_TASK.id] -= 0.5
+            task = taskworker._get_prefetched_task()
+            assert task is not None and task.id == SIMPLE_TASK.id
+            assert task.processing_deadline_duration == 1
+
+            # Less than a second left
+            taskworker._task_receive_timing[RETRY_TASK.id] -= 1.5
+            assert taskworker._get_prefetched_task() is None
+            mock_client.discard_task.assert_called_once_with(RETRY_TASK.id)
+
+    def test_prefetch_counts_pending_fetches(self) -> None:
+        taskworker = TaskWorker(
+            rpc_host="127.0.0.1:50051",
+            num_brokers=1,
+            max_child_task_count=100,
+            prefetch_size=2,
+        )
+        with mock.patch.object(taskworker, "client") as mock_client:
+            mock_client.get_tasks.return_value = []
+
+            # A result batch is fetching enough tasks to fill the buffer
+            taskworker._prefetch_pending = 2
+            assert taskworker._get_prefetched_task() is None
+            assert mock_client.get_tasks.call_count == 0
+
+            taskworker._prefetch_pending = 1
+            assert taskworker._get_prefetched_task() is None
+            mock_client.get_tasks.assert_called_once_with(None, 1)
+            assert taskworker._prefetch_pending == 1
+
 
 @pytest.mark.django_db
 def test_child_worker_complete() -> None:
@@ -198,6 +312,23 @@ def test_child_worker_complete() -> None:
     assert result.status == TASK_ACTIVATION_STATUS_COMPLETE
 
 
+@pytest.mark.django_db
+def test_child_worker_coroutine_task() -> None:
+    todo: queue.Queue[TaskActivation] = queue.Queue()
+    processed: queue.Queue[ProcessingResult] = queue.Queue()
+    shutdown = Event()
+
+    todo.put(_async_timed_task("async", 0.1))
+    with mock.patch("sentry.taskworker.tasks.examples.logger") as mock_logger:
+        child_worker(todo, processed, shutdown, max_task_count=1)
+
+    # The coroutine was awaited
+    mock_logger.debug.assert_called_once_with("async_timed_task complete")
+    result = processed.get()
+    assert result.task_id == "async"
+    assert result.status == TASK_ACTIVATION_STATUS_COMPLETE
+
+
 @pytest.mark.django_db
 def test_child_worker_retry_task() -> None:
     todo: queue.Queue[TaskActivation] = queue.Queue()
@@ -281,3 +412,94 @@ def test_child_worker_at_most_once() -> None:
     result = processed.get(block=False)
     assert result.task_id == SIMPLE_TASK.id
     assert result.status == TASK_ACTIVATION_STATUS_COMPLETE
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("executor_cls", [ThreadTaskExecutor, AsyncioTaskExecutor])
+def test_run_concurrent_tasks(executor_cls) -> None:
+    todo: queue.Queue[TaskActivation] = queue.Queue()
+    processed: queue.Queue[ProcessingResult] = queue.Queue()
+    shutdown = Event()
+
+    # A fresh id, so that at-most-once keys of other tests don't interfere
+    at_most_once = TaskActivation()
+    at_most_once.CopyFrom(AT_MOST_ONCE_TASK)
+    at_most_once.id = uuid4().hex
+
+    for i in range(5):
+        todo.put(_timed_task(f"timed-{i}", 0.5))
+    todo.put(at_most_once)
+    todo.put(at_most_once)
+    todo.put(RETRY_TASK)
+
+    executor = executor_cls(max_concurrency=10)
+    start = time.time()
+    abandoned = run_concurrent_tasks(
+        todo, processed, shutdown, max_task_count=7, executor=executor, max_concurrency=10
+    )
+    executor.shutdown(wait=True)
+
+    # The timed tasks ran concurrently
+    assert time.time() - start < 2
+    assert not abandoned
+    assert todo.empty()
+
+    results = {}
+    while not processed.empty():
+        result = processed.get()
+        results[result.task_id] = result.status
+    assert results == {
+        **{f"timed-{i}": TASK_ACTIVATION_STATUS_COMPLETE for i in range(5)},
+        at_most_once.id: TASK_ACTIVATION_STATUS_COMPLETE,
+        RETRY_TASK.id: TASK_ACTIVATION_STATUS_RETRY,
+    }
+
+
+@pytest.mark.django_db
+def test_run_concurrent_tasks_deadline_exceeded() -> None:
+    todo: queue.Queue[TaskActivation] = queue.Queue()
+    processed: queue.Queue[ProcessingResult] = queue.Queue()
+    shutdown = Event()
+
+    todo.put(_timed_task("slow", 3, deadline=1))
+    todo.put(_timed_task("fast", 0.1))
+
+    executor = ThreadTaskExecutor(max_concurrency=2)
+    abandoned = run_concurrent_tasks(
+        todo, processed, shutdown, max_task_count=None, executor=executor, max_concurrency=2
+    )
+    executor.shutdown(wait=False)
+
+    # The slow task cannot be interrupted, so the child has to exit
+    assert abandoned
+    assert processed.get(block=False) == ProcessingResult(
+        task_id="fast", status=TASK_ACTIVATION_STATUS_COMPLETE
+    )
+    assert processed.get(block=False) == ProcessingResult(
+        task_id="slow", status=TASK_ACTIVATION_STATUS_FAILURE
+    )
+
+
+@pytest.mark.django_db
+def test_run_concurrent_tasks_async_deadline_exceeded() -> None:
+    todo: queue.Queue[TaskActivation] = queue.Queue()
+    processed: queue.Queue[ProcessingResult] = queue.Queue()
+    shutdown = Event()
+
+    todo.put(_async_timed_task("slow", 3, deadline=1))
+    todo.put(_async_timed_task("fast", 0.1))
+
+    executor = AsyncioTaskExecutor(max_concurrency=2)
+    abandoned = run_concurrent_tasks(
+        todo, processed, shutdown, max_task_count=2, executor=executor, max_concurrency=2
+    )
+    executor.shutdown(wait=True)
+
+    # Coroutines are cancelled, so the child can keep going
+    assert not abandoned
+    assert processed.get(block=False) == ProcessingResult(
+        task_id="fast", status=TASK_ACTIVATION_STATUS_COMPLETE
+    )
+    assert processed.get(block=False) == ProcessingResult(
+        task_id="slow", status=TASK_ACTIVATION_STATUS_FAILURE
+    )
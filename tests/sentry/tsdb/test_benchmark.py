@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from sentry.testutils.helpers.options import override_options
+from sentry.testutils.pytest.fixtures import django_db_all
+from sentry.tsdb.base import ONE_DAY, ONE_HOUR, ONE_MINUTE, TSDBModel
+from sentry.tsdb.redis import RedisTSDB
+
+# Roughly what the issue stream requests: a day of hourly series for a page of groups
+NUM_KEYS = 500
+
+
+def benchmark_available() -> bool:
+    try:
+        __import__("pytest_benchmark")
+    except ModuleNotFoundError:
+        return False
+    else:
+        return True
+
+
+@pytest.fixture
+def tsdb():
+    with override_options(
+        {"redis.clusters": {"tsdb": {"hosts": {i - 6: {"db": i} for i in range(6, 9)}}}}
+    ):
+        db = RedisTSDB(
+            rollups=((10, 30), (ONE_MINUTE, 120), (ONE_HOUR, 24), (ONE_DAY, 30)),
+            vnodes=64,
+            cluster="tsdb",
+        )
+
+    yield db
+
+    with db.cluster.all() as client:
+        client.flushdb()
+
+
+@django_db_all
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize("vectorized", [False, True], ids=["per_key", "vectorized"])
+def test_benchmark_get_range(tsdb, vectorized, benchmark):
+    end = datetime.now(timezone.utc)
+    start = end - timedelta(hours=23)
+    keys = list(range(1, NUM_KEYS + 1))
+
+    tsdb.incr_multi(
+        [
+            (TSDBModel.group, key, {"timestamp": start + timedelta(hours=key % 24), "count": key})
+            for key in keys
+        ]
+    )
+
+    with override_options({"tsdb.redis.vectorized-reads": vectorized}):
+        result = benchmark(tsdb.get_range, TSDBModel.group, keys, start, end, rollup=ONE_HOUR)
+
+    assert len(result) == NUM_KEYS
@@ -77,6 +77,47 @@ class RedisTSDBTest(TestCase):
         result = self.db.get_model_key("我爱啤酒")
         assert result == "26f980fbe1e8a9d3a0123d2049f95f28"
 
+    def test_vectorized_reads(self):
+        now = datetime.now(timezone.utc) - timedelta(hours=4)
+        dts = [now + timedelta(hours=i) for i in range(4)]
+
+        for i, dt in enumerate(dts):
+            self.db.incr_multi(
+                [(TSDBModel.project, 1), (TSDBModel.project, "foo"), (TSDBModel.project, 65)],
+                dt,
+                count=i + 1,
+                environment_id=1,
+            )
+            self.db.record(TSDBModel.users_affected_by_group, 1, [f"user-{i}", "user"], dt)
+
+        keys = [1, "foo", 65, 2]
+
+        def get_range(environment_ids):
+            return self.db.get_range(
+                TSDBModel.project, keys, dts[0], dts[-1], environment_ids=environment_ids
+            )
+
+        def get_distinct_counts_series():
+            return self.db.get_distinct_counts_series(
+                TSDBModel.users_affected_by_group, [1, 2], dts[0], dts[-1], rollup=3600
+            )
+
+        expected_range = get_range(None)
+        expected_range_environment = get_range([1])
+        expected_distinct = get_distinct_counts_series()
+
+        with override_options({"tsdb.redis.vectorized-reads": True}):
+            assert get_range(None) == expected_range
+            assert get_range([1]) == expected_range_environment
+            assert get_distinct_counts_series() == expected_distinct
+
+        epochs, counts = self.db.get_range_arrays(
+            TSDBModel.project, keys, dts[0], dts[-1], environment_id=1
+        )
+        assert epochs == [epoch for epoch, _ in expected_range_environment[1]]
+        assert list(counts[1]) == [1, 2, 3, 4]
+        assert list(counts[2]) == [0, 0, 0, 0]
+
     def test_simple(self):
         now = datetime.now(timezone.utc) - timedelta(hours=4)
         dts = [now + timedelta(hours=i) for i in range(4)]
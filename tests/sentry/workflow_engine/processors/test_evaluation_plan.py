@@ -0,0 +1,268 @@
+from unittest import mock
+
+from sentry.eventstream.base import GroupState
+from sentry.grouping.grouptype import ErrorGroupType
+from sentry.testutils.helpers import override_options
+from sentry.workflow_engine.models import DataConditionGroup
+from sentry.workflow_engine.models.data_condition import Condition
+from sentry.workflow_engine.processors import evaluation_plan
+from sentry.workflow_engine.processors.evaluation_plan import (
+    build_evaluation_plan,
+    get_evaluation_plan,
+    invalidate_evaluation_plans,
+)
+from sentry.workflow_engine.processors.workflow import process_workflows
+from sentry.workflow_engine.types import WorkflowEventData
+from tests.sentry.workflow_engine.test_base import BaseWorkflowTest
+
+
+class EvaluationPlanTestCase(BaseWorkflowTest):
+    def setUp(self):
+        evaluation_plan._local_plans.clear()
+        (
+            self.workflow,
+            self.detector,
+            self.detector_workflow,
+            self.workflow_triggers,
+        ) = self.create_detector_and_workflow(
+            name_prefix="error",
+            workflow_triggers=self.create_data_condition_group(),
+            detector_type=ErrorGroupType.slug,
+        )
+
+        self.group, self.event, self.group_event = self.create_group_event()
+        self.job = WorkflowEventData(
+            event=self.group_event,
+            group_state=GroupState(
+                id=1, is_new=False, is_regression=True, is_new_group_environment=False
+            ),
+        )
+
+    def create_error_workflow(self, **kwargs):
+        workflow_triggers = self.create_data_condition_group(**kwargs)
+        self.create_data_condition(
+            condition_group=workflow_triggers,
+            type=Condition.EVENT_SEEN_COUNT,
+            comparison=1,
+            condition_result=True,
+        )
+        workflow = self.create_workflow(when_condition_group=workflow_triggers)
+        self.create_detector_workflow(detector=self.detector, workflow=workflow)
+        return workflow, workflow_triggers
+
+
+class TestBuildEvaluationPlan(EvaluationPlanTestCase):
+    def test_build(self):
+        plan = build_evaluation_plan(self.project.id, self.organization.id)
+
+        assert plan.error_detector_id == self.detector.id
+        assert plan.get_detector(self.group_event) == self.detector
+        assert plan.detector_workflows == {self.detector.id: (self.workflow.id,)}
+        environment = self.group_event.get_environment()
+        assert plan.get_workflows(self.detector.id, environment.id) == {self.workflow}
+
+        group = plan.condition_groups[self.workflow_triggers.id]
+        assert group.logic_type == DataConditionGroup.Type.ANY
+        assert [plan.conditions[index].type for index in group.fast_conditions] == [
+            Condition.EVENT_SEEN_COUNT
+        ]
+
+    def test_deduplicates_conditions(self):
+        _, workflow_triggers = self.create_error_workflow()
+
+        plan = build_evaluation_plan(self.project.id, self.organization.id)
+
+        assert len(plan.conditions) == 1
+        assert (
+            plan.condition_groups[workflow_triggers.id].fast_conditions
+            == plan.condition_groups[self.workflow_triggers.id].fast_conditions
+        )
+
+    def test_orders_conditions_by_cost(self):
+        self.create_data_condition(
+            condition_group=self.workflow_triggers,
+            type=Condition.LATEST_RELEASE,
+            comparison=True,
+            condition_result=True,
+        )
+        self.create_data_condition(
+            condition_group=self.workflow_triggers,
+            type=Condition.EQUAL,
+            comparison=1,
+            condition_result=True,
+        )
+        slow_condition = self.create_data_condition(
+            condition_group=self.workflow_triggers,
+            type=Condition.EVENT_FREQUENCY_COUNT,
+            comparison={"interval": "1h", "value": 100},
+            condition_result=True,
+        )
+
+        plan = build_evaluation_plan(self.project.id, self.organization.id)
+
+        group = plan.condition_groups[self.workflow_triggers.id]
+        assert [plan.conditions[index].type for index in group.fast_conditions] == [
+            Condition.EQUAL,
+            Condition.EVENT_SEEN_COUNT,
+            Condition.LATEST_RELEASE,
+        ]
+        assert group.slow_conditions == (slow_condition,)
+
+    def test_skips_disabled_workflows(self):
+        workflow, _ = self.create_error_workflow()
+        workflow.update(enabled=False)
+
+        plan = build_evaluation_plan(self.project.id, self.organization.id)
+
+        assert plan.detector_workflows == {self.detector.id: (self.workflow.id,)}
+
+
+class TestGetEvaluationPlan(EvaluationPlanTestCase):
+    def test_cache_hit(self):
+        plan = get_evaluation_plan(self.project.id, self.organization.id)
+
+        with self.assertNumQueries(0):
+            assert get_evaluation_plan(self.project.id, self.organization.id) is plan
+
+        evaluation_plan._local_plans.clear()
+        with self.assertNumQueries(0):
+            cached_plan = get_evaluation_plan(self.project.id, self.organization.id)
+        assert cached_plan.workflows.keys() == plan.workflows.keys()
+
+    def test_invalidate(self):
+        plan = get_evaluation_plan(self.project.id, self.organization.id)
+
+        invalidate_evaluation_plans(self.organization.id)
+
+        assert get_evaluation_plan(self.project.id, self.organization.id) is not plan
+
+    def test_invalidated_on_changes(self):
+        get_evaluation_plan(self.project.id, self.organization.id)
+
+        workflow, _ = self.create_error_workflow()
+        plan = get_evaluation_plan(self.project.id, self.organization.id)
+        assert workflow.id in plan.workflows
+
+        workflow.update(enabled=False)
+        plan = get_evaluation_plan(self.project.id, self.organization.id)
+        assert workflow.id not in plan.workflows
+
+        condition = self.create_data_condition(
+            condition_group=self.workflow_triggers,
+            type=Condition.EQUAL,
+            comparison=1,
+            condition_result=True,
+        )
+        plan = get_evaluation_plan(self.project.id, self.organization.id)
+        assert condition.id in {condition.id for condition in plan.conditions}
+
+        condition_id = condition.id
+        condition.delete()
+        plan = get_evaluation_plan(self.project.id, self.organization.id)
+        assert condition_id not in {condition.id for condition in plan.conditions}
+
+    def test_invalidated_on_queryset_updates(self):
+        get_evaluation_plan(self.project.id, self.organization.id)
+
+        with self.capture_on_commit_callbacks(execute=True):
+            DataConditionGroup.objects.filter(id=self.workflow_triggers.id).with_post_update_signal(
+                True
+            ).update(logic_type=DataConditionGroup.Type.ALL)
+
+        plan = get_evaluation_plan(self.project.id, self.organization.id)
+        assert plan.condition_groups[self.workflow_triggers.id].logic_type == (
+            DataConditionGroup.Type.ALL
+        )
+
+
+class TestEvaluateConditionGroup(EvaluationPlanTestCase):
+    def test_evaluates_shared_conditions_once(self):
+        _, workflow_triggers = self.create_error_workflow()
+        plan = build_evaluation_plan(self.project.id, self.organization.id)
+
+        results: evaluation_plan.ConditionResults = {}
+        with mock.patch.object(
+            plan.conditions[0], "evaluate_value", wraps=plan.conditions[0].evaluate_value
+        ) as mock_evaluate_value:
+            assert plan.evaluate_condition_group(self.workflow_triggers.id, self.job, results) == (
+                True,
+                [],
+            )
+            assert plan.evaluate_condition_group(workflow_triggers.id, self.job, results) == (
+                True,
+                [],
+            )
+
+        assert mock_evaluate_value.call_count == 1
+
+    def test_short_circuits_slow_conditions(self):
+        self.workflow_triggers.update(logic_type=DataConditionGroup.Type.ALL)
+        self.create_data_condition(
+            condition_group=self.workflow_triggers,
+            type=Condition.EQUAL,
+            comparison=1,
+            condition_result=True,
+        )
+        slow_condition = self.create_data_condition(
+            condition_group=self.workflow_triggers,
+            type=Condition.EVENT_FREQUENCY_COUNT,
+            comparison={"interval": "1h", "value": 100},
+            condition_result=True,
+        )
+        plan = build_evaluation_plan(self.project.id, self.organization.id)
+
+        # The comparison fails, so the slow condition does not need to be evaluated
+        assert plan.evaluate_condition_group(self.workflow_triggers.id, self.job, {}) == (
+            False,
+            [],
+        )
+
+        self.workflow_triggers.conditions.filter(type=Condition.EQUAL).delete()
+        plan = build_evaluation_plan(self.project.id, self.organization.id)
+        assert plan.evaluate_condition_group(self.workflow_triggers.id, self.job, {}) == (
+            True,
+            [slow_condition],
+        )
+
+    def test_empty_any(self):
+        # Action filters without conditions only exist to attach actions, and always pass
+        for logic_type in (DataConditionGroup.Type.ANY, DataConditionGroup.Type.ANY_SHORT_CIRCUIT):
+            condition_group = self.create_data_condition_group(logic_type=logic_type)
+            self.create_workflow_data_condition_group(
+                workflow=self.workflow, condition_group=condition_group
+            )
+            plan = build_evaluation_plan(self.project.id, self.organization.id)
+
+            assert plan.evaluate_condition_group(condition_group.id, self.job, {}) == (True, [])
+
+    def test_none(self):
+        self.workflow_triggers.update(logic_type=DataConditionGroup.Type.NONE)
+        plan = build_evaluation_plan(self.project.id, self.organization.id)
+
+        assert plan.evaluate_condition_group(self.workflow_triggers.id, self.job, {}) == (
+            False,
+            [],
+        )
+
+
+@override_options({"workflow_engine.evaluation-plan.enabled": True})
+class TestProcessWorkflowsFromPlan(EvaluationPlanTestCase):
+    def test_process_workflows(self):
+        assert process_workflows(self.job) == {self.workflow}
+
+    def test_no_queries_on_cache_hit(self):
+        process_workflows(self.job)
+
+        with self.assertNumQueries(0):
+            assert process_workflows(self.job) == {self.workflow}
+
+    def test_environment(self):
+        workflow, _ = self.create_error_workflow()
+        workflow.update(environment=self.create_environment(project=self.project, name="other"))
+
+        assert process_workflows(self.job) == {self.workflow}
+
+    def test_falls_back_without_detector(self):
+        self.detector.delete()
+
+        assert process_workflows(self.job) == set()